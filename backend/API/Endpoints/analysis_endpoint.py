@@ -0,0 +1,60 @@
+########################################################################################################################
+# analysis_endpoint.py
+# This file contains the endpoints used for running a full analysis in a single request. It includes the following
+# endpoints:
+#   - /analyze: POST request to run every step of the analysis for a user and return all of the results
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from backend.API.Managers.analysis_manager import (
+    AnalysisError,
+    analyze_user,
+    get_analysis_exception,
+)
+from backend.API.Managers.authentication_manager import decode_token
+from backend.API.Models.analysis_input import AnalysisInput
+
+
+########################################################################################################################
+# ROUTER
+########################################################################################################################
+
+analysis_router = APIRouter()
+
+
+########################################################################################################################
+# ENDPOINTS
+########################################################################################################################
+
+
+@analysis_router.post("/analyze")
+def analyze_endpoint(
+    analysis_input: AnalysisInput, username: str = Depends(decode_token)
+):
+    """
+    Runs a full analysis for a user, the same as calling /location, /dimensions, /cladding, /roof,
+    /importance_category, /building, /set_wind_load, /set_seismic_load, /set_snow_load, /get_wall_load_combinations
+    and /get_roof_load_combinations in turn
+    :param analysis_input: The input of each step of the analysis
+    :param username: The username of the user
+    :return: The results of each step of the analysis
+    """
+    try:
+        # Run the analysis and return its results
+        return analyze_user(username=username, analysis_input=analysis_input)
+    # If a result cannot be computed from the user's inputs, say which input has to be corrected
+    except AnalysisError as e:
+        raise get_analysis_exception(e)
+    # If something goes wrong, raise an error
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -16,10 +16,19 @@
 import jsonpickle
 from fastapi import APIRouter, Depends, HTTPException
 
+from backend.API.Managers.analysis_manager import (
+    AnalysisError,
+    get_analysis_exception,
+    resolve_user_analysis,
+)
 from backend.API.Managers.authentication_manager import decode_token
-from backend.API.Managers.building_manager import process_building_data
-from backend.API.Managers.user_data_manager import check_user_exists, set_user_building
+from backend.API.Managers.user_data_manager import (
+    check_user_exists,
+    get_user_building,
+    set_user_building_input,
+)
 from backend.API.Models.building_input import BuildingInput
+from backend.Constants.analysis_constants import AnalysisNode
 
 ########################################################################################################################
 # ROUTER
@@ -47,18 +56,18 @@ def building_endpoint(
     try:
         # If storage for the user does not exist in memory, create a slot for the user
         check_user_exists(username)
-        # Process the building data and create a building object
-        building = process_building_data(
-            num_floor=building_input.num_floor,
-            h_opening=building_input.h_opening,
-            zones=building_input.zones,
-            materials=building_input.materials,
-            username=username,
+        # Store the building input in the user's memory slot, invalidating the results that depend on it
+        set_user_building_input(
+            username=username, building_input=building_input.model_dump()
         )
-        # Store the building object in the user's memory slot
-        set_user_building(username=username, building=building)
+        # Process the building data and create a building object
+        resolve_user_analysis(username=username, nodes=[AnalysisNode.BUILDING])
+        building = get_user_building(username=username)
         # Return the building object as a JSON string
         return jsonpickle.encode(building)
+    # If a result cannot be computed from the user's inputs, say which input has to be corrected
+    except AnalysisError as e:
+        raise get_analysis_exception(e)
     # If something goes wrong, raise an error
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -16,8 +16,14 @@
 import jsonpickle
 from fastapi import HTTPException, Depends, APIRouter
 
+from backend.API.Managers.analysis_manager import (
+    AnalysisError,
+    get_analysis_exception,
+    resolve_user_analysis,
+)
 from backend.API.Managers.authentication_manager import decode_token
 from backend.API.Managers.user_data_manager import get_user_building, check_user_exists
+from backend.Constants.analysis_constants import AnalysisNode
 
 ########################################################################################################################
 # ROUTER
@@ -41,6 +47,9 @@ def get_height_zones_endpoint(username: str = Depends(decode_token)):
     try:
         # If storage for the user does not exist in memory, create a slot for the user
         check_user_exists(username)
+        # Recompute the building if it is out of date but not its loads, the height zones are needed to fill in the
+        # wind load input so they cannot depend on it
+        resolve_user_analysis(username=username, nodes=[AnalysisNode.BUILDING])
         # Get the user's building
         building = get_user_building(username=username)
         # Create a dictionary of the height zones
@@ -49,6 +58,9 @@ def get_height_zones_endpoint(username: str = Depends(decode_token)):
             height_zones[zone.zone_num] = zone
         # Return the height zones as a JSON string
         return jsonpickle.encode(height_zones)
+    # If a result cannot be computed from the user's inputs, say which input has to be corrected
+    except AnalysisError as e:
+        raise get_analysis_exception(e)
     # If something goes wrong, raise an error
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -2,6 +2,8 @@
 # location.py
 # This file contains the endpoints used for setting the location for a user. It includes the following endpoints:
 #   - /location: POST request to set the location for a user
+#   - /reverse_geocode: POST request to find the postal code, city and province nearest to a latitude and longitude
+#   - /autocomplete_location: POST request to suggest postal codes, cities and provinces for a partial address
 #
 # Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
 # By using this code, you agree to abide by the terms and conditions in those files.
@@ -16,9 +18,15 @@
 from fastapi import APIRouter, Depends, HTTPException
 
 from backend.API.Managers.authentication_manager import decode_token
-from backend.API.Managers.location_manager import process_location_data
+from backend.API.Managers.executor_manager import run_io_bound
+from backend.API.Managers.location_manager import (
+    autocomplete_location,
+    process_location_data,
+    reverse_geocode_location,
+)
 from backend.API.Managers.user_data_manager import set_user_location, check_user_exists
 from backend.API.Models.location_input import LocationInput
+from backend.Constants.location_constants import AUTOCOMPLETE_LIMIT
 
 
 ########################################################################################################################
@@ -34,7 +42,7 @@ location_router = APIRouter()
 
 
 @location_router.post("/location")
-def location_endpoint(
+async def location_endpoint(
     location_input: LocationInput, username: str = Depends(decode_token)
 ):
     """
@@ -46,8 +54,10 @@ def location_endpoint(
     try:
         # If storage for the user does not exist in memory, create a slot for the user
         check_user_exists(username)
-        # Process the location data and create a location object
-        location = process_location_data(
+        # Process the location data and create a location object, which waits on Nominatim and CanSHM
+        location = await run_io_bound(
+            "upstream",
+            process_location_data,
             address=location_input.address,
             site_designation=location_input.site_designation,
             seismic_value=location_input.seismic_value,
@@ -59,3 +69,41 @@ def location_endpoint(
     # If something goes wrong, raise an error
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@location_router.post("/reverse_geocode")
+def reverse_geocode_endpoint(
+    latitude: float, longitude: float, username: str = Depends(decode_token)
+):
+    """
+    Finds the postal code, city and province nearest to a location, used when a site is picked on a map
+    :param latitude: The latitude of the location
+    :param longitude: The longitude of the location
+    :param username: The username of the user
+    :return: The postal code, city, province, latitude, longitude and distance in km of the nearest postal code
+    """
+    try:
+        # Return the nearest postal code
+        return reverse_geocode_location(latitude=latitude, longitude=longitude)
+    # If something goes wrong, raise an error
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@location_router.post("/autocomplete_location")
+def autocomplete_location_endpoint(
+    query: str, limit: int = AUTOCOMPLETE_LIMIT, username: str = Depends(decode_token)
+):
+    """
+    Suggests postal codes, cities and provinces for a partial address, used while the address is being typed
+    :param query: The partial address
+    :param limit: The maximum number of suggestions
+    :param username: The username of the user
+    :return: The type, label, city, province, latitude and longitude of each suggestion
+    """
+    try:
+        # Return the suggestions
+        return autocomplete_location(query=query, limit=limit)
+    # If something goes wrong, raise an error
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
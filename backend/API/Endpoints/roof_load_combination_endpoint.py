@@ -17,10 +17,21 @@
 import json
 
 from fastapi import APIRouter, Depends, HTTPException
+from starlette.concurrency import run_in_threadpool
 
+from backend.API.Managers.analysis_manager import (
+    AnalysisError,
+    get_analysis_exception,
+    resolve_user_analysis,
+)
 from backend.API.Managers.authentication_manager import decode_token
+from backend.API.Managers.executor_manager import (
+    ExecutorBusyError,
+    get_busy_exception,
+    run_cpu_bound,
+)
 from backend.API.Managers.roof_load_combination_manager import (
-    process_roof_load_combination_data,
+    get_roof_load_combinations,
 )
 from backend.API.Managers.user_data_manager import (
     check_user_exists,
@@ -28,6 +39,7 @@ from backend.API.Managers.user_data_manager import (
     get_user_building,
 )
 from backend.API.Models.roof_load_combination_input import RoofLoadCombinationInput
+from backend.Entities.Profiling.sampling_profiler import run_profiled
 
 ########################################################################################################################
 # ROUTER
@@ -41,7 +53,7 @@ roof_load_combination_router = APIRouter()
 
 
 @roof_load_combination_router.post("/get_roof_load_combinations")
-def roof_load_combination_endpoint(
+async def roof_load_combination_endpoint(
     roof_load_combination_input: RoofLoadCombinationInput,
     username: str = Depends(decode_token),
 ):
@@ -54,56 +66,30 @@ def roof_load_combination_endpoint(
     try:
         # If storage for the user does not exist in memory, create a slot for the user
         check_user_exists(username)
+        # Recompute any results that are out of date with the user's inputs, off the event loop
+        await run_in_threadpool(run_profiled, resolve_user_analysis, username)
         # The building object associated with the user
         building = get_user_building(username)
         # Get the snow loads for the user
         snow_load_upwind = get_user_snow_load(username)["upwind"]
         snow_load_downwind = get_user_snow_load(username)["downwind"]
-        # Process the roof load combination data and create a roof load combination object
-        dataframes = process_roof_load_combination_data(
+        # Compute the roof load combinations on the CPU pool
+        table = await run_cpu_bound(
+            get_roof_load_combinations,
             building=building,
             snow_load_upwind=snow_load_upwind,
             snow_load_downwind=snow_load_downwind,
             uls_roof_type=roof_load_combination_input.uls_roof_type,
             sls_roof_type=roof_load_combination_input.sls_roof_type,
         )
-        # Round the values in the dataframes to 4 decimal places
-        upwind_df = dataframes["upwind"].round(4)
-        # Get the headers and values for the upwind dataframe
-        upwind_headers = [str(x) for x in upwind_df.columns]
-        # Find the indices of the companion headers in the upwind dataframe
-        upwind_companion_indices = [
-            i for i in range(len(upwind_headers)) if "companion" in upwind_headers[i]
-        ]
-        # Get the values for the upwind dataframe
-        upwind_values = [float(x) for x in upwind_df.iloc[0].values]
-        # Remove the companion headers and values from the upwind dataframe
-        for index in sorted(upwind_companion_indices, reverse=True):
-            upwind_headers.pop(index)
-            upwind_values.pop(index)
-        # Round the values in the dataframes to 4 decimal places
-        downwind_df = dataframes["downwind"].round(4)
-        # Get the headers and values for the downwind dataframe
-        downwind_headers = [str(x) for x in downwind_df.columns]
-        # Find the indices of the companion headers in the downwind dataframe
-        downwind_companion_indices = [
-            i
-            for i in range(len(downwind_headers))
-            if "companion" in downwind_headers[i]
-        ]
-        # Get the values for the downwind dataframe
-        downwind_values = [float(x) for x in downwind_df.iloc[0].values]
-        # Remove the companion headers and values from the downwind dataframe
-        for index in sorted(downwind_companion_indices, reverse=True):
-            downwind_headers.pop(index)
-            downwind_values.pop(index)
         # Return the roof load combinations in a JSON string
-        return json.dumps(
-            {
-                "upwind": [upwind_headers, upwind_values],
-                "downwind": [downwind_headers, downwind_values],
-            }
-        )
+        return json.dumps(table)
+    # If the CPU pool is full, ask the client to retry
+    except ExecutorBusyError as e:
+        raise get_busy_exception(e)
+    # If a result cannot be computed from the user's inputs, say which input has to be corrected
+    except AnalysisError as e:
+        raise get_analysis_exception(e)
     # If something goes wrong, raise an error
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
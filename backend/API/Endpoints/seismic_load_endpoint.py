@@ -2,7 +2,7 @@
 # set_seismic_load_endpoint.py
 # This file contains the endpoints used for creating a seismic load object for a user. It includes the following
 # endpoints:
-#   - /set_seismic_load: POST request to create a seismic load object for a user
+#   - /set_seismic_load: POST request to set the seismic load input for a user
 #
 # Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
 # By using this code, you agree to abide by the terms and conditions in those files.
@@ -16,13 +16,15 @@
 
 from fastapi import APIRouter, Depends, HTTPException
 
+from backend.API.Managers.analysis_manager import (
+    AnalysisError,
+    check_seismic_load_input,
+    get_analysis_exception,
+)
 from backend.API.Managers.authentication_manager import decode_token
-from backend.API.Managers.seismic_load_manager import process_seismic_load_data
 from backend.API.Managers.user_data_manager import (
     check_user_exists,
-    get_user_building,
-    get_user_importance_category,
-    get_user_location,
+    set_user_seismic_load_input,
 )
 from backend.API.Models.seismic_load_input import SeismicLoadInput
 
@@ -42,7 +44,7 @@ def set_seismic_load_endpoint(
     seismic_load_input: SeismicLoadInput, username: str = Depends(decode_token)
 ):
     """
-    Creates a seismic load object for a user
+    Sets the seismic load input for a user, the seismic load of each height zone is recomputed the next time it is read
     :param seismic_load_input: The input data for the seismic load
     :param username: The username of the user
     :return: None
@@ -50,21 +52,18 @@ def set_seismic_load_endpoint(
     try:
         # If storage for the user does not exist in memory, create a slot for the user
         check_user_exists(username)
-        # Process the seismic load data and create a seismic load object
-        building = get_user_building(username=username)
-        # Get the user's importance factor
-        importance_factor = get_user_importance_category(username=username)
-        # Get the user's building location
-        location = get_user_location(username=username)
-        # Process the seismic load data
-        process_seismic_load_data(
-            building=building,
-            location=location,
-            importance_category=importance_factor,
-            ar=seismic_load_input.ar,
-            rp=seismic_load_input.rp,
-            cp=seismic_load_input.cp,
+        # Check the input against the user's building before storing it, so that it fails here rather than when the
+        # seismic load is read
+        check_seismic_load_input(
+            username=username, seismic_load_input=seismic_load_input.model_dump()
+        )
+        # Store the seismic load input in the user's memory slot, invalidating the seismic load of each height zone
+        set_user_seismic_load_input(
+            username=username, seismic_load_input=seismic_load_input.model_dump()
         )
+    # If the input cannot be used with the user's building, say what has to be corrected
+    except AnalysisError as e:
+        raise get_analysis_exception(e)
     # If something goes wrong, raise an error
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -2,6 +2,9 @@
 # server_status_endpoint.py
 # This file contains the endpoints used for the server status page. It includes the following endpoints:
 #   - /server_status: GET request to view the server status page
+#   - /upstream_status: GET request to view the latency, error counts and circuit state of the external services
+#   - /metrics: GET request to view the metrics of the server in the Prometheus text exposition format
+#   - /get_profile: GET request to get the profile of a request profiled on demand, requires the profiling token
 #
 # Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
 # By using this code, you agree to abide by the terms and conditions in those files.
@@ -13,9 +16,22 @@
 # IMPORTS
 ########################################################################################################################
 
-from fastapi import APIRouter, HTTPException
-from starlette.responses import FileResponse
+import uuid
 
+from fastapi import APIRouter, HTTPException, Request
+from starlette.responses import FileResponse, PlainTextResponse
+
+from backend.API.Managers.metrics_manager import render_metrics
+from backend.API.Middleware.profiling_middleware import (
+    get_profile_path,
+    is_valid_profiling_token,
+)
+from backend.Constants.profiling_constants import (
+    PROFILE_ENDPOINT,
+    PROFILE_HEADER,
+    PROFILE_QUERY_PARAMETER,
+)
+from backend.Entities.Upstream.upstream_client import get_upstream_metrics
 from config import get_file_path
 
 ########################################################################################################################
@@ -43,3 +59,58 @@ def user_data_endpoint():
     # If something goes wrong, raise an error
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@server_status_endpoint.get("/upstream_status")
+def upstream_status_endpoint():
+    """
+    Returns the metrics of the external services the backend calls
+    :return: The number of requests, retries, errors, timeouts, rejected requests and fallbacks, the latency and the
+    circuit state of each service
+    """
+    try:
+        # Return the metrics of each service
+        return get_upstream_metrics()
+    # If something goes wrong, raise an error
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@server_status_endpoint.get("/metrics")
+def metrics_endpoint():
+    """
+    Returns the metrics of the server for Prometheus to scrape, merged over the workers of a multi-worker server
+    :return: The request latencies by router and route, the sizes of the session store, autosave queue, database pools
+    and caches, the Blender renders in progress and the latency and state of the external services
+    """
+    try:
+        # Render every metric, whichever worker answers
+        return PlainTextResponse(
+            render_metrics(), media_type="text/plain; version=0.0.4"
+        )
+    # If something goes wrong, raise an error
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@server_status_endpoint.get(PROFILE_ENDPOINT)
+def get_profile_endpoint(id: str, request: Request):
+    """
+    Gets the profile of a request profiled on demand, as folded stacks for flamegraph.pl, speedscope or inferno
+    :param id: The id of the profile, from the X-Profile-Url header of the profiled response
+    :param request: The request, which must carry the profiling token like the profiled request did
+    :return: The folded stacks of the profile
+    """
+    token = request.headers.get(PROFILE_HEADER) or request.query_params.get(
+        PROFILE_QUERY_PARAMETER
+    )
+    if not is_valid_profiling_token(token):
+        raise HTTPException(status_code=403, detail="Invalid profiling token")
+    try:
+        # Only accept ids the middleware could have made, so the path stays inside the output directory
+        output_path = get_profile_path(str(uuid.UUID(id)))
+        # Return the profile
+        return FileResponse(output_path, media_type="text/plain")
+    # If something goes wrong, raise an error
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
@@ -16,16 +16,19 @@
 import jsonpickle
 from fastapi import APIRouter, Depends, HTTPException
 
+from backend.API.Managers.analysis_manager import (
+    AnalysisError,
+    get_analysis_exception,
+    resolve_user_analysis,
+)
 from backend.API.Managers.authentication_manager import decode_token
-from backend.API.Managers.snow_load_manager import process_snow_load_data
 from backend.API.Managers.user_data_manager import (
     check_user_exists,
-    get_user_building,
-    get_user_importance_category,
-    get_user_location,
-    set_user_snow_load,
+    get_user_snow_load,
+    set_user_snow_load_input,
 )
 from backend.API.Models.snow_load_input import SnowLoadInput
+from backend.Constants.analysis_constants import AnalysisNode
 
 ########################################################################################################################
 # ROUTER
@@ -51,24 +54,18 @@ def set_snow_load_endpoint(
     try:
         # If storage for the user does not exist in memory, create a slot for the user
         check_user_exists(username)
-        # The building associated with the user
-        building = get_user_building(username=username)
-        # The importance factor for the user
-        importance_factor = get_user_importance_category(username=username)
-        # The location of the user
-        location = get_user_location(username=username)
-        # Process the snow load data and create a snow load object
-        snow_load = process_snow_load_data(
-            building=building,
-            location=location,
-            importance_category=importance_factor,
-            exposure_factor_selection=snow_load_input.exposure_factor_selection,
-            roof_type=snow_load_input.roof_type,
+        # Store the snow load input in the user's memory slot, invalidating the snow load
+        set_user_snow_load_input(
+            username=username, snow_load_input=snow_load_input.model_dump()
         )
-        # Store the snow load object in the user's memory slot
-        set_user_snow_load(username=username, snow_load=snow_load)
+        # Process the snow load data and create a snow load object
+        resolve_user_analysis(username=username, nodes=[AnalysisNode.SNOW_LOAD])
+        snow_load = get_user_snow_load(username=username)
         # Return the snow load object as a JSON string
         return jsonpickle.encode(snow_load)
+    # If a result cannot be computed from the user's inputs, say which input has to be corrected
+    except AnalysisError as e:
+        raise get_analysis_exception(e)
     # If something goes wrong, raise an error
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
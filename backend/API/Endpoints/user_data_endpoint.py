@@ -4,12 +4,15 @@
 #   - /user_data: POST request to get user data
 #   - /get_user_profile: POST request to get user profile data
 #   - /get_all_user_save_data: POST request to get all user save data
+#   - /list_user_save_files: POST request to list one page of a user's save files without their data
 #   - /get_user_save_file: POST request to get a user save file
 #   - /set_user_save_data: POST request to set user save data
 #   - /set_user_current_save_file: POST request to set the current user save file
 #   - /get_user_current_save_file: POST request to get the current user save file
 #   - /delete_user_current_save_file: POST request to delete a user save file
 #   - /download_user_save_file: POST request to download a user save file
+#   - /set_user_save_snapshot: POST request to store a binary snapshot of the user's session in a save file
+#   - /restore_user_save_snapshot: POST request to restore the user's session from a save file's snapshot
 #
 # Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
 # By using this code, you agree to abide by the terms and conditions in those files.
@@ -23,23 +26,34 @@
 
 import io
 import json
+from datetime import datetime
+from typing import Optional
 
 import jsonpickle
 from fastapi import APIRouter, Depends, HTTPException
 from starlette.responses import StreamingResponse
 
 from backend.API.Managers.authentication_manager import decode_token
+from backend.API.Managers.executor_manager import run_io_bound
+from backend.API.Managers.autosave_manager import (
+    queue_user_save_data,
+    flush_user_save_data,
+    discard_user_save_data,
+)
 from backend.API.Managers.user_data_manager import (
     check_user_exists,
     get_user_data,
     get_all_user_save_data,
+    list_user_save_files,
+    SAVE_FILE_PAGE_SIZE,
     get_user_save_file,
-    set_user_save_data,
     set_user_current_save_file,
     get_user_current_save_file,
     get_user_profile,
     delete_user_save_file,
     get_user_save_file_json,
+    set_user_save_snapshot,
+    restore_user_save_snapshot,
 )
 from backend.API.Models.save_data_input import SaveDataInput
 
@@ -90,7 +104,7 @@ def get_user_profile_endpoint(username: str = Depends(decode_token)):
 
 
 @user_data_router.post("/get_all_user_save_data")
-def get_all_user_save_data_endpoint(username: str = Depends(decode_token)):
+async def get_all_user_save_data_endpoint(username: str = Depends(decode_token)):
     """
     Gets all user save data
     :param username:
@@ -99,15 +113,46 @@ def get_all_user_save_data_endpoint(username: str = Depends(decode_token)):
     try:
         # If storage for the user does not exist in memory, create a slot for the user
         check_user_exists(username)
+        # Write any pending autosaves so the listing is up to date
+        await run_io_bound("database", flush_user_save_data, username)
         # Return the user's save data
-        return get_all_user_save_data(username)
+        return await run_io_bound("database", get_all_user_save_data, username)
+    # If something goes wrong, raise an error
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@user_data_router.post("/list_user_save_files")
+async def list_user_save_files_endpoint(
+    limit: int = SAVE_FILE_PAGE_SIZE,
+    before_date: Optional[datetime] = None,
+    before_id: Optional[int] = None,
+    username: str = Depends(decode_token),
+):
+    """
+    Lists one page of a user's save files, newest first, without their JSON data
+    :param limit: The number of save files to list
+    :param before_date: The before_date of the next_cursor returned with the previous page
+    :param before_id: The before_id of the next_cursor returned with the previous page
+    :param username: The username of the user
+    :return: The save files of the page and the cursor of the next page
+    """
+    try:
+        # If storage for the user does not exist in memory, create a slot for the user
+        check_user_exists(username)
+        # Write any pending autosaves so the listing is up to date
+        await run_io_bound("database", flush_user_save_data, username)
+        # Return the page of save files
+        return await run_io_bound(
+            "database", list_user_save_files, username, limit, before_date, before_id
+        )
     # If something goes wrong, raise an error
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @user_data_router.post("/get_user_save_file")
-def get_user_save_file_endpoint(id: int, username: str = Depends(decode_token)):
+async def get_user_save_file_endpoint(id: int, username: str = Depends(decode_token)):
     """
     Gets a user save file
     :param id: The id of the save file
@@ -117,15 +162,17 @@ def get_user_save_file_endpoint(id: int, username: str = Depends(decode_token)):
     try:
         # If storage for the user does not exist in memory, create a slot for the user
         check_user_exists(username)
+        # Write any pending autosave of the save file so it is up to date
+        await run_io_bound("database", flush_user_save_data, username, id)
         # Return the user's save file data
-        return get_user_save_file(username, id)
+        return await run_io_bound("database", get_user_save_file, username, id)
     # If something goes wrong, raise an error
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @user_data_router.post("/set_user_save_data")
-def set_user_save_data_endpoint(
+async def set_user_save_data_endpoint(
     data: SaveDataInput, username: str = Depends(decode_token)
 ):
     """
@@ -137,8 +184,10 @@ def set_user_save_data_endpoint(
     try:
         # If storage for the user does not exist in memory, create a slot for the user
         check_user_exists(username)
-        # Set the user's save data
-        return set_user_save_data(username, data.json_data, data.id)
+        # Set the user's save data, updates to an existing save file are written in the background
+        return await run_io_bound(
+            "database", queue_user_save_data, username, data.json_data, data.id
+        )
     # If something goes wrong, raise an error
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -181,7 +230,9 @@ def get_user_current_save_file_endpoint(username: str = Depends(decode_token)):
 
 
 @user_data_router.post("/delete_user_current_save_file")
-def delete_user_save_file_endpoint(id: int, username: str = Depends(decode_token)):
+async def delete_user_save_file_endpoint(
+    id: int, username: str = Depends(decode_token)
+):
     """
     Deletes a user save file
     :param id: The id of the save file
@@ -191,14 +242,18 @@ def delete_user_save_file_endpoint(id: int, username: str = Depends(decode_token
     try:
         # If storage for the user does not exist in memory, create a slot for the user
         check_user_exists(username)
-        return delete_user_save_file(username, id)
+        # Drop any pending autosave of the save file so it is not written after the delete
+        await run_io_bound("database", discard_user_save_data, username, id)
+        return await run_io_bound("database", delete_user_save_file, username, id)
     # If something goes wrong, raise an error
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @user_data_router.post("/download_user_save_file")
-def download_user_save_file_endpoint(id: int, username: str = Depends(decode_token)):
+async def download_user_save_file_endpoint(
+    id: int, username: str = Depends(decode_token)
+):
     """
     Downloads a user save file
     :param id: The id of the save file
@@ -208,8 +263,10 @@ def download_user_save_file_endpoint(id: int, username: str = Depends(decode_tok
     try:
         # If storage for the user does not exist in memory, create a slot for the user
         check_user_exists(username)
+        # Write any pending autosave of the save file so it is up to date
+        await run_io_bound("database", flush_user_save_data, username, id)
         # Get the user's save file data
-        data = get_user_save_file_json(username, id)
+        data = await run_io_bound("database", get_user_save_file_json, username, id)
 
         # Create a string of JSON data
         json_str = json.dumps(data)
@@ -228,3 +285,45 @@ def download_user_save_file_endpoint(id: int, username: str = Depends(decode_tok
     # If something goes wrong, raise an error
     except Exception as e:
         return {"error": str(e)}
+
+
+@user_data_router.post("/set_user_save_snapshot")
+async def set_user_save_snapshot_endpoint(
+    id: int, username: str = Depends(decode_token)
+):
+    """
+    Stores a binary snapshot of the user's session, including all computed results, in a save file
+    :param id: The id of the save file
+    :param username: The username of the user
+    :return: The id of the save file
+    """
+    try:
+        # If storage for the user does not exist in memory, create a slot for the user
+        check_user_exists(username)
+        # Store the snapshot of the user's session
+        return await run_io_bound("database", set_user_save_snapshot, username, id)
+    # If something goes wrong, raise an error
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@user_data_router.post("/restore_user_save_snapshot")
+async def restore_user_save_snapshot_endpoint(
+    id: int, username: str = Depends(decode_token)
+):
+    """
+    Restores the user's session from the binary snapshot of a save file without recomputing any results
+    :param id: The id of the save file
+    :param username: The username of the user
+    :return: The user's restored data
+    """
+    try:
+        # If storage for the user does not exist in memory, create a slot for the user
+        check_user_exists(username)
+        # Restore the user's session
+        await run_io_bound("database", restore_user_save_snapshot, username, id)
+        # Return the user's restored data
+        return get_user_data(username)
+    # If something goes wrong, raise an error
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
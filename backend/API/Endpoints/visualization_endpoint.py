@@ -23,15 +23,31 @@ import uuid
 
 import jsonpickle
 from fastapi import APIRouter, Depends, HTTPException
+from starlette.concurrency import run_in_threadpool
 from starlette.responses import FileResponse
 
+from backend.API.Managers.analysis_manager import (
+    AnalysisError,
+    get_analysis_exception,
+    resolve_user_analysis,
+)
 from backend.API.Managers.authentication_manager import decode_token
+from backend.API.Managers.executor_manager import (
+    ExecutorBusyError,
+    get_busy_exception,
+    run_cpu_bound,
+    run_io_bound,
+)
+from backend.API.Managers.metrics_manager import track_blender_render
 from backend.API.Managers.user_data_manager import (
     check_user_exists,
     get_user_building,
     get_user_snow_load,
 )
 from backend.API.Models.simple_model_input import SimpleModelInput
+from backend.Constants.analysis_constants import AnalysisNode
+from backend.Entities.Profiling.sampling_profiler import run_profiled
+from backend.Entities.Tracing.tracing import SPAN_KIND_CLIENT, start_span
 from backend.visualizations.load_combination_bar_chart import generate_bar_chart
 from blender.scripts.blender_object import WindZone, SeismicZone
 from blender.scripts.blender_request import run_blender_script
@@ -44,13 +60,33 @@ from config import get_file_path
 visualization_router = APIRouter()
 
 
+########################################################################################################################
+# HELPER FUNCTIONS
+########################################################################################################################
+
+
+def render_blender_model(model: str, script_path: str, id: str, json_str: str):
+    """
+    Renders a model with Blender, counted and timed while it runs
+    :param model: The name of the model, used to label the metrics and span of the render
+    :param script_path: The path of the Blender script that builds the model
+    :param id: The id of the model
+    :param json_str: The data of the model as a JSON string
+    :return: None
+    """
+    with track_blender_render(model), start_span(
+        "subprocess.blender", {"blender.model": model}, SPAN_KIND_CLIENT
+    ):
+        run_blender_script(script_path=script_path, id=id, json_str=json_str)
+
+
 ########################################################################################################################
 # ENDPOINTS
 ########################################################################################################################
 
 
 @visualization_router.post("/bar_chart")
-def generate_bar_chart_endpoint(username: str = Depends(decode_token)):
+async def generate_bar_chart_endpoint(username: str = Depends(decode_token)):
     """
     Generates a 3D bar chart for the load combinations for a height zone
     :param username: The username of the user
@@ -59,24 +95,32 @@ def generate_bar_chart_endpoint(username: str = Depends(decode_token)):
     try:
         # If storage for the user does not exist in memory, create a slot for the user
         check_user_exists(username)
+        # Recompute any results that are out of date with the user's inputs, off the event loop
+        await run_in_threadpool(run_profiled, resolve_user_analysis, username)
         # Generate a unique id for the bar chart
         id = str(uuid.uuid4())
         # Get the user's building and snow load
         building = get_user_building(username)
         snow_load = get_user_snow_load(username)["upwind"]
-        # Generate the bar chart
-        num_generated = generate_bar_chart(
-            id=id, building=building, snow_load=snow_load
+        # Generate the bar chart on the CPU pool
+        num_generated = await run_cpu_bound(
+            generate_bar_chart, id=id, building=building, snow_load=snow_load
         )
         # Return the id and the number of bar charts generated
         return jsonpickle.encode({"id": id, "num_bar_charts": num_generated})
+    # If the CPU pool is full, ask the client to retry
+    except ExecutorBusyError as e:
+        raise get_busy_exception(e)
+    # If a result cannot be computed from the user's inputs, say which input has to be corrected
+    except AnalysisError as e:
+        raise get_analysis_exception(e)
     # If something goes wrong, raise an error
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @visualization_router.post("/load_model")
-def generate_load_model_endpoint(username: str = Depends(decode_token)):
+async def generate_load_model_endpoint(username: str = Depends(decode_token)):
     """
     Generates a load model for a user's building
     :param username: The username of the user
@@ -85,6 +129,13 @@ def generate_load_model_endpoint(username: str = Depends(decode_token)):
     try:
         # If storage for the user does not exist in memory, create a slot for the user
         check_user_exists(username)
+        # Recompute the wind and seismic loads if they are out of date, off the event loop
+        await run_in_threadpool(
+            run_profiled,
+            resolve_user_analysis,
+            username,
+            [AnalysisNode.WIND_LOAD, AnalysisNode.SEISMIC_LOAD],
+        )
         # Generate a unique id for the load model
         id = str(uuid.uuid4())
         # Get the user's building
@@ -119,20 +170,27 @@ def generate_load_model_endpoint(username: str = Depends(decode_token)):
         # Convert the wind and seismic cubes to JSON
         json_wind = jsonpickle.encode(wind_cubes)
         path_wind = get_file_path("blender/scripts/wind_cube.py")
-        run_blender_script(script_path=path_wind, id=id, json_str=json_wind)
+        await run_io_bound(
+            "blender", render_blender_model, "wind", path_wind, id, json_wind
+        )
 
         json_seismic = jsonpickle.encode(seismic_cubes)
         path_seismic = get_file_path("blender/scripts/seismic_cube.py")
-        run_blender_script(script_path=path_seismic, id=id, json_str=json_seismic)
+        await run_io_bound(
+            "blender", render_blender_model, "seismic", path_seismic, id, json_seismic
+        )
         # Return the id of the load models
         return jsonpickle.encode(id)
+    # If a result cannot be computed from the user's inputs, say which input has to be corrected
+    except AnalysisError as e:
+        raise get_analysis_exception(e)
     # If something goes wrong, raise an error
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
 @visualization_router.post("/simple_model")
-def generate_simple_model_endpoint(
+async def generate_simple_model_endpoint(
     simple_model_input: SimpleModelInput, username: str = Depends(decode_token)
 ):
     """
@@ -155,7 +213,9 @@ def generate_simple_model_endpoint(
         )
         # Generate the simple model
         path_simple = get_file_path("blender/scripts/simple_cube.py")
-        run_blender_script(script_path=path_simple, id=id, json_str=json_simple)
+        await run_io_bound(
+            "blender", render_blender_model, "simple", path_simple, id, json_simple
+        )
         # Return the id of the simple model
         return jsonpickle.encode(id)
     # If something goes wrong, raise an error
@@ -14,20 +14,30 @@
 # IMPORTS
 ########################################################################################################################
 
-import json
-
 from fastapi import APIRouter, Depends, HTTPException
+from starlette.concurrency import run_in_threadpool
 
+from backend.API.Managers.analysis_manager import (
+    AnalysisError,
+    get_analysis_exception,
+    resolve_user_analysis,
+)
 from backend.API.Managers.authentication_manager import decode_token
+from backend.API.Managers.executor_manager import (
+    ExecutorBusyError,
+    get_busy_exception,
+    run_cpu_bound,
+)
 from backend.API.Managers.user_data_manager import (
     check_user_exists,
     get_user_building,
     get_user_snow_load,
 )
 from backend.API.Managers.wall_load_combination_manager import (
-    process_wall_load_combination_data,
+    get_wall_load_combinations,
 )
 from backend.API.Models.wall_load_combination_input import WallLoadCombinationInput
+from backend.Entities.Profiling.sampling_profiler import run_profiled
 
 ########################################################################################################################
 # ROUTER
@@ -41,7 +51,7 @@ wall_load_combination_router = APIRouter()
 
 
 @wall_load_combination_router.post("/get_wall_load_combinations")
-def wall_load_combination_endpoint(
+async def wall_load_combination_endpoint(
     wall_load_combination_input: WallLoadCombinationInput,
     username: str = Depends(decode_token),
 ):
@@ -54,25 +64,26 @@ def wall_load_combination_endpoint(
     try:
         # If storage for the user does not exist in memory, create a slot for the user
         check_user_exists(username)
+        # Recompute any results that are out of date with the user's inputs, off the event loop
+        await run_in_threadpool(run_profiled, resolve_user_analysis, username)
         # The user's building data
         building = get_user_building(username)
         # The user's snow load data
         snow_load = get_user_snow_load(username)["upwind"]
-        # Process the wall load combination data and create a wall load combination dataframe
-        df = process_wall_load_combination_data(
+        # Compute the wall load combinations on the CPU pool and return them as a JSON object
+        return await run_cpu_bound(
+            get_wall_load_combinations,
             building=building,
             snow_load=snow_load,
             uls_wall_type=wall_load_combination_input.uls_wall_type,
             sls_wall_type=wall_load_combination_input.sls_wall_type,
-        ).round(4)
-        # Check if the 'companion' column exists and drop it
-        if "companion" in df.columns:
-            df = df.drop(columns=["companion"])
-        # Convert the dataframe to a JSON object
-        df_json = df.to_json(orient="records")
-        parsed = json.loads(df_json)
-        # Return the JSON object
-        return parsed
+        )
+    # If the CPU pool is full, ask the client to retry
+    except ExecutorBusyError as e:
+        raise get_busy_exception(e)
+    # If a result cannot be computed from the user's inputs, say which input has to be corrected
+    except AnalysisError as e:
+        raise get_analysis_exception(e)
     # If something goes wrong, raise an error
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,7 +1,7 @@
 ########################################################################################################################
 # wind_load_endpoint.py
 # This file contains the endpoints used for creating a wind load object for a user. It includes the following endpoints:
-#   - /set_wind_load: POST request to create a wind load object for a user
+#   - /set_wind_load: POST request to set the wind load input for a user
 #
 # Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
 # By using this code, you agree to abide by the terms and conditions in those files.
@@ -15,14 +15,16 @@
 
 from fastapi import APIRouter, Depends, HTTPException
 
+from backend.API.Managers.analysis_manager import (
+    AnalysisError,
+    check_wind_load_input,
+    get_analysis_exception,
+)
 from backend.API.Managers.authentication_manager import decode_token
 from backend.API.Managers.user_data_manager import (
     check_user_exists,
-    get_user_building,
-    get_user_importance_category,
-    get_user_location,
+    set_user_wind_load_input,
 )
-from backend.API.Managers.wind_load_manager import process_wind_load_data
 from backend.API.Models.wind_load_input import WindLoadInput
 
 ########################################################################################################################
@@ -41,7 +43,7 @@ def set_wind_load_endpoint(
     wind_load_input: WindLoadInput, username: str = Depends(decode_token)
 ):
     """
-    Creates a wind load object for a user
+    Sets the wind load input for a user, the wind load of each height zone is recomputed the next time it is read
     :param wind_load_input: The input data for the wind load
     :param username: The username of the user
     :return: None
@@ -49,27 +51,18 @@ def set_wind_load_endpoint(
     try:
         # If storage for the user does not exist in memory, create a slot for the user
         check_user_exists(username)
-        # The user's building data
-        building = get_user_building(username=username)
-        # The user's importance factor
-        importance_factor = get_user_importance_category(username=username)
-        # The user's location
-        location = get_user_location(username=username)
-        # Process the wind load data and create wind load objects
-        for height_zone in building.height_zones:
-            i = height_zone.zone_num - 1
-            process_wind_load_data(
-                building=building,
-                height_zone=height_zone,
-                importance_category=importance_factor,
-                location=location,
-                ct=wind_load_input.ct[i],
-                exposure_factor=wind_load_input.exposure_factor[i],
-                internal_pressure_category=wind_load_input.internal_pressure_category[
-                    i
-                ],
-                manual_ce_cei=wind_load_input.manual_ce_cei[i],
-            )
+        # Check the input against the user's building before storing it, so that it fails here rather than when the
+        # wind load is read
+        check_wind_load_input(
+            username=username, wind_load_input=wind_load_input.model_dump()
+        )
+        # Store the wind load input in the user's memory slot, invalidating the wind load of each height zone
+        set_user_wind_load_input(
+            username=username, wind_load_input=wind_load_input.model_dump()
+        )
+    # If the input cannot be used with the user's building, say what has to be corrected
+    except AnalysisError as e:
+        raise get_analysis_exception(e)
     # If something goes wrong, raise an error
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,420 @@
+########################################################################################################################
+# analysis_manager.py
+# This file manages the incremental recomputation of a user's analysis. Inputs mark the results that depend on them as
+# dirty, and dirty results are only recomputed when they are read. A result that cannot be computed keeps why until its
+# inputs change, so that it only fails the requests that read it.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import jsonpickle
+from fastapi import HTTPException
+
+from backend.API.Managers.building_manager import process_building_data
+from backend.API.Managers.cladding_manager import process_cladding_data
+from backend.API.Managers.dimensions_manager import process_dimension_data
+from backend.API.Managers.importance_category_manager import (
+    process_importance_category_data,
+)
+from backend.API.Managers.location_manager import process_location_data
+from backend.API.Managers.roof_load_combination_manager import (
+    get_roof_load_combination_table,
+    process_roof_load_combination_data,
+)
+from backend.API.Managers.roof_manager import process_roof_data
+from backend.API.Managers.seismic_load_manager import process_seismic_load_data
+from backend.API.Managers.snow_load_manager import process_snow_load_data
+from backend.API.Managers.user_data_manager import (
+    check_user_exists,
+    get_user,
+    get_user_building,
+    get_user_snow_load,
+    set_user_building_input,
+    set_user_cladding,
+    set_user_dimensions,
+    set_user_importance_category,
+    set_user_location,
+    set_user_roof,
+    set_user_seismic_load_input,
+    set_user_snow_load_input,
+    set_user_wind_load_input,
+)
+from backend.API.Managers.wall_load_combination_manager import (
+    get_wall_load_combination_records,
+    process_wall_load_combination_data,
+)
+from backend.API.Managers.wind_load_manager import process_wind_load_data
+from backend.API.Models.analysis_input import AnalysisInput
+from backend.Constants.analysis_constants import ANALYSIS_IO_WORKERS, AnalysisNode
+from backend.Constants.wind_constants import (
+    InternalPressureSelections,
+    WindExposureFactorSelections,
+)
+from backend.Entities.User.user import User
+from backend.Entities.Tracing.tracing import traced
+
+########################################################################################################################
+# EXCEPTIONS
+########################################################################################################################
+
+
+class AnalysisError(Exception):
+    """
+    Raised when a result of a user's analysis cannot be computed from the user's inputs
+    """
+
+    pass
+
+
+########################################################################################################################
+# COMPUTE FUNCTIONS
+########################################################################################################################
+
+
+@traced("manager.compute_building")
+def compute_building(user: User) -> bool:
+    """
+    Recreates the building of a user from the building input
+    :param user: The user object
+    :return: True if the building was computed, False if the building input has not been provided
+    """
+    if user.building_input is None:
+        return False
+    # Process the building data and create a building object
+    building = process_building_data(**user.building_input, username=user.username)
+    user.set_building(building)
+    return True
+
+
+@traced("manager.compute_wind_load")
+def compute_wind_load(user: User) -> bool:
+    """
+    Recomputes the wind load of each height zone of a user's building
+    :param user: The user object
+    :return: True if the wind load was computed, False if the wind load input has not been provided
+    """
+    wind_load_input = user.wind_load_input
+    if wind_load_input is None:
+        return False
+    # Process the wind load data and create wind load objects
+    for height_zone in user.building.height_zones:
+        i = height_zone.zone_num - 1
+        process_wind_load_data(
+            building=user.building,
+            height_zone=height_zone,
+            importance_category=user.importance_category,
+            location=user.location,
+            ct=wind_load_input["ct"][i],
+            exposure_factor=wind_load_input["exposure_factor"][i],
+            internal_pressure_category=wind_load_input["internal_pressure_category"][i],
+            manual_ce_cei=wind_load_input["manual_ce_cei"][i],
+        )
+    return True
+
+
+@traced("manager.compute_seismic_load")
+def compute_seismic_load(user: User) -> bool:
+    """
+    Recomputes the seismic load of each height zone of a user's building
+    :param user: The user object
+    :return: True if the seismic load was computed, False if the seismic load input has not been provided
+    """
+    seismic_load_input = user.seismic_load_input
+    if seismic_load_input is None:
+        return False
+    # Process the seismic load data
+    process_seismic_load_data(
+        building=user.building,
+        location=user.location,
+        importance_category=user.importance_category,
+        ar=seismic_load_input["ar"],
+        rp=seismic_load_input["rp"],
+        cp=seismic_load_input["cp"],
+    )
+    return True
+
+
+@traced("manager.compute_snow_load")
+def compute_snow_load(user: User) -> bool:
+    """
+    Recomputes the upwind and downwind snow load of a user's building
+    :param user: The user object
+    :return: True if the snow load was computed, False if the snow load input has not been provided
+    """
+    snow_load_input = user.snow_load_input
+    if snow_load_input is None:
+        return False
+    # Process the snow load data and create a snow load object
+    snow_load = process_snow_load_data(
+        building=user.building,
+        location=user.location,
+        importance_category=user.importance_category,
+        exposure_factor_selection=snow_load_input["exposure_factor_selection"],
+        roof_type=snow_load_input["roof_type"],
+    )
+    user.set_snow_load(snow_load)
+    return True
+
+
+########################################################################################################################
+# GLOBALS
+########################################################################################################################
+
+# The function used to recompute each derived node
+COMPUTE_FUNCTIONS = {
+    AnalysisNode.BUILDING: compute_building,
+    AnalysisNode.WIND_LOAD: compute_wind_load,
+    AnalysisNode.SEISMIC_LOAD: compute_seismic_load,
+    AnalysisNode.SNOW_LOAD: compute_snow_load,
+}
+
+# Runs the location lookups of full analyses, which wait on external services, alongside the rest of the analysis
+ANALYSIS_EXECUTOR = ThreadPoolExecutor(
+    max_workers=ANALYSIS_IO_WORKERS, thread_name_prefix="analysis-io"
+)
+
+
+########################################################################################################################
+# MANAGER
+########################################################################################################################
+
+
+def get_analysis_exception(error: AnalysisError) -> HTTPException:
+    """
+    Gets the response to a request that needs a result which cannot be computed from the user's inputs
+    :param error: The error raised by the analysis
+    :return: A 422 saying which input has to be corrected
+    """
+    return HTTPException(status_code=422, detail=str(error))
+
+
+def resolve_node(user: User, node: AnalysisNode) -> bool:
+    """
+    Brings a node up to date, recomputing its dirty dependencies first. If the node cannot be computed, why is recorded
+    on the node and it is not tried again until one of its dependencies changes, so that only the results that depend
+    on it fail
+    :param user: The user object
+    :param node: The node to resolve
+    :return: True if the node is up to date, False if some input it needs has not been provided yet or it could not be
+    computed
+    """
+    graph = user.get_dependency_graph()
+    # Inputs and results that are already up to date need no work
+    if not graph.is_dirty(node):
+        return True
+    # A node that could not be computed fails the same way until one of its dependencies changes
+    if graph.get_error(node) is not None:
+        return False
+    # Resolve the dirty dependencies of the node before the node itself
+    for dependency in graph.get_dependencies(node):
+        if graph.is_dirty(dependency) and not resolve_node(user, dependency):
+            # The node fails for the same reason as its dependency
+            if graph.get_error(dependency) is not None:
+                graph.set_error(node, graph.get_error(dependency))
+                user.set_changed(True)
+            return False
+    # Recompute the node and mark it as up to date
+    try:
+        computed = COMPUTE_FUNCTIONS[node](user)
+    except Exception as e:
+        graph.set_error(
+            node, f"The {node.value.replace('_', ' ')} could not be computed: {e}"
+        )
+        user.set_changed(True)
+        return False
+    if not computed:
+        return False
+    graph.mark_clean(node)
+    # The wind and seismic loads are computed into the height zones of the building rather than through a setter
+    user.set_changed(True)
+    return True
+
+
+def resolve_user_analysis(
+    username: str, nodes: Optional[List[AnalysisNode]] = None
+) -> None:
+    """
+    Recomputes the dirty results of a user's analysis, results whose inputs have not been provided are left dirty. Raises
+    an AnalysisError once every node has been tried if any of them could not be computed
+    :param username: The username of the user
+    :param nodes: The nodes to resolve, all derived nodes if not provided
+    :return: None
+    """
+    user = get_user(username)
+    graph = user.get_dependency_graph()
+    if nodes is None:
+        nodes = graph.get_derived_nodes()
+    for node in nodes:
+        resolve_node(user, node)
+    # Report each distinct error once, a node fails for the same reason as the dependency that failed
+    errors = dict.fromkeys(
+        graph.get_error(node) for node in nodes if graph.get_error(node) is not None
+    )
+    if errors:
+        raise AnalysisError("; ".join(errors))
+
+
+def check_building_exists(username: str, load: str) -> int:
+    """
+    Checks that the building of a user can be created before the input of one of its loads is set
+    :param username: The username of the user
+    :param load: The name of the load, used in the error
+    :return: The number of height zones of the building
+    """
+    resolve_user_analysis(username=username, nodes=[AnalysisNode.BUILDING])
+    user = get_user(username)
+    if user.get_dependency_graph().is_dirty(AnalysisNode.BUILDING):
+        raise AnalysisError(f"The building must be set before the {load}")
+    return len(user.building.height_zones)
+
+
+def check_wind_load_input(username: str, wind_load_input: dict) -> None:
+    """
+    Checks that a wind load input has a valid value for each height zone of a user's building
+    :param username: The username of the user
+    :param wind_load_input: The input used to compute the wind load of each height zone
+    :return: None
+    """
+    num_height_zones = check_building_exists(username, "wind load")
+    # Each list has a value for each height zone
+    for key in ("ct", "exposure_factor", "manual_ce_cei", "internal_pressure_category"):
+        if len(wind_load_input[key]) < num_height_zones:
+            raise AnalysisError(
+                f"{key} has {len(wind_load_input[key])} values but the building has {num_height_zones} height zones"
+            )
+    # The selections are ones the wind load can be computed with
+    for exposure_factor in wind_load_input["exposure_factor"]:
+        if exposure_factor not in [x.value for x in WindExposureFactorSelections]:
+            raise AnalysisError(f"{exposure_factor} is not a valid exposure factor")
+    for category in wind_load_input["internal_pressure_category"]:
+        if category not in [x.value for x in InternalPressureSelections]:
+            raise AnalysisError(f"{category} is not a valid internal pressure category")
+
+
+def check_seismic_load_input(username: str, seismic_load_input: dict) -> None:
+    """
+    Checks that the seismic load can be computed from a seismic load input for a user's building
+    :param username: The username of the user
+    :param seismic_load_input: The input used to compute the seismic load of each height zone
+    :return: None
+    """
+    check_building_exists(username, "seismic load")
+    # The horizontal force factor is divided by the response modification factor
+    if seismic_load_input["rp"] == 0:
+        raise AnalysisError("rp must not be 0")
+
+
+@traced("manager.analyze_user")
+def analyze_user(username: str, analysis_input: AnalysisInput) -> dict:
+    """
+    Runs a full analysis for a user in one call, in the order of the dependency graph. The location lookup waits on
+    external services, so it runs while the building is created
+    :param username: The username of the user
+    :param analysis_input: The input of each step of the analysis
+    :return: The location, dimensions, cladding, roof, importance category, building and snow load (the last two as
+    JSON strings, as returned by /building and /set_snow_load) and the wall and roof load combinations
+    """
+    # If storage for the user does not exist in memory, create a slot for the user
+    check_user_exists(username)
+
+    # Start the location lookup, nothing before the loads depends on it. It runs in a copy of the current context so
+    # that its spans are part of the request's trace
+    location_future = ANALYSIS_EXECUTOR.submit(
+        contextvars.copy_context().run,
+        process_location_data,
+        address=analysis_input.location.address,
+        site_designation=analysis_input.location.site_designation,
+        seismic_value=analysis_input.location.seismic_value,
+    )
+
+    # Set the inputs of the building
+    dimensions = process_dimension_data(
+        width=analysis_input.dimensions.width,
+        height=analysis_input.dimensions.height,
+        eave_height=analysis_input.dimensions.eave_height,
+        ridge_height=analysis_input.dimensions.ridge_height,
+    )
+    set_user_dimensions(username=username, dimensions=dimensions)
+    cladding = process_cladding_data(
+        c_top=analysis_input.cladding.c_top, c_bot=analysis_input.cladding.c_bot
+    )
+    set_user_cladding(username=username, cladding=cladding)
+    roof = process_roof_data(
+        w_roof=analysis_input.roof.w_roof,
+        l_roof=analysis_input.roof.l_roof,
+        slope=analysis_input.roof.slope,
+        uniform_dead_load=analysis_input.roof.uniform_dead_load,
+    )
+    set_user_roof(username=username, roof=roof)
+    importance_category = process_importance_category_data(
+        analysis_input.importance_category.importance_category
+    )
+    set_user_importance_category(
+        username=username, importance_category=importance_category
+    )
+
+    # Set the inputs of the loads, each marks the results that depend on it as dirty
+    set_user_building_input(
+        username=username, building_input=analysis_input.building.model_dump()
+    )
+    set_user_wind_load_input(
+        username=username, wind_load_input=analysis_input.wind_load.model_dump()
+    )
+    set_user_seismic_load_input(
+        username=username, seismic_load_input=analysis_input.seismic_load.model_dump()
+    )
+    set_user_snow_load_input(
+        username=username, snow_load_input=analysis_input.snow_load.model_dump()
+    )
+
+    # Create the building while the location is looked up
+    resolve_user_analysis(username=username, nodes=[AnalysisNode.BUILDING])
+
+    # The loads need the location
+    location = location_future.result()
+    set_user_location(username=username, location=location)
+    resolve_user_analysis(username)
+
+    # Compute the load combinations
+    building = get_user_building(username)
+    snow_load = get_user_snow_load(username)
+    wall_load_combinations = process_wall_load_combination_data(
+        building=building,
+        snow_load=snow_load["upwind"],
+        uls_wall_type=analysis_input.wall_load_combination.uls_wall_type,
+        sls_wall_type=analysis_input.wall_load_combination.sls_wall_type,
+    )
+    roof_load_combinations = process_roof_load_combination_data(
+        building=building,
+        snow_load_upwind=snow_load["upwind"],
+        snow_load_downwind=snow_load["downwind"],
+        uls_roof_type=analysis_input.roof_load_combination.uls_roof_type,
+        sls_roof_type=analysis_input.roof_load_combination.sls_roof_type,
+    )
+
+    return {
+        "location": location,
+        "dimensions": dimensions,
+        "cladding": cladding,
+        "roof": roof,
+        "importance_category": importance_category,
+        "building": jsonpickle.encode(building),
+        "snow_load": jsonpickle.encode(snow_load),
+        "wall_load_combinations": get_wall_load_combination_records(
+            wall_load_combinations
+        ),
+        "roof_load_combinations": get_roof_load_combination_table(
+            roof_load_combinations
+        ),
+    }
@@ -23,6 +23,7 @@ from jose import jwt, JWTError
 from sqlalchemy.orm import sessionmaker
 
 from backend.API.Managers.user_data_manager import set_user_profile, check_user_exists
+from backend.Entities.Tracing.tracing import set_trace_attributes
 from backend.Entities.User.profile import Profile
 from config import get_file_path
 from database.Constants.connection_constants import PrivilegeType
@@ -271,6 +272,8 @@ def decode_token(token: str = Depends(oauth2_scheme)):
         # If the username is None, raise an HTTPException
         if username is None:
             raise credentials_exception
+        # Label the spans of the request with the user
+        set_trace_attributes({"enduser.id": username})
         # Return the username
         return username
     # If the token is not valid, raise an HTTPException
@@ -0,0 +1,334 @@
+########################################################################################################################
+# autosave_manager.py
+# This file manages the write-behind autosave of save data. Updates to an existing save file are acknowledged
+# immediately and merged in memory, then the latest version is written to the database once the save file has been
+# quiet for a debounce window, when it is read, or when the server shuts down.
+#
+# On the multi-worker server the pending saves of a user are handed from worker to worker along with the user's session
+# (see session_manager.py), which registers a writer so that the saves it holds between requests are written as well.
+#
+# Writes for a save file are applied in the order they were received. A save file is never written by two threads at
+# once, and the data of a failed write is kept underneath any newer data so that it is retried. If the save file was
+# deleted before its data was written, the data is written to a new save file rather than dropped.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import json
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from backend.API.Managers.user_data_manager import (
+    set_user_save_data,
+    update_user_save_data,
+    user_save_file_exists,
+)
+from backend.Constants.autosave_constants import (
+    AUTOSAVE_DEBOUNCE_SECONDS,
+    AUTOSAVE_FLUSH_LOCKS,
+    AUTOSAVE_KNOWN_SAVE_FILES,
+    AUTOSAVE_MAX_DELAY_SECONDS,
+    AUTOSAVE_POLL_SECONDS,
+)
+
+########################################################################################################################
+# GLOBALS
+########################################################################################################################
+
+# The data waiting to be written for each (username, save id), along with when it first and last changed
+PENDING_SAVES: Dict[Tuple[str, int], dict] = dict()
+
+# The (username, save id) pairs most recently known to exist in the database, least recently used first. A save file
+# deleted by another worker may still be listed, its data is then written to a new save file when it is flushed
+KNOWN_SAVE_FILES: OrderedDict = OrderedDict()
+
+# The (username, save id) pairs being written to the database
+WRITING_SAVES: Set[Tuple[str, int]] = set()
+
+# Guards the collections above
+LOCK = threading.Lock()
+
+# The locks held while a save file is being written, a fixed number shared by all save files so that they do not grow
+# with the number of save files ever written
+FLUSH_LOCKS: List[threading.Lock] = [
+    threading.Lock() for _ in range(AUTOSAVE_FLUSH_LOCKS)
+]
+
+# The background thread that writes pending saves once they are due
+WRITER: Optional[threading.Thread] = None
+
+# Functions that write the pending saves held outside of this process, called by the background writer with False to
+# write those that are due and when the server shuts down with True to write all of them
+SAVE_WRITERS: List[Callable[[bool], None]] = []
+
+
+########################################################################################################################
+# HELPER FUNCTIONS
+########################################################################################################################
+
+
+def get_flush_lock(key: Tuple[str, int]) -> threading.Lock:
+    """
+    Gets the lock held while a save file is being written, which it may share with other save files
+    :param key: The (username, save id) of the save file
+    :return: The lock for the save file
+    """
+    return FLUSH_LOCKS[hash(key) % len(FLUSH_LOCKS)]
+
+
+def add_known_save_file(key: Tuple[str, int]) -> None:
+    """
+    Records that a save file exists in the database, forgetting the least recently used save file once there are too
+    many. Must be called while holding LOCK
+    :param key: The (username, save id) of the save file
+    :return: None
+    """
+    KNOWN_SAVE_FILES[key] = None
+    KNOWN_SAVE_FILES.move_to_end(key)
+    if len(KNOWN_SAVE_FILES) > AUTOSAVE_KNOWN_SAVE_FILES:
+        KNOWN_SAVE_FILES.popitem(last=False)
+
+
+def is_save_due(entry: dict, now: float) -> bool:
+    """
+    Whether a pending save is due to be written
+    :param entry: The pending save, as stored in PENDING_SAVES
+    :param now: The current time.monotonic()
+    :return: True if the save file has been quiet for the debounce window, or has waited for the longest delay
+    """
+    return (
+        now - entry["last"] >= AUTOSAVE_DEBOUNCE_SECONDS
+        or now - entry["first"] >= AUTOSAVE_MAX_DELAY_SECONDS
+    )
+
+
+def flush_key(key: Tuple[str, int]) -> None:
+    """
+    Writes the pending data of a save file to the database
+    :param key: The (username, save id) of the save file
+    :return: None
+    """
+    with get_flush_lock(key):
+        with LOCK:
+            entry = PENDING_SAVES.pop(key, None)
+            if entry is None:
+                return
+            WRITING_SAVES.add(key)
+        username, id = key
+        try:
+            json_data = json.dumps(entry["data"])
+            # The save file was deleted, keep the data the user was told was saved in a new save file
+            if update_user_save_data(username, json_data, id) is None:
+                new_id = set_user_save_data(username, json_data)
+                warnings.warn(
+                    f"Save file {id} no longer exists, its autosaved data was written to save file {new_id}"
+                )
+                with LOCK:
+                    KNOWN_SAVE_FILES.pop(key, None)
+                    add_known_save_file((username, new_id))
+        except Exception:
+            # Put the data back underneath anything that arrived while writing so the write is retried
+            with LOCK:
+                newer = PENDING_SAVES.get(key)
+                if newer is not None:
+                    entry["data"].update(newer["data"])
+                    entry["last"] = newer["last"]
+                PENDING_SAVES[key] = entry
+            raise
+        finally:
+            with LOCK:
+                WRITING_SAVES.discard(key)
+
+
+def write_due_saves() -> None:
+    """
+    Runs in the background and writes every pending save that is due
+    :return: None
+    """
+    while True:
+        time.sleep(AUTOSAVE_POLL_SECONDS)
+        now = time.monotonic()
+        with LOCK:
+            due = [
+                key for key, entry in PENDING_SAVES.items() if is_save_due(entry, now)
+            ]
+        for key in due:
+            try:
+                flush_key(key)
+            # Keep the writer alive, the save stays pending and is retried on the next poll
+            except Exception as e:
+                warnings.warn(f"Autosave of save file {key[1]} failed: {e}")
+        for writer in SAVE_WRITERS:
+            try:
+                writer(False)
+            except Exception as e:
+                warnings.warn(
+                    f"Autosave of saves held outside of this process failed: {e}"
+                )
+
+
+def start_writer() -> None:
+    """
+    Starts the background writer if it is not already running
+    :return: None
+    """
+    global WRITER
+    with LOCK:
+        if WRITER is None or not WRITER.is_alive():
+            WRITER = threading.Thread(
+                target=write_due_saves, name="autosave-writer", daemon=True
+            )
+            WRITER.start()
+
+
+########################################################################################################################
+# MANAGER
+########################################################################################################################
+
+
+def queue_user_save_data(username: str, json_data: str, id: int = None) -> int:
+    """
+    Sets the save data for the user. Updates to an existing save file are acknowledged immediately and written in the
+    background, new save files are created right away so that their id can be returned
+    :param username: The username of the user
+    :param json_data: The JSON data to save
+    :param id: The id of the save file
+    :return: The id of the save file
+    """
+    key = (username, id)
+    patch = json.loads(json_data)
+    # New save files, save files that do not exist, and data that cannot be merged by key are written right away
+    if (
+        id is None
+        or not isinstance(patch, dict)
+        or (key not in KNOWN_SAVE_FILES and not user_save_file_exists(username, id))
+    ):
+        if id is not None:
+            flush_user_save_data(username, id)
+        id = set_user_save_data(username, json_data, id)
+        with LOCK:
+            add_known_save_file((username, id))
+        return id
+
+    # Merge the new data over the pending data, the same way the database merges it
+    now = time.monotonic()
+    with LOCK:
+        add_known_save_file(key)
+        entry = PENDING_SAVES.setdefault(key, {"data": dict(), "first": now})
+        entry["data"].update(patch)
+        entry["last"] = now
+    start_writer()
+    return id
+
+
+def flush_user_save_data(username: str, id: int = None) -> None:
+    """
+    Writes the pending data of a user's save file, or of all the user's save files, to the database
+    :param username: The username of the user
+    :param id: The id of the save file, all the user's save files if not provided
+    :return: None
+    """
+    # Save files with a write in progress are included so that the caller waits for the write to finish
+    with LOCK:
+        keys = [
+            key
+            for key in set(PENDING_SAVES) | WRITING_SAVES
+            if key[0] == username and (id is None or key[1] == id)
+        ]
+    for key in keys:
+        flush_key(key)
+
+
+def flush_all_user_save_data() -> None:
+    """
+    Writes the pending data of every save file to the database, called when the server shuts down
+    :return: None
+    """
+    with LOCK:
+        keys = list(PENDING_SAVES.keys())
+    for key in keys:
+        flush_key(key)
+    for writer in SAVE_WRITERS:
+        writer(True)
+
+
+def take_user_save_data(username: str) -> Dict[int, dict]:
+    """
+    Removes the pending data of all a user's save files from this process, to hand it to another one
+    :param username: The username of the user
+    :return: The pending data of each save file, as stored in PENDING_SAVES, by save id
+    """
+    with LOCK:
+        entries = {
+            key: PENDING_SAVES.pop(key)
+            for key in list(PENDING_SAVES)
+            if key[0] == username
+        }
+        writing = [key for key in WRITING_SAVES if key[0] == username]
+    # Wait for the writes in progress, the data of a write that failed is put back and taken along with the rest
+    for key in writing:
+        with get_flush_lock(key):
+            with LOCK:
+                entry = PENDING_SAVES.pop(key, None)
+            if entry is not None:
+                newer = entries.get(key)
+                if newer is not None:
+                    entry["data"].update(newer["data"])
+                    entry["last"] = newer["last"]
+                entries[key] = entry
+    return {id: entry for (_, id), entry in entries.items()}
+
+
+def restore_user_save_data(username: str, entries: Dict[int, dict]) -> None:
+    """
+    Takes over the pending data of a user's save files handed over by another process
+    :param username: The username of the user
+    :param entries: The pending data of each save file, as returned by take_user_save_data, by save id
+    :return: None
+    """
+    with LOCK:
+        for id, entry in entries.items():
+            key = (username, id)
+            # Data queued in this process is newer than the data handed over
+            newer = PENDING_SAVES.get(key)
+            if newer is not None:
+                entry["data"].update(newer["data"])
+                entry["last"] = newer["last"]
+            PENDING_SAVES[key] = entry
+            add_known_save_file(key)
+    if entries:
+        start_writer()
+
+
+def add_save_writer(writer: Callable[[bool], None]) -> None:
+    """
+    Registers a function that writes the pending saves held outside of this process
+    :param writer: The function, it takes whether to write every save rather than only those that are due
+    :return: None
+    """
+    SAVE_WRITERS.append(writer)
+
+
+def discard_user_save_data(username: str, id: int) -> None:
+    """
+    Discards the pending data of a save file that is about to be deleted
+    :param username: The username of the user
+    :param id: The id of the save file
+    :return: None
+    """
+    key = (username, id)
+    # Wait for any write of the save file that is in progress to finish
+    with get_flush_lock(key):
+        with LOCK:
+            PENDING_SAVES.pop(key, None)
+            KNOWN_SAVE_FILES.pop(key, None)
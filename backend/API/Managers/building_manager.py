@@ -24,12 +24,14 @@ from backend.Entities.Building.building import (
     BuildingCustomHeightDefaultMaterialBuilder,
 )
 from backend.Entities.Building.height_zone import HeightZone
+from backend.Entities.Tracing.tracing import traced
 
 ########################################################################################################################
 # MANAGER
 ########################################################################################################################
 
 
+@traced("manager.process_building_data")
 def process_building_data(
     num_floor: int,
     h_opening: Optional[float],
@@ -13,6 +13,7 @@
 ########################################################################################################################
 
 from backend.Entities.Building.cladding import CladdingBuilder
+from backend.Entities.Tracing.tracing import traced
 
 
 ########################################################################################################################
@@ -20,6 +21,7 @@ from backend.Entities.Building.cladding import CladdingBuilder
 ########################################################################################################################
 
 
+@traced("manager.process_cladding_data")
 def process_cladding_data(c_top: float, c_bot: float):
     """
     Processes the cladding data and creates a cladding object
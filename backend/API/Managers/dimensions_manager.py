@@ -16,6 +16,7 @@ from backend.Entities.Building.dimensions import (
     BasicDimensionsBuilder,
     EaveRidgeDimensionsBuilder,
 )
+from backend.Entities.Tracing.tracing import traced
 
 
 ########################################################################################################################
@@ -23,6 +24,7 @@ from backend.Entities.Building.dimensions import (
 ########################################################################################################################
 
 
+@traced("manager.process_dimension_data")
 def process_dimension_data(
     width: float,
     height: float = None,
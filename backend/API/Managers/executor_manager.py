@@ -0,0 +1,292 @@
+########################################################################################################################
+# executor_manager.py
+# This file manages the executors endpoint work is run on, so that the light endpoints do not wait behind the heavy
+# ones. FastAPI runs every synchronous endpoint on one pool of threads, under one GIL, where a report being generated
+# slows down every other request, and calls waiting on Nominatim or the database hold threads the other requests need.
+#
+#   - CPU-heavy work, such as the load combinations, the bar charts and the Excel report, runs on a pool of processes
+#     with CPU_WORKERS processes. At most CPU_QUEUE_SIZE tasks wait for a process, further tasks are turned away with
+#     an ExecutorBusyError rather than queue without bound.
+#   - I/O-bound work runs on threads from an async endpoint, with a limit on the calls to each resource (see
+#     IO_CONCURRENCY_LIMITS). Calls over the limit wait without holding a thread, and do not count against the threads
+#     of the synchronous endpoints.
+#
+# How long each task waited for its executor, and how long it ran, is recorded for /metrics. A task of a profiled request
+# is sampled in the process that runs it, and the samples are added to the profile of the request.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import anyio
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+from backend.API.Managers.metrics_manager import (
+    EXECUTOR_REJECTED,
+    EXECUTOR_TASKS,
+    observe_executor_task,
+)
+from backend.API.Managers.warmup_manager import WARM_UP, warm_up_pandas
+from backend.Constants.executor_constants import (
+    CPU_EXECUTOR,
+    DEFAULT_CPU_QUEUE_SIZE,
+    DEFAULT_CPU_WORKERS,
+    EXECUTOR_RETRY_AFTER_SECONDS,
+    IO_CONCURRENCY_LIMITS,
+)
+from backend.Entities.Profiling.sampling_profiler import (
+    CURRENT_PROFILER,
+    SamplingProfiler,
+    run_profiled,
+)
+from backend.Entities.Tracing.tracing import disable_tracing, start_span
+from config import get_file_path
+
+########################################################################################################################
+# GLOBALS
+########################################################################################################################
+
+# Get the size of the CPU pool from data/EnvironmentVariables/.env, or the environment
+load_dotenv(dotenv_path=get_file_path(relative_path="data/EnvironmentVariables/.env"))
+CPU_WORKERS = int(
+    os.getenv("CPU_WORKERS") or min(DEFAULT_CPU_WORKERS, os.cpu_count() or 1)
+)
+CPU_QUEUE_SIZE = int(os.getenv("CPU_QUEUE_SIZE") or DEFAULT_CPU_QUEUE_SIZE)
+
+# The pool of processes the CPU-heavy work runs on, created on first use
+CPU_POOL: Optional[ProcessPoolExecutor] = None
+
+# The number of tasks submitted to the CPU pool that have not finished, only changed on the event loop
+CPU_TASKS = 0
+
+# The limiter of the calls to each I/O resource, created on first use since they belong to the event loop
+IO_LIMITERS: Dict[str, anyio.CapacityLimiter] = dict()
+
+
+########################################################################################################################
+# EXCEPTIONS
+########################################################################################################################
+
+
+class ExecutorBusyError(Exception):
+    """
+    Raised when a task is turned away because its executor already has as many tasks waiting as it is allowed
+    """
+
+    pass
+
+
+########################################################################################################################
+# HELPER FUNCTIONS
+########################################################################################################################
+
+
+def initialize_cpu_worker():
+    """
+    Prepares a process of the CPU pool
+    :return: None
+    """
+    # The work of the process is timed by the span of the request that submitted it
+    disable_tracing()
+    # Most of the work of the pool uses pandas
+    warm_up_pandas()
+    # The tasks run on the main thread of the process, this names their stacks in the profiles of profiled requests
+    threading.current_thread().name = f"{CPU_EXECUTOR} pool process"
+
+
+def run_timed(
+    function: Callable,
+    args: tuple,
+    kwargs: dict,
+    submitted: float,
+    profile_interval: Optional[float] = None,
+) -> Tuple[float, float, Any, Optional[Counter]]:
+    """
+    Runs a task of the CPU pool, in a process of the pool
+    :param function: The function of the task
+    :param args: The positional arguments of the function
+    :param kwargs: The keyword arguments of the function
+    :param submitted: When the task was submitted, by time.time since the clock is shared by the processes
+    :param profile_interval: How often to sample the task if its request is being profiled, in seconds, None if not
+    :return: How long the task waited for the process and how long it ran, in seconds, the result of the function, and
+    the number of times each folded stack of the task was sampled if it was profiled
+    """
+    start = time.time()
+    if profile_interval is None:
+        result = function(*args, **kwargs)
+        return start - submitted, time.time() - start, result, None
+
+    # The profiler of the request cannot see into this process, so the task is sampled here and the samples sent back
+    profiler = SamplingProfiler(profile_interval)
+    token = CURRENT_PROFILER.set(profiler)
+    profiler.start()
+    try:
+        result = run_profiled(function, *args, **kwargs)
+    finally:
+        profiler.stop()
+        CURRENT_PROFILER.reset(token)
+    return start - submitted, time.time() - start, result, profiler.stacks
+
+
+def get_cpu_pool() -> ProcessPoolExecutor:
+    """
+    Gets the pool of processes the CPU-heavy work runs on, creating it on first use
+    :return: The pool
+    """
+    global CPU_POOL
+    if CPU_POOL is None:
+        # Processes are spawned rather than forked, a fork of a process running threads can inherit locks held by them
+        CPU_POOL = ProcessPoolExecutor(
+            max_workers=CPU_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=initialize_cpu_worker,
+        )
+    return CPU_POOL
+
+
+def get_io_limiter(resource: str) -> anyio.CapacityLimiter:
+    """
+    Gets the limiter of the calls to an I/O resource, creating it on first use
+    :param resource: The resource, one of the keys of IO_CONCURRENCY_LIMITS
+    :return: The limiter
+    """
+    if resource not in IO_LIMITERS:
+        IO_LIMITERS[resource] = anyio.CapacityLimiter(IO_CONCURRENCY_LIMITS[resource])
+    return IO_LIMITERS[resource]
+
+
+def get_busy_exception(error: ExecutorBusyError) -> HTTPException:
+    """
+    Gets the response to a request turned away because its executor is full
+    :param error: The error raised by the executor
+    :return: A 503 asking the client to retry after EXECUTOR_RETRY_AFTER_SECONDS
+    """
+    return HTTPException(
+        status_code=503,
+        detail=str(error),
+        headers={"Retry-After": str(EXECUTOR_RETRY_AFTER_SECONDS)},
+    )
+
+
+########################################################################################################################
+# MANAGER
+########################################################################################################################
+
+
+async def run_cpu_bound(function: Callable, *args, **kwargs) -> Any:
+    """
+    Runs a CPU-heavy function on the CPU pool. The function and its arguments and result are pickled, so the function
+    must be defined at the top level of a module, and anything it changes in its arguments is not seen by the caller
+    :param function: The function
+    :param args: The positional arguments of the function
+    :param kwargs: The keyword arguments of the function
+    :return: The result of the function
+    """
+    global CPU_POOL, CPU_TASKS
+    if CPU_TASKS >= CPU_WORKERS + CPU_QUEUE_SIZE:
+        EXECUTOR_REJECTED.inc(executor=CPU_EXECUTOR)
+        raise ExecutorBusyError(
+            f"The server is busy, {CPU_TASKS} reports are being generated or waiting to be"
+        )
+    pool = get_cpu_pool()
+    profiler = CURRENT_PROFILER.get()
+    CPU_TASKS += 1
+    EXECUTOR_TASKS.inc(executor=CPU_EXECUTOR)
+    try:
+        with start_span(
+            f"executor.{CPU_EXECUTOR}", {"code.function": function.__qualname__}
+        ) as span:
+            queue_wait, duration, result, stacks = await asyncio.wrap_future(
+                pool.submit(
+                    run_timed,
+                    function,
+                    args,
+                    kwargs,
+                    time.time(),
+                    None if profiler is None else profiler.interval,
+                )
+            )
+            if span is not None:
+                span.attributes["executor.queue_wait"] = queue_wait
+            if stacks is not None:
+                profiler.add_stacks(stacks)
+    # A process of the pool died, such as from running out of memory, so start a new pool for the tasks that follow
+    except BrokenProcessPool:
+        if CPU_POOL is pool:
+            CPU_POOL = None
+        raise
+    finally:
+        CPU_TASKS -= 1
+        EXECUTOR_TASKS.dec(executor=CPU_EXECUTOR)
+    observe_executor_task(CPU_EXECUTOR, queue_wait, duration)
+    return result
+
+
+async def run_io_bound(resource: str, function: Callable, *args, **kwargs) -> Any:
+    """
+    Runs a function that waits on an I/O resource on a thread, once fewer calls to the resource than its limit are
+    running
+    :param resource: The resource, one of the keys of IO_CONCURRENCY_LIMITS
+    :param function: The function
+    :param args: The positional arguments of the function
+    :param kwargs: The keyword arguments of the function
+    :return: The result of the function
+    """
+    submitted = time.perf_counter()
+    start = None
+
+    def run():
+        nonlocal start
+        start = time.perf_counter()
+        return run_profiled(function, *args, **kwargs)
+
+    EXECUTOR_TASKS.inc(executor=resource)
+    try:
+        return await anyio.to_thread.run_sync(run, limiter=get_io_limiter(resource))
+    finally:
+        EXECUTOR_TASKS.dec(executor=resource)
+        if start is not None:
+            observe_executor_task(
+                resource, start - submitted, time.perf_counter() - start
+            )
+
+
+def start_cpu_pool():
+    """
+    Starts the processes of the CPU pool while the server starts, so that the first reports do not wait for them,
+    unless WARM_UP is false
+    :return: None
+    """
+    if not WARM_UP:
+        return
+    pool = get_cpu_pool()
+    for _ in range(CPU_WORKERS):
+        pool.submit(int)
+
+
+def shutdown_cpu_pool():
+    """
+    Stops the processes of the CPU pool, called when the server shuts down
+    :return: None
+    """
+    global CPU_POOL
+    if CPU_POOL is not None:
+        CPU_POOL.shutdown(wait=False, cancel_futures=True)
+        CPU_POOL = None
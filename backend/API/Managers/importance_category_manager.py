@@ -13,6 +13,7 @@
 ########################################################################################################################
 
 from backend.Constants.importance_factor_constants import ImportanceFactor
+from backend.Entities.Tracing.tracing import traced
 
 
 ########################################################################################################################
@@ -20,6 +21,7 @@ from backend.Constants.importance_factor_constants import ImportanceFactor
 ########################################################################################################################
 
 
+@traced("manager.process_importance_category_data")
 def process_importance_category_data(importance_category: str):
     """
     Processes the importance category data and returns the importance factor
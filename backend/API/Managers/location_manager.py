@@ -12,8 +12,35 @@
 # IMPORTS
 ########################################################################################################################
 
+import threading
+from copy import copy
+from typing import List, Optional
+
+from backend.Constants.location_constants import (
+    AUTOCOMPLETE_LIMIT,
+    LOCATION_CACHE_SIZE,
+    LOCATION_CACHE_TTL,
+    MAX_AUTOCOMPLETE_LIMIT,
+)
 from backend.Constants.seismic_constants import SiteDesignation, SiteClass
-from backend.Entities.Location.location import LocationXvBuilder, LocationXsBuilder
+from backend.Entities.Location.gazetteer import normalize_place_name
+from backend.Entities.Location.local_geocoder import get_local_geocoder
+from backend.Entities.Location.location import (
+    Location,
+    LocationXvBuilder,
+    LocationXsBuilder,
+)
+from backend.Entities.Location.location_cache import SingleFlightCache
+from backend.Entities.Location.postal_code_index import get_postal_code_index
+from backend.Entities.Tracing.tracing import traced
+
+########################################################################################################################
+# GLOBALS
+########################################################################################################################
+
+# Recently processed locations, by normalized address, site designation and seismic value, shared between users so
+# that a site opened by several users at once is geocoded and looked up once
+LOCATION_CACHE = SingleFlightCache(LOCATION_CACHE_SIZE, LOCATION_CACHE_TTL)
 
 
 ########################################################################################################################
@@ -21,16 +48,39 @@ from backend.Entities.Location.location import LocationXvBuilder, LocationXsBuil
 ########################################################################################################################
 
 
+@traced("manager.process_location_data")
 def process_location_data(
     address: str, site_designation: str, seismic_value: int | str
 ):
     """
-    Processes the location data and creates a location object
+    Processes the location data and creates a location object, concurrent calls with the same address and seismic
+    parameters share one lookup
     :param address: The address of the location
     :param site_designation: The site designation of the location
     :param seismic_value: The seismic value of the location, int if xv, str if xs
     :return:
     """
+    key = (normalize_place_name(address), site_designation, str(seismic_value))
+    location = LOCATION_CACHE.get(
+        key, lambda: build_location(address, site_designation, seismic_value)
+    )
+    # Each user gets their own copy, with the address as they typed it
+    location = copy(location)
+    location.address = address
+    return location
+
+
+@traced("manager.build_location")
+def build_location(
+    address: str, site_designation: str, seismic_value: int | str
+) -> Location:
+    """
+    Creates a location object, looking up its coordinates, climatic data and seismic data
+    :param address: The address of the location
+    :param site_designation: The site designation of the location
+    :param seismic_value: The seismic value of the location, int if xv, str if xs
+    :return: The location object
+    """
     # Convert the site designation and seismic value to the correct enums
     site_designation = SiteDesignation.get_key_from_value(site_designation)
     # If the site designation is XS, convert the seismic value to the correct enum
@@ -51,3 +101,36 @@ def process_location_data(
     location_builder.set_seismic_data(seismic_value)
     # Return the location object
     return location_builder.get_location()
+
+
+def reverse_geocode_location(latitude: float, longitude: float) -> Optional[dict]:
+    """
+    Finds the postal code, city and province nearest to a location, without an external geocoder
+    :param latitude: The latitude of the location
+    :param longitude: The longitude of the location
+    :return: The postal code, city, province, latitude, longitude and distance in km of the nearest postal code
+    """
+    return get_postal_code_index().reverse_geocode(latitude, longitude)
+
+
+def autocomplete_location(query: str, limit: int = AUTOCOMPLETE_LIMIT) -> List[dict]:
+    """
+    Suggests postal codes, cities and provinces that start with what has been typed so far
+    :param query: The partial address, e.g. "M5V", "Toron" or "Victoria, B"
+    :param limit: The maximum number of suggestions, at most MAX_AUTOCOMPLETE_LIMIT
+    :return: The type, label, city, province, latitude and longitude of each suggestion
+    """
+    # Keep the number of suggestions within bounds, the work done grows with it
+    limit = max(1, min(limit, MAX_AUTOCOMPLETE_LIMIT))
+    return get_postal_code_index().autocomplete(query, limit)
+
+
+def load_location_indexes():
+    """
+    Builds the in-memory location indexes in the background, so that the first lookup does not have to wait for them
+    :return: None
+    """
+    # The local geocoder is built on top of the postal code index, so this builds both
+    threading.Thread(
+        target=get_local_geocoder, name="location-index-loader", daemon=True
+    ).start()
@@ -0,0 +1,468 @@
+########################################################################################################################
+# metrics_manager.py
+# This file manages the metrics exposed at /metrics. It holds the metrics updated by the middleware and the endpoints
+# (request latencies, Blender renders in flight, executor queue waits) and the collectors that read the sizes of the
+# session store, the autosave queue, the database pools, the caches and the upstream clients when the metrics are
+# scraped.
+#
+# Each worker of a multi-worker server dumps its metrics to a file in a directory shared by the workers every
+# METRICS_WRITE_SECONDS, and when it exits. The worker answering a scrape merges the files of every worker, so /metrics
+# covers the whole server whichever worker answers. When a worker exits, the master folds its counters and histograms
+# into the file of the workers that have exited, so that they never go down, and drops its gauges.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import glob
+import json
+import os
+import threading
+import time
+import warnings
+from contextlib import contextmanager
+from typing import Optional
+
+from backend.API.Managers.autosave_manager import PENDING_SAVES
+from backend.API.Managers.location_manager import LOCATION_CACHE
+from backend.API.Managers.session_manager import write_file
+from backend.API.Managers.user_data_manager import ALL_USER_DATA
+from backend.API.Managers.warmup_manager import get_warmup_durations
+from backend.Constants.executor_constants import EXECUTOR_QUEUE_WAIT_BUCKETS
+from backend.Constants.metrics_constants import METRICS_WRITE_SECONDS
+from backend.Entities.Location.location import COORDINATES_CACHE
+from backend.Entities.Metrics.metrics import REGISTRY, counter, gauge, histogram
+from backend.Entities.Upstream.upstream_client import UPSTREAM_CLIENTS
+from database.Entities.database_connection import get_pool_statistics
+
+########################################################################################################################
+# GLOBALS
+########################################################################################################################
+
+# The directory the workers of a multi-worker server dump their metrics to, None when the server runs in one process
+METRICS_DIRECTORY: Optional[str] = None
+
+# Dumps the metrics of this worker every METRICS_WRITE_SECONDS
+METRICS_WRITER: Optional[threading.Thread] = None
+
+# Stops the writer when the worker exits
+METRICS_WRITER_STOP = threading.Event()
+
+# Guards the file of this worker, which is written by the writer and when the worker exits
+METRICS_FILE_LOCK = threading.Lock()
+
+# The buckets of the Blender render durations, in seconds, renders take far longer than requests
+BLENDER_RENDER_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+
+# The latency of every request, by the router and route that handled it
+HTTP_REQUEST_DURATION = histogram(
+    "aspenlog_http_request_duration_seconds",
+    "Latency of HTTP requests",
+    ("router", "route", "method"),
+)
+
+# The number of requests, by the router and route that handled them and the status code of the response
+HTTP_REQUESTS = counter(
+    "aspenlog_http_requests_total",
+    "Number of HTTP requests",
+    ("router", "route", "method", "status"),
+)
+
+# The number of requests being handled
+HTTP_REQUESTS_IN_PROGRESS = gauge(
+    "aspenlog_http_requests_in_progress", "Number of HTTP requests being handled"
+)
+
+# The number of Blender renders running, by model
+BLENDER_RENDERS_IN_PROGRESS = gauge(
+    "aspenlog_blender_renders_in_progress",
+    "Number of Blender renders running",
+    ("model",),
+)
+
+# The duration of every Blender render, by model
+BLENDER_RENDER_DURATION = histogram(
+    "aspenlog_blender_render_duration_seconds",
+    "Duration of Blender renders",
+    ("model",),
+    BLENDER_RENDER_BUCKETS,
+)
+
+# The number of users with data in memory
+SESSIONS = gauge("aspenlog_sessions", "Number of users with data held in memory")
+
+# The number of save files waiting to be written by the autosave writer
+AUTOSAVE_QUEUE_DEPTH = gauge(
+    "aspenlog_autosave_queue_depth", "Number of save files waiting to be written"
+)
+
+# The usage of the database
+DATABASE_POOL = gauge(
+    "aspenlog_database_pool",
+    "Database engines and connections, by kind",
+    ("statistic",),
+)
+
+# The lookups of each cache, by how they were answered
+CACHE_LOOKUPS = counter(
+    "aspenlog_cache_lookups_total",
+    "Lookups of each cache since the server started, by result",
+    ("cache", "result"),
+)
+
+# The share of the lookups of each cache that did not have to be computed
+CACHE_HIT_RATIO = gauge(
+    "aspenlog_cache_hit_ratio",
+    "Share of lookups answered from the cache or by a lookup already in flight, by worker",
+    ("cache",),
+    "liveall",
+)
+
+# The number of results kept by each cache
+CACHE_SIZE = gauge("aspenlog_cache_size", "Number of results kept", ("cache",))
+
+# The calls made to each upstream service, by outcome
+UPSTREAM_CALLS = counter(
+    "aspenlog_upstream_calls_total",
+    "Calls to upstream services since the server started, by outcome",
+    ("upstream", "outcome"),
+)
+
+# Whether the circuit of each upstream service is in a state
+UPSTREAM_CIRCUIT_STATE = gauge(
+    "aspenlog_upstream_circuit_state",
+    "1 for the current state of the circuit of each upstream service, by worker",
+    ("upstream", "state"),
+    "liveall",
+)
+
+# The number of responses of each upstream service kept to fall back on
+UPSTREAM_FALLBACK_SIZE = gauge(
+    "aspenlog_upstream_fallback_size",
+    "Number of responses kept to fall back on",
+    ("upstream",),
+)
+
+# How long each warm-up hook took
+WARMUP_DURATION = gauge(
+    "aspenlog_warmup_duration_seconds",
+    "Duration of the warm-up hooks run after the server started",
+    ("hook",),
+    "livemax",
+)
+
+# How long each task waited for a slot of its executor before it started, by executor
+EXECUTOR_QUEUE_WAIT = histogram(
+    "aspenlog_executor_queue_wait_seconds",
+    "Time tasks waited for their executor before they started",
+    ("executor",),
+    EXECUTOR_QUEUE_WAIT_BUCKETS,
+)
+
+# How long each task ran once it started, by executor
+EXECUTOR_TASK_DURATION = histogram(
+    "aspenlog_executor_task_duration_seconds",
+    "Duration of the tasks run by each executor",
+    ("executor",),
+)
+
+# The number of tasks of each executor waiting for a slot or running
+EXECUTOR_TASKS = gauge(
+    "aspenlog_executor_tasks",
+    "Number of tasks of each executor waiting for a slot or running",
+    ("executor",),
+)
+
+# The number of tasks turned away because their executor was full
+EXECUTOR_REJECTED = counter(
+    "aspenlog_executor_rejected_total",
+    "Number of tasks turned away because their executor was full",
+    ("executor",),
+)
+
+
+########################################################################################################################
+# HELPER FUNCTIONS
+########################################################################################################################
+
+
+def get_worker_metrics_path(pid: int) -> str:
+    """
+    Gets the path of the file a worker dumps its metrics to
+    :param pid: The pid of the worker
+    :return: The path of the file
+    """
+    return os.path.join(METRICS_DIRECTORY, f"worker-{pid}.json")
+
+
+def get_exited_metrics_path() -> str:
+    """
+    Gets the path of the file holding the counters and histograms of the workers that have exited
+    :return: The path of the file
+    """
+    return os.path.join(METRICS_DIRECTORY, "exited.json")
+
+
+def read_metrics_file(path: str) -> Optional[dict]:
+    """
+    Reads a file of metrics
+    :param path: The path of the file
+    :return: The contents of the file, None if it does not exist as its worker has exited
+    """
+    try:
+        with open(path, "r") as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def read_exited_metrics() -> dict:
+    """
+    Reads the counters and histograms of the workers that have exited
+    :return: The pids of the workers whose files are being removed, whose metrics are already included, and the merged
+    dump of their metrics
+    """
+    return read_metrics_file(get_exited_metrics_path()) or {"pids": [], "metrics": {}}
+
+
+########################################################################################################################
+# HOOKS
+########################################################################################################################
+
+
+def observe_request(router: str, route: str, method: str, status: int, duration: float):
+    """
+    Records a request that has been handled
+    :param router: The module of the endpoint that handled the request
+    :param route: The path template of the endpoint
+    :param method: The HTTP method
+    :param status: The status code of the response
+    :param duration: How long the request took, in seconds
+    :return: None
+    """
+    HTTP_REQUEST_DURATION.observe(duration, router=router, route=route, method=method)
+    HTTP_REQUESTS.inc(router=router, route=route, method=method, status=status)
+
+
+@contextmanager
+def track_blender_render(model: str):
+    """
+    Counts a Blender render while it runs and records how long it took
+    :param model: The model being rendered
+    :return: None
+    """
+    BLENDER_RENDERS_IN_PROGRESS.inc(model=model)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        BLENDER_RENDER_DURATION.observe(time.perf_counter() - start, model=model)
+        BLENDER_RENDERS_IN_PROGRESS.dec(model=model)
+
+
+def observe_executor_task(executor: str, queue_wait: float, duration: float):
+    """
+    Records a task that an executor has run
+    :param executor: The executor
+    :param queue_wait: How long the task waited for the executor, in seconds
+    :param duration: How long the task ran, in seconds
+    :return: None
+    """
+    EXECUTOR_QUEUE_WAIT.observe(queue_wait, executor=executor)
+    EXECUTOR_TASK_DURATION.observe(duration, executor=executor)
+
+
+########################################################################################################################
+# COLLECTORS
+########################################################################################################################
+
+
+def collect_sessions():
+    """
+    Reads the size of the session store and the autosave queue
+    :return: None
+    """
+    SESSIONS.set(len(ALL_USER_DATA))
+    AUTOSAVE_QUEUE_DEPTH.set(len(PENDING_SAVES))
+
+
+def collect_database_pool():
+    """
+    Reads the usage of the database
+    :return: None
+    """
+    for statistic, value in get_pool_statistics().items():
+        DATABASE_POOL.set(value, statistic=statistic)
+
+
+def collect_caches():
+    """
+    Reads the lookups and sizes of the location and coordinates caches
+    :return: None
+    """
+    for name, cache in (
+        ("location", LOCATION_CACHE),
+        ("coordinates", COORDINATES_CACHE),
+    ):
+        metrics = cache.get_metrics()
+        for result in ("hits", "coalesced", "misses"):
+            CACHE_LOOKUPS.set(metrics[result], cache=name, result=result)
+        CACHE_SIZE.set(metrics["size"], cache=name)
+        lookups = metrics["hits"] + metrics["coalesced"] + metrics["misses"]
+        if lookups:
+            CACHE_HIT_RATIO.set(
+                (metrics["hits"] + metrics["coalesced"]) / lookups, cache=name
+            )
+
+
+def collect_upstream():
+    """
+    Reads the calls, circuit state and kept responses of every upstream service that has been called
+    :return: None
+    """
+    for name, client in list(UPSTREAM_CLIENTS.items()):
+        metrics = client.metrics.to_dict()
+        for outcome in (
+            "requests",
+            "retries",
+            "errors",
+            "timeouts",
+            "rejected",
+            "fallbacks",
+        ):
+            UPSTREAM_CALLS.set(metrics[outcome], upstream=name, outcome=outcome)
+        for state in ("closed", "open", "half_open"):
+            UPSTREAM_CIRCUIT_STATE.set(
+                int(client.breaker.state == state), upstream=name, state=state
+            )
+        UPSTREAM_FALLBACK_SIZE.set(len(client.fallback_cache), upstream=name)
+
+
+def collect_warmup():
+    """
+    Reads how long each warm-up hook that has run took
+    :return: None
+    """
+    for hook, duration in get_warmup_durations().items():
+        WARMUP_DURATION.set(duration, hook=hook)
+
+
+REGISTRY.add_collector(collect_sessions)
+REGISTRY.add_collector(collect_database_pool)
+REGISTRY.add_collector(collect_caches)
+REGISTRY.add_collector(collect_upstream)
+REGISTRY.add_collector(collect_warmup)
+
+
+########################################################################################################################
+# MANAGER
+########################################################################################################################
+
+
+def set_metrics_directory(directory: Optional[str]) -> None:
+    """
+    Sets the directory the workers dump their metrics to, before the workers are forked
+    :param directory: The directory, None when the server runs in one process
+    :return: None
+    """
+    global METRICS_DIRECTORY
+    METRICS_DIRECTORY = directory
+
+
+def write_worker_metrics() -> None:
+    """
+    Dumps the metrics of this worker to its file
+    :return: None
+    """
+    with METRICS_FILE_LOCK:
+        write_file(
+            get_worker_metrics_path(os.getpid()),
+            json.dumps(REGISTRY.dump()).encode("utf-8"),
+        )
+
+
+def run_metrics_writer() -> None:
+    """
+    Dumps the metrics of this worker every METRICS_WRITE_SECONDS until the worker exits
+    :return: None
+    """
+    while not METRICS_WRITER_STOP.wait(METRICS_WRITE_SECONDS):
+        try:
+            write_worker_metrics()
+        # Try again on the next round
+        except Exception as e:
+            warnings.warn(f"Could not write the metrics of the worker: {e}")
+
+
+def start_metrics_writer() -> None:
+    """
+    Starts dumping the metrics of this worker, called in each worker once it is forked
+    :return: None
+    """
+    global METRICS_WRITER
+    write_worker_metrics()
+    METRICS_WRITER_STOP.clear()
+    METRICS_WRITER = threading.Thread(
+        target=run_metrics_writer, name="metrics-writer", daemon=True
+    )
+    METRICS_WRITER.start()
+
+
+def stop_metrics_writer() -> None:
+    """
+    Stops dumping the metrics of this worker and dumps them one last time, called in each worker as it exits
+    :return: None
+    """
+    METRICS_WRITER_STOP.set()
+    write_worker_metrics()
+
+
+def merge_exited_worker_metrics(pid: int) -> None:
+    """
+    Folds the counters and histograms of a worker that has exited into those of the workers that exited before it and
+    removes its file, so that they keep counting up and its gauges are dropped. Called in the master
+    :param pid: The pid of the worker
+    :return: None
+    """
+    path = get_worker_metrics_path(pid)
+    dump = read_metrics_file(path)
+    if dump is None:
+        return
+    metrics = REGISTRY.merge_exited([read_exited_metrics()["metrics"], dump])
+    # Scrapes skip the file of the worker until it is removed, as its metrics are already included
+    write_file(
+        get_exited_metrics_path(),
+        json.dumps({"pids": [pid], "metrics": metrics}).encode("utf-8"),
+    )
+    os.remove(path)
+    write_file(
+        get_exited_metrics_path(),
+        json.dumps({"pids": [], "metrics": metrics}).encode("utf-8"),
+    )
+
+
+def render_metrics() -> str:
+    """
+    Renders every metric, merged over the workers of a multi-worker server
+    :return: The metrics in the Prometheus text exposition format
+    """
+    if METRICS_DIRECTORY is None:
+        return REGISTRY.render()
+    # The metrics of this worker are read as they are now, those of the other workers are at most METRICS_WRITE_SECONDS
+    # old. This worker's file is left to the writer, so that this scrape is not counted as in progress by later ones
+    exited = read_exited_metrics()
+    dumps = [(0, exited["metrics"]), (os.getpid(), REGISTRY.dump())]
+    for path in glob.glob(os.path.join(METRICS_DIRECTORY, "worker-*.json")):
+        pid = int(os.path.basename(path)[len("worker-") : -len(".json")])
+        if pid in exited["pids"] or pid == os.getpid():
+            continue
+        dump = read_metrics_file(path)
+        if dump is not None:
+            dumps.append((pid, dump))
+    return REGISTRY.render_dumps(dumps)
@@ -12,6 +12,8 @@
 # IMPORTS
 ########################################################################################################################
 
+from typing import Dict, TYPE_CHECKING
+
 from backend.Constants.roof_load_combination_constants import (
     SLSRoofLoadCombinationTypes,
     ULSRoofLoadCombinationTypes,
@@ -21,6 +23,11 @@ from backend.Entities.Snow.snow_load import SnowLoad
 from backend.algorithms.load_combination_algorithms import (
     compute_roof_load_combinations,
 )
+from backend.Entities.Tracing.tracing import traced
+
+# Only needed for the annotations, pandas is imported on first use so that the server does not wait for it to start
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 ########################################################################################################################
@@ -28,6 +35,7 @@ from backend.algorithms.load_combination_algorithms import (
 ########################################################################################################################
 
 
+@traced("manager.process_roof_load_combination_data")
 def process_roof_load_combination_data(
     building: Building,
     snow_load_upwind: SnowLoad,
@@ -56,3 +64,52 @@ def process_roof_load_combination_data(
     )
     # Return the roof load combinations
     return {"upwind": upwind_roof_combination, "downwind": downwind_roof_combination}
+
+
+def get_roof_load_combination_table(dataframes: Dict[str, "pd.DataFrame"]) -> dict:
+    """
+    Converts the roof load combinations into the table returned by the API
+    :param dataframes: The dataframes containing the upwind and downwind roof load combinations
+    :return: The [headers, values] of the upwind and downwind roof load combinations, rounded to 4 decimal places and
+    without the companion columns
+    """
+    table = dict()
+    for side in ("upwind", "downwind"):
+        # Round the values in the dataframe to 4 decimal places
+        df = dataframes[side].round(4)
+        # Get the headers and values of the dataframe
+        headers = [str(x) for x in df.columns]
+        values = [float(x) for x in df.iloc[0].values]
+        # Remove the companion headers and values
+        table[side] = [
+            [header for header in headers if "companion" not in header],
+            [
+                value
+                for header, value in zip(headers, values)
+                if "companion" not in header
+            ],
+        ]
+    return table
+
+
+def get_roof_load_combinations(
+    building: Building,
+    snow_load_upwind: SnowLoad,
+    snow_load_downwind: SnowLoad,
+    uls_roof_type: str,
+    sls_roof_type: str,
+) -> dict:
+    """
+    Computes the roof load combinations as the table returned by the API, run on the CPU pool
+    :param building: The building object
+    :param snow_load_upwind: The snow load on the upwind side of the building
+    :param snow_load_downwind: The snow load on the downwind side of the building
+    :param uls_roof_type: The type of ULS roof load combination
+    :param sls_roof_type: The type of SLS roof load combination
+    :return: The [headers, values] of the upwind and downwind roof load combinations
+    """
+    return get_roof_load_combination_table(
+        process_roof_load_combination_data(
+            building, snow_load_upwind, snow_load_downwind, uls_roof_type, sls_roof_type
+        )
+    )
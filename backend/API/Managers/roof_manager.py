@@ -13,6 +13,7 @@
 ########################################################################################################################
 
 from backend.Entities.Building.roof import RoofBuilder
+from backend.Entities.Tracing.tracing import traced
 
 
 ########################################################################################################################
@@ -20,6 +21,7 @@ from backend.Entities.Building.roof import RoofBuilder
 ########################################################################################################################
 
 
+@traced("manager.process_roof_data")
 def process_roof_data(
     w_roof: float, l_roof: float, slope: float, uniform_dead_load: float
 ):
@@ -25,6 +25,7 @@ from backend.algorithms.seismic_load_algorithms import (
     get_horizontal_force_factor,
     get_specified_lateral_earthquake_force,
 )
+from backend.Entities.Tracing.tracing import traced
 
 
 ########################################################################################################################
@@ -32,6 +33,7 @@ from backend.algorithms.seismic_load_algorithms import (
 ########################################################################################################################
 
 
+@traced("manager.process_seismic_load_data")
 def process_seismic_load_data(
     building: Building,
     location: Location,
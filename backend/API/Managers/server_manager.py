@@ -0,0 +1,244 @@
+########################################################################################################################
+# server_manager.py
+# This file manages the multi-worker server, which runs the app in several gunicorn worker processes so that the
+# calculations and reports of different users are not held up by one another behind a single GIL.
+#
+# The app is created, and the reference data, postal code index, local geocoder, pandas and matplotlib are loaded, once
+# in the gunicorn master before the workers are forked from it, so that every worker shares the same copy of them. The
+# objects loaded are then frozen out of the garbage collector, which would otherwise write to every one of them on its
+# first full collection and give each worker a private copy of the pages they live on.
+#
+# Workers are replaced gracefully, finishing the requests they are handling, after MAX_REQUESTS requests, or once the
+# memory they do not share with the other workers exceeds MAX_WORKER_MEMORY_MB (see recycling_middleware.py). Sessions
+# are shared between the workers through a temporary directory (see session_manager.py), so a user's requests can be
+# handled by any worker and a session survives its worker being replaced. Metrics are merged over the workers through
+# another temporary directory (see metrics_manager.py), so /metrics covers every worker whichever one answers.
+#
+# The settings are read from data/EnvironmentVariables/.env, or the environment:
+#   - WORKERS: the number of worker processes, 1 runs the server in a single process without gunicorn
+#   - MAX_REQUESTS, MAX_REQUESTS_JITTER: replace a worker after this many requests, plus up to the jitter
+#   - MAX_WORKER_MEMORY_MB: replace a worker once its unshared memory exceeds this many megabytes
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import gc
+import os
+import shutil
+import tempfile
+import warnings
+from typing import Callable
+
+from dotenv import load_dotenv
+from fastapi import FastAPI
+from gunicorn.app.base import BaseApplication
+from gunicorn.arbiter import Arbiter
+from gunicorn.workers.base import Worker
+
+from backend.API.Managers.metrics_manager import (
+    merge_exited_worker_metrics,
+    set_metrics_directory,
+    start_metrics_writer,
+    stop_metrics_writer,
+)
+from backend.API.Managers.session_manager import set_session_directory
+from backend.API.Managers.warmup_manager import run_warmup_hooks
+from backend.Constants.server_constants import (
+    DEFAULT_MAX_REQUESTS,
+    DEFAULT_MAX_REQUESTS_JITTER,
+    DEFAULT_MAX_WORKER_MEMORY_MB,
+    SERVER_HOST,
+    SERVER_PORT,
+    WORKER_CLASS,
+    WORKER_GRACEFUL_TIMEOUT,
+    WORKER_TIMEOUT,
+)
+from backend.Entities.Location.local_geocoder import get_local_geocoder
+from config import get_file_path
+
+########################################################################################################################
+# GLOBALS
+########################################################################################################################
+
+# Get the worker settings from data/EnvironmentVariables/.env, or the environment
+load_dotenv(dotenv_path=get_file_path(relative_path="data/EnvironmentVariables/.env"))
+MAX_REQUESTS = int(os.getenv("MAX_REQUESTS") or DEFAULT_MAX_REQUESTS)
+MAX_REQUESTS_JITTER = int(
+    os.getenv("MAX_REQUESTS_JITTER") or DEFAULT_MAX_REQUESTS_JITTER
+)
+MAX_WORKER_MEMORY_MB = float(
+    os.getenv("MAX_WORKER_MEMORY_MB") or DEFAULT_MAX_WORKER_MEMORY_MB
+)
+
+
+########################################################################################################################
+# HELPER FUNCTIONS
+########################################################################################################################
+
+
+def get_worker_memory() -> float:
+    """
+    Gets the memory of this process that is not shared with the other workers, which is what grows as a worker leaks
+    :return: The private resident memory of the process in megabytes, its whole resident memory where the private
+    memory cannot be read
+    """
+    try:
+        with open("/proc/self/smaps_rollup") as file:
+            return (
+                sum(
+                    int(line.split()[1])
+                    for line in file
+                    if line.startswith(("Private_Clean:", "Private_Dirty:"))
+                )
+                / 1024
+            )
+    except OSError:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def preload_shared_data():
+    """
+    Loads the data and modules every worker uses, so that they are loaded once and shared by the workers
+    :return: None
+    """
+    # Loads the reference data, pandas and matplotlib, a hook that fails is reported and does not stop the others
+    run_warmup_hooks()
+    # The local geocoder is built on top of the postal code index, so this builds both
+    try:
+        get_local_geocoder()
+    # The workers build it on first use instead
+    except Exception as e:
+        warnings.warn(f"Could not preload the location indexes: {e}")
+
+
+def remove_directories(*directories: str):
+    """
+    Removes directories and everything in them
+    :param directories: The directories
+    :return: None
+    """
+    for directory in directories:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def on_worker_exit(server: Arbiter, worker: Worker):
+    """
+    Dumps the metrics of a worker as it exits. Gunicorn also calls this in the master for a worker that had already
+    exited, whose metrics are then merged into those of the workers that have exited
+    :param server: The gunicorn master
+    :param worker: The worker
+    :return: None
+    """
+    if os.getpid() == worker.pid:
+        stop_metrics_writer()
+    else:
+        merge_exited_worker_metrics(worker.pid)
+
+
+########################################################################################################################
+# MAIN CLASS
+########################################################################################################################
+
+
+class ProductionServer(BaseApplication):
+    """
+    This class is used to run the app in several gunicorn worker processes forked from a preloaded master
+    """
+
+    # Creates the app
+    create_app: Callable[[], FastAPI]
+    # The gunicorn settings
+    options: dict
+
+    def __init__(self, create_app: Callable[[], FastAPI], options: dict):
+        """
+        Initializes the ProductionServer object
+        :param create_app: Creates the app
+        :param options: The gunicorn settings
+        """
+        self.create_app = create_app
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        """
+        Applies the gunicorn settings
+        :return: None
+        """
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self) -> FastAPI:
+        """
+        Creates the app and loads the shared data, in the master since the app is preloaded
+        :return: The app
+        """
+        from backend.API.Middleware.recycling_middleware import recycling_middleware
+        from backend.API.Middleware.session_middleware import session_middleware
+
+        app = self.create_app()
+        # Bring the session of each request's user up to date with the other workers
+        app.middleware("http")(session_middleware)
+        # Replace a worker whose memory has grown too large, only added when MAX_WORKER_MEMORY_MB is set
+        if MAX_WORKER_MEMORY_MB > 0:
+            app.middleware("http")(recycling_middleware)
+        preload_shared_data()
+        # Keep the garbage collector from writing to, and so copying, the pages the workers share
+        gc.collect()
+        gc.freeze()
+        return app
+
+
+########################################################################################################################
+# MANAGER
+########################################################################################################################
+
+
+def run_production_server(
+    create_app: Callable[[], FastAPI], workers: int, port: int = SERVER_PORT
+):
+    """
+    Runs the app in several worker processes, until the server is stopped
+    :param create_app: Creates the app
+    :param workers: The number of worker processes
+    :param port: The port to listen on
+    :return: None
+    """
+    session_directory = tempfile.mkdtemp(prefix="aspenlog-sessions-")
+    set_session_directory(session_directory)
+    metrics_directory = tempfile.mkdtemp(prefix="aspenlog-metrics-")
+    set_metrics_directory(metrics_directory)
+    ProductionServer(
+        create_app,
+        {
+            "bind": f"{SERVER_HOST}:{port}",
+            "workers": workers,
+            "worker_class": WORKER_CLASS,
+            "preload_app": True,
+            "max_requests": MAX_REQUESTS,
+            "max_requests_jitter": MAX_REQUESTS_JITTER,
+            "graceful_timeout": WORKER_GRACEFUL_TIMEOUT,
+            "timeout": WORKER_TIMEOUT,
+            # Each worker dumps its metrics for the worker answering a scrape to merge
+            "post_fork": lambda server, worker: start_metrics_writer(),
+            "worker_exit": on_worker_exit,
+            "child_exit": lambda server, worker: merge_exited_worker_metrics(
+                worker.pid
+            ),
+            # Sessions and metrics do not outlive the server, as with a single process
+            "on_exit": lambda server: remove_directories(
+                session_directory, metrics_directory
+            ),
+        },
+    ).run()
@@ -0,0 +1,270 @@
+########################################################################################################################
+# session_manager.py
+# This file manages the sessions shared between the workers of a multi-worker server (see server_manager.py). Each user's
+# session lives in the memory of a worker, and the next request of the user may be handled by any other worker, so the
+# session is written to a directory shared by the workers as a snapshot (see snapshot_manager.py) after each request,
+# and read back by the next worker to handle a request of the user if it changed in the meantime.
+#
+# The requests of a user are handled one at a time across every worker, by holding a lock on a file of the user for the
+# whole request, so that two workers never change the same session at once. A session is only written when a request
+# changed it.
+#
+# The pending autosaves of the user (see autosave_manager.py) are handed over along with the lock rather than written to
+# the database, so that they keep being merged until they are due. They are written to a file of the user when the lock
+# is released and taken back into memory by the next worker to lock the session. Between requests they are written to
+# the database by the autosave writer of any worker once they are due, and by each worker as it shuts down.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import fcntl
+import glob
+import hashlib
+import json
+import os
+import time
+from typing import Dict, IO, Optional, Tuple
+
+from backend.API.Managers.autosave_manager import (
+    add_save_writer,
+    flush_user_save_data,
+    is_save_due,
+    restore_user_save_data,
+    start_writer,
+    take_user_save_data,
+)
+from backend.API.Managers.snapshot_manager import decode_snapshot, encode_snapshot
+from backend.API.Managers.user_data_manager import ALL_USER_DATA
+
+########################################################################################################################
+# GLOBALS
+########################################################################################################################
+
+# The directory the sessions are shared through, None when the server runs in a single process
+SESSION_DIRECTORY: Optional[str] = None
+
+# The version of each user's session held by this worker, as the (inode, size, modification time) of the snapshot file
+# it was read from or written to
+SESSION_VERSIONS: Dict[str, Tuple[int, int, int]] = dict()
+
+
+########################################################################################################################
+# HELPER FUNCTIONS
+########################################################################################################################
+
+
+def get_session_path(username: str, extension: str) -> str:
+    """
+    Gets the path of one of the files of a user's session, the username is hashed so that it is always a valid file name
+    :param username: The username of the user
+    :param extension: The extension of the file
+    :return: The path of the file
+    """
+    name = hashlib.sha256(username.encode("utf-8")).hexdigest()
+    return os.path.join(SESSION_DIRECTORY, f"{name}.{extension}")
+
+
+def get_file_version(path: str) -> Optional[Tuple[int, int, int]]:
+    """
+    Gets the version of a snapshot file, which changes whenever the file is replaced
+    :param path: The path of the file
+    :return: The inode, size and modification time of the file, None if it does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+
+def write_file(path: str, data: bytes) -> None:
+    """
+    Replaces a file shared between the workers in one step, so that a worker never reads half of it
+    :param path: The path of the file
+    :param data: The contents of the file
+    :return: None
+    """
+    temporary_path = f"{path}.{os.getpid()}"
+    with open(temporary_path, "wb") as file:
+        file.write(data)
+    os.replace(temporary_path, path)
+
+
+def read_pending_saves(path: str) -> Optional[Tuple[str, Dict[int, dict]]]:
+    """
+    Reads the pending autosaves handed over with a user's session
+    :param path: The path of the file of the pending autosaves
+    :return: The username and the pending data of each save file by save id, None if there are none
+    """
+    try:
+        with open(path, "rb") as file:
+            pending_saves = json.loads(file.read())
+    except FileNotFoundError:
+        return None
+    return pending_saves["username"], {
+        int(id): entry for id, entry in pending_saves["saves"].items()
+    }
+
+
+########################################################################################################################
+# MANAGER
+########################################################################################################################
+
+
+def set_session_directory(directory: Optional[str]) -> None:
+    """
+    Sets the directory the sessions are shared through, which enables sharing them
+    :param directory: The directory, None to stop sharing sessions
+    :return: None
+    """
+    global SESSION_DIRECTORY
+    SESSION_DIRECTORY = directory
+
+
+def session_sharing_enabled() -> bool:
+    """
+    Whether sessions are shared between workers
+    :return: True if a session directory has been set
+    """
+    return SESSION_DIRECTORY is not None
+
+
+def try_lock_session(username: str) -> Optional[IO]:
+    """
+    Locks a user's session if no other request of the user is being handled, by any worker, without waiting
+    :param username: The username of the user
+    :return: The lock file, to pass to unlock_session, None if the session is locked
+    """
+    file = open(get_session_path(username, "lock"), "a")
+    try:
+        fcntl.flock(file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        file.close()
+        return None
+    return file
+
+
+def unlock_session(file: IO) -> None:
+    """
+    Unlocks a user's session
+    :param file: The lock file returned by try_lock_session
+    :return: None
+    """
+    fcntl.flock(file, fcntl.LOCK_UN)
+    file.close()
+
+
+def load_pending_saves(username: str) -> None:
+    """
+    Takes the pending autosaves handed over with a user's session into this worker, must hold the session's lock
+    :param username: The username of the user
+    :return: None
+    """
+    path = get_session_path(username, "saves")
+    pending_saves = read_pending_saves(path)
+    if pending_saves is None:
+        return
+    restore_user_save_data(username, pending_saves[1])
+    os.remove(path)
+
+
+def store_pending_saves(username: str) -> None:
+    """
+    Hands the pending autosaves of a user over with the user's session, must hold the session's lock
+    :param username: The username of the user
+    :return: None
+    """
+    entries = take_user_save_data(username)
+    if not entries:
+        return
+    write_file(
+        get_session_path(username, "saves"),
+        json.dumps({"username": username, "saves": entries}).encode("utf-8"),
+    )
+    # Write them once they are due if no request of the user takes them first
+    start_writer()
+
+
+def write_pending_saves(write_all: bool) -> None:
+    """
+    Writes the pending autosaves handed over with the sessions of users without a request being handled, called by the
+    autosave writer
+    :param write_all: Whether to write every pending autosave, rather than only the users' with an autosave that is due
+    :return: None
+    """
+    if SESSION_DIRECTORY is None:
+        return
+    for path in glob.glob(os.path.join(SESSION_DIRECTORY, "*.saves")):
+        pending_saves = read_pending_saves(path)
+        if pending_saves is None:
+            continue
+        username, entries = pending_saves
+        now = time.monotonic()
+        if not write_all and not any(
+            is_save_due(entry, now) for entry in entries.values()
+        ):
+            continue
+        # A request of the user is being handled, and takes the autosaves over
+        file = try_lock_session(username)
+        if file is None:
+            continue
+        try:
+            load_pending_saves(username)
+            try:
+                flush_user_save_data(username)
+            # Hand the autosaves that could not be written back over with the session, to be retried
+            finally:
+                store_pending_saves(username)
+        finally:
+            unlock_session(file)
+
+
+def load_session(username: str) -> None:
+    """
+    Reads a user's session if another worker changed it since this worker last saw it, and takes the user's pending
+    autosaves over
+    :param username: The username of the user
+    :return: None
+    """
+    load_pending_saves(username)
+    path = get_session_path(username, "snapshot")
+    version = get_file_version(path)
+    if version is None or SESSION_VERSIONS.get(username) == version:
+        return
+    with open(path, "rb") as file:
+        user = decode_snapshot(file.read())
+    user.set_changed(False)
+    ALL_USER_DATA[username] = user
+    SESSION_VERSIONS[username] = version
+
+
+def store_session(username: str) -> None:
+    """
+    Writes a user's session for the other workers if it changed, and hands the user's pending autosaves over with it
+    :param username: The username of the user
+    :return: None
+    """
+    store_pending_saves(username)
+    user = ALL_USER_DATA.get(username)
+    if user is None or not user.get_changed():
+        return
+    # Cleared before encoding so that the workers reading the snapshot see the user as unchanged
+    user.set_changed(False)
+    try:
+        path = get_session_path(username, "snapshot")
+        write_file(path, encode_snapshot(user))
+    except BaseException:
+        user.set_changed(True)
+        raise
+    SESSION_VERSIONS[username] = get_file_version(path)
+
+
+# Write the pending autosaves held between requests along with those held in memory
+add_save_writer(write_pending_saves)
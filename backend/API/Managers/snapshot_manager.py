@@ -0,0 +1,131 @@
+########################################################################################################################
+# snapshot_manager.py
+# This file manages binary snapshots of a user's session. A snapshot stores the whole User state, including the
+# computed wind, seismic and snow results, so that a save can be restored without recomputing anything.
+#
+# A snapshot is laid out as follows:
+#   - 4 bytes: SNAPSHOT_MAGIC
+#   - 2 bytes: the snapshot version as a big endian unsigned short
+#   - the rest: the flattened jsonpickle state of the User, packed with msgpack and compressed with zstd
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import struct
+from typing import Callable, Dict
+
+import jsonpickle
+import msgpack
+import zstandard
+
+from backend.Constants.analysis_constants import ANALYSIS_DEPENDENCIES
+from backend.Constants.snapshot_constants import (
+    SNAPSHOT_MAGIC,
+    SNAPSHOT_VERSION,
+    SNAPSHOT_COMPRESSION_LEVEL,
+)
+from backend.Entities.User.dependency_graph import DependencyGraph
+from backend.Entities.User.user import User
+
+########################################################################################################################
+# GLOBALS
+########################################################################################################################
+
+# The format of the snapshot header
+HEADER_FORMAT = f">{len(SNAPSHOT_MAGIC)}sH"
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+# Functions that upgrade the flattened User state of a snapshot from the version used as the key to the next version
+SNAPSHOT_MIGRATIONS: Dict[int, Callable[[dict], dict]] = {}
+
+
+########################################################################################################################
+# MANAGER
+########################################################################################################################
+
+
+def encode_snapshot(user: User) -> bytes:
+    """
+    Encodes a user into a binary snapshot
+    :param user: The user object
+    :return: The binary snapshot
+    """
+    # Flatten the user into JSON compatible data, keys=True keeps the height zone keys of the building intact
+    state = jsonpickle.Pickler(keys=True).flatten(user)
+    # Pack and compress the state
+    payload = zstandard.ZstdCompressor(level=SNAPSHOT_COMPRESSION_LEVEL).compress(
+        msgpack.packb(state, use_bin_type=True)
+    )
+    return struct.pack(HEADER_FORMAT, SNAPSHOT_MAGIC, SNAPSHOT_VERSION) + payload
+
+
+def migrate_snapshot_state(state: dict, version: int) -> dict:
+    """
+    Upgrades the flattened User state of a snapshot to the current snapshot version
+    :param state: The flattened User state
+    :param version: The version the snapshot was written with
+    :return: The flattened User state in the current snapshot version
+    """
+    # Snapshots written by newer code cannot be understood
+    if version > SNAPSHOT_VERSION:
+        raise ValueError(
+            f"Snapshot version {version} is newer than the supported version {SNAPSHOT_VERSION}"
+        )
+    # Apply each migration in order until the state is current
+    while version < SNAPSHOT_VERSION:
+        if version not in SNAPSHOT_MIGRATIONS:
+            raise ValueError(f"No migration registered for snapshot version {version}")
+        state = SNAPSHOT_MIGRATIONS[version](state)
+        version += 1
+    return state
+
+
+def upgrade_user(user: User) -> User:
+    """
+    Fills in attributes a restored user is missing because it was saved before they were added to the User class
+    :param user: The restored user object
+    :return: The upgraded user object
+    """
+    # Copy over the default value of any attribute that did not exist when the snapshot was taken
+    defaults = User(user.username)
+    for attribute, value in vars(defaults).items():
+        if not hasattr(user, attribute):
+            setattr(user, attribute, value)
+    # If the shape of the analysis or its graph changed since the snapshot was taken, every result is recomputed when it
+    # is next read
+    if user.dependency_graph.dependencies != DependencyGraph(
+        ANALYSIS_DEPENDENCIES
+    ).dependencies or not hasattr(user.dependency_graph, "errors"):
+        user.dependency_graph = defaults.dependency_graph
+    return user
+
+
+def decode_snapshot(snapshot: bytes) -> User:
+    """
+    Decodes a binary snapshot into a user
+    :param snapshot: The binary snapshot
+    :return: The user object
+    """
+    # Ensure the data is a snapshot
+    if len(snapshot) < HEADER_SIZE:
+        raise ValueError("Snapshot is truncated")
+    magic, version = struct.unpack(HEADER_FORMAT, snapshot[:HEADER_SIZE])
+    if magic != SNAPSHOT_MAGIC:
+        raise ValueError("Data is not a session snapshot")
+    # Decompress and unpack the state
+    state = msgpack.unpackb(
+        zstandard.ZstdDecompressor().decompress(snapshot[HEADER_SIZE:]),
+        raw=False,
+        strict_map_key=False,
+    )
+    # Bring the state up to date and restore the user
+    state = migrate_snapshot_state(state, version)
+    user = jsonpickle.Unpickler(keys=True).restore(state)
+    return upgrade_user(user)
@@ -26,6 +26,7 @@ from backend.algorithms.snow_load_algorithms import (
     get_basic_roof_snow_load_factor,
     get_snow_load,
 )
+from backend.Entities.Tracing.tracing import traced
 
 
 ########################################################################################################################
@@ -33,6 +34,7 @@ from backend.algorithms.snow_load_algorithms import (
 ########################################################################################################################
 
 
+@traced("manager.process_snow_load_data")
 def process_snow_load_data(
     building: Building,
     location: Location,
@@ -12,12 +12,15 @@
 # IMPORTS
 ########################################################################################################################
 
+import json
 from datetime import datetime
+from typing import Optional
 
 import jsonpickle
-from sqlalchemy import desc
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import desc, update, insert, literal, func, tuple_
+from sqlalchemy.orm import Session, sessionmaker
 
+from backend.API.Managers.snapshot_manager import encode_snapshot, decode_snapshot
 from backend.Constants.importance_factor_constants import ImportanceFactor
 from backend.Entities.Building.building import Building
 from backend.Entities.Building.cladding import Cladding
@@ -37,6 +40,10 @@ from database.Entities.save_data import SaveData
 # This dictionary stores all data across all users
 ALL_USER_DATA = dict()
 
+# The number of save files listed per page by default, and the most that can be requested at once
+SAVE_FILE_PAGE_SIZE = 50
+MAX_SAVE_FILE_PAGE_SIZE = 200
+
 
 ########################################################################################################################
 # MANAGER
@@ -62,6 +69,7 @@ def set_user_data(username: str, user_data: User) -> None:
     :return: None
     """
     # Set the user data in memory
+    user_data.set_changed(True)
     ALL_USER_DATA[username] = user_data
 
 
@@ -201,6 +209,110 @@ def set_user_snow_load(username: str, snow_load) -> None:
     ALL_USER_DATA[username].set_snow_load(snow_load)
 
 
+def set_user_building_input(username: str, building_input: dict) -> None:
+    """
+    Sets the input used to create the building for the user
+    :param username: The username of the user
+    :param building_input: The building input
+    :return: None
+    """
+    ALL_USER_DATA[username].set_building_input(building_input)
+
+
+def set_user_wind_load_input(username: str, wind_load_input: dict) -> None:
+    """
+    Sets the input used to compute the wind load for the user
+    :param username: The username of the user
+    :param wind_load_input: The wind load input
+    :return: None
+    """
+    ALL_USER_DATA[username].set_wind_load_input(wind_load_input)
+
+
+def set_user_seismic_load_input(username: str, seismic_load_input: dict) -> None:
+    """
+    Sets the input used to compute the seismic load for the user
+    :param username: The username of the user
+    :param seismic_load_input: The seismic load input
+    :return: None
+    """
+    ALL_USER_DATA[username].set_seismic_load_input(seismic_load_input)
+
+
+def set_user_snow_load_input(username: str, snow_load_input: dict) -> None:
+    """
+    Sets the input used to compute the snow load for the user
+    :param username: The username of the user
+    :param snow_load_input: The snow load input
+    :return: None
+    """
+    ALL_USER_DATA[username].set_snow_load_input(snow_load_input)
+
+
+def merge_user_save_data(
+    controller: Session, username: str, json_data: str, id: int
+) -> Optional[int]:
+    """
+    Merges new data into an existing save file by reading and rewriting it, for databases that cannot merge JSON
+    :param controller: The session connected to the database
+    :param username: The username of the user
+    :param json_data: The JSON data to merge into the save file
+    :param id: The id of the save file
+    :return: The id of the save file, None if the save file does not exist
+    """
+    entry = (
+        controller.query(SaveData)
+        .filter((SaveData.Username == username) & (SaveData.ID == id))
+        .first()
+    )
+    if entry is None:
+        return None
+    entry.JsonData = json.dumps({**json.loads(entry.JsonData), **json.loads(json_data)})
+    entry.DateModified = datetime.now()
+    return entry.ID
+
+
+def update_user_save_data(username: str, json_data: str, id: int) -> Optional[int]:
+    """
+    Merges new data into an existing save file for the user, overriding matching top level keys. The merge is done by
+    the database, so the cost of an update does not depend on the size of the save
+    :param username: The username of the user
+    :param json_data: The JSON data to merge into the save file
+    :param id: The id of the save file
+    :return: The id of the save file, None if the save file does not exist
+    """
+    # Connect to the database
+    new_connection = DatabaseConnection(database_name="NBCC-2020")
+    engine = new_connection.get_engine(privilege=PrivilegeType.ADMIN)
+    session = sessionmaker(autocommit=False, autoflush=True, bind=engine)
+    controller = session()
+    # Databases without JSONB, such as the SQLite database of the load test, merge the data here instead
+    if engine.dialect.name != "postgresql":
+        modified_id = merge_user_save_data(controller, username, json_data, id)
+        controller.commit()
+        controller.close()
+        new_connection.close()
+        return modified_id
+    # Merge the new data into the existing entry and set DateModified to the current time
+    modified_id = controller.execute(
+        update(SaveData)
+        .where((SaveData.Username == username) & (SaveData.ID == id))
+        .values(
+            JsonData=SaveData.JsonData.op("||")(
+                literal(json_data, SaveData.JsonData.type)
+            ),
+            DateModified=datetime.now(),
+        )
+        .returning(SaveData.ID)
+    ).scalar()
+    # Commit and close the connection
+    controller.commit()
+    controller.close()
+    new_connection.close()
+    # Return the id of the save file
+    return modified_id
+
+
 def set_user_save_data(username: str, json_data: str, id: int = None) -> int:
     """
     Sets the save data for the user
@@ -209,40 +321,82 @@ def set_user_save_data(username: str, json_data: str, id: int = None) -> int:
     :param id: The id of the save file
     :return: The id of the save file
     """
+    # If an id is provided, merge the new data into the existing entry
+    if id is not None:
+        modified_id = update_user_save_data(username, json_data, id)
+        if modified_id is not None:
+            return modified_id
+
+    # Otherwise, create a new entry with the current time
+    new_connection = DatabaseConnection(database_name="NBCC-2020")
+    engine = new_connection.get_engine(privilege=PrivilegeType.ADMIN)
+    session = sessionmaker(autocommit=False, autoflush=True, bind=engine)
+    controller = session()
+    new_id = controller.execute(
+        insert(SaveData)
+        .values(Username=username, DateModified=datetime.now(), JsonData=json_data)
+        .returning(SaveData.ID)
+    ).scalar()
+    # Commit and close the connection
+    controller.commit()
+    controller.close()
+    new_connection.close()
+
+    # Return the id of the save file
+    return new_id
+
+
+def user_save_file_exists(username: str, id: int) -> bool:
+    """
+    Checks if a save file exists for the user
+    :param username: The username of the user
+    :param id: The id of the save file
+    :return: True if the save file exists, False otherwise
+    """
     # Connect to the database
     new_connection = DatabaseConnection(database_name="NBCC-2020")
     engine = new_connection.get_engine(privilege=PrivilegeType.ADMIN)
-    Session = sessionmaker(autocommit=False, autoflush=True, bind=engine)
-    controller = Session()
+    session = sessionmaker(autocommit=False, autoflush=True, bind=engine)
+    controller = session()
+    # Check for the save file without loading it
+    exists = (
+        controller.query(SaveData.ID)
+        .filter((SaveData.Username == username) & (SaveData.ID == id))
+        .first()
+        is not None
+    )
+    # Close the connection
+    controller.close()
+    new_connection.close()
+    return exists
 
-    # Check if the entry already exists
-    existing_entry = None
-    # If an id is provided, check if the entry exists
-    if id is not None:
-        existing_entry = (
-            controller.query(SaveData)
-            .filter((SaveData.Username == username) & (SaveData.ID == id))
-            .first()
-        )
 
-    # If the entry exists, modify it. Otherwise, create a new entry
-    if existing_entry is not None:
-        # modify existing entry, by overriding JsonData and DateModified to use current time
-        prev_data = jsonpickle.decode(existing_entry.JsonData)
-        for key, value in jsonpickle.decode(json_data).items():
-            prev_data[key] = value
-
-        existing_entry.JsonData = jsonpickle.encode(prev_data)
-        existing_entry.DateModified = datetime.now()
-    # Create new entry with the current time
-    else:
-        new_entry = SaveData(
-            Username=username, DateModified=datetime.now(), JsonData=json_data
-        )
-        controller.add(new_entry)
-        controller.commit()
-        id = new_entry.ID
+def set_user_save_snapshot(username: str, id: int) -> int:
+    """
+    Stores a binary snapshot of the user's session, including all computed results, in a save file
+    :param username: The username of the user
+    :param id: The id of the save file
+    :return: The id of the save file
+    """
+    # Encode the user's session
+    snapshot = encode_snapshot(ALL_USER_DATA[username])
 
+    # Connect to the database
+    new_connection = DatabaseConnection(database_name="NBCC-2020")
+    engine = new_connection.get_engine(privilege=PrivilegeType.ADMIN)
+    session = sessionmaker(autocommit=False, autoflush=True, bind=engine)
+    controller = session()
+    # Get the save file with the given id
+    existing_entry = (
+        controller.query(SaveData)
+        .filter((SaveData.Username == username) & (SaveData.ID == id))
+        .first()
+    )
+    # The snapshot can only be stored in an existing save file
+    assert existing_entry is not None
+    # Store the snapshot and update the modification time
+    existing_entry.Snapshot = snapshot
+    existing_entry.DateModified = datetime.now()
     # Commit and close the connection
     controller.commit()
     controller.close()
@@ -252,6 +406,42 @@ def set_user_save_data(username: str, json_data: str, id: int = None) -> int:
     return id
 
 
+def restore_user_save_snapshot(username: str, id: int) -> User:
+    """
+    Restores the user's session from the binary snapshot of a save file without recomputing any results
+    :param username: The username of the user
+    :param id: The id of the save file
+    :return: The restored user object
+    """
+    # Connect to the database
+    new_connection = DatabaseConnection(database_name="NBCC-2020")
+    engine = new_connection.get_engine(privilege=PrivilegeType.ADMIN)
+    session = sessionmaker(autocommit=False, autoflush=True, bind=engine)
+    controller = session()
+    # Get only the snapshot of the save file with the given id
+    snapshot = (
+        controller.query(SaveData.Snapshot)
+        .filter((SaveData.Username == username) & (SaveData.ID == id))
+        .scalar()
+    )
+    # Close the connection
+    controller.close()
+    new_connection.close()
+
+    # The save file must have a snapshot to restore from
+    assert snapshot is not None
+    # Decode the snapshot, keeping the identity and profile of the current session
+    user = decode_snapshot(snapshot)
+    user.username = username
+    user.profile = ALL_USER_DATA[username].get_profile()
+    user.current_save_file = id
+    user.set_changed(True)
+    # Replace the user's session with the restored one
+    ALL_USER_DATA[username] = user
+    # Return the restored user
+    return user
+
+
 def get_user_profile(username: str) -> Profile:
     """
     Gets the profile for the user
@@ -369,6 +559,15 @@ def get_user_snow_load(username: str):
     return ALL_USER_DATA.get(username).get_snow_load()
 
 
+def get_user(username: str) -> User:
+    """
+    Gets the user object for the user
+    :param username: The username of the user
+    :return: The user object
+    """
+    return ALL_USER_DATA.get(username)
+
+
 def get_user_data(username: str):
     """
     Gets the user data for the user
@@ -403,6 +602,63 @@ def get_all_user_save_data(username: str):
     return result
 
 
+def list_user_save_files(
+    username: str,
+    limit: int = SAVE_FILE_PAGE_SIZE,
+    before_date: Optional[datetime] = None,
+    before_id: Optional[int] = None,
+) -> dict:
+    """
+    Lists one page of the user's save files, newest first, without loading their JSON data
+    :param username: The username of the user
+    :param limit: The number of save files to list
+    :param before_date: The DateModified of the last save file of the previous page, None for the first page
+    :param before_id: The ID of the last save file of the previous page, None for the first page
+    :return: The save files of the page and the cursor of the next page, None if this is the last page
+    """
+    limit = max(1, min(limit, MAX_SAVE_FILE_PAGE_SIZE))
+    # Connect to the database
+    new_connection = DatabaseConnection(database_name="NBCC-2020")
+    engine = new_connection.get_engine(privilege=PrivilegeType.ADMIN)
+    session = sessionmaker(autocommit=False, autoflush=True, bind=engine)
+    controller = session()
+    # Select only the columns needed to list the save files, the project name is extracted by the database
+    query = controller.query(
+        SaveData.ID,
+        SaveData.DateModified,
+        func.jsonb_extract_path_text(
+            SaveData.JsonData, "input_page", "input", "project-name"
+        ).label("ProjectName"),
+    ).filter(SaveData.Username == username)
+    # Continue after the last save file of the previous page
+    if before_date is not None and before_id is not None:
+        query = query.filter(
+            tuple_(SaveData.DateModified, SaveData.ID) < tuple_(before_date, before_id)
+        )
+    # Fetch one extra row to know whether there is another page
+    rows = (
+        query.order_by(desc(SaveData.DateModified), desc(SaveData.ID))
+        .limit(limit + 1)
+        .all()
+    )
+    # Close the connection
+    controller.close()
+    new_connection.close()
+
+    # Build the page and the cursor of the next page
+    items = [
+        {"ID": row.ID, "DateModified": row.DateModified, "ProjectName": row.ProjectName}
+        for row in rows[:limit]
+    ]
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = {
+            "before_date": items[-1]["DateModified"],
+            "before_id": items[-1]["ID"],
+        }
+    return {"items": items, "next_cursor": next_cursor}
+
+
 def get_user_save_file(username: str, id: int):
     """
     Gets the save file for the user
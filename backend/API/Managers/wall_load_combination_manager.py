@@ -12,6 +12,9 @@
 # IMPORTS
 ########################################################################################################################
 
+import json
+from typing import List, TYPE_CHECKING
+
 from backend.Constants.wall_load_combination_constants import (
     ULSWallLoadCombinationTypes,
     SLSWallLoadCombinationTypes,
@@ -21,6 +24,11 @@ from backend.Entities.Snow.snow_load import SnowLoad
 from backend.algorithms.load_combination_algorithms import (
     compute_wall_load_combinations,
 )
+from backend.Entities.Tracing.tracing import traced
+
+# Only needed for the annotations, pandas is imported on first use so that the server does not wait for it to start
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 ########################################################################################################################
@@ -28,6 +36,7 @@ from backend.algorithms.load_combination_algorithms import (
 ########################################################################################################################
 
 
+@traced("manager.process_wall_load_combination_data")
 def process_wall_load_combination_data(
     building: Building, snow_load: SnowLoad, uls_wall_type: str, sls_wall_type: str
 ):
@@ -44,3 +53,35 @@ def process_wall_load_combination_data(
     return compute_wall_load_combinations(
         building, snow_load, uls_wall_type, sls_wall_type
     )
+
+
+def get_wall_load_combination_records(df: "pd.DataFrame") -> List[dict]:
+    """
+    Converts the wall load combinations into the records returned by the API
+    :param df: The dataframe containing the wall load combinations
+    :return: One record per row of the dataframe, rounded to 4 decimal places and without the companion column
+    """
+    df = df.round(4)
+    # Check if the 'companion' column exists and drop it
+    if "companion" in df.columns:
+        df = df.drop(columns=["companion"])
+    # Convert the dataframe to a JSON object
+    return json.loads(df.to_json(orient="records"))
+
+
+def get_wall_load_combinations(
+    building: Building, snow_load: SnowLoad, uls_wall_type: str, sls_wall_type: str
+) -> List[dict]:
+    """
+    Computes the wall load combinations as the records returned by the API, run on the CPU pool
+    :param building: The building object
+    :param snow_load: The snow load object
+    :param uls_wall_type: The type of ULS wall load combination
+    :param sls_wall_type: The type of SLS wall load combination
+    :return: One record per row of the wall load combinations
+    """
+    return get_wall_load_combination_records(
+        process_wall_load_combination_data(
+            building, snow_load, uls_wall_type, sls_wall_type
+        )
+    )
@@ -0,0 +1,131 @@
+########################################################################################################################
+# warmup_manager.py
+# This file manages the warm-up of the server. Dependencies that are slow to import, such as pandas and matplotlib, are
+# imported on first use so that the server starts quickly, and the warm-up hooks import them on a background thread once
+# the server has started, so that the first users do not wait for them either.
+#
+# Warm-up is enabled unless WARM_UP=false is set in data/EnvironmentVariables/.env, or the environment, which suits
+# short-lived servers such as those of the tests.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import os
+import threading
+import time
+import warnings
+from typing import Callable, Dict, List, Tuple
+
+from dotenv import load_dotenv
+
+from backend.Entities.Location.reference_data import get_reference_data
+from config import get_file_path
+
+########################################################################################################################
+# GLOBALS
+########################################################################################################################
+
+# Get whether to warm up from data/EnvironmentVariables/.env, or the environment
+load_dotenv(dotenv_path=get_file_path(relative_path="data/EnvironmentVariables/.env"))
+WARM_UP = (os.getenv("WARM_UP") or "true").lower() != "false"
+
+# The warm-up hooks, by name, run in the order they were registered
+WARMUP_HOOKS: List[Tuple[str, Callable[[], None]]] = []
+
+# How long each warm-up hook that has run took, in seconds
+WARMUP_DURATIONS: Dict[str, float] = {}
+
+
+########################################################################################################################
+# WARM-UP HOOKS
+########################################################################################################################
+
+
+def warm_up_pandas():
+    """
+    Imports pandas, which the load combinations and the Excel output use
+    :return: None
+    """
+    import pandas as pd
+
+    pd.DataFrame(columns=["warm_up"])
+
+
+def warm_up_matplotlib():
+    """
+    Imports matplotlib and draws an empty 3D chart, which loads the fonts the bar charts use
+    :return: None
+    """
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure()
+    fig.add_subplot(111, projection="3d")
+    fig.canvas.draw()
+    plt.close(fig)
+
+
+def warm_up_reference_data():
+    """
+    Loads the compiled reference data, if it has been built
+    :return: None
+    """
+    get_reference_data()
+
+
+########################################################################################################################
+# MANAGER
+########################################################################################################################
+
+
+def register_warmup_hook(name: str, hook: Callable[[], None]):
+    """
+    Registers a function to run when the server warms up
+    :param name: The name of the hook, used to report how long it took
+    :param hook: The function, it takes no arguments
+    :return: None
+    """
+    WARMUP_HOOKS.append((name, hook))
+
+
+def run_warmup_hooks():
+    """
+    Runs every warm-up hook, a hook that fails is reported and does not stop the others
+    :return: None
+    """
+    for name, hook in WARMUP_HOOKS:
+        start = time.perf_counter()
+        try:
+            hook()
+        except Exception as e:
+            warnings.warn(f"Warm-up hook '{name}' failed: {e}")
+        WARMUP_DURATIONS[name] = time.perf_counter() - start
+
+
+def start_warmup():
+    """
+    Runs the warm-up hooks in the background, so that the server accepts requests while it warms up
+    :return: None
+    """
+    if not WARM_UP:
+        return
+    threading.Thread(target=run_warmup_hooks, name="warmup", daemon=True).start()
+
+
+def get_warmup_durations() -> Dict[str, float]:
+    """
+    Gets how long each warm-up hook that has run took
+    :return: The duration of each hook, in seconds
+    """
+    return dict(WARMUP_DURATIONS)
+
+
+register_warmup_hook("reference_data", warm_up_reference_data)
+register_warmup_hook("pandas", warm_up_pandas)
+register_warmup_hook("matplotlib", warm_up_matplotlib)
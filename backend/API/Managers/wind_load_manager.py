@@ -30,12 +30,14 @@ from backend.algorithms.wind_load_algorithms import (
     get_external_pressure,
     get_internal_pressure,
 )
+from backend.Entities.Tracing.tracing import traced
 
 ########################################################################################################################
 # MANAGER
 ########################################################################################################################
 
 
+@traced("manager.process_wind_load_data")
 def process_wind_load_data(
     building: Building,
     height_zone: HeightZone,
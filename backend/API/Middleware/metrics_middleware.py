@@ -0,0 +1,68 @@
+########################################################################################################################
+# metrics_middleware.py
+# This file contains the middleware that records the latency and status code of every request for /metrics, labelled by
+# the router and route that handled it.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import time
+
+from starlette.requests import Request
+
+from backend.API.Managers.metrics_manager import (
+    HTTP_REQUESTS_IN_PROGRESS,
+    observe_request,
+)
+
+########################################################################################################################
+# HELPER FUNCTIONS
+########################################################################################################################
+
+
+def get_route_labels(request: Request) -> tuple:
+    """
+    Gets the router and route that handled a request, using the path template so that the number of labels stays small
+    :param request: The request
+    :return: The router (the module of the endpoint) and the route, "unmatched" for both if no route matched
+    """
+    route = request.scope.get("route")
+    if route is None:
+        return "unmatched", "unmatched"
+    endpoint = getattr(route, "endpoint", None)
+    router = endpoint.__module__.rsplit(".", 1)[-1] if endpoint else "unmatched"
+    return router, getattr(route, "path", "unmatched")
+
+
+########################################################################################################################
+# MIDDLEWARE
+########################################################################################################################
+
+
+async def metrics_middleware(request: Request, call_next):
+    """
+    Records the latency and status code of a request
+    :param request: The request
+    :param call_next: Handles the request
+    :return: The response
+    """
+    HTTP_REQUESTS_IN_PROGRESS.inc()
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        HTTP_REQUESTS_IN_PROGRESS.dec()
+        router, route = get_route_labels(request)
+        observe_request(
+            router, route, request.method, status, time.perf_counter() - start
+        )
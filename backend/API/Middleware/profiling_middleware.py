@@ -0,0 +1,160 @@
+########################################################################################################################
+# profiling_middleware.py
+# This file contains the middleware that profiles a request on demand. A request carrying the profiling token, in the
+# X-Profile header or the profile query parameter, is sampled while it is handled; the folded stacks are written to
+# backend/output and the link to them is returned in the X-Profile-Url header.
+#
+# Only the code run for the profiled request is sampled, even while other requests are being handled: the endpoints are
+# wrapped by profile_endpoints, and the code a request runs on other threads goes through run_profiled (see
+# sampling_profiler.py).
+#
+# The token is read from PROFILING_TOKEN in data/EnvironmentVariables/.env, or the environment. Without it the
+# middleware is not added to the app at all, so requests pay nothing for it.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import os
+import secrets
+import threading
+import uuid
+from typing import Optional
+
+from dotenv import load_dotenv
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+
+from backend.Constants.profiling_constants import (
+    PROFILE_ENDPOINT,
+    PROFILE_HEADER,
+    PROFILE_OUTPUT_DIRECTORY,
+    PROFILE_QUERY_PARAMETER,
+    PROFILE_SAMPLE_INTERVAL,
+    PROFILE_URL_HEADER,
+)
+from backend.Entities.Profiling.sampling_profiler import (
+    CURRENT_PROFILER,
+    SamplingProfiler,
+    profile_function,
+)
+from config import get_file_path
+
+########################################################################################################################
+# GLOBALS
+########################################################################################################################
+
+# Get the profiling token from data/EnvironmentVariables/.env, or the environment, profiling is disabled without it
+load_dotenv(dotenv_path=get_file_path(relative_path="data/EnvironmentVariables/.env"))
+PROFILING_TOKEN: Optional[str] = os.getenv("PROFILING_TOKEN") or None
+
+# Held while a request is being profiled, the samples of two profiled requests would otherwise be mixed
+PROFILE_LOCK = threading.Lock()
+
+
+########################################################################################################################
+# HELPER FUNCTIONS
+########################################################################################################################
+
+
+def profiling_enabled() -> bool:
+    """
+    Whether requests may be profiled
+    :return: True if a profiling token has been set
+    """
+    return PROFILING_TOKEN is not None
+
+
+def is_valid_profiling_token(token: Optional[str]) -> bool:
+    """
+    Whether a token is the profiling token
+    :param token: The token sent with a request
+    :return: True if profiling is enabled and the token matches
+    """
+    if PROFILING_TOKEN is None or not token:
+        return False
+    return secrets.compare_digest(
+        token.encode("utf-8"), PROFILING_TOKEN.encode("utf-8")
+    )
+
+
+def get_profile_path(id: str) -> str:
+    """
+    Gets the path of a profile
+    :param id: The id of the profile
+    :return: The absolute path of the folded stacks of the profile
+    """
+    return get_file_path(f"{PROFILE_OUTPUT_DIRECTORY}/profile_{id}.folded")
+
+
+def profile_endpoints(app: FastAPI):
+    """
+    Wraps the endpoints of an app so that they are sampled when their request is profiled, called once every router has
+    been included
+    :param app: The app
+    :return: None
+    """
+    for route in app.routes:
+        if isinstance(route, APIRoute):
+            # The request handler of the route calls the endpoint through its dependant
+            route.dependant.call = profile_function(route.dependant.call)
+
+
+def write_profile(profiler: SamplingProfiler) -> str:
+    """
+    Writes the samples of a profiled request
+    :param profiler: The profiler that sampled the request
+    :return: The id of the profile
+    """
+    id = str(uuid.uuid4())
+    with open(get_profile_path(id), "w") as file:
+        file.write(profiler.to_folded())
+    return id
+
+
+########################################################################################################################
+# MIDDLEWARE
+########################################################################################################################
+
+
+async def profiling_middleware(request: Request, call_next):
+    """
+    Profiles a request if it carries the profiling token
+    :param request: The request
+    :param call_next: Handles the request
+    :return: The response, with the link to the profile in the X-Profile-Url header if it was profiled
+    """
+    token = request.headers.get(PROFILE_HEADER) or request.query_params.get(
+        PROFILE_QUERY_PARAMETER
+    )
+    # Requests that did not ask to be profiled, or asked while another request is being profiled, are handled as is
+    if (
+        not is_valid_profiling_token(token)
+        or request.url.path == PROFILE_ENDPOINT
+        or not PROFILE_LOCK.acquire(blocking=False)
+    ):
+        return await call_next(request)
+
+    try:
+        profiler = SamplingProfiler(PROFILE_SAMPLE_INTERVAL)
+        profiler.start()
+        # The request is handled in a task that copies the context, so its code finds the profiler
+        context_token = CURRENT_PROFILER.set(profiler)
+        try:
+            response = await call_next(request)
+        finally:
+            CURRENT_PROFILER.reset(context_token)
+            profiler.stop()
+        id = write_profile(profiler)
+    finally:
+        PROFILE_LOCK.release()
+
+    response.headers[PROFILE_URL_HEADER] = f"{PROFILE_ENDPOINT}?id={id}"
+    return response
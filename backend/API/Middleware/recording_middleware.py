@@ -0,0 +1,207 @@
+########################################################################################################################
+# recording_middleware.py
+# This file contains the middleware that records requests so that a session can be replayed against another server
+# (see backend/Testing/replay.py). Each request is appended to RECORDING_FILE as a line of JSON with its body, timings
+# and a digest of its response.
+#
+# Nothing that authenticates a user is recorded. The token of a request is replaced by a pseudonym, the same for every
+# request made with it so that the requests of a session can be told apart, passwords in request bodies and the
+# profiling token are redacted, and responses are only recorded as a digest.
+#
+# Recording is enabled by setting RECORD_REQUESTS=true in data/EnvironmentVariables/.env, or the environment. Without
+# it the middleware is not added to the app at all, so requests pay nothing for it.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode
+
+from dotenv import load_dotenv
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from backend.Constants.profiling_constants import PROFILE_QUERY_PARAMETER
+from backend.Constants.recording_constants import (
+    DEFAULT_RECORDING_FILE,
+    RECORDING_MAX_BODY_SIZE,
+    RECORDING_REDACTED_FIELDS,
+    RECORDING_REDACTED_VALUE,
+)
+from config import get_file_path
+
+########################################################################################################################
+# GLOBALS
+########################################################################################################################
+
+# Get whether to record requests, and where to, from data/EnvironmentVariables/.env, or the environment
+load_dotenv(dotenv_path=get_file_path(relative_path="data/EnvironmentVariables/.env"))
+RECORD_REQUESTS = (os.getenv("RECORD_REQUESTS") or "").lower() == "true"
+RECORDING_FILE = os.getenv("RECORDING_FILE") or get_file_path(DEFAULT_RECORDING_FILE)
+
+# Guards writing to the recording file
+RECORDING_LOCK = threading.Lock()
+
+
+########################################################################################################################
+# HELPER FUNCTIONS
+########################################################################################################################
+
+
+def recording_enabled() -> bool:
+    """
+    Whether requests are recorded
+    :return: True if RECORD_REQUESTS is set to true
+    """
+    return RECORD_REQUESTS
+
+
+def get_session_pseudonym(authorization: Optional[str]) -> Optional[str]:
+    """
+    Gets the pseudonym recorded in place of the token of a request
+    :param authorization: The Authorization header of the request
+    :return: A digest of the token that cannot be turned back into it, None if the request has no token
+    """
+    if not authorization:
+        return None
+    return hashlib.sha256(authorization.encode("utf-8")).hexdigest()[:16]
+
+
+def redact_json(data):
+    """
+    Redacts the values of the redacted fields of a JSON document, at any depth
+    :param data: The JSON document
+    :return: A copy of the document with the values of the redacted fields replaced
+    """
+    if isinstance(data, dict):
+        return {
+            key: (
+                RECORDING_REDACTED_VALUE
+                if key in RECORDING_REDACTED_FIELDS
+                else redact_json(value)
+            )
+            for key, value in data.items()
+        }
+    if isinstance(data, list):
+        return [redact_json(value) for value in data]
+    return data
+
+
+def redact_body(body: bytes) -> Optional[str]:
+    """
+    Gets the body of a request as it is recorded
+    :param body: The body of the request
+    :return: The body with the redacted fields of a JSON body replaced, None if the body cannot be recorded
+    """
+    if len(body) > RECORDING_MAX_BODY_SIZE:
+        return None
+    try:
+        text = body.decode("utf-8")
+    except UnicodeDecodeError:
+        return None
+    try:
+        return json.dumps(redact_json(json.loads(text)))
+    # Bodies that are not JSON have no fields to redact
+    except ValueError:
+        return text
+
+
+def redact_query(query: str) -> str:
+    """
+    Gets the query string of a request as it is recorded
+    :param query: The query string of the request
+    :return: The query string with the profiling token replaced
+    """
+    return urlencode(
+        [
+            (key, RECORDING_REDACTED_VALUE if key == PROFILE_QUERY_PARAMETER else value)
+            for key, value in parse_qsl(query, keep_blank_values=True)
+        ]
+    )
+
+
+def write_record(record: dict):
+    """
+    Appends a request to the recording file
+    :param record: The request
+    :return: None
+    """
+    line = json.dumps(record, separators=(",", ":"))
+    with RECORDING_LOCK:
+        with open(RECORDING_FILE, "a") as file:
+            file.write(line + "\n")
+
+
+########################################################################################################################
+# MIDDLEWARE
+########################################################################################################################
+
+
+async def recording_middleware(request: Request, call_next):
+    """
+    Records a request, with its body, timings and a digest of its response
+    :param request: The request
+    :param call_next: Handles the request
+    :return: The response
+    """
+    start_time = time.time()
+    start = time.perf_counter()
+    body = await request.body()
+
+    # The body has been read from the client, so hand the endpoint the copy read here
+    receive = request.receive
+    body_sent = False
+
+    async def receive_body():
+        nonlocal body_sent
+        if body_sent:
+            return await receive()
+        body_sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    request._receive = receive_body
+
+    response = await call_next(request)
+    recorded_body = redact_body(body)
+    record = {
+        "time": start_time,
+        "method": request.method,
+        "path": request.url.path,
+        "query": redact_query(request.url.query),
+        "session": get_session_pseudonym(request.headers.get("Authorization")),
+        "content_type": request.headers.get("Content-Type"),
+        "body": recorded_body,
+        "replayable": recorded_body is not None,
+        "status": response.status_code,
+    }
+
+    # Digest the response as it is sent rather than reading it first, so reports and other large responses are not
+    # held in memory, and the response keeps its headers as they are, repeated ones such as Set-Cookie included
+    body_iterator = response.body_iterator
+
+    async def digest_body():
+        digest = hashlib.sha256()
+        size = 0
+        async for chunk in body_iterator:
+            digest.update(chunk)
+            size += len(chunk)
+            yield chunk
+        record["duration"] = time.perf_counter() - start
+        record["response_size"] = size
+        record["response_digest"] = digest.hexdigest()
+        await run_in_threadpool(write_record, record)
+
+    response.body_iterator = digest_body()
+    return response
@@ -0,0 +1,64 @@
+########################################################################################################################
+# recycling_middleware.py
+# This file contains the middleware that replaces a worker of the multi-worker server once the memory it does not share
+# with the other workers exceeds MAX_WORKER_MEMORY_MB (see server_manager.py). The memory is checked every
+# WORKER_MEMORY_CHECK_INTERVAL requests, and a worker over the limit is asked to stop the same way gunicorn stops it,
+# so it finishes the requests it is handling while gunicorn starts its replacement.
+#
+# The middleware is only added to the app by the multi-worker server, a single process has no one to replace it.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import os
+import signal
+import warnings
+
+from starlette.requests import Request
+
+from backend.API.Managers.server_manager import MAX_WORKER_MEMORY_MB, get_worker_memory
+from backend.Constants.server_constants import WORKER_MEMORY_CHECK_INTERVAL
+
+########################################################################################################################
+# GLOBALS
+########################################################################################################################
+
+# The number of requests this worker has handled
+REQUEST_COUNT = 0
+
+# Whether this worker has been asked to stop
+RECYCLING = False
+
+
+########################################################################################################################
+# MIDDLEWARE
+########################################################################################################################
+
+
+async def recycling_middleware(request: Request, call_next):
+    """
+    Handles a request, then asks the worker to stop if its memory is over the limit
+    :param request: The request
+    :param call_next: Handles the request
+    :return: The response
+    """
+    global REQUEST_COUNT, RECYCLING
+    response = await call_next(request)
+    REQUEST_COUNT += 1
+    if not RECYCLING and REQUEST_COUNT % WORKER_MEMORY_CHECK_INTERVAL == 0:
+        memory = get_worker_memory()
+        if memory > MAX_WORKER_MEMORY_MB:
+            warnings.warn(
+                f"Worker {os.getpid()} uses {memory:.0f} MB, over the limit of {MAX_WORKER_MEMORY_MB:.0f} MB, "
+                f"replacing it after {REQUEST_COUNT} requests"
+            )
+            RECYCLING = True
+            os.kill(os.getpid(), signal.SIGTERM)
+    return response
@@ -0,0 +1,130 @@
+########################################################################################################################
+# session_middleware.py
+# This file contains the middleware that shares sessions between the workers of a multi-worker server. The session of
+# the user making a request is locked and brought up to date before the request is handled, and written for the other
+# workers once it has been (see session_manager.py). Requests that are not authenticated are handled as they are.
+#
+# The requests of a user wait for one another on the event loop rather than in the thread pool, which the endpoints
+# share. Within a worker they queue on a lock of the user, and only the request at the head of the queue tries the lock
+# file, which is tried without blocking and retried with a growing wait while another worker holds it. A burst of
+# requests from one user so holds no threads while it waits, and the request holding the lock always has one to finish
+# with.
+#
+# The middleware is only added to the app by the multi-worker server, a single process has nothing to share.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+
+from backend.API.Managers.authentication_manager import decode_token
+from backend.API.Managers.session_manager import (
+    load_session,
+    store_session,
+    try_lock_session,
+    unlock_session,
+)
+from backend.Constants.session_constants import (
+    SESSION_LOCK_MAX_RETRY_SECONDS,
+    SESSION_LOCK_MIN_RETRY_SECONDS,
+)
+
+########################################################################################################################
+# GLOBALS
+########################################################################################################################
+
+# The lock of each user with a request being handled by this worker, which the requests of the user queue on
+USER_LOCKS: Dict[str, asyncio.Lock] = dict()
+
+# The number of requests holding or waiting for each lock in USER_LOCKS, a lock is dropped once it has none
+USER_LOCK_REQUESTS: Dict[str, int] = dict()
+
+
+########################################################################################################################
+# HELPER FUNCTIONS
+########################################################################################################################
+
+
+def get_request_username(request: Request) -> Optional[str]:
+    """
+    Gets the user making a request
+    :param request: The request
+    :return: The username in the token of the request, None if it has no valid token
+    """
+    scheme, _, token = (request.headers.get("Authorization") or "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return decode_token(token)
+    # The endpoint rejects the request itself
+    except HTTPException:
+        return None
+
+
+@asynccontextmanager
+async def hold_session(username: str):
+    """
+    Waits until no other request of a user is being handled, by any worker, and locks the user's session until the end
+    of the block
+    :param username: The username of the user
+    :return: None
+    """
+    if username not in USER_LOCKS:
+        USER_LOCKS[username] = asyncio.Lock()
+        USER_LOCK_REQUESTS[username] = 0
+    lock = USER_LOCKS[username]
+    USER_LOCK_REQUESTS[username] += 1
+    try:
+        async with lock:
+            retry_seconds = SESSION_LOCK_MIN_RETRY_SECONDS
+            file = try_lock_session(username)
+            while file is None:
+                await asyncio.sleep(retry_seconds)
+                retry_seconds = min(2 * retry_seconds, SESSION_LOCK_MAX_RETRY_SECONDS)
+                file = try_lock_session(username)
+            try:
+                yield
+            finally:
+                unlock_session(file)
+    finally:
+        USER_LOCK_REQUESTS[username] -= 1
+        if USER_LOCK_REQUESTS[username] == 0:
+            del USER_LOCKS[username]
+            del USER_LOCK_REQUESTS[username]
+
+
+########################################################################################################################
+# MIDDLEWARE
+########################################################################################################################
+
+
+async def session_middleware(request: Request, call_next):
+    """
+    Handles a request with the latest session of its user, and shares the session once it has been handled
+    :param request: The request
+    :param call_next: Handles the request
+    :return: The response
+    """
+    username = get_request_username(request)
+    if username is None:
+        return await call_next(request)
+
+    async with hold_session(username):
+        # Reading and writing the session block, so they are done off the event loop
+        await run_in_threadpool(load_session, username)
+        response = await call_next(request)
+        await run_in_threadpool(store_session, username)
+    return response
@@ -0,0 +1,51 @@
+########################################################################################################################
+# tracing_middleware.py
+# This file contains the middleware that starts the root span of every request, which the spans of the managers,
+# algorithms, database queries, upstream calls and Blender renders run for the request are part of.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+from starlette.requests import Request
+
+from backend.Entities.Tracing.tracing import SPAN_KIND_SERVER, begin_span, end_span
+
+########################################################################################################################
+# MIDDLEWARE
+########################################################################################################################
+
+
+async def tracing_middleware(request: Request, call_next):
+    """
+    Runs a request as the root span of a trace, named after the route that handled it
+    :param request: The request
+    :param call_next: Handles the request
+    :return: The response
+    """
+    span, token = begin_span(
+        f"{request.method} {request.url.path}",
+        {"http.method": request.method, "http.target": request.url.path},
+        SPAN_KIND_SERVER,
+    )
+    error = None
+    try:
+        response = await call_next(request)
+        span.set_attribute("http.status_code", response.status_code)
+        return response
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        # Name the span after the path template so that requests to the same endpoint can be grouped
+        route = request.scope.get("route")
+        if route is not None:
+            span.name = f"{request.method} {route.path}"
+            span.set_attribute("http.route", route.path)
+        end_span(span, token, error)
@@ -0,0 +1,61 @@
+########################################################################################################################
+# analysis_input.py
+# This file contains the input model for running a full analysis in a single request.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+from pydantic import BaseModel
+
+from backend.API.Models.building_input import BuildingInput
+from backend.API.Models.cladding_input import CladdingInput
+from backend.API.Models.dimensions_input import DimensionsInput
+from backend.API.Models.importance_category_input import ImportanceCategoryInput
+from backend.API.Models.location_input import LocationInput
+from backend.API.Models.roof_input import RoofInput
+from backend.API.Models.roof_load_combination_input import RoofLoadCombinationInput
+from backend.API.Models.seismic_load_input import SeismicLoadInput
+from backend.API.Models.snow_load_input import SnowLoadInput
+from backend.API.Models.wall_load_combination_input import WallLoadCombinationInput
+from backend.API.Models.wind_load_input import WindLoadInput
+
+
+########################################################################################################################
+# MODEL
+########################################################################################################################
+
+
+class AnalysisInput(BaseModel):
+    """
+    The input model for a full analysis, the input of each step as it would be sent to its own endpoint
+    """
+
+    # The input for /location
+    location: LocationInput
+    # The input for /dimensions
+    dimensions: DimensionsInput
+    # The input for /cladding
+    cladding: CladdingInput
+    # The input for /roof
+    roof: RoofInput
+    # The input for /importance_category
+    importance_category: ImportanceCategoryInput
+    # The input for /building
+    building: BuildingInput
+    # The input for /set_wind_load
+    wind_load: WindLoadInput
+    # The input for /set_seismic_load
+    seismic_load: SeismicLoadInput
+    # The input for /set_snow_load
+    snow_load: SnowLoadInput
+    # The input for /get_wall_load_combinations
+    wall_load_combination: WallLoadCombinationInput
+    # The input for /get_roof_load_combinations
+    roof_load_combination: RoofLoadCombinationInput
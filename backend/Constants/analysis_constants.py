@@ -0,0 +1,78 @@
+########################################################################################################################
+# analysis_constants.py
+# This file contains the constants and enums pertaining to the dependency graph of a user's analysis
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+from enum import Enum
+
+
+########################################################################################################################
+# ENUMS
+########################################################################################################################
+
+
+class AnalysisNode(Enum):
+    """
+    Enum for the nodes of a user's analysis dependency graph
+    """
+
+    # Inputs provided directly by the user
+    LOCATION: str = "location"
+    DIMENSIONS: str = "dimensions"
+    CLADDING: str = "cladding"
+    ROOF: str = "roof"
+    IMPORTANCE_CATEGORY: str = "importance_category"
+    BUILDING_INPUT: str = "building_input"
+    WIND_LOAD_INPUT: str = "wind_load_input"
+    SEISMIC_LOAD_INPUT: str = "seismic_load_input"
+    SNOW_LOAD_INPUT: str = "snow_load_input"
+    # Results derived from the inputs
+    BUILDING: str = "building"
+    WIND_LOAD: str = "wind_load"
+    SEISMIC_LOAD: str = "seismic_load"
+    SNOW_LOAD: str = "snow_load"
+
+
+########################################################################################################################
+# CONSTANTS
+########################################################################################################################
+
+# The direct dependencies of each derived node, a node is recomputed when any of its dependencies change
+ANALYSIS_DEPENDENCIES = {
+    AnalysisNode.BUILDING: [
+        AnalysisNode.BUILDING_INPUT,
+        AnalysisNode.DIMENSIONS,
+        AnalysisNode.CLADDING,
+        AnalysisNode.ROOF,
+    ],
+    AnalysisNode.WIND_LOAD: [
+        AnalysisNode.WIND_LOAD_INPUT,
+        AnalysisNode.BUILDING,
+        AnalysisNode.IMPORTANCE_CATEGORY,
+        AnalysisNode.LOCATION,
+    ],
+    AnalysisNode.SEISMIC_LOAD: [
+        AnalysisNode.SEISMIC_LOAD_INPUT,
+        AnalysisNode.BUILDING,
+        AnalysisNode.IMPORTANCE_CATEGORY,
+        AnalysisNode.LOCATION,
+    ],
+    AnalysisNode.SNOW_LOAD: [
+        AnalysisNode.SNOW_LOAD_INPUT,
+        AnalysisNode.BUILDING,
+        AnalysisNode.IMPORTANCE_CATEGORY,
+        AnalysisNode.LOCATION,
+    ],
+}
+
+# How many location lookups of /analyze requests run alongside the rest of their analysis at once
+ANALYSIS_IO_WORKERS = 8
@@ -0,0 +1,28 @@
+########################################################################################################################
+# autosave_constants.py
+# This file contains the constants pertaining to the write-behind autosave of save data
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# CONSTANTS
+########################################################################################################################
+
+# A pending save is written once no new data has arrived for it for this many seconds
+AUTOSAVE_DEBOUNCE_SECONDS = 2.0
+
+# A pending save is written after this many seconds even if new data keeps arriving
+AUTOSAVE_MAX_DELAY_SECONDS = 10.0
+
+# How often the background writer checks for pending saves that are due, in seconds
+AUTOSAVE_POLL_SECONDS = 0.5
+
+# The number of locks the save files are spread over, a save file is only written while holding its lock
+AUTOSAVE_FLUSH_LOCKS = 64
+
+# The number of save files remembered to exist in the database, so that saving to them again needs no lookup
+AUTOSAVE_KNOWN_SAVE_FILES = 10000
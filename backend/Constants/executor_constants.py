@@ -0,0 +1,51 @@
+########################################################################################################################
+# executor_constants.py
+# This file contains the constants pertaining to the executors endpoint work is run on
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# CONSTANTS
+########################################################################################################################
+
+# The name of the process pool the CPU-heavy work runs on, as reported in the metrics
+CPU_EXECUTOR = "cpu"
+
+# The most processes of the CPU pool when CPU_WORKERS is not set, fewer if the machine has fewer cores
+DEFAULT_CPU_WORKERS = 4
+
+# The most tasks waiting for a process of the CPU pool when CPU_QUEUE_SIZE is not set, more are turned away
+DEFAULT_CPU_QUEUE_SIZE = 16
+
+# The I/O-bound work that waits on each resource, and the most calls to it that run at once. Calls over the limit wait
+# for a slot without holding a thread, and calls to one resource never hold up calls to another
+#   - upstream: Nominatim and CanSHM
+#   - database: reads and writes of save files
+#   - blender: Blender renders, each of which runs Blender in its own process
+IO_CONCURRENCY_LIMITS = {
+    "upstream": 16,
+    "database": 8,
+    "blender": 2,
+}
+
+# How long a client turned away because the CPU pool is full is asked to wait before retrying, in seconds
+EXECUTOR_RETRY_AFTER_SECONDS = 5
+
+# The buckets of the time tasks wait for an executor, in seconds
+EXECUTOR_QUEUE_WAIT_BUCKETS = (
+    0.001,
+    0.005,
+    0.01,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
@@ -8,9 +8,125 @@
 # Author: Noah Subedar [https://github.com/noahsub]
 ########################################################################################################################
 
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+from enum import Enum
+
+
+########################################################################################################################
+# ENUMS
+########################################################################################################################
+
+
+class GeocoderMode(Enum):
+    """
+    Enum for how addresses without a postal code are geocoded
+    """
+
+    # Only use Nominatim
+    NOMINATIM = "nominatim"
+    # Use the local geocoder, and Nominatim when the local geocoder is not confident enough
+    LOCAL_FIRST = "local_first"
+    # Only use the local geocoder, for deployments without outbound network access
+    LOCAL_ONLY = "local_only"
+
+    @staticmethod
+    def get_key_from_value(value):
+        match value:
+            case "nominatim":
+                return GeocoderMode.NOMINATIM
+            case "local_first":
+                return GeocoderMode.LOCAL_FIRST
+            case "local_only":
+                return GeocoderMode.LOCAL_ONLY
+
+
 ########################################################################################################################
 # CONSTANTS
 ########################################################################################################################
 
 # The radius of the earth in kilometers
 EARTH_RADIUS = 6371
+
+# The two letter code of each province and territory, keyed by its normalized name and by its code
+PROVINCE_CODES = {
+    "ALBERTA": "AB",
+    "BRITISH COLUMBIA": "BC",
+    "MANITOBA": "MB",
+    "NEW BRUNSWICK": "NB",
+    "NEWFOUNDLAND AND LABRADOR": "NL",
+    "NEWFOUNDLAND": "NL",
+    "NORTHWEST TERRITORIES": "NT",
+    "NOVA SCOTIA": "NS",
+    "NUNAVUT": "NU",
+    "ONTARIO": "ON",
+    "PRINCE EDWARD ISLAND": "PE",
+    "QUEBEC": "QC",
+    "SASKATCHEWAN": "SK",
+    "YUKON": "YT",
+    "YUKON TERRITORY": "YT",
+    "AB": "AB",
+    "BC": "BC",
+    "MB": "MB",
+    "NB": "NB",
+    "NL": "NL",
+    "NT": "NT",
+    "NS": "NS",
+    "NU": "NU",
+    "ON": "ON",
+    "PE": "PE",
+    "QC": "QC",
+    "SK": "SK",
+    "YT": "YT",
+}
+
+# Abbreviations expanded when normalizing place names, so that "Ft. St. John" and "Fort Saint John" match
+PLACE_NAME_ABBREVIATIONS = {
+    "FT": "FORT",
+    "MT": "MOUNT",
+    "PT": "POINT",
+    "ST": "SAINT",
+    "STE": "SAINTE",
+}
+
+# The minimum similarity, between 0 and 1, for a place name to be considered a fuzzy match
+GAZETTEER_MATCH_CUTOFF = 0.85
+
+# The size of the cells of the spatial index over the postal codes, in kilometers
+SPATIAL_INDEX_CELL_SIZE = 5
+
+# How many rings of cells around a point are searched before falling back to comparing against every postal code
+SPATIAL_INDEX_MAX_RINGS = 8
+
+# The number of suggestions returned by address autocomplete, by default and at most
+AUTOCOMPLETE_LIMIT = 10
+MAX_AUTOCOMPLETE_LIMIT = 50
+
+# How addresses without a postal code are geocoded when GEOCODER_MODE is not set
+DEFAULT_GEOCODER_MODE = GeocoderMode.LOCAL_FIRST
+
+# The minimum confidence, between 0 and 1, for a local geocoder match to be used without asking Nominatim
+LOCAL_GEOCODER_MIN_CONFIDENCE = 0.75
+
+# How much the confidence of a local geocoder match is scaled by when the address has words that are not part of the
+# city or province, e.g. a street, since the match is only the centroid of the city
+LOCAL_GEOCODER_STREET_FACTOR = 0.6
+
+# How much the confidence of a local geocoder match is scaled by when the address has no province
+LOCAL_GEOCODER_NO_PROVINCE_FACTOR = 0.9
+
+# The confidence of a local geocoder match of only a province
+LOCAL_GEOCODER_PROVINCE_CONFIDENCE = 0.3
+
+# The most words a city name is made of, e.g. "Niagara On The Lake"
+LOCAL_GEOCODER_MAX_CITY_WORDS = 5
+
+# How many location lookups are kept, and for how many seconds, so that repeated lookups of a site are served from memory
+LOCATION_CACHE_SIZE = 1024
+LOCATION_CACHE_TTL = 24 * 60 * 60
+
+# How many geocoded addresses are kept, and for how many seconds
+COORDINATES_CACHE_SIZE = 4096
+COORDINATES_CACHE_TTL = 24 * 60 * 60
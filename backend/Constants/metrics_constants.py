@@ -0,0 +1,17 @@
+########################################################################################################################
+# metrics_constants.py
+# This file contains the constants pertaining to the metrics exposed at /metrics
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# CONSTANTS
+########################################################################################################################
+
+# How often each worker of a multi-worker server dumps its metrics for the other workers to merge, in seconds. The
+# worker answering a scrape dumps its own metrics first, the metrics of the other workers are at most this old
+METRICS_WRITE_SECONDS = 1.0
@@ -0,0 +1,31 @@
+########################################################################################################################
+# profiling_constants.py
+# This file contains the constants pertaining to the on-demand profiling of requests
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# CONSTANTS
+########################################################################################################################
+
+# The header holding the profiling token to profile a request
+PROFILE_HEADER = "X-Profile"
+
+# The query parameter holding the profiling token to profile a request, for clients that cannot set headers
+PROFILE_QUERY_PARAMETER = "profile"
+
+# The response header holding the link to the profile of a profiled request
+PROFILE_URL_HEADER = "X-Profile-Url"
+
+# The endpoint serving the profiles, requests to it are never profiled
+PROFILE_ENDPOINT = "/get_profile"
+
+# How often the stacks of the threads handling a request are sampled, in seconds
+PROFILE_SAMPLE_INTERVAL = 0.005
+
+# The directory, relative to the project, the profiles are written to
+PROFILE_OUTPUT_DIRECTORY = "backend/output"
@@ -0,0 +1,28 @@
+########################################################################################################################
+# recording_constants.py
+# This file contains the constants used to record requests so that they can be replayed.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# CONSTANTS
+########################################################################################################################
+
+# The file requests are recorded to when RECORDING_FILE is not set, relative to the project
+DEFAULT_RECORDING_FILE = "backend/output/recorded_requests.jsonl"
+
+# Request bodies larger than this are not recorded, in bytes, the request is recorded as not replayable
+RECORDING_MAX_BODY_SIZE = 1024 * 1024
+
+# The fields of JSON request bodies whose values are never recorded, at any depth
+RECORDING_REDACTED_FIELDS = {"password"}
+
+# The value recorded in place of a redacted one
+RECORDING_REDACTED_VALUE = "[REDACTED]"
+
+# The endpoints that create and authenticate users, the replay creates its own users instead of replaying them
+RECORDING_AUTHENTICATION_ENDPOINTS = {"/register", "/login"}
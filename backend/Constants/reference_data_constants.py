@@ -0,0 +1,63 @@
+########################################################################################################################
+# reference_data_constants.py
+# This file contains the constants pertaining to the compiled reference data bundle
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# CONSTANTS
+########################################################################################################################
+
+# The version of the bundle layout written and read by this code, increment when the layout changes so that bundles
+# built by older code are rebuilt rather than misread
+REFERENCE_DATA_VERSION = 2
+
+# The directory bundles are written to, relative to the project root, each version gets its own subdirectory
+REFERENCE_DATA_DIRECTORY = "data/reference"
+
+# The file describing the tables and columns of a bundle
+REFERENCE_DATA_MANIFEST = "manifest.json"
+
+# The columns compiled into the bundle for each table, in the order they are stored
+REFERENCE_DATA_TABLES = {
+    "CanadianPostalCodeData": [
+        "postal_code",
+        "city",
+        "province",
+        "latitude",
+        "longitude",
+    ],
+    "ClimaticData": [
+        "ProvinceAndLocation",
+        "Latitude",
+        "Longitude",
+        "Elev_m",
+        "Jan_2_5_percent_C",
+        "Jan_1_percent_C",
+        "July_Dry_C",
+        "July_Wet_C",
+        "DegreeDaysBelow18C",
+        "Rain_15_Min_mm",
+        "OneDayRain_1_50_mm",
+        "Ann_Rain_mm",
+        "MoistIndex",
+        "Ann_Tot_Ppn_mm",
+        "DrivingRainWindPressures_Pa_1_5",
+        "SnowLoad_kPa_1_50_Ss",
+        "SnowLoad_kPa_1_50_Sr",
+        "HourlyWindPressures_kPa_1_10",
+        "HourlyWindPressures_kPa_1_50",
+    ],
+    "WindSpeedData": ["q_KPa", "V_ms"],
+}
+
+# The column each table is sorted by in the bundle, so that it can be searched with a binary search
+REFERENCE_DATA_SORT_COLUMNS = {
+    "CanadianPostalCodeData": "postal_code",
+    "ClimaticData": "ID",
+    "WindSpeedData": "ID",
+}
@@ -0,0 +1,41 @@
+########################################################################################################################
+# server_constants.py
+# This file contains the constants pertaining to running the server, with one process or with several workers
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# CONSTANTS
+########################################################################################################################
+
+# The address and port the server listens on
+SERVER_HOST = "0.0.0.0"
+SERVER_PORT = 42613
+
+# The number of worker processes when WORKERS is not set, one runs the server in a single process without gunicorn
+DEFAULT_WORKERS = 1
+
+# A worker is replaced after handling this many requests when MAX_REQUESTS is not set, 0 never replaces it
+DEFAULT_MAX_REQUESTS = 1000
+
+# A random number of requests up to this is added to the limit of each worker, so that they are not all replaced at once
+DEFAULT_MAX_REQUESTS_JITTER = 100
+
+# A worker is replaced once the memory it does not share with the others exceeds this many megabytes when
+# MAX_WORKER_MEMORY_MB is not set, 0 never replaces it
+DEFAULT_MAX_WORKER_MEMORY_MB = 0
+
+# How many requests a worker handles between checks of its memory
+WORKER_MEMORY_CHECK_INTERVAL = 20
+
+# How long a worker being replaced has to finish its requests, and how long a request may take before its worker is
+# considered stuck and killed, in seconds. Blender renders can take a couple of minutes
+WORKER_GRACEFUL_TIMEOUT = 30
+WORKER_TIMEOUT = 180
+
+# The worker class gunicorn runs the app with
+WORKER_CLASS = "uvicorn.workers.UvicornWorker"
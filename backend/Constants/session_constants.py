@@ -0,0 +1,18 @@
+########################################################################################################################
+# session_constants.py
+# This file contains the constants pertaining to the sessions shared between the workers of a multi-worker server
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# CONSTANTS
+########################################################################################################################
+
+# How long a request first waits before trying again for a session locked by another worker, in seconds. The wait
+# doubles with each try, up to SESSION_LOCK_MAX_RETRY_SECONDS
+SESSION_LOCK_MIN_RETRY_SECONDS = 0.001
+SESSION_LOCK_MAX_RETRY_SECONDS = 0.05
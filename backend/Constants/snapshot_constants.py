@@ -0,0 +1,23 @@
+########################################################################################################################
+# snapshot_constants.py
+# This file contains the constants pertaining to binary session snapshots
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# CONSTANTS
+########################################################################################################################
+
+# The bytes every snapshot starts with, used to reject data that is not a snapshot
+SNAPSHOT_MAGIC = b"ASPS"
+
+# The version of the snapshot format written by this code, increment when the layout of the User state changes and
+# register a migration from the previous version in snapshot_manager.SNAPSHOT_MIGRATIONS
+SNAPSHOT_VERSION = 1
+
+# The zstd compression level used for snapshots
+SNAPSHOT_COMPRESSION_LEVEL = 3
@@ -0,0 +1,60 @@
+########################################################################################################################
+# tracing_constants.py
+# This file contains the constants pertaining to the tracing of requests
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+from enum import Enum
+
+
+########################################################################################################################
+# ENUMS
+########################################################################################################################
+
+
+class TracingExporter(Enum):
+    """
+    Enum for where finished traces are written
+    """
+
+    # Tracing is disabled and the traced functions are left as they are
+    NONE = "none"
+    # Each trace is printed as a tree of spans and their durations
+    CONSOLE = "console"
+    # Each trace is appended to TRACING_FILE as a line of OTLP JSON
+    FILE = "file"
+
+    @staticmethod
+    def get_key_from_value(value):
+        match value:
+            case "none":
+                return TracingExporter.NONE
+            case "console":
+                return TracingExporter.CONSOLE
+            case "file":
+                return TracingExporter.FILE
+
+
+########################################################################################################################
+# CONSTANTS
+########################################################################################################################
+
+# Where traces are written when TRACING_EXPORTER is not set
+DEFAULT_TRACING_EXPORTER = TracingExporter.NONE
+
+# The file traces are written to with the file exporter when TRACING_FILE is not set, relative to the project
+DEFAULT_TRACING_FILE = "backend/output/traces.jsonl"
+
+# The name of the service in the exported traces
+TRACING_SERVICE_NAME = "aspenlog"
+
+# The longest database statement kept as an attribute of a span, in characters
+TRACING_MAX_STATEMENT_LENGTH = 500
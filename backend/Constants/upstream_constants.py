@@ -0,0 +1,58 @@
+########################################################################################################################
+# upstream_constants.py
+# This file contains the constants pertaining to the external services the backend calls
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# CONSTANTS
+########################################################################################################################
+
+# The NBCC 2020 Seismic Hazard Tool (CanSHM) GraphQL API
+CANSHM_URL = "https://www.earthquakescanada.nrcan.gc.ca/api/canshm/graphql"
+
+# The Nominatim server, and the scheme used to reach it
+NOMINATIM_DOMAIN = "nominatim.openstreetmap.org"
+NOMINATIM_SCHEME = "https"
+
+# The settings of each upstream service:
+#   - connect_timeout: seconds to wait for a connection to be established
+#   - read_timeout: seconds to wait for the response once connected
+#   - max_retries: how many times a failed request is retried
+#   - backoff: seconds waited before the first retry, doubled for each retry after it and jittered
+#   - max_backoff: the most seconds waited before a retry
+#   - failure_threshold: how many failures in a row open the circuit, so that requests fail fast
+#   - reset_timeout: seconds the circuit stays open before a single request is let through to test the service
+#   - pool_size: how many keep-alive connections are kept open to the service
+UPSTREAM_SETTINGS = {
+    "canshm": {
+        "connect_timeout": 3.05,
+        "read_timeout": 10,
+        "max_retries": 2,
+        "backoff": 0.25,
+        "max_backoff": 2,
+        "failure_threshold": 5,
+        "reset_timeout": 30,
+        "pool_size": 16,
+    },
+    "nominatim": {
+        "connect_timeout": 3.05,
+        "read_timeout": 10,
+        "max_retries": 1,
+        "backoff": 1,
+        "max_backoff": 4,
+        "failure_threshold": 5,
+        "reset_timeout": 60,
+        "pool_size": 4,
+    },
+}
+
+# How many responses of each upstream service are kept to fall back on while it is unavailable
+UPSTREAM_FALLBACK_CACHE_SIZE = 4096
+
+# How many of the most recent latencies of each upstream service are kept for percentiles
+UPSTREAM_LATENCY_WINDOW = 1000
@@ -0,0 +1,184 @@
+########################################################################################################################
+# gazetteer.py
+# This file contains classes that resolve Canadian place names to coordinates without a network connection. The places
+# are the city and province centroids of the CanadianPostalCodeData table.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import difflib
+import re
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+
+from backend.Constants.location_constants import (
+    GAZETTEER_MATCH_CUTOFF,
+    PLACE_NAME_ABBREVIATIONS,
+    PROVINCE_CODES,
+)
+from database.Constants.connection_constants import PrivilegeType
+from database.Entities.canadian_postal_code_data import CanadianPostalCodeData
+from database.Entities.database_connection import DatabaseConnection
+
+
+########################################################################################################################
+# HELPER FUNCTIONS
+########################################################################################################################
+
+
+def normalize_place_name(name: str) -> str:
+    """
+    Normalizes a place name so that differences in case, accents, punctuation and common abbreviations are ignored
+    :param name: The place name
+    :return: The normalized place name
+    """
+    # Remove accents, "Montréal" becomes "Montreal"
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(
+        character for character in name if not unicodedata.combining(character)
+    )
+    # Keep only letters and digits, everything else separates words
+    words = re.sub(r"[^A-Z0-9]+", " ", name.upper().replace("&", " AND ")).split()
+    # Expand abbreviations
+    return " ".join(PLACE_NAME_ABBREVIATIONS.get(word, word) for word in words)
+
+
+def get_province_code(province: str) -> Optional[str]:
+    """
+    Gets the two letter code of a province or territory
+    :param province: The name or code of the province or territory
+    :return: The two letter code, None if the province is not recognized
+    """
+    return PROVINCE_CODES.get(normalize_place_name(province))
+
+
+########################################################################################################################
+# MAIN CLASS
+########################################################################################################################
+
+
+class Gazetteer:
+    """
+    This class is used to look up the centroid of a city or province by name, with fuzzy matching of the name
+    """
+
+    # The (latitude, longitude) centroid of each normalized city name, per province code
+    cities: Dict[str, Dict[str, Tuple[float, float]]]
+    # The (latitude, longitude) centroid of each province code
+    provinces: Dict[str, Tuple[float, float]]
+
+    def __init__(self, places: Iterable[Tuple[str, str, float, float]]):
+        """
+        Initializes the Gazetteer object
+        :param places: The (city, province, latitude, longitude) of each place, a city listed more than once is placed
+        at the average of its coordinates
+        """
+        # Sum the coordinates of each city and province so that their centroids can be computed
+        city_sums = dict()
+        province_sums = dict()
+        for city, province, latitude, longitude in places:
+            province = get_province_code(province or "")
+            if province is None or latitude is None or longitude is None:
+                continue
+            city = normalize_place_name(city or "")
+            for sums, key in (
+                (city_sums.setdefault(province, dict()), city),
+                (province_sums, province),
+            ):
+                total = sums.setdefault(key, [0.0, 0.0, 0])
+                total[0] += latitude
+                total[1] += longitude
+                total[2] += 1
+
+        self.cities = {
+            province: {
+                city: (total[0] / total[2], total[1] / total[2])
+                for city, total in sums.items()
+                if city
+            }
+            for province, sums in city_sums.items()
+        }
+        self.provinces = {
+            province: (total[0] / total[2], total[1] / total[2])
+            for province, total in province_sums.items()
+        }
+
+    @classmethod
+    def from_database(cls) -> "Gazetteer":
+        """
+        Builds a gazetteer from the CanadianPostalCodeData table
+        :return: The gazetteer
+        """
+        # Connect to the database
+        database = DatabaseConnection(database_name="NBCC-2020")
+        engine = database.get_engine(privilege=PrivilegeType.ADMIN)
+        session = sessionmaker(autocommit=False, autoflush=True, bind=engine)
+        controller = session()
+        # Let the database average the coordinates of each city, this returns a few thousand rows instead of every
+        # postal code
+        places = (
+            controller.query(
+                CanadianPostalCodeData.city,
+                CanadianPostalCodeData.province,
+                func.avg(CanadianPostalCodeData.latitude),
+                func.avg(CanadianPostalCodeData.longitude),
+            )
+            .group_by(CanadianPostalCodeData.city, CanadianPostalCodeData.province)
+            .all()
+        )
+        controller.close()
+        database.close()
+        return cls(places)
+
+    def find_province(self, province: str) -> Optional[Tuple[float, float]]:
+        """
+        Finds the centroid of a province or territory
+        :param province: The name or code of the province or territory
+        :return: The (latitude, longitude) of the province, None if it is not known
+        """
+        return self.provinces.get(get_province_code(province) or "")
+
+    def find_city(
+        self, city: str, province: Optional[str] = None
+    ) -> Optional[Tuple[float, float, float]]:
+        """
+        Finds the centroid of a city
+        :param city: The name of the city
+        :param province: The name or code of the province the city is in, every province is searched if not provided
+        :return: The (latitude, longitude, similarity) of the best match, where similarity is 1 for an exact match, None
+        if no city is similar enough
+        """
+        name = normalize_place_name(city)
+        if not name:
+            return None
+        if province is not None:
+            provinces: List[str] = [get_province_code(province) or ""]
+        else:
+            provinces = list(self.cities.keys())
+
+        # Exact matches need no comparison
+        for code in provinces:
+            if name in self.cities.get(code, {}):
+                return (*self.cities[code][name], 1.0)
+
+        # Otherwise, take the most similar name across the provinces searched
+        best = None
+        for code in provinces:
+            names = self.cities.get(code, {})
+            for match in difflib.get_close_matches(
+                name, names.keys(), n=1, cutoff=GAZETTEER_MATCH_CUTOFF
+            ):
+                similarity = difflib.SequenceMatcher(None, name, match).ratio()
+                if best is None or similarity > best[2]:
+                    best = (*names[match], similarity)
+        return best
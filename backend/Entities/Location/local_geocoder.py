@@ -0,0 +1,238 @@
+########################################################################################################################
+# local_geocoder.py
+# This file contains classes that geocode free-form addresses without a network connection. An address is resolved to
+# the centroid of the city (or province) it names, using the places of the CanadianPostalCodeData table, together with a
+# confidence score so that callers can decide whether a more precise geocoder is worth asking.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import difflib
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from backend.Constants.location_constants import (
+    GAZETTEER_MATCH_CUTOFF,
+    LOCAL_GEOCODER_MAX_CITY_WORDS,
+    LOCAL_GEOCODER_NO_PROVINCE_FACTOR,
+    LOCAL_GEOCODER_PROVINCE_CONFIDENCE,
+    LOCAL_GEOCODER_STREET_FACTOR,
+    PROVINCE_CODES,
+)
+from backend.Entities.Location.gazetteer import normalize_place_name
+from backend.Entities.Location.postal_code_index import (
+    PostalCodeIndex,
+    get_postal_code_index,
+)
+
+########################################################################################################################
+# GLOBALS
+########################################################################################################################
+
+# The local geocoder, None until it is first built
+LOCAL_GEOCODER = None
+
+# Guards building the local geocoder
+LOCK = threading.Lock()
+
+# Words that say nothing about where in Canada an address is: the country, and whole or partial postal codes
+IGNORED_WORD_REGEX = re.compile(
+    r"^(CANADA|[A-Z]\d[A-Z]|\d[A-Z]\d|[A-Z]\d[A-Z]\d[A-Z]\d)$"
+)
+
+
+########################################################################################################################
+# MAIN CLASS
+########################################################################################################################
+
+
+class LocalGeocoder:
+    """
+    This class is used to resolve a free-form address to the centroid of the city or province it names
+    """
+
+    # The (city, province, province code, latitude, longitude, number of postal codes) of each place sharing a
+    # normalized city name, the place with the most postal codes first
+    cities: Dict[str, List[Tuple[str, str, str, float, float, int]]]
+    # The normalized city names of each province code, for fuzzy matching
+    province_city_names: Dict[str, List[str]]
+    # The (latitude, longitude) centroid of each province code
+    province_centroids: Dict[str, Tuple[float, float]]
+
+    def __init__(self, postal_code_index: PostalCodeIndex):
+        """
+        Initializes the LocalGeocoder object
+        :param postal_code_index: The postal code index, whose cities and province centroids are used as the places
+        """
+        index_cities = postal_code_index.cities
+        self.cities = dict()
+        self.province_city_names = dict()
+        for position in range(len(index_cities["city"])):
+            city = index_cities["city"][position].decode("utf-8")
+            code = str(index_cities["province_code"][position])
+            name = normalize_place_name(city)
+            if not name or not code:
+                continue
+            self.cities.setdefault(name, []).append(
+                (
+                    city,
+                    index_cities["province"][position].decode("utf-8"),
+                    code,
+                    float(index_cities["latitude"][position]),
+                    float(index_cities["longitude"][position]),
+                    int(index_cities["count"][position]),
+                )
+            )
+            self.province_city_names.setdefault(code, []).append(name)
+        for places in self.cities.values():
+            places.sort(key=lambda place: -place[5])
+        self.province_centroids = postal_code_index.province_centroids
+
+    def split_address(self, address: str) -> Tuple[List[List[str]], Optional[str], str]:
+        """
+        Splits an address into its comma separated parts of normalized words and takes the province off the end
+        :param address: The address, e.g. "123 Main St, Saint John, NB E2L 1A1, Canada"
+        :return: The words of each part without the province, the province code (None if there is none) and the words
+        the province was given as
+        """
+        parts = [
+            [word for word in words if not IGNORED_WORD_REGEX.match(word)]
+            for words in (
+                normalize_place_name(part).split() for part in address.split(",")
+            )
+        ]
+        parts = [words for words in parts if words]
+
+        # The province is the last thing in an address, either in its own part or after the city
+        if parts:
+            words = parts[-1]
+            for length in range(min(len(words), 4), 0, -1):
+                province_words = " ".join(words[-length:])
+                province = PROVINCE_CODES.get(province_words)
+                if province is not None:
+                    parts[-1] = words[:-length]
+                    return [words for words in parts if words], province, province_words
+        return parts, None, ""
+
+    def find_city(
+        self, name: str, province: Optional[str]
+    ) -> Optional[Tuple[Tuple[str, str, str, float, float, int], float]]:
+        """
+        Finds a city by its exact normalized name
+        :param name: The normalized name of the city
+        :param province: The province code the city must be in, any province if None
+        :return: The place with the most postal codes and the share of the postal codes of every place with the name
+        that it has, None if there is no such city
+        """
+        places = [
+            place
+            for place in self.cities.get(name, [])
+            if province is None or place[2] == province
+        ]
+        if not places:
+            return None
+        return places[0], places[0][5] / sum(place[5] for place in places)
+
+    def geocode(self, address: str) -> Optional[dict]:
+        """
+        Resolves an address to the centroid of the city, or failing that the province, that it names
+        :param address: The address
+        :return: The latitude, longitude, confidence between 0 and 1, precision ("city" or "province"), city and
+        province, None if the address names no known place
+        """
+        parts, province, province_words = self.split_address(address)
+        word_count = sum(len(words) for words in parts)
+
+        # "Quebec" on its own is the city, not the province
+        if not parts and province_words and province_words != province:
+            parts = [province_words.split()]
+            word_count = len(parts[0])
+
+        # The names the city may be given as, the city usually comes after the street so the parts are searched from
+        # the last one, and longer names are tried first so that "Saint John" is not taken for "John"
+        candidates = []
+        for words in reversed(parts):
+            for length in range(min(len(words), LOCAL_GEOCODER_MAX_CITY_WORDS), 0, -1):
+                candidates.append((" ".join(words[-length:]), word_count - length))
+
+        # Take the first exact match
+        match = None
+        for name, unmatched_words in candidates:
+            found = self.find_city(name, province)
+            if found is not None:
+                match = (*found, 1.0, unmatched_words)
+                break
+
+        # Otherwise, take the most similar name
+        if match is None:
+            names = (
+                self.province_city_names.get(province, [])
+                if province is not None
+                else self.cities.keys()
+            )
+            for name, unmatched_words in candidates:
+                # Street numbers and short words are not worth comparing
+                if len(name) < 4 or any(character.isdigit() for character in name):
+                    continue
+                for close_name in difflib.get_close_matches(
+                    name, names, n=1, cutoff=GAZETTEER_MATCH_CUTOFF
+                ):
+                    similarity = difflib.SequenceMatcher(None, name, close_name).ratio()
+                    if match is None or similarity > match[2]:
+                        match = (
+                            *self.find_city(close_name, province),
+                            similarity,
+                            unmatched_words,
+                        )
+
+        if match is not None:
+            place, share, similarity, unmatched_words = match
+            confidence = similarity
+            # Without a province, a name shared by cities in several provinces may be the wrong one
+            if province is None:
+                confidence *= LOCAL_GEOCODER_NO_PROVINCE_FACTOR * share
+            # The centroid of the city is only an approximation of a street address
+            if unmatched_words:
+                confidence *= LOCAL_GEOCODER_STREET_FACTOR
+            return {
+                "latitude": place[3],
+                "longitude": place[4],
+                "confidence": round(confidence, 3),
+                "precision": "city",
+                "city": place[0],
+                "province": place[1],
+            }
+
+        # Fall back to the centroid of the province
+        if province in self.province_centroids:
+            latitude, longitude = self.province_centroids[province]
+            return {
+                "latitude": latitude,
+                "longitude": longitude,
+                "confidence": LOCAL_GEOCODER_PROVINCE_CONFIDENCE,
+                "precision": "province",
+                "city": None,
+                "province": province,
+            }
+        return None
+
+
+def get_local_geocoder() -> LocalGeocoder:
+    """
+    Gets the local geocoder, building it and the postal code index on first use
+    :return: The local geocoder
+    """
+    global LOCAL_GEOCODER
+    if LOCAL_GEOCODER is None:
+        with LOCK:
+            if LOCAL_GEOCODER is None:
+                LOCAL_GEOCODER = LocalGeocoder(get_postal_code_index())
+    return LOCAL_GEOCODER
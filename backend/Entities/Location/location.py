@@ -12,22 +12,92 @@
 # IMPORTS
 ########################################################################################################################
 
-import json
+import functools
+import os
 import re
+import threading
 import uuid
-import requests
-from typing import Optional
+from typing import Optional, Tuple
+from dotenv import load_dotenv
 from geopy import Nominatim
+from geopy.adapters import RequestsAdapter
+from geopy.exc import (
+    GeocoderRateLimited,
+    GeocoderTimedOut,
+    GeocoderUnavailable,
+    GeopyError,
+)
 from geopy.extra.rate_limiter import RateLimiter
-from numpy import arcsin, sqrt, sin, cos, radians, inf
+from numpy import arcsin, sqrt, sin, cos, radians, inf, argmin, flatnonzero, isnan
 from sqlalchemy.orm import sessionmaker
-from backend.Constants.location_constants import EARTH_RADIUS
+from backend.Constants.location_constants import (
+    COORDINATES_CACHE_SIZE,
+    COORDINATES_CACHE_TTL,
+    DEFAULT_GEOCODER_MODE,
+    EARTH_RADIUS,
+    GeocoderMode,
+    LOCAL_GEOCODER_MIN_CONFIDENCE,
+)
 from backend.Constants.seismic_constants import SiteClass, SiteDesignation
+from backend.Constants.upstream_constants import (
+    CANSHM_URL,
+    NOMINATIM_DOMAIN,
+    NOMINATIM_SCHEME,
+    UPSTREAM_SETTINGS,
+)
+from backend.Entities.Location.gazetteer import normalize_place_name
+from backend.Entities.Location.local_geocoder import get_local_geocoder
+from backend.Entities.Location.location_cache import SingleFlightCache
+from backend.Entities.Location.reference_data import get_reference_data
+from backend.Entities.Upstream.upstream_client import (
+    UpstreamUnavailableError,
+    get_upstream_client,
+)
+from config import get_file_path
 from database.Constants.connection_constants import PrivilegeType
 from database.Entities.canadian_postal_code_data import CanadianPostalCodeData
 from database.Entities.climatic_data import ClimaticData
 from database.Entities.database_connection import DatabaseConnection
 
+########################################################################################################################
+# GLOBALS
+########################################################################################################################
+
+# Get the geocoder mode from data/EnvironmentVariables/.env, or the environment, one of the values of GeocoderMode
+load_dotenv(dotenv_path=get_file_path(relative_path="data/EnvironmentVariables/.env"))
+GEOCODER_MODE = (
+    GeocoderMode.get_key_from_value(os.getenv("GEOCODER_MODE")) or DEFAULT_GEOCODER_MODE
+)
+
+# The upstream services can be pointed at stand-ins, such as the mock servers of the load test, in the same file
+CANSHM_ENDPOINT = os.getenv("CANSHM_URL") or CANSHM_URL
+NOMINATIM_ENDPOINT_DOMAIN = os.getenv("NOMINATIM_DOMAIN") or NOMINATIM_DOMAIN
+NOMINATIM_ENDPOINT_SCHEME = os.getenv("NOMINATIM_SCHEME") or NOMINATIM_SCHEME
+
+# The rate limited Nominatim geocode function, shared so that its connections are kept alive and the rate limit holds
+# across requests, None until it is first used
+NOMINATIM_GEOCODE = None
+
+# Guards creating the Nominatim geocode function
+NOMINATIM_LOCK = threading.Lock()
+
+# The coordinates of recently geocoded addresses, by normalized address, so that the rate limited geocoder is asked once
+# for an address however many users look it up at the same time
+COORDINATES_CACHE = SingleFlightCache(COORDINATES_CACHE_SIZE, COORDINATES_CACHE_TTL)
+
+
+########################################################################################################################
+# EXCEPTIONS
+########################################################################################################################
+
+
+class LocationNotFoundError(Exception):
+    """
+    Raised when the coordinates of an address cannot be found
+    """
+
+    pass
+
 
 ########################################################################################################################
 # HELPER FUNCTIONS
@@ -37,14 +107,14 @@ from database.Entities.database_connection import DatabaseConnection
 def haversine_distance(lat1, lon1, lat2, lon2):
     """
     Calculates the distance between two points on the earth's surface using the haversine formula
-    :param lat1: The latitude of the first point
-    :param lon1: The longitude of the first point
+    :param lat1: The latitude of the first point, or an array of latitudes
+    :param lon1: The longitude of the first point, or an array of longitudes
     :param lat2: The latitude of the second point
     :param lon2: The longitude of the second point
-    :return: The distance between the two points in km
+    :return: The distance between the two points in km, or an array of distances
     """
     # Convert to radians
-    lat1, lon1, lat2, lon2 = radians([lat1, lon1, lat2, lon2])
+    lat1, lon1, lat2, lon2 = (radians(x) for x in (lat1, lon1, lat2, lon2))
     # Haversine formula
     # Reference: https://en.wikipedia.org/wiki/Haversine_formula
     a = (sin((lat2 - lat1) / 2)) ** 2
@@ -56,6 +126,96 @@ def haversine_distance(lat1, lon1, lat2, lon2):
     return distance
 
 
+def get_nominatim_geocode() -> RateLimiter:
+    """
+    Gets the rate limited Nominatim geocode function, creating it on first use
+    :return: The geocode function
+    """
+    global NOMINATIM_GEOCODE
+    if NOMINATIM_GEOCODE is None:
+        with NOMINATIM_LOCK:
+            if NOMINATIM_GEOCODE is None:
+                settings = UPSTREAM_SETTINGS["nominatim"]
+                geolocator = Nominatim(
+                    user_agent=str(uuid.uuid4()).replace("-", ""),
+                    timeout=settings["read_timeout"],
+                    domain=NOMINATIM_ENDPOINT_DOMAIN,
+                    scheme=NOMINATIM_ENDPOINT_SCHEME,
+                    # Retries are left to the upstream client
+                    adapter_factory=functools.partial(
+                        RequestsAdapter,
+                        pool_maxsize=settings["pool_size"],
+                        max_retries=0,
+                    ),
+                )
+                NOMINATIM_GEOCODE = RateLimiter(
+                    geolocator.geocode,
+                    min_delay_seconds=1,
+                    max_retries=0,
+                    swallow_exceptions=False,
+                )
+    return NOMINATIM_GEOCODE
+
+
+def geocode_with_nominatim(address: str) -> Optional[Tuple[float, float]]:
+    """
+    Finds the coordinates of an address with Nominatim
+    :param address: The address
+    :return: The (latitude, longitude) of the address, None if Nominatim does not know it or cannot be reached
+    """
+
+    def request():
+        location_info = get_nominatim_geocode()(address)
+        if location_info is None:
+            return None
+        return location_info.latitude, location_info.longitude
+
+    try:
+        return get_upstream_client("nominatim").call(
+            request,
+            cache_key=address,
+            retry_exceptions=(
+                GeocoderRateLimited,
+                GeocoderTimedOut,
+                GeocoderUnavailable,
+            ),
+            timeout_exceptions=(GeocoderTimedOut,),
+        )
+    # An unreachable Nominatim is treated like an unknown address
+    except (GeopyError, UpstreamUnavailableError):
+        return None
+
+
+def geocode_address(address: str) -> Tuple[float, float]:
+    """
+    Finds the coordinates of an address without a postal code, with the local geocoder and/or Nominatim depending on
+    GEOCODER_MODE
+    :param address: The address
+    :return: The (latitude, longitude) of the address
+    """
+    # Try the local geocoder first, a confident match saves the request to Nominatim
+    local_match = None
+    if GEOCODER_MODE != GeocoderMode.NOMINATIM:
+        local_match = get_local_geocoder().geocode(address)
+        if local_match is not None and (
+            GEOCODER_MODE == GeocoderMode.LOCAL_ONLY
+            or local_match["confidence"] >= LOCAL_GEOCODER_MIN_CONFIDENCE
+        ):
+            return local_match["latitude"], local_match["longitude"]
+
+    if GEOCODER_MODE != GeocoderMode.LOCAL_ONLY:
+        coordinates = geocode_with_nominatim(address)
+        if coordinates is not None:
+            return coordinates
+
+    # A match the local geocoder is not confident in is better than none at all when Nominatim has nothing either
+    if local_match is not None:
+        return local_match["latitude"], local_match["longitude"]
+    raise LocationNotFoundError(
+        f"Could not find the location of '{address}', perhaps use a postal code instead"
+    )
+
+
 ########################################################################################################################
 # MAIN CLASS
 ########################################################################################################################
@@ -127,6 +287,16 @@ class Location:
             # ensure that there is a space between the first 3 characters and the last 3 characters
             if len(postal_code) == 6:
                 postal_code = postal_code[:3] + " " + postal_code[3:]
+            # use the compiled reference data if it has been built
+            reference_data = get_reference_data()
+            if reference_data is not None:
+                coordinates = reference_data.find_postal_code(postal_code)
+                if coordinates is None:
+                    raise LocationNotFoundError(
+                        f"Could not find the postal code {postal_code}"
+                    )
+                self.latitude, self.longitude = coordinates
+                return
             # get the data from the database
             database = DatabaseConnection(database_name="NBCC-2020")
             engine = database.get_engine(privilege=PrivilegeType.ADMIN)
@@ -137,38 +307,34 @@ class Location:
                 .filter_by(postal_code=postal_code)
                 .first()
             )
+            controller.close()
+            database.close()
+            if location_info is None:
+                raise LocationNotFoundError(
+                    f"Could not find the postal code {postal_code}"
+                )
             self.latitude = location_info.latitude
             self.longitude = location_info.longitude
         else:
-            geolocator = Nominatim(user_agent=str(uuid.uuid4()).replace("-", ""))
-            geocode = RateLimiter(geolocator.geocode, min_delay_seconds=1)
-            location_info = geocode(address, timeout=10)
-
-            # Ensure function is given a valid location
-            # TODO: Make custom error for this
-            assert location_info is not None
-
-            # Set the latitude and longitude
-            self.latitude = location_info.latitude
-            self.longitude = location_info.longitude
+            # Set the latitude and longitude, sharing the lookup with any other lookup of the same address
+            self.latitude, self.longitude = COORDINATES_CACHE.get(
+                normalize_place_name(address), lambda: geocode_address(address)
+            )
 
     def get_seismic_data_xv(self):
         """
         Fetches the seismic data from the NBCC 2020 Seismic Hazard Tool API using the XV site designation
         :return:
         """
-        # The url of the API
-        url = "https://www.earthquakescanada.nrcan.gc.ca/api/canshm/graphql"
 
         # The payload and headers containing the data we want to use in our POST request
         payload = f'{{"query":"query{{\\n NBC2020(latitude: {self.latitude}, longitude: {self.longitude}){{\\n X148: siteDesignationsXv(vs30: {self.xv}, poe50: [2.0]){{\\n sa0p2\\n sa1p0\\n }}\\n }}\\n}}","variables":{{}}}}'
         headers = {"Content-Type": "application/json"}
 
-        # The response received from the POST request
-        response = requests.request("POST", url, headers=headers, data=payload)
-
-        # Convert the data to json
-        data = json.loads(response.text)
+        # The response received from the POST request, identical requests answer the same so the payload is the cache key
+        data = get_upstream_client("canshm").post_json(
+            CANSHM_ENDPOINT, cache_key=payload, headers=headers, data=payload
+        )
 
         # Assign the data to the attributes
         self.design_spectral_acceleration_0_2 = (
@@ -183,18 +349,15 @@ class Location:
         Fetches the seismic data from the NBCC 2020 Seismic Hazard Tool API using the XS site designation
         :return:
         """
-        # The url of the API
-        url = "https://www.earthquakescanada.nrcan.gc.ca/api/canshm/graphql"
 
         # The payload and headers containing the data we want to use in our POST request
         payload = f'{{"query":"query{{\\n NBC2020(latitude: {self.latitude}, longitude: {self.longitude}){{\\n XC: siteDesignationsXs(siteClass: C, poe50: [2.0]){{\\n sa0p2\\n sa1p0\\n }}\\n }}\\n}}","variables":{{}}}}'
         headers = {"Content-Type": "application/json"}
 
-        # The response received from the POST request
-        response = requests.request("POST", url, headers=headers, data=payload)
-
-        # Convert the data to json
-        data = json.loads(response.text)
+        # The response received from the POST request, identical requests answer the same so the payload is the cache key
+        data = get_upstream_client("canshm").post_json(
+            CANSHM_ENDPOINT, cache_key=payload, headers=headers, data=payload
+        )
 
         # example data
         # {'data': {'NBC2020': {'XC': [{'sa0p2': 0.658, 'sa1p0': 0.209}]}}}
@@ -210,6 +373,12 @@ class Location:
         Fetches the climatic data from the database
         :return: None
         """
+        # Use the compiled reference data if it has been built
+        reference_data = get_reference_data()
+        if reference_data is not None:
+            self.get_climatic_data_from_reference_data()
+            return
+
         # Connect to the database
         database = DatabaseConnection(database_name="NBCC-2020")
         engine = database.get_engine(privilege=PrivilegeType.ADMIN)
@@ -240,6 +409,31 @@ class Location:
         self.snow_load = min_entry.SnowLoad_kPa_1_50_Sr
         self.rain_load = min_entry.SnowLoad_kPa_1_50_Ss
 
+    def get_climatic_data_from_reference_data(self):
+        """
+        Fetches the climatic data from the compiled reference data, this picks the same station as get_climatic_data
+        :return: None
+        """
+        reference_data = get_reference_data()
+        climatic_data = reference_data.tables["ClimaticData"]
+        # Distances to every station at once, stations without a location are never picked
+        distances = haversine_distance(
+            climatic_data["Latitude"],
+            climatic_data["Longitude"],
+            self.latitude,
+            self.longitude,
+        )
+        distances[isnan(distances)] = inf
+        # The first station within 10km in table order is taken, otherwise the closest station
+        close = flatnonzero(distances < 10)
+        index = close[0] if len(close) > 0 else argmin(distances)
+        entry = reference_data.get_row("ClimaticData", index)
+
+        # Set the climatic attributes
+        self.wind_velocity_pressure = entry["HourlyWindPressures_kPa_1_50"]
+        self.snow_load = entry["SnowLoad_kPa_1_50_Sr"]
+        self.rain_load = entry["SnowLoad_kPa_1_50_Ss"]
+
     def __str__(self):
         """
         String representation of the Location class
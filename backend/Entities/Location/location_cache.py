@@ -0,0 +1,145 @@
+########################################################################################################################
+# location_cache.py
+# This file contains the cache used for location lookups. Results are kept for a while, and lookups of the same key that
+# arrive while the first one is still being computed wait for it rather than repeating it (single-flight), so that a
+# project opened by several users at once geocodes and queries the seismic hazard tool once.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+########################################################################################################################
+# IN-FLIGHT CLASS
+########################################################################################################################
+
+
+class InFlightLookup:
+    """
+    This class is used to hand the result of a lookup to the lookups of the same key waiting on it
+    """
+
+    # Set once the lookup has finished
+    done: threading.Event
+    # The result of the lookup
+    value: Any
+    # The error raised by the lookup, None if it succeeded
+    error: Optional[BaseException]
+
+    def __init__(self):
+        """
+        Initializes the InFlightLookup object
+        """
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+########################################################################################################################
+# MAIN CLASS
+########################################################################################################################
+
+
+class SingleFlightCache:
+    """
+    This class is used to keep the results of lookups for a while and to share a lookup between concurrent callers
+    """
+
+    # The (time stored, result) of each key, the least recently used first
+    entries: OrderedDict
+    # The lookups being computed, by key
+    in_flight: Dict[Hashable, InFlightLookup]
+    # The most results kept
+    max_size: int
+    # How many seconds a result is kept
+    ttl: float
+    # The number of lookups answered from a kept result, by waiting on another lookup, and by computing the result
+    counters: Dict[str, int]
+    # Guards the entries, in-flight lookups and counters
+    lock: threading.Lock
+
+    def __init__(self, max_size: int, ttl: float):
+        """
+        Initializes the SingleFlightCache object
+        :param max_size: The most results kept
+        :param ttl: How many seconds a result is kept
+        """
+        self.entries = OrderedDict()
+        self.in_flight = dict()
+        self.max_size = max_size
+        self.ttl = ttl
+        self.counters = {"hits": 0, "coalesced": 0, "misses": 0}
+        self.lock = threading.Lock()
+
+    def get(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Gets the result of a lookup, computing it only if it is not kept and no other caller is computing it
+        :param key: The key of the lookup
+        :param compute: Computes the result, errors are raised to every caller waiting on it and are not kept
+        :return: The result
+        """
+        with self.lock:
+            # Answer from a kept result that has not expired
+            entry: Optional[Tuple[float, Any]] = self.entries.get(key)
+            if entry is not None and time.monotonic() - entry[0] < self.ttl:
+                self.entries.move_to_end(key)
+                self.counters["hits"] += 1
+                return entry[1]
+            # Wait on the caller already computing the result
+            lookup = self.in_flight.get(key)
+            is_leader = lookup is None
+            if is_leader:
+                lookup = InFlightLookup()
+                self.in_flight[key] = lookup
+                self.counters["misses"] += 1
+            else:
+                self.counters["coalesced"] += 1
+
+        if not is_leader:
+            lookup.done.wait()
+            if lookup.error is not None:
+                raise lookup.error
+            return lookup.value
+
+        try:
+            lookup.value = compute()
+        except BaseException as e:
+            lookup.error = e
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+                if lookup.error is None:
+                    self.entries[key] = (time.monotonic(), lookup.value)
+                    self.entries.move_to_end(key)
+                    while len(self.entries) > self.max_size:
+                        self.entries.popitem(last=False)
+            lookup.done.set()
+        return lookup.value
+
+    def clear(self):
+        """
+        Drops every kept result
+        :return: None
+        """
+        with self.lock:
+            self.entries.clear()
+
+    def get_metrics(self) -> dict:
+        """
+        Gets the metrics of the cache
+        :return: The number of hits, coalesced lookups and misses, and the number of results kept
+        """
+        with self.lock:
+            return {**self.counters, "size": len(self.entries)}
@@ -0,0 +1,482 @@
+########################################################################################################################
+# postal_code_index.py
+# This file contains classes that hold the CanadianPostalCodeData table in memory and index it, so that location
+# lookups are served without a database query or an external geocoder.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import sessionmaker
+
+from backend.Constants.location_constants import (
+    AUTOCOMPLETE_LIMIT,
+    EARTH_RADIUS,
+    PROVINCE_CODES,
+    SPATIAL_INDEX_CELL_SIZE,
+    SPATIAL_INDEX_MAX_RINGS,
+)
+from backend.Entities.Location.gazetteer import get_province_code, normalize_place_name
+from backend.Entities.Location.reference_data import get_reference_data
+from database.Constants.connection_constants import PrivilegeType
+from database.Entities.canadian_postal_code_data import CanadianPostalCodeData
+from database.Entities.database_connection import DatabaseConnection
+
+########################################################################################################################
+# GLOBALS
+########################################################################################################################
+
+# The postal code index, None until it is first built
+POSTAL_CODE_INDEX = None
+
+# Guards building the postal code index
+LOCK = threading.Lock()
+
+
+########################################################################################################################
+# HELPER FUNCTIONS
+########################################################################################################################
+
+
+def to_unit_vectors(latitudes, longitudes) -> np.ndarray:
+    """
+    Converts coordinates to points on the unit sphere, the straight line distance between two points grows with the
+    distance along the earth's surface, so the nearest point is the same either way
+    :param latitudes: The latitude, or an array of latitudes
+    :param longitudes: The longitude, or an array of longitudes
+    :return: The (x, y, z) of each point
+    """
+    latitudes = np.radians(latitudes)
+    longitudes = np.radians(longitudes)
+    return np.stack(
+        [
+            np.cos(latitudes) * np.cos(longitudes),
+            np.cos(latitudes) * np.sin(longitudes),
+            np.sin(latitudes),
+        ],
+        axis=-1,
+    )
+
+
+def load_postal_code_data() -> Dict[str, np.ndarray]:
+    """
+    Loads the CanadianPostalCodeData table sorted by postal code in byte order, from the compiled reference data if it
+    has been built, otherwise from the database
+    :return: The postal_code, city, province, latitude and longitude columns, text is UTF-8 encoded bytes
+    """
+    reference_data = get_reference_data()
+    if reference_data is not None:
+        return reference_data.tables["CanadianPostalCodeData"]
+
+    # Connect to the database
+    database = DatabaseConnection(database_name="NBCC-2020")
+    engine = database.get_engine(privilege=PrivilegeType.ADMIN)
+    session = sessionmaker(autocommit=False, autoflush=True, bind=engine)
+    controller = session()
+    rows = (
+        controller.query(
+            CanadianPostalCodeData.postal_code,
+            CanadianPostalCodeData.city,
+            CanadianPostalCodeData.province,
+            CanadianPostalCodeData.latitude,
+            CanadianPostalCodeData.longitude,
+        )
+        .order_by(CanadianPostalCodeData.postal_code, CanadianPostalCodeData.ID)
+        .all()
+    )
+    controller.close()
+    database.close()
+
+    # Store the columns the same way as the compiled reference data
+    postal_codes, cities, provinces, latitudes, longitudes = (
+        zip(*rows) if rows else [[]] * 5
+    )
+    columns = {
+        "postal_code": np.array(
+            [(x or "").encode("utf-8") for x in postal_codes], dtype=bytes
+        ),
+        "city": np.array([(x or "").encode("utf-8") for x in cities], dtype=bytes),
+        "province": np.array(
+            [(x or "").encode("utf-8") for x in provinces], dtype=bytes
+        ),
+        "latitude": np.array(latitudes, dtype=np.float64),
+        "longitude": np.array(longitudes, dtype=np.float64),
+    }
+    # The order of the database depends on its collation, the binary searches rely on byte order
+    order = np.argsort(columns["postal_code"], kind="stable")
+    return {column: values[order] for column, values in columns.items()}
+
+
+########################################################################################################################
+# SPATIAL INDEX CLASS
+########################################################################################################################
+
+
+class SpatialIndex:
+    """
+    This class is used to find the nearest of a set of points. The points are placed on the unit sphere and bucketed into
+    a grid of cubes, and a search only compares against the points in the cubes around the query
+    """
+
+    # The points on the unit sphere, grouped by cube
+    points: np.ndarray
+    # The position in the original arrays of each point
+    positions: np.ndarray
+    # The length of the edge of a cube
+    cell_size: float
+    # The number of cubes along each axis
+    cells_per_axis: int
+    # The key of each cube that contains points, sorted
+    cell_keys: np.ndarray
+    # Where the points of each cube start and end in points
+    cell_starts: np.ndarray
+    cell_ends: np.ndarray
+    # The key offsets of the cubes in each ring around a cube, the first ring is the cube itself
+    rings: List[np.ndarray]
+
+    def __init__(self, latitudes: np.ndarray, longitudes: np.ndarray):
+        """
+        Initializes the SpatialIndex object
+        :param latitudes: The latitude of each point
+        :param longitudes: The longitude of each point, points with a NaN coordinate are left out
+        """
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        valid = ~(np.isnan(latitudes) | np.isnan(longitudes))
+        self.positions = np.flatnonzero(valid)
+        self.points = to_unit_vectors(latitudes[valid], longitudes[valid])
+
+        # The grid is padded so that the rings around any cube stay inside it
+        self.cell_size = SPATIAL_INDEX_CELL_SIZE / EARTH_RADIUS
+        self.cells_per_axis = (
+            int(np.ceil(2 / self.cell_size)) + 2 * SPATIAL_INDEX_MAX_RINGS + 1
+        )
+
+        # Group the points by cube
+        keys = self.get_cell_keys(self.points)
+        order = np.argsort(keys, kind="stable")
+        self.points = self.points[order]
+        self.positions = self.positions[order]
+        self.cell_keys, self.cell_starts = np.unique(keys[order], return_index=True)
+        self.cell_ends = np.append(self.cell_starts[1:], len(keys))
+
+        # The cubes at exactly k steps from a cube, for each ring k
+        n = self.cells_per_axis
+        self.rings = []
+        for k in range(SPATIAL_INDEX_MAX_RINGS + 1):
+            steps = np.arange(-k, k + 1)
+            dx, dy, dz = [x.ravel() for x in np.meshgrid(steps, steps, steps)]
+            on_ring = np.maximum(np.maximum(abs(dx), abs(dy)), abs(dz)) == k
+            self.rings.append((dx * n * n + dy * n + dz)[on_ring])
+
+    def get_cell_keys(self, points: np.ndarray) -> np.ndarray:
+        """
+        Gets the key of the cube each point is in
+        :param points: The points on the unit sphere
+        :return: The key of the cube of each point
+        """
+        cells = (
+            np.floor((points + 1) / self.cell_size).astype(np.int64)
+            + SPATIAL_INDEX_MAX_RINGS
+        )
+        n = self.cells_per_axis
+        return cells[..., 0] * n * n + cells[..., 1] * n + cells[..., 2]
+
+    def nearest(self, latitude: float, longitude: float) -> Optional[Tuple[int, float]]:
+        """
+        Finds the point nearest to a location
+        :param latitude: The latitude of the location
+        :param longitude: The longitude of the location
+        :return: The position of the nearest point and its distance in km, None if there are no points
+        """
+        if len(self.points) == 0:
+            return None
+        point = to_unit_vectors(latitude, longitude)
+        center = self.get_cell_keys(point)
+
+        best_index, best_distance = None, np.inf
+        for k, ring in enumerate(self.rings):
+            # Find the cubes of the ring that contain points
+            keys = center + ring
+            found = np.minimum(
+                np.searchsorted(self.cell_keys, keys), len(self.cell_keys) - 1
+            )
+            for cell in found[self.cell_keys[found] == keys]:
+                start, end = self.cell_starts[cell], self.cell_ends[cell]
+                distances = np.linalg.norm(self.points[start:end] - point, axis=1)
+                index = int(np.argmin(distances))
+                if distances[index] < best_distance:
+                    best_index, best_distance = start + index, distances[index]
+            # Every point outside the rings searched so far is further than k cubes away
+            if best_distance <= k * self.cell_size:
+                break
+        else:
+            # Nothing close by, compare against every point
+            distances = np.linalg.norm(self.points - point, axis=1)
+            best_index = int(np.argmin(distances))
+            best_distance = distances[best_index]
+
+        # Convert the straight line distance to the distance along the earth's surface
+        distance = 2 * EARTH_RADIUS * np.arcsin(min(best_distance / 2, 1.0))
+        return int(self.positions[best_index]), float(distance)
+
+
+########################################################################################################################
+# PREFIX INDEX CLASS
+########################################################################################################################
+
+
+class PrefixIndex:
+    """
+    This class is used to find the keys that start with a prefix. The keys are kept in a sorted array, so the keys that
+    share a prefix are next to each other and are found with two binary searches
+    """
+
+    # The keys, sorted
+    keys: np.ndarray
+    # The value each key points to
+    values: np.ndarray
+
+    def __init__(self, keys: np.ndarray, values: np.ndarray, is_sorted: bool = False):
+        """
+        Initializes the PrefixIndex object
+        :param keys: The keys as bytes
+        :param values: The value each key points to
+        :param is_sorted: Whether the keys are already sorted
+        """
+        if not is_sorted:
+            order = np.argsort(keys, kind="stable")
+            keys, values = keys[order], values[order]
+        self.keys = keys
+        self.values = values
+
+    def find(self, prefix: bytes) -> np.ndarray:
+        """
+        Finds the values of the keys that start with a prefix
+        :param prefix: The prefix
+        :return: The values, in the order of their keys
+        """
+        start = np.searchsorted(self.keys, prefix, side="left")
+        # No UTF-8 encoded text continues with this byte, so every key starting with the prefix sorts before it
+        end = np.searchsorted(self.keys, prefix + b"\xff", side="left")
+        return self.values[start:end]
+
+
+########################################################################################################################
+# MAIN CLASS
+########################################################################################################################
+
+
+class PostalCodeIndex:
+    """
+    This class is used to look up postal codes in memory
+    """
+
+    # The postal_code, city, province, latitude and longitude columns, sorted by postal code
+    columns: Dict[str, np.ndarray]
+    # The spatial index over the coordinates of the postal codes
+    spatial_index: SpatialIndex
+    # The postal codes without spaces, pointing to their position in the columns
+    postal_code_index: PrefixIndex
+    # The name, province, latitude, longitude and number of postal codes of each city
+    cities: Dict[str, np.ndarray]
+    # The normalized city names, pointing to their position in cities
+    city_index: PrefixIndex
+    # The normalized province names and codes, pointing to their code
+    province_index: PrefixIndex
+    # The (latitude, longitude) centroid of the postal codes of each province code
+    province_centroids: Dict[str, Tuple[float, float]]
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        """
+        Initializes the PostalCodeIndex object
+        :param columns: The postal_code, city, province, latitude and longitude columns, sorted by postal code
+        """
+        self.columns = columns
+        self.spatial_index = SpatialIndex(columns["latitude"], columns["longitude"])
+
+        # Removing the space keeps the postal codes sorted when it is always the fourth character, which is checked
+        # rather than assumed since a postal code written without it would sort elsewhere
+        postal_codes = np.char.replace(np.asarray(columns["postal_code"]), b" ", b"")
+        self.postal_code_index = PrefixIndex(
+            postal_codes,
+            np.arange(len(postal_codes)),
+            is_sorted=bool(np.all(postal_codes[:-1] <= postal_codes[1:])),
+        )
+
+        # Group the postal codes by city, the number of postal codes of a city is used to rank it
+        places, inverse = np.unique(
+            np.char.add(
+                np.char.add(np.asarray(columns["province"]), b"|"),
+                np.asarray(columns["city"]),
+            ),
+            return_inverse=True,
+        )
+        counts = np.bincount(inverse, minlength=len(places))
+        self.cities = {
+            "city": np.array([place.split(b"|", 1)[1] for place in places]),
+            "province": np.array([place.split(b"|", 1)[0] for place in places]),
+            "latitude": np.bincount(inverse, columns["latitude"], len(places)) / counts,
+            "longitude": np.bincount(inverse, columns["longitude"], len(places))
+            / counts,
+            "count": counts,
+        }
+        # The province of each city as a two letter code, whichever way the data names it
+        codes = {
+            province: get_province_code(province.decode("utf-8")) or ""
+            for province in set(self.cities["province"])
+        }
+        self.cities["province_code"] = np.array(
+            [codes[province] for province in self.cities["province"]]
+        )
+        self.city_index = PrefixIndex(
+            np.array(
+                [
+                    normalize_place_name(city.decode("utf-8")).encode("utf-8")
+                    for city in self.cities["city"]
+                ]
+            ),
+            np.arange(len(places)),
+        )
+        self.province_index = PrefixIndex(
+            np.array([name.encode("utf-8") for name in PROVINCE_CODES.keys()]),
+            np.array(list(PROVINCE_CODES.values())),
+        )
+        self.province_centroids = dict()
+        for code in set(self.cities["province_code"]) - {""}:
+            in_province = self.cities["province_code"] == code
+            counts = self.cities["count"][in_province]
+            self.province_centroids[str(code)] = (
+                float(np.average(self.cities["latitude"][in_province], weights=counts)),
+                float(
+                    np.average(self.cities["longitude"][in_province], weights=counts)
+                ),
+            )
+
+    def get_entry(self, position: int) -> dict:
+        """
+        Gets a postal code
+        :param position: The position of the postal code in the columns
+        :return: The postal code, city, province, latitude and longitude
+        """
+        return {
+            "postal_code": self.columns["postal_code"][position].decode("utf-8"),
+            "city": self.columns["city"][position].decode("utf-8"),
+            "province": self.columns["province"][position].decode("utf-8"),
+            "latitude": float(self.columns["latitude"][position]),
+            "longitude": float(self.columns["longitude"][position]),
+        }
+
+    def reverse_geocode(self, latitude: float, longitude: float) -> Optional[dict]:
+        """
+        Finds the postal code nearest to a location
+        :param latitude: The latitude of the location
+        :param longitude: The longitude of the location
+        :return: The postal code, city, province, latitude, longitude and distance in km, None if there are no postal
+        codes
+        """
+        nearest = self.spatial_index.nearest(latitude, longitude)
+        if nearest is None:
+            return None
+        position, distance = nearest
+        return {**self.get_entry(position), "distance": distance}
+
+    def autocomplete(self, query: str, limit: int = AUTOCOMPLETE_LIMIT) -> List[dict]:
+        """
+        Suggests postal codes, cities and provinces for a partially typed address. Postal codes come first, then
+        cities with the most postal codes, then provinces
+        :param query: The partially typed address, e.g. "M5S 1", "Toron" or "Kingston, O"
+        :param limit: The maximum number of suggestions
+        :return: The type, label, postal code (for postal codes), city, province, latitude and longitude of each
+        suggestion
+        """
+        suggestions = []
+
+        # Postal codes, typed with or without the space, start with a letter followed by a digit
+        postal_code = "".join(query.split()).upper()
+        if re.match(r"^[A-Z]\d[A-Z0-9]{0,4}$", postal_code):
+            matches = self.postal_code_index.find(postal_code.encode("utf-8"))
+            for position in matches[:limit]:
+                entry = self.get_entry(position)
+                suggestions.append(
+                    {
+                        "type": "postal_code",
+                        "label": f"{entry['postal_code']}, {entry['city']}, {entry['province']}",
+                        **entry,
+                    }
+                )
+
+        # Cities, optionally followed by a comma and a province, the province is matched by prefix
+        city, _, province = query.partition(",")
+        city = normalize_place_name(city).encode("utf-8")
+        province = normalize_place_name(province).encode("utf-8")
+        provinces = set(self.province_index.find(province)) if province else None
+        if city and len(suggestions) < limit:
+            matches = self.city_index.find(city)
+            if provinces is not None:
+                matches = matches[
+                    np.isin(self.cities["province_code"][matches], list(provinces))
+                ]
+            # Take the cities with the most postal codes without sorting every match
+            count = limit - len(suggestions)
+            if len(matches) > count:
+                matches = matches[
+                    np.argpartition(-self.cities["count"][matches], count - 1)[:count]
+                ]
+            matches = matches[np.argsort(-self.cities["count"][matches], kind="stable")]
+            for position in matches:
+                entry = {
+                    "city": self.cities["city"][position].decode("utf-8"),
+                    "province": self.cities["province"][position].decode("utf-8"),
+                    "latitude": float(self.cities["latitude"][position]),
+                    "longitude": float(self.cities["longitude"][position]),
+                }
+                suggestions.append(
+                    {
+                        "type": "city",
+                        "label": f"{entry['city']}, {entry['province']}",
+                        **entry,
+                    }
+                )
+
+        # Provinces, by name or code
+        if city and not province and len(suggestions) < limit:
+            for code in dict.fromkeys(self.province_index.find(city)):
+                centroid = self.province_centroids.get(str(code))
+                if centroid is None:
+                    continue
+                suggestions.append(
+                    {
+                        "type": "province",
+                        "label": str(code),
+                        "province": str(code),
+                        "latitude": centroid[0],
+                        "longitude": centroid[1],
+                    }
+                )
+
+        return suggestions[:limit]
+
+
+def get_postal_code_index() -> PostalCodeIndex:
+    """
+    Gets the postal code index, building it on first use
+    :return: The postal code index
+    """
+    global POSTAL_CODE_INDEX
+    if POSTAL_CODE_INDEX is None:
+        with LOCK:
+            if POSTAL_CODE_INDEX is None:
+                POSTAL_CODE_INDEX = PostalCodeIndex(load_postal_code_data())
+    return POSTAL_CODE_INDEX
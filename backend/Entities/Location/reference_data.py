@@ -0,0 +1,145 @@
+########################################################################################################################
+# reference_data.py
+# This file contains classes that serve the NBCC reference data from the bundle compiled by
+# database/Population/build_reference_data.py. The column files are memory mapped, so loading is instant, nothing is
+# read until it is used, and worker processes share the same pages.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import json
+import os
+import threading
+import warnings
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from backend.Constants.reference_data_constants import (
+    REFERENCE_DATA_DIRECTORY,
+    REFERENCE_DATA_MANIFEST,
+    REFERENCE_DATA_VERSION,
+)
+from config import get_file_path
+
+########################################################################################################################
+# GLOBALS
+########################################################################################################################
+
+# The loaded bundle, False until the first attempt to load it
+REFERENCE_DATA = False
+
+# Guards the first load
+LOCK = threading.Lock()
+
+
+########################################################################################################################
+# MAIN CLASS
+########################################################################################################################
+
+
+class ReferenceData:
+    """
+    This class is used to access the columns of the compiled reference data tables
+    """
+
+    # The directory of the bundle
+    directory: str
+    # The manifest of the bundle
+    manifest: dict
+    # The memory mapped columns of each table, keyed by table name then column name
+    tables: Dict[str, Dict[str, np.ndarray]]
+
+    def __init__(self, directory: str):
+        """
+        Initializes the ReferenceData object by memory mapping the bundle in a directory
+        :param directory: The directory of the bundle
+        """
+        self.directory = directory
+        with open(os.path.join(directory, REFERENCE_DATA_MANIFEST), "r") as file:
+            self.manifest = json.load(file)
+        if self.manifest["version"] != REFERENCE_DATA_VERSION:
+            raise ValueError(
+                f"Reference data bundle version {self.manifest['version']} does not match {REFERENCE_DATA_VERSION}"
+            )
+        self.tables = {
+            table_name: {
+                column: np.load(
+                    os.path.join(directory, details["file"]),
+                    mmap_mode="r",
+                    allow_pickle=False,
+                )
+                for column, details in table["columns"].items()
+            }
+            for table_name, table in self.manifest["tables"].items()
+        }
+
+    def get_row(self, table_name: str, index: int) -> dict:
+        """
+        Gets a row of a table
+        :param table_name: The name of the table
+        :param index: The position of the row in the bundle
+        :return: The value of each column, text is decoded and NaN is returned as None
+        """
+        row = dict()
+        for column, values in self.tables[table_name].items():
+            value = values[index]
+            if isinstance(value, bytes):
+                row[column] = value.decode("utf-8")
+            elif np.isnan(value):
+                row[column] = None
+            else:
+                row[column] = float(value)
+        return row
+
+    def find_postal_code(self, postal_code: str) -> Optional[Tuple[float, float]]:
+        """
+        Finds the coordinates of a postal code
+        :param postal_code: The postal code in the form "A1A 1A1"
+        :return: The (latitude, longitude) of the postal code, None if it is not known
+        """
+        postal_codes = self.tables["CanadianPostalCodeData"]["postal_code"]
+        key = postal_code.encode("utf-8")
+        # The postal codes are sorted, so this is a binary search
+        index = int(np.searchsorted(postal_codes, key))
+        if index == len(postal_codes) or postal_codes[index] != key:
+            return None
+        return (
+            float(self.tables["CanadianPostalCodeData"]["latitude"][index]),
+            float(self.tables["CanadianPostalCodeData"]["longitude"][index]),
+        )
+
+
+########################################################################################################################
+# HELPER FUNCTIONS
+########################################################################################################################
+
+
+def get_reference_data() -> Optional[ReferenceData]:
+    """
+    Gets the reference data bundle of the current version, loading it on first use
+    :return: The reference data, None if no usable bundle has been built
+    """
+    global REFERENCE_DATA
+    if REFERENCE_DATA is False:
+        with LOCK:
+            if REFERENCE_DATA is False:
+                directory = get_file_path(
+                    os.path.join(REFERENCE_DATA_DIRECTORY, f"v{REFERENCE_DATA_VERSION}")
+                )
+                reference_data = None
+                if os.path.exists(os.path.join(directory, REFERENCE_DATA_MANIFEST)):
+                    try:
+                        reference_data = ReferenceData(directory)
+                    # Fall back to the database rather than fail every location lookup
+                    except Exception as e:
+                        warnings.warn(f"Could not load reference data bundle: {e}")
+                REFERENCE_DATA = reference_data
+    return REFERENCE_DATA
@@ -0,0 +1,529 @@
+########################################################################################################################
+# metrics.py
+# This file contains the counters, gauges and histograms used to monitor the backend, and the registry that renders them
+# in the Prometheus text exposition format. Values that are already counted elsewhere (cache hits, queue lengths) are
+# read by collectors when the metrics are scraped rather than being updated on every change.
+#
+# Each worker of a multi-worker server holds its own values. A worker dumps them to a file (see metrics_manager.py), and
+# the dumps of every worker are merged into one value per series when the metrics are scraped. Counters and histograms
+# are added up. Gauges are added up, take the largest value, or keep the value of each worker under a pid label,
+# depending on their multiprocess mode.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import bisect
+import threading
+from typing import Callable, Dict, List, Tuple
+
+########################################################################################################################
+# GLOBALS
+########################################################################################################################
+
+# The default upper bounds of the buckets of a histogram, in seconds
+DEFAULT_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+
+# How the values of a gauge held by the workers of a multi-worker server are merged, only the workers that are running
+# are included: livesum adds them up, livemax takes the largest and liveall keeps the value of each worker under a pid
+# label
+GAUGE_MULTIPROCESS_MODES = ("livesum", "livemax", "liveall")
+
+
+########################################################################################################################
+# HELPER FUNCTIONS
+########################################################################################################################
+
+
+def format_labels(labels: Dict[str, str]) -> str:
+    """
+    Formats labels for the Prometheus text exposition format
+    :param labels: The labels
+    :return: The labels as {name="value",...}, an empty string if there are none
+    """
+    if not labels:
+        return ""
+    escaped = (
+        (
+            name,
+            str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"),
+        )
+        for name, value in labels.items()
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def format_value(value: float) -> str:
+    """
+    Formats a value for the Prometheus text exposition format
+    :param value: The value
+    :return: The value, with infinities written as +Inf and -Inf
+    """
+    if value == float("inf"):
+        return "+Inf"
+    if value == float("-inf"):
+        return "-Inf"
+    return repr(float(value))
+
+
+########################################################################################################################
+# METRIC CLASSES
+########################################################################################################################
+
+
+class Metric:
+    """
+    This class is used to hold a value for each combination of label values
+    """
+
+    # The name of the metric
+    name: str
+    # What the metric measures
+    description: str
+    # The Prometheus type of the metric
+    type: str
+    # The names of the labels of the metric
+    label_names: Tuple[str, ...]
+    # The value for each combination of label values
+    values: Dict[Tuple[str, ...], float]
+    # Guards the values
+    lock: threading.Lock
+
+    def __init__(self, name: str, description: str, label_names: Tuple[str, ...] = ()):
+        """
+        Initializes the Metric object
+        :param name: The name of the metric
+        :param description: What the metric measures
+        :param label_names: The names of the labels of the metric
+        """
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.values = dict()
+        self.lock = threading.Lock()
+
+    def get_key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        """
+        Gets the combination of label values
+        :param labels: The value of each label
+        :return: The label values in the order of label_names
+        """
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def set(self, value: float, **labels):
+        """
+        Sets the value, used by collectors for values counted elsewhere
+        :param value: The value
+        :param labels: The value of each label
+        :return: None
+        """
+        with self.lock:
+            self.values[self.get_key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        """
+        Adds to the value
+        :param amount: The amount to add
+        :param labels: The value of each label
+        :return: None
+        """
+        key = self.get_key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self) -> List[str]:
+        """
+        Renders the metric
+        :return: The lines of the metric in the Prometheus text exposition format
+        """
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        with self.lock:
+            values = list(self.values.items())
+        for key, value in values:
+            labels = format_labels(dict(zip(self.label_names, key)))
+            lines.append(f"{self.name}{labels} {format_value(value)}")
+        return lines
+
+    def dump(self) -> list:
+        """
+        Dumps the values, to be merged with those of the other workers
+        :return: The [label values, value] of each combination of label values
+        """
+        with self.lock:
+            return [[list(key), value] for key, value in self.values.items()]
+
+    def merge(self, dumps: List[Tuple[int, list]]) -> "Metric":
+        """
+        Creates a copy of the metric holding the values of several workers added up
+        :param dumps: The pid of each worker and the dump of its values
+        :return: The merged metric
+        """
+        merged = type(self)(self.name, self.description, self.label_names)
+        for _, values in dumps:
+            for key, value in values:
+                merged.values[tuple(key)] = merged.values.get(tuple(key), 0) + value
+        return merged
+
+
+class Counter(Metric):
+    """
+    This class is used to count events, the value only goes up
+    """
+
+    type = "counter"
+
+
+class Gauge(Metric):
+    """
+    This class is used to hold a value that goes up and down
+    """
+
+    type = "gauge"
+    # How the values of the workers of a multi-worker server are merged, one of GAUGE_MULTIPROCESS_MODES
+    multiprocess_mode: str
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        label_names: Tuple[str, ...] = (),
+        multiprocess_mode: str = "livesum",
+    ):
+        """
+        Initializes the Gauge object
+        :param name: The name of the metric
+        :param description: What the metric measures
+        :param label_names: The names of the labels of the metric
+        :param multiprocess_mode: How the values of the workers of a multi-worker server are merged, one of
+        GAUGE_MULTIPROCESS_MODES
+        """
+        if multiprocess_mode not in GAUGE_MULTIPROCESS_MODES:
+            raise ValueError(f"Unknown multiprocess mode {multiprocess_mode}")
+        super().__init__(name, description, label_names)
+        self.multiprocess_mode = multiprocess_mode
+
+    def merge(self, dumps: List[Tuple[int, list]]) -> "Gauge":
+        """
+        Creates a copy of the gauge holding the values of several workers, merged according to the multiprocess mode
+        :param dumps: The pid of each worker and the dump of its values
+        :return: The merged gauge
+        """
+        # Each worker's value is a series of its own
+        if self.multiprocess_mode == "liveall":
+            merged = Gauge(
+                self.name, self.description, self.label_names + ("pid",), "liveall"
+            )
+            for pid, values in dumps:
+                for key, value in values:
+                    merged.values[tuple(key) + (str(pid),)] = value
+            return merged
+        merged = Gauge(
+            self.name, self.description, self.label_names, self.multiprocess_mode
+        )
+        for _, values in dumps:
+            for key, value in values:
+                key = tuple(key)
+                if key not in merged.values:
+                    merged.values[key] = value
+                elif self.multiprocess_mode == "livemax":
+                    merged.values[key] = max(merged.values[key], value)
+                else:
+                    merged.values[key] += value
+        return merged
+
+    def dec(self, amount: float = 1, **labels):
+        """
+        Subtracts from the value
+        :param amount: The amount to subtract
+        :param labels: The value of each label
+        :return: None
+        """
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    """
+    This class is used to count observations, such as latencies, in buckets
+    """
+
+    type = "histogram"
+    # The upper bound of each bucket
+    buckets: Tuple[float, ...]
+    # The number of observations in each bucket (not cumulative), the sum and the count, for each combination of label
+    # values
+    observations: Dict[Tuple[str, ...], Tuple[List[int], List[float]]]
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        label_names: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        """
+        Initializes the Histogram object
+        :param name: The name of the metric
+        :param description: What the metric measures
+        :param label_names: The names of the labels of the metric
+        :param buckets: The upper bound of each bucket
+        """
+        super().__init__(name, description, label_names)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self.observations = dict()
+
+    def observe(self, value: float, **labels):
+        """
+        Records an observation
+        :param value: The observed value
+        :param labels: The value of each label
+        :return: None
+        """
+        key = self.get_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            if key not in self.observations:
+                self.observations[key] = ([0] * len(self.buckets), [0.0, 0])
+            counts, total = self.observations[key]
+            counts[index] += 1
+            total[0] += value
+            total[1] += 1
+
+    def render(self) -> List[str]:
+        """
+        Renders the metric
+        :return: The lines of the metric in the Prometheus text exposition format
+        """
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        with self.lock:
+            observations = [
+                (key, list(counts), list(total))
+                for key, (counts, total) in self.observations.items()
+            ]
+        for key, counts, (value_sum, value_count) in observations:
+            labels = dict(zip(self.label_names, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                bucket_labels = format_labels({**labels, "le": format_value(bound)})
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(
+                f"{self.name}_sum{format_labels(labels)} {format_value(value_sum)}"
+            )
+            lines.append(f"{self.name}_count{format_labels(labels)} {value_count}")
+        return lines
+
+    def dump(self) -> list:
+        """
+        Dumps the observations, to be merged with those of the other workers
+        :return: The [label values, bucket counts, [sum, count]] of each combination of label values
+        """
+        with self.lock:
+            return [
+                [list(key), list(counts), list(total)]
+                for key, (counts, total) in self.observations.items()
+            ]
+
+    def merge(self, dumps: List[Tuple[int, list]]) -> "Histogram":
+        """
+        Creates a copy of the histogram holding the observations of several workers added up
+        :param dumps: The pid of each worker and the dump of its observations
+        :return: The merged histogram
+        """
+        merged = Histogram(
+            self.name, self.description, self.label_names, self.buckets[:-1]
+        )
+        for _, observations in dumps:
+            for key, counts, total in observations:
+                if tuple(key) not in merged.observations:
+                    merged.observations[tuple(key)] = (
+                        [0] * len(self.buckets),
+                        [0.0, 0],
+                    )
+                merged_counts, merged_total = merged.observations[tuple(key)]
+                for index, count in enumerate(counts):
+                    merged_counts[index] += count
+                merged_total[0] += total[0]
+                merged_total[1] += total[1]
+        return merged
+
+
+########################################################################################################################
+# REGISTRY CLASS
+########################################################################################################################
+
+
+class MetricsRegistry:
+    """
+    This class is used to hold every metric and render them together
+    """
+
+    # The metrics, by name
+    metrics: Dict[str, Metric]
+    # The functions called before rendering to update the metrics of values counted elsewhere
+    collectors: List[Callable[[], None]]
+    # Guards the metrics and collectors
+    lock: threading.Lock
+
+    def __init__(self):
+        """
+        Initializes the MetricsRegistry object
+        """
+        self.metrics = dict()
+        self.collectors = list()
+        self.lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        """
+        Registers a metric, a metric of the same name is only registered once
+        :param metric: The metric
+        :return: The registered metric of that name
+        """
+        with self.lock:
+            return self.metrics.setdefault(metric.name, metric)
+
+    def add_collector(self, collector: Callable[[], None]):
+        """
+        Adds a function called before the metrics are rendered
+        :param collector: The function
+        :return: None
+        """
+        with self.lock:
+            if collector not in self.collectors:
+                self.collectors.append(collector)
+
+    def collect(self) -> List[Metric]:
+        """
+        Runs the collectors
+        :return: Every metric
+        """
+        with self.lock:
+            collectors = list(self.collectors)
+            metrics = list(self.metrics.values())
+        for collector in collectors:
+            collector()
+        return metrics
+
+    def render(self) -> str:
+        """
+        Renders every metric, after running the collectors
+        :return: The metrics in the Prometheus text exposition format
+        """
+        lines = []
+        for metric in self.collect():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def dump(self) -> Dict[str, list]:
+        """
+        Dumps every metric, after running the collectors, to be merged with those of the other workers
+        :return: The dump of each metric, by name
+        """
+        return {metric.name: metric.dump() for metric in self.collect()}
+
+    def merge_exited(self, dumps: List[Dict[str, list]]) -> Dict[str, list]:
+        """
+        Merges the dumps of workers that have exited into one. Only the counters and histograms are kept, the gauges of
+        a worker no longer apply once it has exited
+        :param dumps: The dumps of the workers, as returned by dump
+        :return: The merged dump
+        """
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return {
+            metric.name: metric.merge(
+                [(0, dump[metric.name]) for dump in dumps if metric.name in dump]
+            ).dump()
+            for metric in metrics
+            if not isinstance(metric, Gauge)
+        }
+
+    def render_dumps(self, dumps: List[Tuple[int, Dict[str, list]]]) -> str:
+        """
+        Renders every metric with the values of several workers merged
+        :param dumps: The pid of each worker and the dump of its metrics, as returned by dump
+        :return: The metrics in the Prometheus text exposition format
+        """
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            merged = metric.merge(
+                [(pid, dump[metric.name]) for pid, dump in dumps if metric.name in dump]
+            )
+            lines.extend(merged.render())
+        return "\n".join(lines) + "\n"
+
+
+# The registry of the backend
+REGISTRY = MetricsRegistry()
+
+
+def counter(name: str, description: str, label_names: Tuple[str, ...] = ()) -> Counter:
+    """
+    Gets a counter of the registry, registering it on first use
+    :param name: The name of the counter
+    :param description: What the counter counts
+    :param label_names: The names of the labels of the counter
+    :return: The counter
+    """
+    return REGISTRY.register(Counter(name, description, label_names))
+
+
+def gauge(
+    name: str,
+    description: str,
+    label_names: Tuple[str, ...] = (),
+    multiprocess_mode: str = "livesum",
+) -> Gauge:
+    """
+    Gets a gauge of the registry, registering it on first use
+    :param name: The name of the gauge
+    :param description: What the gauge measures
+    :param label_names: The names of the labels of the gauge
+    :param multiprocess_mode: How the values of the workers of a multi-worker server are merged, one of
+    GAUGE_MULTIPROCESS_MODES
+    :return: The gauge
+    """
+    return REGISTRY.register(Gauge(name, description, label_names, multiprocess_mode))
+
+
+def histogram(
+    name: str,
+    description: str,
+    label_names: Tuple[str, ...] = (),
+    buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+) -> Histogram:
+    """
+    Gets a histogram of the registry, registering it on first use
+    :param name: The name of the histogram
+    :param description: What the histogram measures
+    :param label_names: The names of the labels of the histogram
+    :param buckets: The upper bound of each bucket
+    :return: The histogram
+    """
+    return REGISTRY.register(Histogram(name, description, label_names, buckets))
@@ -0,0 +1,256 @@
+########################################################################################################################
+# sampling_profiler.py
+# This file contains a sampling profiler used to find out why a request was slow. A background thread takes the stacks
+# of the threads working on the profiled request at a fixed interval and counts identical stacks, which are written in
+# the folded stack format read by flamegraph.pl, speedscope and inferno.
+#
+# Sampling is used rather than cProfile because synchronous endpoints run on a worker thread of the thread pool, which a
+# profiler enabled in the middleware would not see.
+#
+# Other requests run on the same threads at the same time, so the work of the profiled request is told apart by frame:
+# the code run for the request goes through run_profiled or profile_function, which register their frame with the
+# profiler of the request (found through CURRENT_PROFILER), and only the stacks holding a registered frame are counted.
+# The frame of an async function is only on the stack of the event loop while that function is running, so this also
+# holds for the event loop, which takes turns between requests.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import asyncio
+import functools
+import os
+import sys
+import threading
+from collections import Counter
+from contextvars import ContextVar
+from types import FrameType
+from typing import Any, Callable, Dict, List, Optional
+
+from config import PROJECT_DIR
+
+########################################################################################################################
+# GLOBALS
+########################################################################################################################
+
+# The profiler of the request being handled, None if it is not being profiled. It is copied into the threads the request
+# runs code on, along with the rest of the context
+CURRENT_PROFILER: ContextVar[Optional["SamplingProfiler"]] = ContextVar(
+    "CURRENT_PROFILER", default=None
+)
+
+
+########################################################################################################################
+# MAIN CLASS
+########################################################################################################################
+
+
+class SamplingProfiler:
+    """
+    This class is used to sample the stacks of the threads running project code until it is stopped
+    """
+
+    # How often the stacks are sampled, in seconds
+    interval: float
+    # The number of times each folded stack was sampled
+    stacks: Counter
+    # The number of times the stacks were sampled
+    samples: int
+    # Set to stop sampling
+    stopped: threading.Event
+    # The thread taking the samples
+    thread: Optional[threading.Thread]
+    # The frames running code for the profiled request, by id, a stack is only sampled if it holds one of them
+    frames: Dict[int, FrameType]
+    # Guards the frames and the stacks
+    lock: threading.Lock
+
+    def __init__(self, interval: float):
+        """
+        Initializes the SamplingProfiler object
+        :param interval: How often the stacks are sampled, in seconds
+        """
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.stopped = threading.Event()
+        self.thread = None
+        self.frames = dict()
+        self.lock = threading.Lock()
+
+    def start(self):
+        """
+        Starts sampling on a background thread
+        :return: None
+        """
+        self.thread = threading.Thread(target=self.run, name="profiler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stops sampling and waits for the last sample
+        :return: None
+        """
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def add_frame(self, frame: FrameType):
+        """
+        Samples the stack of a frame while it runs code for the profiled request
+        :param frame: The frame
+        :return: None
+        """
+        with self.lock:
+            self.frames[id(frame)] = frame
+
+    def remove_frame(self, frame: FrameType):
+        """
+        Stops sampling the stack of a frame, once it has finished running code for the profiled request
+        :param frame: The frame
+        :return: None
+        """
+        with self.lock:
+            self.frames.pop(id(frame), None)
+
+    def add_stacks(self, stacks: Counter):
+        """
+        Adds stacks sampled by another profiler, such as the profiler of a task run in another process for the profiled
+        request
+        :param stacks: The number of times each folded stack was sampled
+        :return: None
+        """
+        with self.lock:
+            self.stacks.update(stacks)
+
+    def run(self):
+        """
+        Takes samples until stopped
+        :return: None
+        """
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def sample(self):
+        """
+        Takes the stack of every thread running code for the profiled request
+        :return: None
+        """
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        own_thread = threading.get_ident()
+        with self.lock:
+            frames = set(self.frames)
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread:
+                continue
+            stack = get_stack(frame)
+            # Threads running code for other requests, or waiting for work, hold none of the registered frames
+            if not any(id(entry) in frames for entry in stack):
+                continue
+            # Start each stack with its thread so that the flame graph is split by thread
+            folded = ";".join(
+                [names.get(thread_id, str(thread_id))]
+                + [format_frame(entry) for entry in stack]
+            )
+            with self.lock:
+                self.stacks[folded] += 1
+        self.samples += 1
+
+    def to_folded(self) -> str:
+        """
+        Gets the samples in the folded stack format
+        :return: One "frame;frame;frame count" line per distinct stack, the most sampled first
+        """
+        return "".join(
+            f"{stack} {count}\n" for stack, count in self.stacks.most_common()
+        )
+
+
+########################################################################################################################
+# HELPER FUNCTIONS
+########################################################################################################################
+
+
+def get_stack(frame: FrameType) -> List[FrameType]:
+    """
+    Gets the frames of a stack
+    :param frame: The innermost frame
+    :return: The frames from the outermost to the innermost
+    """
+    stack = []
+    while frame is not None:
+        stack.append(frame)
+        frame = frame.f_back
+    stack.reverse()
+    return stack
+
+
+def format_frame(frame: FrameType) -> str:
+    """
+    Formats a frame for the folded stack format
+    :param frame: The frame
+    :return: The function with its file relative to the project (or its file name if outside it) and first line
+    """
+    code = frame.f_code
+    filename = code.co_filename
+    if filename.startswith(PROJECT_DIR):
+        filename = os.path.relpath(filename, PROJECT_DIR)
+    else:
+        filename = os.path.basename(filename)
+    # Semicolons separate the frames, so they may not appear in a frame
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})".replace(";", ",")
+
+
+def run_profiled(function: Callable, *args, **kwargs) -> Any:
+    """
+    Runs a function, sampled by the profiler of the request it runs for if the request is being profiled. Used for the
+    code a request runs on another thread
+    :param function: The function
+    :param args: The positional arguments of the function
+    :param kwargs: The keyword arguments of the function
+    :return: The result of the function
+    """
+    profiler = CURRENT_PROFILER.get()
+    if profiler is None:
+        return function(*args, **kwargs)
+    frame = sys._getframe()
+    profiler.add_frame(frame)
+    try:
+        return function(*args, **kwargs)
+    finally:
+        profiler.remove_frame(frame)
+
+
+def profile_function(function: Callable) -> Callable:
+    """
+    Wraps a function, such as an endpoint, so that it is sampled by the profiler of the request it runs for
+    :param function: The function, synchronous or async
+    :return: The wrapped function, of the same kind
+    """
+    if not asyncio.iscoroutinefunction(function):
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            return run_profiled(function, *args, **kwargs)
+
+        return wrapper
+
+    @functools.wraps(function)
+    async def async_wrapper(*args, **kwargs):
+        profiler = CURRENT_PROFILER.get()
+        if profiler is None:
+            return await function(*args, **kwargs)
+        frame = sys._getframe()
+        profiler.add_frame(frame)
+        try:
+            return await function(*args, **kwargs)
+        finally:
+            profiler.remove_frame(frame)
+
+    return async_wrapper
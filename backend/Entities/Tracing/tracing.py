@@ -0,0 +1,494 @@
+########################################################################################################################
+# tracing.py
+# This file contains the spans used to time the stages of a request: the endpoint, each manager call, algorithm stage,
+# database query, upstream call and Blender render. The spans of a request make up a trace, which is written once the
+# request is done, either to the console as a tree or to a file as OTLP JSON (one ExportTraceServiceRequest per line,
+# the format read by the OpenTelemetry collector's otlpjsonfile receiver).
+#
+# The exporter is chosen with TRACING_EXPORTER in data/EnvironmentVariables/.env, or the environment, one of the values
+# of TracingExporter. Tracing is disabled by default, in which case traced functions are returned as they are.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import functools
+import inspect
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from sqlalchemy import Engine, event
+
+from backend.Constants.tracing_constants import (
+    DEFAULT_TRACING_EXPORTER,
+    DEFAULT_TRACING_FILE,
+    TRACING_MAX_STATEMENT_LENGTH,
+    TRACING_SERVICE_NAME,
+    TracingExporter,
+)
+from config import get_file_path
+
+########################################################################################################################
+# GLOBALS
+########################################################################################################################
+
+# Get the exporter and trace file from data/EnvironmentVariables/.env, or the environment
+load_dotenv(dotenv_path=get_file_path(relative_path="data/EnvironmentVariables/.env"))
+TRACING_EXPORTER = (
+    TracingExporter.get_key_from_value(os.getenv("TRACING_EXPORTER"))
+    or DEFAULT_TRACING_EXPORTER
+)
+TRACING_FILE = os.getenv("TRACING_FILE") or get_file_path(DEFAULT_TRACING_FILE)
+
+# The span being run in the current context, copied into the worker threads that run synchronous endpoints
+CURRENT_SPAN: ContextVar[Optional["Span"]] = ContextVar("CURRENT_SPAN", default=None)
+
+# Guards writing to the trace file
+EXPORT_LOCK = threading.Lock()
+
+# The OTLP span kinds
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+
+########################################################################################################################
+# TRACE CLASS
+########################################################################################################################
+
+
+class Trace:
+    """
+    This class is used to hold the spans of a request
+    """
+
+    # The id of the trace, 32 hexadecimal characters
+    trace_id: str
+    # The attributes shared by every span of the trace, such as the user
+    attributes: Dict[str, Any]
+    # The spans that have ended
+    spans: List["Span"]
+    # Guards the spans, which may end on different threads
+    lock: threading.Lock
+
+    def __init__(self):
+        """
+        Initializes the Trace object
+        """
+        self.trace_id = secrets.token_hex(16)
+        self.attributes = dict()
+        self.spans = list()
+        self.lock = threading.Lock()
+
+
+########################################################################################################################
+# SPAN CLASS
+########################################################################################################################
+
+
+class Span:
+    """
+    This class is used to time a stage of a request
+    """
+
+    # The name of the stage
+    name: str
+    # The trace the span belongs to
+    trace: Trace
+    # The id of the span, 16 hexadecimal characters
+    span_id: str
+    # The id of the span this stage is part of, None for the root span
+    parent_id: Optional[str]
+    # The OTLP kind of the span
+    kind: int
+    # When the span started and ended, in nanoseconds since the epoch
+    start_time: int
+    end_time: Optional[int]
+    # The attributes of the span
+    attributes: Dict[str, Any]
+    # The error raised during the span, None if there was none
+    error: Optional[str]
+
+    def __init__(
+        self,
+        name: str,
+        parent: Optional["Span"],
+        kind: int,
+        attributes: Optional[Dict[str, Any]],
+    ):
+        """
+        Initializes the Span object
+        :param name: The name of the stage
+        :param parent: The span this stage is part of, None to start a new trace
+        :param kind: The OTLP kind of the span
+        :param attributes: The attributes of the span
+        """
+        self.name = name
+        self.trace = parent.trace if parent is not None else Trace()
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent is not None else None
+        self.kind = kind
+        self.start_time = time.time_ns()
+        self.end_time = None
+        self.attributes = dict(attributes or {})
+        self.error = None
+
+    def set_attribute(self, key: str, value: Any):
+        """
+        Sets an attribute of the span
+        :param key: The name of the attribute
+        :param value: The value of the attribute
+        :return: None
+        """
+        self.attributes[key] = value
+
+    def get_duration(self) -> float:
+        """
+        Gets how long the span took
+        :return: The duration in milliseconds
+        """
+        return ((self.end_time or time.time_ns()) - self.start_time) / 1e6
+
+    def to_otlp(self) -> dict:
+        """
+        Converts the span to OTLP JSON
+        :return: The span as an OTLP JSON span
+        """
+        span = {
+            "traceId": self.trace.trace_id,
+            "spanId": self.span_id,
+            "name": self.name,
+            "kind": self.kind,
+            "startTimeUnixNano": str(self.start_time),
+            "endTimeUnixNano": str(self.end_time),
+            "attributes": to_otlp_attributes(
+                {**self.trace.attributes, **self.attributes}
+            ),
+            "status": (
+                {"code": 2, "message": self.error}
+                if self.error is not None
+                else {"code": 1}
+            ),
+        }
+        if self.parent_id is not None:
+            span["parentSpanId"] = self.parent_id
+        return span
+
+
+########################################################################################################################
+# HELPER FUNCTIONS
+########################################################################################################################
+
+
+def to_otlp_attributes(attributes: Dict[str, Any]) -> List[dict]:
+    """
+    Converts attributes to OTLP JSON
+    :param attributes: The attributes
+    :return: The attributes as OTLP JSON key values
+    """
+    converted = []
+    for key, value in attributes.items():
+        if isinstance(value, bool):
+            converted.append({"key": key, "value": {"boolValue": value}})
+        elif isinstance(value, int):
+            converted.append({"key": key, "value": {"intValue": str(value)}})
+        elif isinstance(value, float):
+            converted.append({"key": key, "value": {"doubleValue": value}})
+        else:
+            converted.append({"key": key, "value": {"stringValue": str(value)}})
+    return converted
+
+
+def get_building_attributes(building: Any) -> Dict[str, Any]:
+    """
+    Gets the size of a building as span attributes
+    :param building: The building object
+    :return: The number of height zones and floors of the building, if known
+    """
+    attributes = dict()
+    height_zones = getattr(building, "height_zones", None)
+    if height_zones is not None:
+        attributes["building.height_zones"] = len(height_zones)
+    num_floor = getattr(building, "num_floor", None)
+    if num_floor is not None:
+        attributes["building.floors"] = num_floor
+    return attributes
+
+
+########################################################################################################################
+# EXPORTERS
+########################################################################################################################
+
+
+def export_trace_to_console(trace: Trace):
+    """
+    Prints a trace as a tree of spans and their durations
+    :param trace: The trace
+    :return: None
+    """
+    depths = dict()
+    lines = [f"trace {trace.trace_id} {trace.attributes}"]
+    for span in sorted(trace.spans, key=lambda x: x.start_time):
+        depths[span.span_id] = depths.get(span.parent_id, -1) + 1
+        status = f" ERROR {span.error}" if span.error is not None else ""
+        lines.append(
+            f"{'  ' * (depths[span.span_id] + 1)}{span.name} {span.get_duration():.2f}ms "
+            f"{span.attributes}{status}"
+        )
+    print("\n".join(lines))
+
+
+def export_trace_to_file(trace: Trace):
+    """
+    Appends a trace to TRACING_FILE as a line of OTLP JSON
+    :param trace: The trace
+    :return: None
+    """
+    request = {
+        "resourceSpans": [
+            {
+                "resource": {
+                    "attributes": to_otlp_attributes(
+                        {"service.name": TRACING_SERVICE_NAME}
+                    )
+                },
+                "scopeSpans": [
+                    {
+                        "scope": {"name": TRACING_SERVICE_NAME},
+                        "spans": [span.to_otlp() for span in trace.spans],
+                    }
+                ],
+            }
+        ]
+    }
+    line = json.dumps(request, separators=(",", ":"))
+    with EXPORT_LOCK:
+        with open(TRACING_FILE, "a") as file:
+            file.write(line + "\n")
+
+
+def export_trace(trace: Trace):
+    """
+    Writes a finished trace with the configured exporter
+    :param trace: The trace
+    :return: None
+    """
+    with trace.lock:
+        trace.spans.sort(key=lambda x: x.start_time)
+    match TRACING_EXPORTER:
+        case TracingExporter.CONSOLE:
+            export_trace_to_console(trace)
+        case TracingExporter.FILE:
+            export_trace_to_file(trace)
+
+
+########################################################################################################################
+# SPAN FUNCTIONS
+########################################################################################################################
+
+
+def tracing_enabled() -> bool:
+    """
+    Whether spans are recorded
+    :return: True if an exporter has been chosen
+    """
+    return TRACING_EXPORTER != TracingExporter.NONE
+
+
+def disable_tracing():
+    """
+    Stops recording spans in this process, used by the processes of the CPU pool, whose work is timed as a single span
+    of the request that submitted it
+    :return: None
+    """
+    global TRACING_EXPORTER
+    TRACING_EXPORTER = TracingExporter.NONE
+
+
+def begin_span(
+    name: str,
+    attributes: Optional[Dict[str, Any]] = None,
+    kind: int = SPAN_KIND_INTERNAL,
+) -> Tuple[Span, Token]:
+    """
+    Starts a span as part of the current span, and makes it the current span
+    :param name: The name of the stage
+    :param attributes: The attributes of the span
+    :param kind: The OTLP kind of the span
+    :return: The span and the token to restore the previous current span with
+    """
+    span = Span(name, CURRENT_SPAN.get(), kind, attributes)
+    return span, CURRENT_SPAN.set(span)
+
+
+def end_span(span: Span, token: Token, error: Optional[BaseException] = None):
+    """
+    Ends a span, restoring the previous current span, and writes the trace if it was the root span
+    :param span: The span
+    :param token: The token returned by begin_span
+    :param error: The error raised during the span, if any
+    :return: None
+    """
+    span.end_time = time.time_ns()
+    if error is not None:
+        span.error = f"{type(error).__name__}: {error}"
+    CURRENT_SPAN.reset(token)
+    with span.trace.lock:
+        span.trace.spans.append(span)
+    if span.parent_id is None:
+        export_trace(span.trace)
+
+
+@contextmanager
+def start_span(
+    name: str,
+    attributes: Optional[Dict[str, Any]] = None,
+    kind: int = SPAN_KIND_INTERNAL,
+):
+    """
+    Times the code run inside it as a span, part of the current span if there is one
+    :param name: The name of the stage
+    :param attributes: The attributes of the span
+    :param kind: The OTLP kind of the span
+    :return: The span, None if tracing is disabled
+    """
+    if not tracing_enabled():
+        yield None
+        return
+    span, token = begin_span(name, attributes, kind)
+    error = None
+    try:
+        yield span
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        end_span(span, token, error)
+
+
+def traced(name: str) -> Callable:
+    """
+    Decorates a function to run as a span. If the function takes a building, the size of the building is added to the
+    attributes of the span. Functions are returned as they are when tracing is disabled
+    :param name: The name of the stage
+    :return: The decorator
+    """
+
+    def decorator(function: Callable) -> Callable:
+        if not tracing_enabled():
+            return function
+        signature = inspect.signature(function)
+        takes_building = "building" in signature.parameters
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            attributes = None
+            if takes_building:
+                arguments = signature.bind_partial(*args, **kwargs).arguments
+                attributes = get_building_attributes(arguments.get("building"))
+            with start_span(name, attributes):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def set_trace_attributes(attributes: Dict[str, Any]):
+    """
+    Sets attributes shared by every span of the current trace, such as the user making the request
+    :param attributes: The attributes
+    :return: None
+    """
+    span = CURRENT_SPAN.get()
+    if span is not None:
+        span.trace.attributes.update(attributes)
+
+
+########################################################################################################################
+# DATABASE TRACING
+########################################################################################################################
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """
+    Starts the span of a database query, if the query is run as part of a traced request
+    :param conn: The connection running the query
+    :param cursor: The DBAPI cursor
+    :param statement: The SQL statement
+    :param parameters: The parameters of the statement
+    :param context: The execution context
+    :param executemany: Whether the statement is run for many sets of parameters
+    :return: None
+    """
+    if CURRENT_SPAN.get() is None:
+        return
+    conn.info.setdefault("spans", []).append(
+        begin_span(
+            "db.query",
+            {
+                "db.system": conn.engine.dialect.name,
+                "db.statement": statement[:TRACING_MAX_STATEMENT_LENGTH],
+            },
+            SPAN_KIND_CLIENT,
+        )
+    )
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    """
+    Ends the span of a database query
+    :param conn: The connection running the query
+    :param cursor: The DBAPI cursor
+    :param statement: The SQL statement
+    :param parameters: The parameters of the statement
+    :param context: The execution context
+    :param executemany: Whether the statement is run for many sets of parameters
+    :return: None
+    """
+    spans = conn.info.get("spans")
+    if spans:
+        span, token = spans.pop()
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            span.set_attribute("db.rows", cursor.rowcount)
+        end_span(span, token)
+
+
+def handle_database_error(exception_context):
+    """
+    Ends the span of a database query that failed
+    :param exception_context: The context of the failed query
+    :return: None
+    """
+    connection = exception_context.connection
+    spans = connection.info.get("spans") if connection is not None else None
+    if spans:
+        span, token = spans.pop()
+        end_span(span, token, exception_context.original_exception)
+
+
+def trace_database_queries():
+    """
+    Records a span for every query run through a sqlalchemy engine, if tracing is enabled
+    :return: None
+    """
+    if not tracing_enabled() or event.contains(
+        Engine, "before_cursor_execute", before_cursor_execute
+    ):
+        return
+    event.listen(Engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(Engine, "handle_error", handle_database_error)
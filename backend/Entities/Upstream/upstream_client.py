@@ -0,0 +1,435 @@
+########################################################################################################################
+# upstream_client.py
+# This file contains the shared client used to call external services such as the NBCC 2020 Seismic Hazard Tool and
+# Nominatim. Each service gets one client with a pool of keep-alive connections, connect and read timeouts, jittered
+# retries, a circuit breaker that fails fast (or answers from the responses it has kept) while the service is down, and
+# latency and error metrics.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Callable, Deque, Dict, Hashable, Optional, Tuple, Type
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+
+from backend.Constants.upstream_constants import (
+    UPSTREAM_FALLBACK_CACHE_SIZE,
+    UPSTREAM_LATENCY_WINDOW,
+    UPSTREAM_SETTINGS,
+)
+from backend.Entities.Metrics.metrics import histogram
+from backend.Entities.Tracing.tracing import SPAN_KIND_CLIENT, start_span
+
+########################################################################################################################
+# GLOBALS
+########################################################################################################################
+
+# The client of each upstream service, created on first use
+UPSTREAM_CLIENTS: Dict[str, "UpstreamClient"] = dict()
+
+# Guards creating the clients
+LOCK = threading.Lock()
+
+# The latency of every attempt, for the metrics endpoint
+UPSTREAM_REQUEST_DURATION = histogram(
+    "aspenlog_upstream_request_duration_seconds",
+    "Latency of requests to upstream services, per attempt",
+    ("upstream",),
+)
+
+
+########################################################################################################################
+# EXCEPTIONS
+########################################################################################################################
+
+
+class UpstreamUnavailableError(Exception):
+    """
+    Raised when an upstream service cannot be reached and there is no kept response to fall back on
+    """
+
+    pass
+
+
+class UpstreamHTTPError(Exception):
+    """
+    Raised when an upstream service answers with a status code worth retrying, a 429 or a 5xx
+    """
+
+    pass
+
+
+########################################################################################################################
+# CIRCUIT BREAKER CLASS
+########################################################################################################################
+
+
+class CircuitBreaker:
+    """
+    This class is used to stop calling a service that keeps failing. After failure_threshold failures in a row the
+    circuit opens and calls are refused, after reset_timeout seconds one call is let through and the circuit closes
+    again if it succeeds
+    """
+
+    # "closed" when calls go through, "open" when they are refused and "half_open" while a test call is in flight
+    state: str
+    # The number of failures in a row
+    failures: int
+    # When the circuit was last opened, in seconds of time.monotonic()
+    opened_at: float
+    # How many failures in a row open the circuit
+    failure_threshold: int
+    # How many seconds the circuit stays open
+    reset_timeout: float
+    # Guards the state
+    lock: threading.Lock
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        """
+        Initializes the CircuitBreaker object
+        :param failure_threshold: How many failures in a row open the circuit
+        :param reset_timeout: How many seconds the circuit stays open
+        """
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+
+    def allow_request(self) -> bool:
+        """
+        Whether a call may go through
+        :return: True if the circuit is closed, or if it has been open long enough and no other test call is in flight
+        """
+        with self.lock:
+            if self.state == "closed":
+                return True
+            if (
+                self.state == "open"
+                and time.monotonic() - self.opened_at >= self.reset_timeout
+            ):
+                self.state = "half_open"
+                return True
+            return False
+
+    def record_success(self):
+        """
+        Records a call that succeeded, closing the circuit
+        :return: None
+        """
+        with self.lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        """
+        Records a call that failed, opening the circuit if the test call failed or there have been too many failures
+        :return: None
+        """
+        with self.lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+
+########################################################################################################################
+# METRICS CLASS
+########################################################################################################################
+
+
+class UpstreamMetrics:
+    """
+    This class is used to count the calls made to an upstream service and how long they took
+    """
+
+    # The name of the service
+    name: str
+    # The number of calls, retries, failed calls, calls refused by the open circuit and calls answered from kept
+    # responses
+    counters: Dict[str, int]
+    # The latency in seconds of the most recent attempts
+    latencies: Deque[float]
+    # The total latency in seconds of every attempt
+    latency_sum: float
+    # The number of attempts
+    latency_count: int
+    # Guards the counters
+    lock: threading.Lock
+
+    def __init__(self, name: str):
+        """
+        Initializes the UpstreamMetrics object
+        :param name: The name of the service
+        """
+        self.name = name
+        self.counters = {
+            "requests": 0,
+            "retries": 0,
+            "errors": 0,
+            "timeouts": 0,
+            "rejected": 0,
+            "fallbacks": 0,
+        }
+        self.latencies = deque(maxlen=UPSTREAM_LATENCY_WINDOW)
+        self.latency_sum = 0.0
+        self.latency_count = 0
+        self.lock = threading.Lock()
+
+    def increment(self, counter: str):
+        """
+        Adds one to a counter
+        :param counter: The name of the counter
+        :return: None
+        """
+        with self.lock:
+            self.counters[counter] += 1
+
+    def observe(self, latency: float):
+        """
+        Records the latency of an attempt
+        :param latency: The latency in seconds
+        :return: None
+        """
+        with self.lock:
+            self.latencies.append(latency)
+            self.latency_sum += latency
+            self.latency_count += 1
+        UPSTREAM_REQUEST_DURATION.observe(latency, upstream=self.name)
+
+    def to_dict(self) -> dict:
+        """
+        Gets the metrics
+        :return: The counters, the number and total seconds of attempts, and the 50th, 95th and 99th percentile latency
+        in seconds of the most recent attempts
+        """
+        with self.lock:
+            latencies = np.array(self.latencies)
+            metrics = {
+                **self.counters,
+                "latency_count": self.latency_count,
+                "latency_sum": self.latency_sum,
+            }
+        for percentile in (50, 95, 99):
+            metrics[f"latency_p{percentile}"] = (
+                float(np.percentile(latencies, percentile)) if len(latencies) else None
+            )
+        return metrics
+
+
+########################################################################################################################
+# MAIN CLASS
+########################################################################################################################
+
+
+class UpstreamClient:
+    """
+    This class is used to call an upstream service
+    """
+
+    # The name of the service
+    name: str
+    # The settings of the service, see UPSTREAM_SETTINGS
+    settings: dict
+    # The session holding the keep-alive connections to the service
+    session: requests.Session
+    # The circuit breaker of the service
+    breaker: CircuitBreaker
+    # The metrics of the service
+    metrics: UpstreamMetrics
+    # The most recent successful responses, by cache key, to fall back on while the service is unavailable
+    fallback_cache: OrderedDict
+    # Guards the fallback cache
+    lock: threading.Lock
+
+    def __init__(self, name: str, settings: dict):
+        """
+        Initializes the UpstreamClient object
+        :param name: The name of the service
+        :param settings: The settings of the service, see UPSTREAM_SETTINGS
+        """
+        self.name = name
+        self.settings = settings
+        self.session = requests.Session()
+        # Retries are done by call, so that every attempt is timed and seen by the circuit breaker
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=settings["pool_size"], max_retries=0
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.breaker = CircuitBreaker(
+            settings["failure_threshold"], settings["reset_timeout"]
+        )
+        self.metrics = UpstreamMetrics(name)
+        self.fallback_cache = OrderedDict()
+        self.lock = threading.Lock()
+
+    @property
+    def timeout(self) -> Tuple[float, float]:
+        """
+        The (connect, read) timeout in seconds
+        """
+        return self.settings["connect_timeout"], self.settings["read_timeout"]
+
+    def get_fallback(self, cache_key: Optional[Hashable]) -> Tuple[bool, Any]:
+        """
+        Gets a kept response
+        :param cache_key: The key the response was kept under
+        :return: Whether a response was kept, and the response
+        """
+        if cache_key is None:
+            return False, None
+        with self.lock:
+            if cache_key not in self.fallback_cache:
+                return False, None
+            return True, self.fallback_cache[cache_key]
+
+    def set_fallback(self, cache_key: Optional[Hashable], response: Any):
+        """
+        Keeps a response, dropping the least recently kept response if there are too many
+        :param cache_key: The key to keep the response under
+        :param response: The response
+        :return: None
+        """
+        if cache_key is None:
+            return
+        with self.lock:
+            self.fallback_cache[cache_key] = response
+            self.fallback_cache.move_to_end(cache_key)
+            while len(self.fallback_cache) > UPSTREAM_FALLBACK_CACHE_SIZE:
+                self.fallback_cache.popitem(last=False)
+
+    def call(
+        self,
+        request: Callable[[], Any],
+        cache_key: Optional[Hashable] = None,
+        retry_exceptions: Tuple[Type[Exception], ...] = (
+            requests.ConnectionError,
+            requests.Timeout,
+            UpstreamHTTPError,
+        ),
+        timeout_exceptions: Tuple[Type[Exception], ...] = (requests.Timeout,),
+    ) -> Any:
+        """
+        Calls the service, retrying failures with jittered exponential backoff
+        :param request: Makes one attempt and returns the response
+        :param cache_key: The key the response is kept under to fall back on, nothing is kept if None
+        :param retry_exceptions: The exceptions that mean the service is unavailable, other exceptions are raised
+        straight away
+        :param timeout_exceptions: The exceptions that mean an attempt timed out
+        :return: The response, or the response kept under cache_key if the service is unavailable
+        """
+        self.metrics.increment("requests")
+        for attempt in range(self.settings["max_retries"] + 1):
+            # Fail fast while the service is down
+            if not self.breaker.allow_request():
+                self.metrics.increment("rejected")
+                break
+            if attempt > 0:
+                self.metrics.increment("retries")
+                # Full jitter keeps the clients that failed together from retrying together
+                backoff = min(
+                    self.settings["max_backoff"],
+                    self.settings["backoff"] * 2 ** (attempt - 1),
+                )
+                time.sleep(random.uniform(0, backoff))
+
+            start = time.perf_counter()
+            try:
+                with start_span(
+                    f"upstream.{self.name}",
+                    {"upstream.attempt": attempt},
+                    SPAN_KIND_CLIENT,
+                ):
+                    response = request()
+            except retry_exceptions as e:
+                self.metrics.observe(time.perf_counter() - start)
+                self.metrics.increment("errors")
+                if isinstance(e, timeout_exceptions):
+                    self.metrics.increment("timeouts")
+                self.breaker.record_failure()
+                continue
+            except Exception:
+                # The service answered, the request itself was wrong
+                self.metrics.observe(time.perf_counter() - start)
+                self.metrics.increment("errors")
+                self.breaker.record_success()
+                raise
+            self.metrics.observe(time.perf_counter() - start)
+            self.breaker.record_success()
+            self.set_fallback(cache_key, response)
+            return response
+
+        # Answer from a kept response if there is one
+        found, response = self.get_fallback(cache_key)
+        if found:
+            self.metrics.increment("fallbacks")
+            return response
+        raise UpstreamUnavailableError(
+            f"The {self.name} service is unavailable, please try again later"
+        )
+
+    def post_json(
+        self, url: str, cache_key: Optional[Hashable] = None, **kwargs
+    ) -> Any:
+        """
+        Sends a POST request to the service and decodes the JSON response
+        :param url: The url to send the request to
+        :param cache_key: The key the response is kept under to fall back on, nothing is kept if None
+        :param kwargs: The arguments of requests.Session.post, e.g. data and headers
+        :return: The decoded response
+        """
+
+        def request():
+            response = self.session.post(url, timeout=self.timeout, **kwargs)
+            if response.status_code == 429 or response.status_code >= 500:
+                raise UpstreamHTTPError(
+                    f"{self.name} answered with status code {response.status_code}"
+                )
+            response.raise_for_status()
+            return response.json()
+
+        return self.call(request, cache_key=cache_key)
+
+
+########################################################################################################################
+# CLIENT FUNCTIONS
+########################################################################################################################
+
+
+def get_upstream_client(name: str) -> UpstreamClient:
+    """
+    Gets the client of an upstream service, creating it on first use
+    :param name: The name of the service, a key of UPSTREAM_SETTINGS
+    :return: The client
+    """
+    if name not in UPSTREAM_CLIENTS:
+        with LOCK:
+            if name not in UPSTREAM_CLIENTS:
+                UPSTREAM_CLIENTS[name] = UpstreamClient(name, UPSTREAM_SETTINGS[name])
+    return UPSTREAM_CLIENTS[name]
+
+
+def get_upstream_metrics() -> Dict[str, dict]:
+    """
+    Gets the metrics of every upstream service that has been called
+    :return: The metrics and circuit state of each service, by name
+    """
+    return {
+        name: {**client.metrics.to_dict(), "circuit": client.breaker.state}
+        for name, client in list(UPSTREAM_CLIENTS.items())
+    }
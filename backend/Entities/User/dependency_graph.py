@@ -0,0 +1,130 @@
+########################################################################################################################
+# dependency_graph.py
+# This file contains classes that track which results of a user's analysis are out of date.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+from typing import Dict, List, Optional, Set
+
+from backend.Constants.analysis_constants import AnalysisNode
+
+########################################################################################################################
+# MAIN CLASS
+########################################################################################################################
+
+
+class DependencyGraph:
+    """
+    This class is used to store the dependencies between the inputs and results of an analysis, along with which
+    results are dirty and need to be recomputed the next time they are read
+    """
+
+    # The direct dependencies of each derived node
+    dependencies: Dict[AnalysisNode, List[AnalysisNode]]
+    # The derived nodes that need to be recomputed
+    dirty: Set[AnalysisNode]
+    # Why each dirty node could not be recomputed, kept until one of its dependencies changes
+    errors: Dict[AnalysisNode, str]
+
+    def __init__(self, dependencies: Dict[AnalysisNode, List[AnalysisNode]]):
+        """
+        Initializes the DependencyGraph object, every derived node starts dirty as it has never been computed
+        :param dependencies: The direct dependencies of each derived node
+        """
+        self.dependencies = {node: list(deps) for node, deps in dependencies.items()}
+        self.dirty = set(self.dependencies.keys())
+        self.errors = dict()
+
+    def get_dependencies(self, node: AnalysisNode) -> List[AnalysisNode]:
+        """
+        Returns the direct dependencies of a node
+        :param node: The node
+        :return: The direct dependencies of the node, empty if the node is an input
+        """
+        return self.dependencies.get(node, [])
+
+    def get_dependents(self, node: AnalysisNode) -> Set[AnalysisNode]:
+        """
+        Returns every node that directly or indirectly depends on a node
+        :param node: The node
+        :return: The set of nodes downstream of the node
+        """
+        dependents = set()
+        frontier = [node]
+        # Walk the graph downstream until no new dependents are found
+        while frontier:
+            current = frontier.pop()
+            for candidate, deps in self.dependencies.items():
+                if current in deps and candidate not in dependents:
+                    dependents.add(candidate)
+                    frontier.append(candidate)
+        return dependents
+
+    def get_derived_nodes(self) -> List[AnalysisNode]:
+        """
+        Returns the derived nodes ordered so that every node comes after its dependencies
+        :return: The derived nodes in topological order
+        """
+        ordered = []
+
+        def visit(node: AnalysisNode):
+            for dependency in self.get_dependencies(node):
+                visit(dependency)
+            if node in self.dependencies and node not in ordered:
+                ordered.append(node)
+
+        for node in self.dependencies:
+            visit(node)
+        return ordered
+
+    def invalidate(self, node: AnalysisNode):
+        """
+        Marks every node downstream of a changed node as dirty, forgetting why they could not be recomputed
+        :param node: The node that changed
+        :return: None
+        """
+        for dependent in self.get_dependents(node):
+            self.dirty.add(dependent)
+            self.errors.pop(dependent, None)
+
+    def is_dirty(self, node: AnalysisNode) -> bool:
+        """
+        Returns whether a node needs to be recomputed
+        :param node: The node
+        :return: True if the node is dirty, False otherwise
+        """
+        return node in self.dirty
+
+    def mark_clean(self, node: AnalysisNode):
+        """
+        Marks a node as up to date
+        :param node: The node
+        :return: None
+        """
+        self.dirty.discard(node)
+        self.errors.pop(node, None)
+
+    def set_error(self, node: AnalysisNode, error: str):
+        """
+        Records why a node could not be recomputed, the node stays dirty
+        :param node: The node
+        :param error: What went wrong
+        :return: None
+        """
+        self.errors[node] = error
+
+    def get_error(self, node: AnalysisNode) -> Optional[str]:
+        """
+        Returns why a node could not be recomputed
+        :param node: The node
+        :return: What went wrong, None if the node has not failed since its dependencies last changed
+        """
+        return self.errors.get(node)
@@ -15,15 +15,16 @@
 
 from typing import Dict, List, Optional
 
-from openpyxl.worksheet.dimensions import Dimension
-
+from backend.Constants.analysis_constants import AnalysisNode, ANALYSIS_DEPENDENCIES
 from backend.Constants.importance_factor_constants import ImportanceFactor
 from backend.Entities.Building.building import Building
 from backend.Entities.Building.cladding import Cladding
+from backend.Entities.Building.dimensions import Dimensions
 from backend.Entities.Building.height_zone import HeightZone
 from backend.Entities.Building.roof import Roof
 from backend.Entities.Location.location import Location
 from backend.Entities.Snow.snow_load import SnowLoad
+from backend.Entities.User.dependency_graph import DependencyGraph
 from backend.Entities.User.profile import Profile
 
 ########################################################################################################################
@@ -40,7 +41,7 @@ class User:
     profile: Optional[Profile]
     current_save_file: Optional[int]
     location: Optional[Location]
-    dimensions: Optional[Dimension]
+    dimensions: Optional[Dimensions]
     cladding: Optional[Cladding]
     roof: Optional[Roof]
     num_floors: Optional[int]
@@ -50,6 +51,13 @@ class User:
     building: Optional[Building]
     importance_category: Optional[ImportanceFactor]
     snow_load: Optional[Dict["str", SnowLoad]]
+    building_input: Optional[Dict]
+    wind_load_input: Optional[Dict]
+    seismic_load_input: Optional[Dict]
+    snow_load_input: Optional[Dict]
+    dependency_graph: DependencyGraph
+    # Whether the user has changed since the session was last shared with the other workers of the server
+    changed: bool
 
     def __init__(self, username: str):
         """
@@ -70,6 +78,12 @@ class User:
         self.building = None
         self.importance_category = None
         self.snow_load = None
+        self.building_input = None
+        self.wind_load_input = None
+        self.seismic_load_input = None
+        self.snow_load_input = None
+        self.dependency_graph = DependencyGraph(ANALYSIS_DEPENDENCIES)
+        self.changed = True
 
     def set_profile(self, profile: Profile):
         """
@@ -78,6 +92,7 @@ class User:
         :return: None
         """
         self.profile = profile
+        self.changed = True
 
     def set_current_save_file(self, current_save_file: int):
         """
@@ -86,6 +101,7 @@ class User:
         :return: None
         """
         self.current_save_file = current_save_file
+        self.changed = True
 
     def set_location(self, location: Location):
         """
@@ -94,14 +110,18 @@ class User:
         :return: None
         """
         self.location = location
+        self.changed = True
+        self.dependency_graph.invalidate(AnalysisNode.LOCATION)
 
-    def set_dimensions(self, dimensions: Dimension):
+    def set_dimensions(self, dimensions: Dimensions):
         """
         Sets the dimensions of the user
         :param dimensions: The dimensions of the building
         :return: None
         """
         self.dimensions = dimensions
+        self.changed = True
+        self.dependency_graph.invalidate(AnalysisNode.DIMENSIONS)
 
     def set_cladding(self, cladding: Cladding):
         """
@@ -110,6 +130,8 @@ class User:
         :return: None
         """
         self.cladding = cladding
+        self.changed = True
+        self.dependency_graph.invalidate(AnalysisNode.CLADDING)
 
     def set_roof(self, roof: Roof):
         """
@@ -118,6 +140,8 @@ class User:
         :return: None
         """
         self.roof = roof
+        self.changed = True
+        self.dependency_graph.invalidate(AnalysisNode.ROOF)
 
     def set_num_floors(self, num_floors: int):
         """
@@ -126,6 +150,7 @@ class User:
         :return: None
         """
         self.num_floors = num_floors
+        self.changed = True
 
     def set_mid_height(self, mid_height: float):
         """
@@ -134,6 +159,7 @@ class User:
         :return: None
         """
         self.mid_height = mid_height
+        self.changed = True
 
     def set_material_load(self, material_load: Dict[int, float]):
         """
@@ -142,6 +168,7 @@ class User:
         :return: None
         """
         self.material_load = material_load
+        self.changed = True
 
     def set_height_zones(self, height_zones: List[HeightZone]):
         """
@@ -150,6 +177,7 @@ class User:
         :return: None
         """
         self.height_zones = height_zones
+        self.changed = True
 
     def set_building(self, building: Building):
         """
@@ -158,6 +186,9 @@ class User:
         :return: None
         """
         self.building = building
+        self.changed = True
+        self.dependency_graph.invalidate(AnalysisNode.BUILDING)
+        self.dependency_graph.mark_clean(AnalysisNode.BUILDING)
 
     def set_importance_category(self, importance_category: ImportanceFactor):
         """
@@ -166,6 +197,8 @@ class User:
         :return: None
         """
         self.importance_category = importance_category
+        self.changed = True
+        self.dependency_graph.invalidate(AnalysisNode.IMPORTANCE_CATEGORY)
 
     def set_snow_load(self, snow_load):
         """
@@ -174,6 +207,48 @@ class User:
         :return: None
         """
         self.snow_load = snow_load
+        self.changed = True
+        self.dependency_graph.mark_clean(AnalysisNode.SNOW_LOAD)
+
+    def set_building_input(self, building_input: Dict):
+        """
+        Sets the input used to create the building
+        :param building_input: The input used to create the building
+        :return: None
+        """
+        self.building_input = building_input
+        self.changed = True
+        self.dependency_graph.invalidate(AnalysisNode.BUILDING_INPUT)
+
+    def set_wind_load_input(self, wind_load_input: Dict):
+        """
+        Sets the input used to compute the wind load of each height zone
+        :param wind_load_input: The input used to compute the wind load
+        :return: None
+        """
+        self.wind_load_input = wind_load_input
+        self.changed = True
+        self.dependency_graph.invalidate(AnalysisNode.WIND_LOAD_INPUT)
+
+    def set_seismic_load_input(self, seismic_load_input: Dict):
+        """
+        Sets the input used to compute the seismic load of each height zone
+        :param seismic_load_input: The input used to compute the seismic load
+        :return: None
+        """
+        self.seismic_load_input = seismic_load_input
+        self.changed = True
+        self.dependency_graph.invalidate(AnalysisNode.SEISMIC_LOAD_INPUT)
+
+    def set_snow_load_input(self, snow_load_input: Dict):
+        """
+        Sets the input used to compute the snow load
+        :param snow_load_input: The input used to compute the snow load
+        :return: None
+        """
+        self.snow_load_input = snow_load_input
+        self.changed = True
+        self.dependency_graph.invalidate(AnalysisNode.SNOW_LOAD_INPUT)
 
     def get_username(self):
         """
@@ -272,3 +347,53 @@ class User:
         :return: The snow load of the building
         """
         return self.snow_load
+
+    def get_building_input(self):
+        """
+        Returns the input used to create the building
+        :return: The input used to create the building
+        """
+        return self.building_input
+
+    def get_wind_load_input(self):
+        """
+        Returns the input used to compute the wind load
+        :return: The input used to compute the wind load
+        """
+        return self.wind_load_input
+
+    def get_seismic_load_input(self):
+        """
+        Returns the input used to compute the seismic load
+        :return: The input used to compute the seismic load
+        """
+        return self.seismic_load_input
+
+    def get_snow_load_input(self):
+        """
+        Returns the input used to compute the snow load
+        :return: The input used to compute the snow load
+        """
+        return self.snow_load_input
+
+    def get_dependency_graph(self):
+        """
+        Returns the dependency graph of the user's analysis
+        :return: The dependency graph of the user's analysis
+        """
+        return self.dependency_graph
+
+    def set_changed(self, changed: bool):
+        """
+        Sets whether the user has changed since the session was last shared with the other workers of the server
+        :param changed: Whether the user has changed
+        :return: None
+        """
+        self.changed = changed
+
+    def get_changed(self):
+        """
+        Returns whether the user has changed since the session was last shared with the other workers of the server
+        :return: True if the user has changed, False otherwise
+        """
+        return self.changed
@@ -0,0 +1,469 @@
+########################################################################################################################
+# benchmarks.py
+# This file contains the micro-benchmarks of the load calculations. Each benchmark times one step of the analysis, from
+# the wind, seismic and snow loads to the load combinations and the bar charts, on synthetic buildings of 1 to 500
+# height zones drawn from a seeded generator (see synthetic_data.py). No database or upstream service is involved, the
+# location of every building is made up.
+#
+# The results are written as JSON, and a previous result can be kept as the baseline to compare against. The compare
+# command exits with code 1 if any benchmark got slower than the baseline by more than the threshold, so that it can be
+# used as a gate.
+#
+# Usage:
+#   python backend/Testing/benchmarks.py run --output backend/Testing/Benchmarks/baseline.json
+#   python backend/Testing/benchmarks.py run --output current.json
+#   python backend/Testing/benchmarks.py compare backend/Testing/Benchmarks/baseline.json current.json
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import glob
+import json
+import os
+import platform
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import typer
+from rich import print
+from rich.markup import escape
+from rich.table import Table
+
+from backend.API.Managers.building_manager import process_building_data
+from backend.API.Managers.cladding_manager import process_cladding_data
+from backend.API.Managers.dimensions_manager import process_dimension_data
+from backend.API.Managers.importance_category_manager import (
+    process_importance_category_data,
+)
+from backend.API.Managers.roof_manager import process_roof_data
+from backend.API.Managers.seismic_load_manager import process_seismic_load_data
+from backend.API.Managers.snow_load_manager import process_snow_load_data
+from backend.API.Managers.user_data_manager import (
+    check_user_exists,
+    set_user_cladding,
+    set_user_dimensions,
+    set_user_roof,
+)
+from backend.API.Managers.wind_load_manager import process_wind_load_data
+from backend.Constants.roof_load_combination_constants import (
+    SLSRoofLoadCombinationTypes,
+    ULSRoofLoadCombinationTypes,
+)
+from backend.Constants.importance_factor_constants import ImportanceFactor
+from backend.Constants.seismic_constants import SiteDesignation
+from backend.Constants.wall_load_combination_constants import (
+    SLSWallLoadCombinationTypes,
+    ULSWallLoadCombinationTypes,
+)
+from backend.Entities.Building.building import Building
+from backend.Entities.Location.location import Location
+from backend.Testing.synthetic_data import generate_analysis_input
+from backend.algorithms.load_combination_algorithms import (
+    compute_roof_load_combinations,
+    compute_wall_load_combinations,
+)
+from backend.visualizations.load_combination_bar_chart import generate_bar_chart
+from config import get_file_path
+
+########################################################################################################################
+# CONSTANTS
+########################################################################################################################
+
+# The numbers of height zones of the buildings benchmarked
+DEFAULT_ZONES = [1, 10, 50, 100, 250, 500]
+
+# The bar charts are rendered as one image per height zone, so larger buildings would take minutes per run
+BAR_CHART_MAX_ZONES = 10
+
+# A benchmark that got slower than its baseline by more than this fraction is a regression
+DEFAULT_THRESHOLD = 0.2
+
+# The username the benchmark buildings are created for
+USERNAME = "benchmark"
+
+app = typer.Typer()
+
+
+########################################################################################################################
+# BENCHMARK CASE CLASS
+########################################################################################################################
+
+
+class BenchmarkCase:
+    """
+    This class is used to store a synthetic building with everything the benchmarked steps take as input, each step
+    having been run once so that the steps after it have their inputs
+    """
+
+    # The number of height zones of the building
+    num_zones: int
+    # The input of each step of the analysis, as generated by generate_analysis_input
+    analysis_input: dict
+    # The made-up location of the building
+    location: Location
+    # The importance category of the building
+    importance_category: ImportanceFactor
+    # The building
+    building: Building
+    # The upwind and downwind snow loads of the building
+    snow_load: dict
+
+    def __init__(self, rng: random.Random, num_zones: int):
+        """
+        Initializes the BenchmarkCase object
+        :param rng: The random generator to draw the building from
+        :param num_zones: The number of height zones of the building
+        """
+        self.num_zones = num_zones
+        self.analysis_input = generate_analysis_input(rng, num_zones)
+
+        # A location with climatic and seismic values in the range of Canadian sites, without looking anything up
+        self.location = Location()
+        self.location.address = self.analysis_input["location"]["address"]
+        self.location.latitude = rng.uniform(43, 50)
+        self.location.longitude = rng.uniform(-123, -63)
+        self.location.site_designation = SiteDesignation.XV
+        self.location.xv = self.analysis_input["location"]["seismic_value"]
+        self.location.wind_velocity_pressure = round(rng.uniform(0.3, 0.8), 2)
+        self.location.snow_load = round(rng.uniform(0.1, 0.6), 2)
+        self.location.rain_load = round(rng.uniform(0.8, 4), 2)
+        self.location.design_spectral_acceleration_0_2 = round(rng.uniform(0.1, 0.7), 3)
+        self.location.design_spectral_acceleration_1 = round(rng.uniform(0.03, 0.23), 3)
+
+        # The building is created from the user's dimensions, cladding and roof
+        check_user_exists(USERNAME)
+        set_user_dimensions(
+            USERNAME, process_dimension_data(**self.analysis_input["dimensions"])
+        )
+        set_user_cladding(
+            USERNAME, process_cladding_data(**self.analysis_input["cladding"])
+        )
+        set_user_roof(USERNAME, process_roof_data(**self.analysis_input["roof"]))
+        self.importance_category = process_importance_category_data(
+            self.analysis_input["importance_category"]["importance_category"]
+        )
+        self.building = process_building_data(
+            **self.analysis_input["building"], username=USERNAME
+        )
+
+        # The load combinations need the loads
+        run_wind_load(self)
+        run_seismic_load(self)
+        self.snow_load = run_snow_load(self)
+
+
+########################################################################################################################
+# BENCHMARKS
+########################################################################################################################
+
+
+def run_wind_load(case: BenchmarkCase):
+    """
+    Computes the wind load of every height zone of the building
+    :param case: The benchmark case
+    :return: None
+    """
+    wind_load_input = case.analysis_input["wind_load"]
+    for height_zone in case.building.height_zones:
+        i = height_zone.zone_num - 1
+        process_wind_load_data(
+            building=case.building,
+            height_zone=height_zone,
+            importance_category=case.importance_category,
+            location=case.location,
+            ct=wind_load_input["ct"][i],
+            exposure_factor=wind_load_input["exposure_factor"][i],
+            internal_pressure_category=wind_load_input["internal_pressure_category"][i],
+            manual_ce_cei=wind_load_input["manual_ce_cei"][i],
+        )
+
+
+def run_seismic_load(case: BenchmarkCase):
+    """
+    Computes the seismic load of the building
+    :param case: The benchmark case
+    :return: None
+    """
+    process_seismic_load_data(
+        building=case.building,
+        location=case.location,
+        importance_category=case.importance_category,
+        **case.analysis_input["seismic_load"],
+    )
+
+
+def run_snow_load(case: BenchmarkCase) -> dict:
+    """
+    Computes the upwind and downwind snow loads of the building
+    :param case: The benchmark case
+    :return: The upwind and downwind snow loads
+    """
+    return process_snow_load_data(
+        building=case.building,
+        location=case.location,
+        importance_category=case.importance_category,
+        **case.analysis_input["snow_load"],
+    )
+
+
+def run_wall_load_combinations(case: BenchmarkCase):
+    """
+    Computes the wall load combinations of the building
+    :param case: The benchmark case
+    :return: None
+    """
+    wall_load_combination_input = case.analysis_input["wall_load_combination"]
+    compute_wall_load_combinations(
+        case.building,
+        case.snow_load["upwind"],
+        ULSWallLoadCombinationTypes(wall_load_combination_input["uls_wall_type"]),
+        SLSWallLoadCombinationTypes(wall_load_combination_input["sls_wall_type"]),
+    )
+
+
+def run_roof_load_combinations(case: BenchmarkCase):
+    """
+    Computes the roof load combinations of the building
+    :param case: The benchmark case
+    :return: None
+    """
+    roof_load_combination_input = case.analysis_input["roof_load_combination"]
+    compute_roof_load_combinations(
+        case.building,
+        case.snow_load["upwind"],
+        ULSRoofLoadCombinationTypes(roof_load_combination_input["uls_roof_type"]),
+        SLSRoofLoadCombinationTypes(roof_load_combination_input["sls_roof_type"]),
+    )
+
+
+def run_bar_chart(case: BenchmarkCase):
+    """
+    Renders the bar charts of the building and deletes them
+    :param case: The benchmark case
+    :return: None
+    """
+    id = str(uuid.uuid4())
+    generate_bar_chart(
+        id=id, building=case.building, snow_load=case.snow_load["upwind"]
+    )
+    for path in glob.glob(get_file_path(f"backend/output/bar_chart_hz_*_{id}.png")):
+        os.remove(path)
+
+
+# The benchmarks, by the name of the function they time, with the largest building each is run on
+BENCHMARKS: Dict[str, tuple[Callable[[BenchmarkCase], object], Optional[int]]] = {
+    "process_wind_load_data": (run_wind_load, None),
+    "process_seismic_load_data": (run_seismic_load, None),
+    "process_snow_load_data": (run_snow_load, None),
+    "compute_wall_load_combinations": (run_wall_load_combinations, None),
+    "compute_roof_load_combinations": (run_roof_load_combinations, None),
+    "generate_bar_chart": (run_bar_chart, BAR_CHART_MAX_ZONES),
+}
+
+
+########################################################################################################################
+# HELPER FUNCTIONS
+########################################################################################################################
+
+
+def time_benchmark(
+    function: Callable[[BenchmarkCase], object],
+    case: BenchmarkCase,
+    repeats: int,
+    min_time: float,
+) -> dict:
+    """
+    Times a benchmark. Each repeat runs the benchmark as many times as it takes to last min_time, so that fast
+    benchmarks are not drowned in the resolution of the clock
+    :param function: The benchmark
+    :param case: The benchmark case to run it on
+    :param repeats: The number of repeats
+    :param min_time: The shortest a repeat may last, in seconds
+    :return: The median, min and max time of one run, in seconds, and the number of runs per repeat
+    """
+    # Warm up, and find out how many runs fill a repeat
+    start = time.perf_counter()
+    function(case)
+    elapsed = time.perf_counter() - start
+    loops = max(1, int(min_time / elapsed)) if elapsed > 0 else 1
+
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(loops):
+            function(case)
+        times.append((time.perf_counter() - start) / loops)
+    return {
+        "median": statistics.median(times),
+        "min": min(times),
+        "max": max(times),
+        "loops": loops,
+    }
+
+
+def get_result_name(benchmark: str, num_zones: int) -> str:
+    """
+    Gets the name a result is stored under
+    :param benchmark: The name of the benchmark
+    :param num_zones: The number of height zones of the building
+    :return: The name, e.g. process_wind_load_data[zones=10]
+    """
+    return f"{benchmark}[zones={num_zones}]"
+
+
+def compare_results(baseline: dict, current: dict, threshold: float) -> List[dict]:
+    """
+    Compares the results of two runs
+    :param baseline: The results of the baseline run
+    :param current: The results of the current run
+    :param threshold: The fraction a benchmark may get slower by before it is a regression
+    :return: One comparison per benchmark in both runs, with the median times, their ratio and whether it regressed
+    """
+    comparisons = []
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        baseline_median = baseline["results"][name]["median"]
+        ratio = result["median"] / baseline_median if baseline_median > 0 else 1
+        comparisons.append(
+            {
+                "name": name,
+                "baseline": baseline_median,
+                "current": result["median"],
+                "ratio": ratio,
+                "regression": ratio > 1 + threshold,
+            }
+        )
+    return comparisons
+
+
+def format_time(seconds: float) -> str:
+    """
+    Formats a time for the result tables
+    :param seconds: The time, in seconds
+    :return: The time in the most readable unit
+    """
+    if seconds >= 1:
+        return f"{seconds:.2f}s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds * 1e6:.1f}µs"
+
+
+########################################################################################################################
+# COMMANDS
+########################################################################################################################
+
+
+@app.command()
+def run(
+    output: str = typer.Option(..., help="The file to write the results to as JSON"),
+    zones: List[int] = typer.Option(
+        DEFAULT_ZONES, help="The numbers of height zones of the buildings"
+    ),
+    benchmarks: Optional[List[str]] = typer.Option(
+        None, help="The benchmarks to run, all of them if not given"
+    ),
+    repeats: int = typer.Option(5, help="The number of repeats of each benchmark"),
+    min_time: float = typer.Option(
+        0.05, help="The shortest a repeat may last, in seconds"
+    ),
+    seed: int = typer.Option(0, help="The seed of the synthetic buildings"),
+):
+    """
+    Runs the benchmarks and writes their results
+    """
+    names = benchmarks or list(BENCHMARKS)
+    for name in names:
+        if name not in BENCHMARKS:
+            raise typer.BadParameter(f"Unknown benchmark '{name}'")
+
+    results = {}
+    for num_zones in zones:
+        # The same building for every benchmark of a size, and the same buildings for every run with the same seed
+        case = BenchmarkCase(random.Random(f"{seed}:{num_zones}"), num_zones)
+        for name in names:
+            function, max_zones = BENCHMARKS[name]
+            if max_zones is not None and num_zones > max_zones:
+                continue
+            result = time_benchmark(function, case, repeats, min_time)
+            results[get_result_name(name, num_zones)] = {
+                "benchmark": name,
+                "zones": num_zones,
+                **result,
+            }
+            print(
+                f"{escape(get_result_name(name, num_zones))}: {format_time(result['median'])}"
+            )
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(
+            {
+                "metadata": {
+                    "date": datetime.now().isoformat(timespec="seconds"),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "seed": seed,
+                    "repeats": repeats,
+                },
+                "results": results,
+            },
+            file,
+            indent=4,
+        )
+
+
+@app.command()
+def compare(
+    baseline: str = typer.Argument(..., help="The results to compare against"),
+    current: str = typer.Argument(..., help="The results to compare"),
+    threshold: float = typer.Option(
+        DEFAULT_THRESHOLD,
+        help="The fraction a benchmark may get slower by before it is a regression",
+    ),
+):
+    """
+    Compares the results of two runs, exits with code 1 if any benchmark regressed
+    """
+    with open(baseline) as file:
+        baseline_results = json.load(file)
+    with open(current) as file:
+        current_results = json.load(file)
+    comparisons = compare_results(baseline_results, current_results, threshold)
+
+    table = Table(title=f"Benchmarks (regression threshold {threshold:.0%})")
+    for column in ["Benchmark", "Baseline", "Current", "Change"]:
+        table.add_column(column)
+    for comparison in comparisons:
+        change = f"{comparison['ratio'] - 1:+.1%}"
+        table.add_row(
+            escape(comparison["name"]),
+            format_time(comparison["baseline"]),
+            format_time(comparison["current"]),
+            f"[red]{change}[/red]" if comparison["regression"] else change,
+        )
+    print(table)
+
+    regressions = [c["name"] for c in comparisons if c["regression"]]
+    if regressions:
+        print(
+            f"[red]{len(regressions)} regression(s): {escape(', '.join(regressions))}[/red]"
+        )
+        raise typer.Exit(code=1)
+    print("No regressions")
+
+
+if __name__ == "__main__":
+    app()
@@ -0,0 +1,504 @@
+########################################################################################################################
+# load_test.py
+# This file contains the end-to-end load test of the backend. It starts the server in its own process, backed by local
+# stand-ins for PostgreSQL (a SQLite file), Nominatim and CanSHM (see mock_upstream.py), then has a number of simulated
+# users register, log in and go through the analysis sessions the frontend would, step by step, with synthetic
+# buildings of a configurable number of height zones. It reports the throughput, the latency percentiles of each
+# endpoint, the errors, and the memory of the server per session.
+#
+# Usage:
+#   python backend/Testing/load_test.py run --users 20 --sessions 5 --latency 0.1
+#   python backend/Testing/load_test.py run --database postgres --output load_test.json
+#
+# With --database postgres the server connects to the database configured in database/.env, which must already exist.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import json
+import os
+import random
+import secrets
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import numpy as np
+import requests
+import typer
+from rich import print
+from rich.table import Table
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.Testing.mock_upstream import MockUpstreamServer
+from backend.Testing.synthetic_data import generate_analysis_input
+from config import PROJECT_DIR
+from database.Entities.authentication_data import BASE as AUTHENTICATION_DATA_BASE
+from database.Entities.canadian_postal_code_data import (
+    BASE as CANADIAN_POSTAL_CODE_DATA_BASE,
+)
+from database.Entities.climatic_data import BASE as CLIMATIC_DATA_BASE, ClimaticData
+from database.Entities.save_data import BASE as SAVE_DATA_BASE
+from database.Entities.wind_speed_data import BASE as WIND_SPEED_DATA_BASE
+
+########################################################################################################################
+# CONSTANTS
+########################################################################################################################
+
+# The steps of an analysis session, as (endpoint, key of the input generated by generate_analysis_input)
+SESSION_STEPS = [
+    ("/location", "location"),
+    ("/dimensions", "dimensions"),
+    ("/cladding", "cladding"),
+    ("/roof", "roof"),
+    ("/importance_category", "importance_category"),
+    ("/building", "building"),
+    ("/set_wind_load", "wind_load"),
+    ("/set_seismic_load", "seismic_load"),
+    ("/set_snow_load", "snow_load"),
+    ("/get_wall_load_combinations", "wall_load_combination"),
+    ("/get_roof_load_combinations", "roof_load_combination"),
+]
+
+# The number of weather stations seeded into the SQLite database
+NUM_CLIMATIC_STATIONS = 200
+
+# How long to wait for the server to start, in seconds
+STARTUP_TIMEOUT = 60
+
+# The password of every simulated user, it meets the password requirements of /register
+PASSWORD = "LoadTest-Password-1"
+
+app = typer.Typer()
+
+
+########################################################################################################################
+# HELPER FUNCTIONS
+########################################################################################################################
+
+
+def get_free_port() -> int:
+    """
+    Gets a port nothing is listening on
+    :return: The port
+    """
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get_rss(pid: int) -> Optional[int]:
+    """
+    Gets the resident memory of a process, read from /proc since psutil is not a dependency
+    :param pid: The id of the process
+    :return: The resident memory in bytes, None where /proc is not available
+    """
+    try:
+        with open(f"/proc/{pid}/status") as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def create_sqlite_database(directory: str, seed: int) -> str:
+    """
+    Creates the SQLite database standing in for PostgreSQL, with every table and synthetic weather stations
+    :param directory: The directory to create the database in
+    :param seed: The seed of the weather stations
+    :return: The sqlalchemy URL of the database
+    """
+    url = f"sqlite:///{os.path.join(directory, 'load_test.db')}"
+    engine = create_engine(url)
+    for base in [
+        AUTHENTICATION_DATA_BASE,
+        CANADIAN_POSTAL_CODE_DATA_BASE,
+        CLIMATIC_DATA_BASE,
+        SAVE_DATA_BASE,
+        WIND_SPEED_DATA_BASE,
+    ]:
+        base.metadata.create_all(engine)
+
+    # Weather stations spread over southern Canada, where the mock Nominatim places every address
+    rng = random.Random(seed)
+    controller = sessionmaker(bind=engine)()
+    controller.add_all(
+        ClimaticData(
+            ID=i,
+            ProvinceAndLocation=f"Station {i}",
+            Latitude=rng.uniform(43, 50),
+            Longitude=rng.uniform(-123, -63),
+            SnowLoad_kPa_1_50_Ss=round(rng.uniform(0.8, 4), 2),
+            SnowLoad_kPa_1_50_Sr=round(rng.uniform(0.1, 0.6), 2),
+            HourlyWindPressures_kPa_1_50=round(rng.uniform(0.3, 0.8), 2),
+        )
+        for i in range(NUM_CLIMATIC_STATIONS)
+    )
+    controller.commit()
+    controller.close()
+    engine.dispose()
+    return url
+
+
+def start_server(
+    port: int, environment: Dict[str, str], workers: int = 1
+) -> subprocess.Popen:
+    """
+    Starts the server in its own process and waits for it to accept requests
+    :param port: The port the server listens on
+    :param environment: The environment variables added to those of this process
+    :param workers: The number of worker processes, 1 runs the server in a single process
+    :return: The server process
+    """
+    process = subprocess.Popen(
+        [
+            sys.executable,
+            __file__,
+            "serve",
+            "--port",
+            str(port),
+            "--workers",
+            str(workers),
+        ],
+        cwd=PROJECT_DIR,
+        env={**os.environ, "PYTHONPATH": PROJECT_DIR, **environment},
+    )
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"The server exited with code {process.returncode}")
+        try:
+            requests.get(f"http://127.0.0.1:{port}/server_status", timeout=1)
+            return process
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("The server did not start in time")
+
+
+def get_percentiles(latencies: List[float]) -> Dict[str, float]:
+    """
+    Gets the latency percentiles of an endpoint
+    :param latencies: The latencies of the requests, in seconds
+    :return: The p50, p95 and p99 latencies and the number of requests, in milliseconds
+    """
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]) * 1000
+    return {
+        "requests": len(latencies),
+        "p50": round(p50, 1),
+        "p95": round(p95, 1),
+        "p99": round(p99, 1),
+    }
+
+
+########################################################################################################################
+# LOAD TEST CLASS
+########################################################################################################################
+
+
+class LoadTest:
+    """
+    This class is used to run the simulated users against a running server and collect the latencies
+    """
+
+    # The address of the server
+    base_url: str
+    # The number of analysis sessions each user goes through
+    sessions: int
+    # The smallest and largest number of height zones of the buildings
+    min_zones: int
+    max_zones: int
+    # The seed of the synthetic buildings
+    seed: int
+    # The latencies of the requests, in seconds, by endpoint
+    latencies: Dict[str, List[float]]
+    # The number of failed requests, by endpoint
+    errors: Dict[str, int]
+    # The first few error messages, to tell what went wrong
+    error_messages: List[str]
+    # Guards the latencies and errors
+    lock: threading.Lock
+
+    def __init__(
+        self, base_url: str, sessions: int, min_zones: int, max_zones: int, seed: int
+    ):
+        """
+        Initializes the LoadTest object
+        :param base_url: The address of the server
+        :param sessions: The number of analysis sessions each user goes through
+        :param min_zones: The smallest number of height zones of the buildings
+        :param max_zones: The largest number of height zones of the buildings
+        :param seed: The seed of the synthetic buildings
+        """
+        self.base_url = base_url
+        self.sessions = sessions
+        self.min_zones = min_zones
+        self.max_zones = max_zones
+        self.seed = seed
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.error_messages = []
+        self.lock = threading.Lock()
+
+    def request(
+        self, http: requests.Session, endpoint: str, data: dict
+    ) -> Optional[requests.Response]:
+        """
+        Makes a request to the server and records its latency
+        :param http: The HTTP session of the user
+        :param endpoint: The endpoint
+        :param data: The JSON body of the request
+        :return: The response, None if the request failed
+        """
+        start = time.perf_counter()
+        try:
+            response = http.post(f"{self.base_url}{endpoint}", json=data)
+        except requests.RequestException as e:
+            response = None
+            message = str(e)
+        latency = time.perf_counter() - start
+
+        with self.lock:
+            self.latencies[endpoint].append(latency)
+            if response is None or response.status_code != 200:
+                self.errors[endpoint] += 1
+                if len(self.error_messages) < 10:
+                    if response is not None:
+                        message = f"{response.status_code} {response.text[:200]}"
+                    self.error_messages.append(f"{endpoint}: {message}")
+                return None
+        return response
+
+    def run_user(self, user: int):
+        """
+        Registers and logs in a user, then goes through their analysis sessions
+        :param user: The number of the user
+        :return: None
+        """
+        rng = random.Random(self.seed * 100003 + user)
+        # Usernames must be alphanumeric, the random part keeps runs against the same database apart
+        username = f"load{secrets.token_hex(4)}{user}"[:20]
+        http = requests.Session()
+        self.request(
+            http,
+            "/register",
+            {
+                "username": username,
+                "first_name": "Load",
+                "last_name": "Test",
+                "password": PASSWORD,
+                "email": f"{username}@example.com",
+            },
+        )
+        response = self.request(
+            http, "/login", {"username": username, "password": PASSWORD}
+        )
+        if response is None:
+            return
+        http.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+
+        save_id = None
+        for _ in range(self.sessions):
+            analysis_input = generate_analysis_input(
+                rng, rng.randint(self.min_zones, self.max_zones)
+            )
+            for endpoint, key in SESSION_STEPS:
+                if self.request(http, endpoint, analysis_input[key]) is None:
+                    break
+            # Save the session like the frontend does, the first save creates the file and the others update it
+            response = self.request(
+                http,
+                "/set_user_save_data",
+                {"json_data": json.dumps(analysis_input), "id": save_id},
+            )
+            if response is not None:
+                save_id = response.json()
+
+    def run(self, users: int, concurrency: int) -> float:
+        """
+        Runs the simulated users
+        :param users: The number of users
+        :param concurrency: The number of users active at the same time
+        :return: How long the users took, in seconds
+        """
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(self.run_user, range(users)))
+        return time.perf_counter() - start
+
+    def get_report(self, duration: float) -> dict:
+        """
+        Gets the results of the load test
+        :param duration: How long the users took, in seconds
+        :return: The throughput, the latency percentiles overall and by endpoint, and the errors
+        """
+        all_latencies = [
+            latency for latencies in self.latencies.values() for latency in latencies
+        ]
+        return {
+            "duration": round(duration, 2),
+            "requests_per_second": round(len(all_latencies) / duration, 1),
+            "overall": get_percentiles(all_latencies),
+            "endpoints": {
+                endpoint: {
+                    **get_percentiles(latencies),
+                    "errors": self.errors.get(endpoint, 0),
+                }
+                for endpoint, latencies in self.latencies.items()
+            },
+            "errors": sum(self.errors.values()),
+            "error_messages": self.error_messages,
+        }
+
+
+########################################################################################################################
+# COMMANDS
+########################################################################################################################
+
+
+@app.command()
+def serve(
+    port: int = typer.Option(42613, help="The port to listen on"),
+    workers: int = typer.Option(1, help="The number of worker processes"),
+):
+    """
+    Runs the server, started by run in its own process so that its memory can be measured on its own
+    """
+    import uvicorn
+
+    from main import create_app
+
+    if workers > 1:
+        from backend.API.Managers.server_manager import run_production_server
+
+        run_production_server(create_app, workers, port)
+    else:
+        uvicorn.run(create_app(), host="127.0.0.1", port=port, log_level="warning")
+
+
+@app.command()
+def run(
+    users: int = typer.Option(10, help="The number of simulated users"),
+    concurrency: int = typer.Option(
+        10, help="The number of users active at the same time"
+    ),
+    sessions: int = typer.Option(3, help="The number of sessions of each user"),
+    min_zones: int = typer.Option(1, help="The fewest height zones of a building"),
+    max_zones: int = typer.Option(20, help="The most height zones of a building"),
+    latency: float = typer.Option(
+        0.05, help="The mean latency of Nominatim and CanSHM, in seconds"
+    ),
+    database: str = typer.Option(
+        "sqlite",
+        help="sqlite for a temporary SQLite database, postgres for database/.env",
+    ),
+    seed: int = typer.Option(0, help="The seed of the synthetic buildings"),
+    output: Optional[str] = typer.Option(
+        None, help="A file to write the results to as JSON"
+    ),
+):
+    """
+    Runs the load test against a server started with local stand-ins for the upstream services
+    """
+    upstream = MockUpstreamServer(latency)
+    upstream.start()
+
+    with tempfile.TemporaryDirectory() as directory:
+        environment = {
+            **upstream.get_environment(),
+            # Every address goes to the mock Nominatim rather than the local geocoder
+            "GEOCODER_MODE": "nominatim",
+            "API_SECRET_KEY": os.getenv("API_SECRET_KEY") or secrets.token_hex(32),
+        }
+        if database == "sqlite":
+            environment["DATABASE_URL"] = create_sqlite_database(directory, seed)
+
+        port = get_free_port()
+        server = start_server(port, environment)
+        try:
+            idle_memory = get_rss(server.pid)
+            load_test = LoadTest(
+                f"http://127.0.0.1:{port}", sessions, min_zones, max_zones, seed
+            )
+            duration = load_test.run(users, concurrency)
+            peak_memory = get_rss(server.pid)
+        finally:
+            server.terminate()
+            server.wait()
+            upstream.shutdown()
+
+    report = load_test.get_report(duration)
+    report["upstream_requests"] = upstream.requests
+    if idle_memory is not None and peak_memory is not None:
+        report["memory"] = {
+            "idle_mb": round(idle_memory / 2**20, 1),
+            "after_mb": round(peak_memory / 2**20, 1),
+            "per_session_kb": round(
+                (peak_memory - idle_memory) / (users * sessions) / 2**10, 1
+            ),
+        }
+
+    table = Table(title="Load test")
+    for column in [
+        "Endpoint",
+        "Requests",
+        "p50 (ms)",
+        "p95 (ms)",
+        "p99 (ms)",
+        "Errors",
+    ]:
+        table.add_column(column)
+    for endpoint, result in report["endpoints"].items():
+        table.add_row(
+            endpoint,
+            str(result["requests"]),
+            str(result["p50"]),
+            str(result["p95"]),
+            str(result["p99"]),
+            str(result["errors"]),
+        )
+    overall = report["overall"]
+    table.add_row(
+        "all",
+        str(overall["requests"]),
+        str(overall["p50"]),
+        str(overall["p95"]),
+        str(overall["p99"]),
+        str(report["errors"]),
+    )
+    print(table)
+    print(
+        f"{report['requests_per_second']} requests/s over {report['duration']}s, upstream requests: "
+        f"{report['upstream_requests']}"
+    )
+    if "memory" in report:
+        print(
+            f"Server memory: {report['memory']['idle_mb']}MB idle, {report['memory']['after_mb']}MB after the test, "
+            f"{report['memory']['per_session_kb']}KB per session"
+        )
+    for message in report["error_messages"]:
+        print(f"[red]{message}[/red]")
+
+    if output is not None:
+        with open(output, "w") as file:
+            json.dump(report, file, indent=4)
+
+
+if __name__ == "__main__":
+    app()
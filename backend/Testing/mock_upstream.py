@@ -0,0 +1,208 @@
+########################################################################################################################
+# mock_upstream.py
+# This file contains a local stand-in for Nominatim and the NBCC 2020 Seismic Hazard Tool (CanSHM), used by the load
+# test so that it neither depends on nor hammers the real services. Every response is delayed by a configurable latency
+# to mimic the network, and the coordinates and seismic values returned are made up but stable for a given input.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+from urllib.parse import parse_qs, urlparse
+
+########################################################################################################################
+# CONSTANTS
+########################################################################################################################
+
+# The path of the Nominatim search endpoint
+NOMINATIM_SEARCH_PATH = "/search"
+
+# The path of the CanSHM GraphQL endpoint
+CANSHM_PATH = "/api/canshm/graphql"
+
+
+########################################################################################################################
+# HELPER FUNCTIONS
+########################################################################################################################
+
+
+def get_stable_fraction(text: str, salt: str) -> float:
+    """
+    Gets a number between 0 and 1 that is always the same for the same text
+    :param text: The text
+    :param salt: Distinguishes the numbers drawn from the same text
+    :return: The number
+    """
+    digest = hashlib.sha256(f"{salt}:{text}".encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") / 2**64
+
+
+########################################################################################################################
+# REQUEST HANDLER CLASS
+########################################################################################################################
+
+
+class MockUpstreamHandler(BaseHTTPRequestHandler):
+    """
+    This class is used to answer the requests made to Nominatim and CanSHM
+    """
+
+    # The server the handler belongs to
+    server: "MockUpstreamServer"
+
+    def log_message(self, format, *args):
+        """
+        Keeps the request log out of the load test output
+        :return: None
+        """
+        pass
+
+    def send_json(self, data):
+        """
+        Sends a JSON response after the configured latency
+        :param data: The data to send
+        :return: None
+        """
+        self.server.wait()
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        """
+        Answers a Nominatim search with coordinates somewhere in southern Canada
+        :return: None
+        """
+        url = urlparse(self.path)
+        if url.path != NOMINATIM_SEARCH_PATH:
+            self.send_error(404)
+            return
+        self.server.count("nominatim")
+        query = parse_qs(url.query).get("q", [""])[0]
+        latitude = 43 + 7 * get_stable_fraction(query, "latitude")
+        longitude = -123 + 60 * get_stable_fraction(query, "longitude")
+        self.send_json(
+            [
+                {
+                    "place_id": int(get_stable_fraction(query, "id") * 1e9),
+                    "lat": str(latitude),
+                    "lon": str(longitude),
+                    "display_name": query,
+                }
+            ]
+        )
+
+    def do_POST(self):
+        """
+        Answers a CanSHM query with design spectral accelerations for both site designations
+        :return: None
+        """
+        if urlparse(self.path).path != CANSHM_PATH:
+            self.send_error(404)
+            return
+        self.server.count("canshm")
+        query = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+        values = [
+            {
+                "sa0p2": round(0.1 + 0.6 * get_stable_fraction(query, "sa0p2"), 3),
+                "sa1p0": round(0.03 + 0.2 * get_stable_fraction(query, "sa1p0"), 3),
+            }
+        ]
+        self.send_json({"data": {"NBC2020": {"X148": values, "XC": values}}})
+
+
+########################################################################################################################
+# SERVER CLASS
+########################################################################################################################
+
+
+class MockUpstreamServer(ThreadingHTTPServer):
+    """
+    This class is used to run the stand-in services on a background thread
+    """
+
+    # Answer every request on its own thread so that the latency of one request does not delay the others
+    daemon_threads = True
+    # The mean latency of a response, in seconds
+    latency: float
+    # The latency is drawn uniformly from latency * (1 - jitter) to latency * (1 + jitter)
+    jitter: float
+    # The number of requests answered, by service
+    requests: Dict[str, int]
+    # Guards the request counts
+    lock: threading.Lock
+
+    def __init__(self, latency: float, jitter: float = 0.25, port: int = 0):
+        """
+        Initializes the MockUpstreamServer object
+        :param latency: The mean latency of a response, in seconds
+        :param jitter: The spread of the latency, as a fraction of the mean
+        :param port: The port to listen on, any free port if 0
+        """
+        super().__init__(("127.0.0.1", port), MockUpstreamHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.requests = {"nominatim": 0, "canshm": 0}
+        self.lock = threading.Lock()
+
+    def wait(self):
+        """
+        Waits for the latency of one response
+        :return: None
+        """
+        if self.latency > 0:
+            time.sleep(
+                random.uniform(
+                    self.latency * (1 - self.jitter), self.latency * (1 + self.jitter)
+                )
+            )
+
+    def count(self, service: str):
+        """
+        Counts a request to a service
+        :param service: The name of the service
+        :return: None
+        """
+        with self.lock:
+            self.requests[service] += 1
+
+    def start(self):
+        """
+        Starts answering requests on a background thread
+        :return: None
+        """
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+
+    def get_address(self) -> str:
+        """
+        Gets the address the stand-in services listen on
+        :return: The host and port, e.g. 127.0.0.1:41234
+        """
+        return f"{self.server_address[0]}:{self.server_address[1]}"
+
+    def get_environment(self) -> Dict[str, str]:
+        """
+        Gets the environment variables that point the backend at the stand-in services
+        :return: The environment variables
+        """
+        return {
+            "NOMINATIM_DOMAIN": self.get_address(),
+            "NOMINATIM_SCHEME": "http",
+            "CANSHM_URL": f"http://{self.get_address()}{CANSHM_PATH}",
+        }
@@ -0,0 +1,272 @@
+########################################################################################################################
+# reference_data_test.py
+# This file tests the location lookups served from the compiled reference data bundle. A bundle of made-up postal codes
+# and weather stations is written with the code of database/Population/build_reference_data.py into a temporary
+# directory and loaded in place of the real one, then the location builders are taken from an address to its climatic
+# data, the postal codes are looked up in the postal code index, and the results are checked against the same lookups
+# done by brute force. No database or upstream service is needed. It exits with code 1 if any check fails, so that it can be used as a gate.
+#
+# Usage:
+#   python backend/Testing/reference_data_test.py
+#   python backend/Testing/reference_data_test.py --seed 7 --postal-codes 500 --stations 100
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import random
+import string
+import tempfile
+from typing import Dict, List
+
+import typer
+from rich import print
+
+from backend.Constants.reference_data_constants import REFERENCE_DATA_TABLES
+from backend.Entities.Location import reference_data
+from backend.Entities.Location.location import (
+    LocationXsBuilder,
+    LocationXvBuilder,
+    haversine_distance,
+)
+from backend.Entities.Location.postal_code_index import (
+    PostalCodeIndex,
+    load_postal_code_data,
+)
+from backend.Entities.Location.reference_data import ReferenceData
+from database.Population.build_reference_data import write_manifest, write_table
+
+########################################################################################################################
+# CONSTANTS
+########################################################################################################################
+
+# The area the made-up postal codes and weather stations are spread over, as (south, north, west, east) in degrees
+AREA = (42.0, 60.0, -130.0, -55.0)
+
+# The street address the postal codes are looked up with, as a user would enter it
+ADDRESS = "100 Queen St W, Toronto, ON {postal_code}"
+
+
+########################################################################################################################
+# HELPER FUNCTIONS
+########################################################################################################################
+
+
+def generate_postal_codes(rng: random.Random, count: int) -> Dict[str, tuple]:
+    """
+    Generates made-up postal codes
+    :param rng: The random generator
+    :param count: The number of postal codes
+    :return: The (latitude, longitude) of each postal code, keyed by postal code in the form "A1A 1A1"
+    """
+    postal_codes = dict()
+    while len(postal_codes) < count:
+        letters = [rng.choice(string.ascii_uppercase) for _ in range(3)]
+        digits = [rng.choice(string.digits) for _ in range(3)]
+        postal_code = (
+            f"{letters[0]}{digits[0]}{letters[1]} {digits[1]}{letters[2]}{digits[2]}"
+        )
+        postal_codes[postal_code] = (
+            rng.uniform(AREA[0], AREA[1]),
+            rng.uniform(AREA[2], AREA[3]),
+        )
+    return postal_codes
+
+
+def generate_stations(
+    rng: random.Random, count: int, postal_codes: Dict[str, tuple]
+) -> List[dict]:
+    """
+    Generates made-up weather stations, some of them next to a postal code and some without a location
+    :param rng: The random generator
+    :param count: The number of stations
+    :param postal_codes: The postal codes, as returned by generate_postal_codes
+    :return: The columns of each station, in table order
+    """
+    locations = list(postal_codes.values())
+    stations = []
+    for i in range(count):
+        # A third of the stations are within a few kilometers of a postal code, so both ways of picking one are tested
+        if i % 3 == 0:
+            latitude, longitude = rng.choice(locations)
+            latitude += rng.uniform(-0.02, 0.02)
+            longitude += rng.uniform(-0.02, 0.02)
+        elif i % 10 == 1:
+            latitude, longitude = None, None
+        else:
+            latitude, longitude = (
+                rng.uniform(AREA[0], AREA[1]),
+                rng.uniform(AREA[2], AREA[3]),
+            )
+        station = {
+            column: round(rng.uniform(0.1, 5.0), 2)
+            for column in REFERENCE_DATA_TABLES["ClimaticData"]
+        }
+        station["ProvinceAndLocation"] = f"Station {i}"
+        station["Latitude"] = latitude
+        station["Longitude"] = longitude
+        stations.append(station)
+    return stations
+
+
+def write_bundle(
+    directory: str, postal_codes: Dict[str, tuple], stations: List[dict]
+) -> ReferenceData:
+    """
+    Writes a bundle of the made-up data and loads it
+    :param directory: The directory to write the bundle to
+    :param postal_codes: The postal codes, as returned by generate_postal_codes
+    :param stations: The weather stations, as returned by generate_stations
+    :return: The loaded bundle
+    """
+    # The postal codes are written out of order, the order of the database depends on its collation
+    postal_code_rows = [
+        [postal_code, "Toronto", "ON", latitude, longitude]
+        for postal_code, (latitude, longitude) in postal_codes.items()
+    ]
+    station_rows = [
+        [station[column] for column in REFERENCE_DATA_TABLES["ClimaticData"]]
+        for station in stations
+    ]
+    wind_speed_rows = [[0.1 * i, 10.0 * i] for i in range(1, 11)]
+    tables = dict()
+    for table_name, rows in [
+        ("CanadianPostalCodeData", postal_code_rows),
+        ("ClimaticData", station_rows),
+        ("WindSpeedData", wind_speed_rows),
+    ]:
+        tables[table_name] = write_table(directory, table_name, list(zip(*rows)))
+    write_manifest(directory, tables)
+    return ReferenceData(directory)
+
+
+def get_expected_station(
+    stations: List[dict], latitude: float, longitude: float
+) -> dict:
+    """
+    Picks the weather station of a location the way the database lookup does, one station at a time
+    :param stations: The weather stations, as returned by generate_stations
+    :param latitude: The latitude of the location
+    :param longitude: The longitude of the location
+    :return: The first station within 10km in table order, otherwise the closest station
+    """
+    closest = None
+    closest_distance = None
+    for station in stations:
+        if station["Latitude"] is None or station["Longitude"] is None:
+            continue
+        distance = haversine_distance(
+            station["Latitude"], station["Longitude"], latitude, longitude
+        )
+        if distance < 10:
+            return station
+        if closest_distance is None or distance < closest_distance:
+            closest, closest_distance = station, distance
+    return closest
+
+
+def check_builders(postal_codes: Dict[str, tuple], stations: List[dict]) -> List[str]:
+    """
+    Takes each location builder from an address with each postal code to its climatic data
+    :param postal_codes: The postal codes in the bundle, as returned by generate_postal_codes
+    :param stations: The weather stations in the bundle, as returned by generate_stations
+    :return: A description of each failed check
+    """
+    failures = []
+    for name, builder_class in [
+        ("LocationXvBuilder", LocationXvBuilder),
+        ("LocationXsBuilder", LocationXsBuilder),
+    ]:
+        for postal_code, (latitude, longitude) in postal_codes.items():
+            builder = builder_class()
+            try:
+                builder.set_address(ADDRESS.format(postal_code=postal_code))
+                builder.set_coordinates()
+                builder.set_climatic_data()
+            except Exception as e:
+                failures.append(f"{name} {postal_code}: {type(e).__name__}: {e}")
+                continue
+            location = builder.get_location()
+            expected = get_expected_station(stations, latitude, longitude)
+            if (location.latitude, location.longitude) != (latitude, longitude):
+                failures.append(
+                    f"{name} {postal_code}: found at {location.latitude}, {location.longitude}, expected "
+                    f"{latitude}, {longitude}"
+                )
+            if (
+                location.wind_velocity_pressure,
+                location.snow_load,
+                location.rain_load,
+            ) != (
+                expected["HourlyWindPressures_kPa_1_50"],
+                expected["SnowLoad_kPa_1_50_Sr"],
+                expected["SnowLoad_kPa_1_50_Ss"],
+            ):
+                failures.append(
+                    f"{name} {postal_code}: climatic data not from {expected['ProvinceAndLocation']}"
+                )
+    return failures
+
+
+def check_postal_code_index(postal_codes: Dict[str, tuple]) -> List[str]:
+    """
+    Looks up each postal code in the postal code index built from the bundle, as the autocomplete does
+    :param postal_codes: The postal codes in the bundle, as returned by generate_postal_codes
+    :return: A description of each failed check
+    """
+    failures = []
+    index = PostalCodeIndex(load_postal_code_data())
+    for postal_code in postal_codes:
+        positions = index.postal_code_index.find(
+            postal_code.replace(" ", "").encode("utf-8")
+        )
+        found = [index.get_entry(position)["postal_code"] for position in positions]
+        if found != [postal_code]:
+            failures.append(f"PostalCodeIndex {postal_code}: found {found}")
+    return failures
+
+
+########################################################################################################################
+# MAIN FUNCTION
+########################################################################################################################
+
+
+def main(
+    seed: int = typer.Option(0, help="The seed of the made-up data"),
+    postal_codes: int = typer.Option(200, help="The number of postal codes"),
+    stations: int = typer.Option(60, help="The number of weather stations"),
+):
+    """
+    Tests the location lookups served from the reference data bundle
+    """
+    rng = random.Random(seed)
+    postal_code_data = generate_postal_codes(rng, postal_codes)
+    station_data = generate_stations(rng, stations, postal_code_data)
+
+    with tempfile.TemporaryDirectory(prefix="aspenlog-reference-data-") as directory:
+        # Serve the lookups from the made-up bundle instead of the one built from the database, if there is one
+        reference_data.REFERENCE_DATA = write_bundle(
+            directory, postal_code_data, station_data
+        )
+        failures = check_builders(postal_code_data, station_data)
+        failures += check_postal_code_index(postal_code_data)
+
+    for failure in failures[:20]:
+        print(f"[red]{failure}[/red]")
+    if failures:
+        print(f"[red]{len(failures)} checks failed[/red]")
+        raise typer.Exit(code=1)
+    print(
+        f"[green]All lookups of {postal_codes} postal codes by both location builders and the postal code index "
+        f"matched[/green]"
+    )
+
+
+if __name__ == "__main__":
+    typer.run(main)
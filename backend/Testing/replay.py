@@ -0,0 +1,358 @@
+########################################################################################################################
+# replay.py
+# This file replays the requests recorded by the recording middleware (see recording_middleware.py) against a server,
+# by default a fresh one started with the same local stand-ins for PostgreSQL, Nominatim and CanSHM as the load test.
+# The requests of each recorded session are sent in order, at the pace they were recorded at or faster, with every
+# session running alongside the others as it did when recorded.
+#
+# Tokens and passwords are not recorded, so each recorded session is replayed as a new user created for the replay, and
+# the recorded /register and /login requests are skipped. The status and a digest of each response are compared with
+# the recorded ones, and the latencies of each endpoint with the recorded latencies. Responses that hold ids or dates,
+# such as the id of a new save file, differ on every run, so a digest mismatch is only worth a look where the status
+# matches and the endpoint is deterministic.
+#
+# Usage:
+#   python backend/Testing/replay.py backend/output/recorded_requests.jsonl --speed 2
+#   python backend/Testing/replay.py recorded_requests.jsonl --url http://127.0.0.1:42613 --output replay.json
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import hashlib
+import json
+import os
+import secrets
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import requests
+import typer
+from rich import print
+from rich.table import Table
+
+from backend.Constants.recording_constants import RECORDING_AUTHENTICATION_ENDPOINTS
+from backend.Testing.load_test import (
+    PASSWORD,
+    create_sqlite_database,
+    get_free_port,
+    get_percentiles,
+    start_server,
+)
+from backend.Testing.mock_upstream import MockUpstreamServer
+
+########################################################################################################################
+# REPLAY CLASS
+########################################################################################################################
+
+
+class Replay:
+    """
+    This class is used to replay recorded sessions against a running server and compare the results
+    """
+
+    # The address of the server
+    base_url: str
+    # How much faster than recorded the requests are sent, 0 to send them as fast as possible
+    speed: float
+    # The recorded requests to replay, by session, in the order they were recorded
+    sessions: Dict[Optional[str], List[dict]]
+    # The time of the first recorded request
+    start_time: float
+    # The number of recorded requests that are not replayed, by reason
+    skipped: Dict[str, int]
+    # The recorded and replayed latencies, in seconds, by endpoint
+    recorded_latencies: Dict[str, List[float]]
+    replayed_latencies: Dict[str, List[float]]
+    # The number of responses whose status or digest differ from the recorded ones, by endpoint
+    status_mismatches: Dict[str, int]
+    digest_mismatches: Dict[str, int]
+    # The first few status mismatches, to tell what went wrong
+    mismatch_messages: List[str]
+    # Guards the results
+    lock: threading.Lock
+
+    def __init__(self, base_url: str, records: List[dict], speed: float):
+        """
+        Initializes the Replay object
+        :param base_url: The address of the server
+        :param records: The recorded requests
+        :param speed: How much faster than recorded the requests are sent, 0 to send them as fast as possible
+        """
+        self.base_url = base_url
+        self.speed = speed
+        self.sessions = defaultdict(list)
+        self.skipped = defaultdict(int)
+        self.recorded_latencies = defaultdict(list)
+        self.replayed_latencies = defaultdict(list)
+        self.status_mismatches = defaultdict(int)
+        self.digest_mismatches = defaultdict(int)
+        self.mismatch_messages = []
+        self.lock = threading.Lock()
+
+        records = sorted(records, key=lambda x: x["time"])
+        self.start_time = records[0]["time"] if records else 0
+        for record in records:
+            if record["path"] in RECORDING_AUTHENTICATION_ENDPOINTS:
+                self.skipped["authentication"] += 1
+            elif not record["replayable"]:
+                self.skipped["body not recorded"] += 1
+            else:
+                self.sessions[record["session"]].append(record)
+
+    def create_user(self) -> str:
+        """
+        Creates a user to replay a recorded session as
+        :return: The token of the user
+        """
+        username = f"replay{secrets.token_hex(6)}"
+        requests.post(
+            f"{self.base_url}/register",
+            json={
+                "username": username,
+                "first_name": "Replay",
+                "last_name": "Replay",
+                "password": PASSWORD,
+                "email": f"{username}@example.com",
+            },
+        ).raise_for_status()
+        response = requests.post(
+            f"{self.base_url}/login", json={"username": username, "password": PASSWORD}
+        )
+        response.raise_for_status()
+        return response.json()["access_token"]
+
+    def replay_request(self, http: requests.Session, record: dict):
+        """
+        Sends a recorded request and compares its response with the recorded one
+        :param http: The HTTP session of the user the session is replayed as
+        :param record: The recorded request
+        :return: None
+        """
+        url = f"{self.base_url}{record['path']}"
+        if record["query"]:
+            url = f"{url}?{record['query']}"
+        headers = {}
+        if record["content_type"]:
+            headers["Content-Type"] = record["content_type"]
+
+        start = time.perf_counter()
+        response = http.request(
+            record["method"],
+            url,
+            data=record["body"].encode("utf-8") if record["body"] else None,
+            headers=headers,
+        )
+        latency = time.perf_counter() - start
+
+        endpoint = f"{record['method']} {record['path']}"
+        with self.lock:
+            self.recorded_latencies[endpoint].append(record["duration"])
+            self.replayed_latencies[endpoint].append(latency)
+            if response.status_code != record["status"]:
+                self.status_mismatches[endpoint] += 1
+                if len(self.mismatch_messages) < 10:
+                    self.mismatch_messages.append(
+                        f"{endpoint}: recorded {record['status']}, replayed {response.status_code} "
+                        f"{response.text[:200]}"
+                    )
+            elif (
+                hashlib.sha256(response.content).hexdigest()
+                != record["response_digest"]
+            ):
+                self.digest_mismatches[endpoint] += 1
+
+    def replay_session(self, token: Optional[str], records: List[dict], start: float):
+        """
+        Sends the requests of a recorded session in order, each no earlier than it was recorded relative to the start
+        :param token: The token of the user the session is replayed as, None for requests that were not authenticated
+        :param records: The recorded requests of the session
+        :param start: When the replay started, by time.monotonic
+        :return: None
+        """
+        http = requests.Session()
+        if token is not None:
+            http.headers["Authorization"] = f"Bearer {token}"
+        for record in records:
+            if self.speed > 0:
+                delay = (record["time"] - self.start_time) / self.speed
+                time.sleep(max(0.0, start + delay - time.monotonic()))
+            try:
+                self.replay_request(http, record)
+            except requests.RequestException as e:
+                with self.lock:
+                    self.status_mismatches[f"{record['method']} {record['path']}"] += 1
+                    if len(self.mismatch_messages) < 10:
+                        self.mismatch_messages.append(f"{record['path']}: {e}")
+
+    def run(self) -> float:
+        """
+        Replays every recorded session
+        :return: How long the replay took, in seconds
+        """
+        # Create the users first so that creating them does not hold up the sessions
+        tokens = {
+            session: (self.create_user() if session is not None else None)
+            for session in self.sessions
+        }
+        start = time.monotonic()
+        with ThreadPoolExecutor(max_workers=max(1, len(self.sessions))) as executor:
+            futures = [
+                executor.submit(self.replay_session, tokens[session], records, start)
+                for session, records in self.sessions.items()
+            ]
+            for future in futures:
+                future.result()
+        return time.monotonic() - start
+
+    def get_report(self, duration: float) -> dict:
+        """
+        Gets the results of the replay
+        :param duration: How long the replay took, in seconds
+        :return: The recorded and replayed latency percentiles and the mismatches of each endpoint
+        """
+        return {
+            "duration": round(duration, 2),
+            "sessions": len(self.sessions),
+            "skipped": dict(self.skipped),
+            "endpoints": {
+                endpoint: {
+                    "recorded": get_percentiles(self.recorded_latencies[endpoint]),
+                    "replayed": get_percentiles(latencies),
+                    "status_mismatches": self.status_mismatches.get(endpoint, 0),
+                    "digest_mismatches": self.digest_mismatches.get(endpoint, 0),
+                }
+                for endpoint, latencies in self.replayed_latencies.items()
+            },
+            "mismatch_messages": self.mismatch_messages,
+        }
+
+
+########################################################################################################################
+# HELPER FUNCTIONS
+########################################################################################################################
+
+
+def read_records(path: str) -> List[dict]:
+    """
+    Reads the recorded requests
+    :param path: The recording file
+    :return: The recorded requests, a line cut short by the server stopping while it was written is left out
+    """
+    records = []
+    with open(path) as file:
+        for line in file:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+    return records
+
+
+def print_report(report: dict):
+    """
+    Prints the results of a replay
+    :param report: The results, as returned by Replay.get_report
+    :return: None
+    """
+    table = Table(title="Replay")
+    for column in [
+        "Endpoint",
+        "Requests",
+        "Recorded p50/p95 (ms)",
+        "Replayed p50/p95 (ms)",
+        "Status mismatches",
+        "Digest mismatches",
+    ]:
+        table.add_column(column)
+    for endpoint, result in report["endpoints"].items():
+        recorded = result["recorded"]
+        replayed = result["replayed"]
+        table.add_row(
+            endpoint,
+            str(replayed["requests"]),
+            f"{recorded['p50']} / {recorded['p95']}",
+            f"{replayed['p50']} / {replayed['p95']}",
+            str(result["status_mismatches"]),
+            str(result["digest_mismatches"]),
+        )
+    print(table)
+    print(
+        f"Replayed {report['sessions']} session(s) in {report['duration']}s, skipped: {report['skipped']}"
+    )
+    for message in report["mismatch_messages"]:
+        print(f"[red]{message}[/red]")
+
+
+########################################################################################################################
+# MAIN FUNCTION
+########################################################################################################################
+
+
+def main(
+    recording: str = typer.Argument(..., help="The file the requests were recorded to"),
+    url: Optional[str] = typer.Option(
+        None, help="The server to replay against, a fresh one is started if not given"
+    ),
+    speed: float = typer.Option(
+        1.0,
+        help="How much faster than recorded to send the requests, 0 for as fast as possible",
+    ),
+    latency: float = typer.Option(
+        0.05,
+        help="The mean latency of Nominatim and CanSHM for a fresh server, in seconds",
+    ),
+    output: Optional[str] = typer.Option(
+        None, help="A file to write the results to as JSON"
+    ),
+):
+    """
+    Replays recorded requests and compares the responses and latencies with the recorded ones
+    """
+    records = read_records(recording)
+    if url is not None:
+        replay = Replay(url, records, speed)
+        report = replay.get_report(replay.run())
+    else:
+        upstream = MockUpstreamServer(latency)
+        upstream.start()
+        with tempfile.TemporaryDirectory() as directory:
+            port = get_free_port()
+            server = start_server(
+                port,
+                {
+                    **upstream.get_environment(),
+                    "GEOCODER_MODE": "nominatim",
+                    "API_SECRET_KEY": os.getenv("API_SECRET_KEY")
+                    or secrets.token_hex(32),
+                    "DATABASE_URL": create_sqlite_database(directory, 0),
+                    # Do not record the replay over the recording
+                    "RECORD_REQUESTS": "false",
+                },
+            )
+            try:
+                replay = Replay(f"http://127.0.0.1:{port}", records, speed)
+                report = replay.get_report(replay.run())
+            finally:
+                server.terminate()
+                server.wait()
+                upstream.shutdown()
+
+    print_report(report)
+    if output is not None:
+        with open(output, "w") as file:
+            json.dump(report, file, indent=4)
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,292 @@
+########################################################################################################################
+# session_lock_test.py
+# This file tests the session locking of the multi-worker server (see session_middleware.py). It starts the server with
+# several workers, backed by the same local stand-ins as the load test (see load_test.py), then has one user send a
+# burst of concurrent requests, which the server must handle one at a time, while another user makes requests of their
+# own. It fails if any request of either user fails or times out, or if the other user's requests are held up by the
+# burst.
+#
+# The user then sends a burst of autosaves of one save file, which are handed from worker to worker with the session.
+# It fails if the autosaves are not all in the database once they are due, without any request reading them, or if
+# reading the save file does not return all of them. It exits with code 1 if any check fails, so that it can be used as
+# a gate.
+#
+# Usage:
+#   python backend/Testing/session_lock_test.py
+#   python backend/Testing/session_lock_test.py --workers 4 --requests 200
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import json
+import os
+import random
+import secrets
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+import requests
+import typer
+from rich import print
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.Constants.autosave_constants import (
+    AUTOSAVE_DEBOUNCE_SECONDS,
+    AUTOSAVE_POLL_SECONDS,
+)
+from backend.Testing.load_test import (
+    PASSWORD,
+    create_sqlite_database,
+    get_free_port,
+    start_server,
+)
+from backend.Testing.mock_upstream import MockUpstreamServer
+from backend.Testing.synthetic_data import generate_analysis_input
+from database.Entities.save_data import SaveData
+
+########################################################################################################################
+# CONSTANTS
+########################################################################################################################
+
+# How long a request may take before it is counted as timed out, in seconds
+REQUEST_TIMEOUT = 30
+
+# How long a request of the other user may take while the burst is being handled, in seconds
+OTHER_USER_MAX_LATENCY = 2.0
+
+# The number of requests the other user makes while the burst is being handled
+OTHER_USER_REQUESTS = 20
+
+# How long the server has to shut down before it is killed, in seconds. A worker with requests stuck waiting for a
+# session never finishes shutting down
+SHUTDOWN_TIMEOUT = 60
+
+
+########################################################################################################################
+# HELPER FUNCTIONS
+########################################################################################################################
+
+
+def log_in(base_url: str, name: str) -> requests.Session:
+    """
+    Registers and logs in a user
+    :param base_url: The address of the server
+    :param name: The start of the username
+    :return: An HTTP session with the token of the user
+    """
+    # Usernames must be alphanumeric, the random part keeps runs against the same database apart
+    username = f"{name}{secrets.token_hex(4)}"[:20]
+    http = requests.Session()
+    http.post(
+        f"{base_url}/register",
+        json={
+            "username": username,
+            "first_name": "Session",
+            "last_name": "Test",
+            "password": PASSWORD,
+            "email": f"{username}@example.com",
+        },
+        timeout=REQUEST_TIMEOUT,
+    ).raise_for_status()
+    response = http.post(
+        f"{base_url}/login",
+        json={"username": username, "password": PASSWORD},
+        timeout=REQUEST_TIMEOUT,
+    )
+    response.raise_for_status()
+    http.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+    return http
+
+
+def post(http: requests.Session, url: str, data: dict) -> Optional[str]:
+    """
+    Makes a request
+    :param http: The HTTP session of the user
+    :param url: The address of the endpoint
+    :param data: The JSON body of the request
+    :return: What went wrong, None if the request succeeded
+    """
+    try:
+        response = http.post(url, json=data, timeout=REQUEST_TIMEOUT)
+    except requests.RequestException as e:
+        return f"{type(e).__name__}: {e}"
+    if response.status_code != 200:
+        return f"{response.status_code} {response.text[:200]}"
+    return None
+
+
+def run_burst(base_url: str, count: int, seed: int) -> List[str]:
+    """
+    Sends a burst of concurrent requests from one user while another user makes requests one after the other
+    :param base_url: The address of the server
+    :param count: The number of requests in the burst
+    :param seed: The seed of the synthetic buildings
+    :return: A description of each failed check
+    """
+    rng = random.Random(seed)
+    burst_user = log_in(base_url, "burst")
+    other_user = log_in(base_url, "other")
+    dimensions = [generate_analysis_input(rng, 1)["dimensions"] for _ in range(count)]
+
+    failures = []
+    other_latencies = []
+    lock = threading.Lock()
+
+    def send_burst_request(data: dict):
+        error = post(burst_user, f"{base_url}/dimensions", data)
+        if error is not None:
+            with lock:
+                failures.append(f"burst /dimensions: {error}")
+
+    def send_other_requests():
+        for data in dimensions[:OTHER_USER_REQUESTS]:
+            start = time.perf_counter()
+            error = post(other_user, f"{base_url}/dimensions", data)
+            other_latencies.append(time.perf_counter() - start)
+            # The rest of the requests would most likely wait as long
+            if error is not None:
+                with lock:
+                    failures.append(f"other /dimensions: {error}")
+                return
+
+    with ThreadPoolExecutor(max_workers=count + 1) as executor:
+        futures = [executor.submit(send_burst_request, data) for data in dimensions]
+        # Give the burst time to fill the server before the other user starts
+        time.sleep(0.5)
+        futures.append(executor.submit(send_other_requests))
+        for future in futures:
+            future.result()
+
+    slowest = max(other_latencies)
+    if slowest > OTHER_USER_MAX_LATENCY:
+        failures.append(
+            f"other /dimensions: took {slowest:.2f}s while the burst was handled, more than "
+            f"{OTHER_USER_MAX_LATENCY}s"
+        )
+    return failures
+
+
+def run_autosaves(base_url: str, count: int, database_url: str) -> List[str]:
+    """
+    Sends a burst of concurrent autosaves of one save file from one user, each with a key of its own, then checks that
+    they are written to the database once they are due and that reading the save file returns all of them
+    :param base_url: The address of the server
+    :param count: The number of autosaves
+    :param database_url: The sqlalchemy URL of the database of the server
+    :return: A description of each failed check
+    """
+    http = log_in(base_url, "autosave")
+    response = http.post(
+        f"{base_url}/set_user_save_data",
+        json={"json_data": json.dumps({"start": 0}), "id": None},
+        timeout=REQUEST_TIMEOUT,
+    )
+    response.raise_for_status()
+    id = response.json()
+    expected = {"start": 0, **{f"key{i}": i for i in range(count)}}
+
+    failures = []
+    with ThreadPoolExecutor(max_workers=count) as executor:
+        for error in executor.map(
+            lambda i: post(
+                http,
+                f"{base_url}/set_user_save_data",
+                {"json_data": json.dumps({f"key{i}": i}), "id": id},
+            ),
+            range(count),
+        ):
+            if error is not None:
+                failures.append(f"/set_user_save_data: {error}")
+
+    # No request reads the save file in the meantime, so the autosaves are only written by the background writers
+    time.sleep(AUTOSAVE_DEBOUNCE_SECONDS + 4 * AUTOSAVE_POLL_SECONDS)
+    engine = create_engine(database_url)
+    controller = sessionmaker(bind=engine)()
+    saved = json.loads(controller.get(SaveData, id).JsonData)
+    controller.close()
+    engine.dispose()
+    if saved != expected:
+        failures.append(
+            f"database: {len(set(expected) - set(saved))} of {len(expected)} keys missing once due"
+        )
+
+    response = http.post(
+        f"{base_url}/get_user_save_file",
+        params={"id": id},
+        timeout=REQUEST_TIMEOUT,
+    )
+    if response.status_code != 200:
+        failures.append(
+            f"/get_user_save_file: {response.status_code} {response.text[:200]}"
+        )
+    elif json.loads(response.json()["JsonData"]) != expected:
+        failures.append("/get_user_save_file: autosaves missing")
+    return failures
+
+
+########################################################################################################################
+# MAIN FUNCTION
+########################################################################################################################
+
+
+def main(
+    workers: int = typer.Option(2, help="The number of worker processes"),
+    requests_: int = typer.Option(
+        100, "--requests", help="The number of concurrent requests of the user"
+    ),
+    seed: int = typer.Option(0, help="The seed of the synthetic buildings"),
+):
+    """
+    Tests that the concurrent requests of a user neither fail nor hold up other users on the multi-worker server
+    """
+    upstream = MockUpstreamServer(0.0)
+    upstream.start()
+
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = create_sqlite_database(directory, seed)
+        environment = {
+            **upstream.get_environment(),
+            "GEOCODER_MODE": "nominatim",
+            "API_SECRET_KEY": os.getenv("API_SECRET_KEY") or secrets.token_hex(32),
+            "DATABASE_URL": database_url,
+        }
+        port = get_free_port()
+        server = start_server(port, environment, workers)
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            failures = run_burst(base_url, requests_, seed)
+            failures += run_autosaves(base_url, requests_, database_url)
+        finally:
+            server.terminate()
+            try:
+                server.wait(SHUTDOWN_TIMEOUT)
+            except subprocess.TimeoutExpired:
+                server.kill()
+                server.wait()
+            upstream.shutdown()
+
+    for failure in failures[:20]:
+        print(f"[red]{failure}[/red]")
+    if failures:
+        print(f"[red]{len(failures)} checks failed[/red]")
+        raise typer.Exit(code=1)
+    print(
+        f"[green]All {requests_} concurrent requests of one user and the requests of another user succeeded, and "
+        f"all {requests_} concurrent autosaves were written, on {workers} workers[/green]"
+    )
+
+
+if __name__ == "__main__":
+    typer.run(main)
@@ -0,0 +1,200 @@
+########################################################################################################################
+# startup_time.py
+# This file reports how long the server takes to start, and what it spends that time importing. The app is created in
+# a fresh interpreter with -X importtime, as many times as asked, and the fastest start is checked against a budget.
+# The modules that are imported on first use rather than at startup (pandas, matplotlib, openpyxl and alembic) are also
+# checked, so that an import added to the wrong file is caught. It exits with code 1 if either check fails, so that it
+# can be used as a gate.
+#
+# Usage:
+#   python backend/Testing/startup_time.py
+#   python backend/Testing/startup_time.py --budget 1.0 --runs 5 --top 30 --output startup.json
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import json
+import os
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+import typer
+from rich import print
+from rich.table import Table
+
+from config import PROJECT_DIR
+
+########################################################################################################################
+# CONSTANTS
+########################################################################################################################
+
+# The longest the app may take to import and create, in seconds
+DEFAULT_STARTUP_BUDGET = 1.5
+
+# The packages that must not be imported while the server starts, they are imported on first use or by the warm-up
+LAZY_PACKAGES = ["pandas", "matplotlib", "openpyxl", "alembic"]
+
+# Creates the app and prints how long it took, in seconds
+STARTUP_SCRIPT = (
+    "import time\n"
+    "start = time.perf_counter()\n"
+    "from main import create_app\n"
+    "create_app()\n"
+    "print(time.perf_counter() - start)\n"
+)
+
+# A line of the -X importtime report, the self and cumulative times are in microseconds
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+########################################################################################################################
+# HELPER FUNCTIONS
+########################################################################################################################
+
+
+def measure_startup() -> dict:
+    """
+    Creates the app in a fresh interpreter and reads what it imported
+    :return: How long creating the app took in seconds, and the self and cumulative import time in seconds and
+    nesting depth of every module imported, in the order they finished importing
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", STARTUP_SCRIPT],
+        cwd=PROJECT_DIR,
+        env={**os.environ, "PYTHONPATH": PROJECT_DIR},
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Could not create the app:\n{result.stderr[-2000:]}")
+
+    modules = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            modules.append(
+                {
+                    "module": match.group(4),
+                    "self": int(match.group(1)) / 1e6,
+                    "cumulative": int(match.group(2)) / 1e6,
+                    "depth": len(match.group(3)) // 2,
+                }
+            )
+    return {
+        "duration": float(result.stdout.strip().splitlines()[-1]),
+        "modules": modules,
+    }
+
+
+def get_package_times(modules: List[dict]) -> Dict[str, float]:
+    """
+    Gets the time spent importing each top level package
+    :param modules: The modules imported, as returned by measure_startup
+    :return: The sum of the self time of the modules of each package, in seconds, the slowest first
+    """
+    times = defaultdict(float)
+    for module in modules:
+        times[module["module"].split(".")[0]] += module["self"]
+    return dict(sorted(times.items(), key=lambda x: x[1], reverse=True))
+
+
+def get_importer(modules: List[dict], index: int) -> Optional[str]:
+    """
+    Gets the module that imported a module, the next module in the report at a smaller depth
+    :param modules: The modules imported, as returned by measure_startup
+    :param index: The index of the module
+    :return: The module that imported it, None if it was imported by the startup script
+    """
+    depth = modules[index]["depth"]
+    for module in modules[index + 1 :]:
+        if module["depth"] < depth:
+            return module["module"]
+    return None
+
+
+def get_lazy_package_importers(modules: List[dict]) -> Dict[str, Optional[str]]:
+    """
+    Finds the lazily imported packages that were imported while the app was created
+    :param modules: The modules imported, as returned by measure_startup
+    :return: The module that imported each of them
+    """
+    importers = {}
+    for i, module in enumerate(modules):
+        if module["module"] in LAZY_PACKAGES:
+            importers[module["module"]] = get_importer(modules, i)
+    return importers
+
+
+########################################################################################################################
+# MAIN FUNCTION
+########################################################################################################################
+
+
+def main(
+    budget: float = typer.Option(
+        DEFAULT_STARTUP_BUDGET,
+        help="The longest the app may take to import and create, in seconds",
+    ),
+    runs: int = typer.Option(3, help="The number of times to create the app"),
+    top: int = typer.Option(20, help="The number of packages to report"),
+    output: Optional[str] = typer.Option(
+        None, help="A file to write the results to as JSON"
+    ),
+):
+    """
+    Reports the import time of the app and checks it against the startup budget
+    """
+    # The fastest run is the least disturbed by the rest of the machine
+    measurements = [measure_startup() for _ in range(runs)]
+    fastest = min(measurements, key=lambda x: x["duration"])
+    package_times = get_package_times(fastest["modules"])
+    lazy_package_importers = get_lazy_package_importers(fastest["modules"])
+
+    table = Table(title="Import time by package")
+    table.add_column("Package")
+    table.add_column("Time (ms)")
+    for package, seconds in list(package_times.items())[:top]:
+        table.add_row(package, f"{seconds * 1000:.1f}")
+    print(table)
+    print(
+        f"Startup took {fastest['duration']:.3f}s (fastest of {runs}), the budget is {budget:.3f}s"
+    )
+
+    failed = False
+    if fastest["duration"] > budget:
+        print("[red]Startup is over budget[/red]")
+        failed = True
+    for package, importer in lazy_package_importers.items():
+        print(f"[red]{package} was imported at startup by {importer}[/red]")
+        failed = True
+
+    if output is not None:
+        with open(output, "w") as file:
+            json.dump(
+                {
+                    "duration": fastest["duration"],
+                    "budget": budget,
+                    "durations": [x["duration"] for x in measurements],
+                    "packages": package_times,
+                    "lazy_packages_imported": lazy_package_importers,
+                },
+                file,
+                indent=4,
+            )
+
+    if failed:
+        raise typer.Exit(code=1)
+
+
+if __name__ == "__main__":
+    typer.run(main)
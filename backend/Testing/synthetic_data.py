@@ -0,0 +1,155 @@
+########################################################################################################################
+# synthetic_data.py
+# This file generates made-up but valid analysis inputs for the load test and the benchmarks. Buildings are drawn from a
+# seeded random generator, so the same seed always gives the same buildings, with any number of height zones.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import random
+
+from backend.Constants.importance_factor_constants import ImportanceFactor
+from backend.Constants.roof_load_combination_constants import (
+    SLSRoofLoadCombinationTypes,
+    ULSRoofLoadCombinationTypes,
+)
+from backend.Constants.snow_constants import RoofType
+from backend.Constants.wall_load_combination_constants import (
+    SLSWallLoadCombinationTypes,
+    ULSWallLoadCombinationTypes,
+)
+from backend.Constants.wind_constants import (
+    InternalPressureSelections,
+    WindExposureFactorSelections,
+)
+
+########################################################################################################################
+# CONSTANTS
+########################################################################################################################
+
+# The addresses the synthetic buildings are placed at
+ADDRESSES = [
+    "Toronto, ON",
+    "Ottawa, ON",
+    "Montreal, QC",
+    "Quebec City, QC",
+    "Halifax, NS",
+    "Winnipeg, MB",
+    "Calgary, AB",
+    "Edmonton, AB",
+    "Vancouver, BC",
+    "Victoria, BC",
+    "Regina, SK",
+    "St. John's, NL",
+]
+
+# The shear wave velocities (Vs30) the XV site designation is given with
+SEISMIC_VALUES = [180, 270, 450, 760, 1100]
+
+# The height of a height zone is drawn from this range, in meters
+ZONE_HEIGHT_RANGE = (3.0, 6.0)
+
+# The height of a floor, in meters
+FLOOR_HEIGHT = 3.5
+
+
+########################################################################################################################
+# GENERATORS
+########################################################################################################################
+
+
+def generate_analysis_input(rng: random.Random, num_zones: int) -> dict:
+    """
+    Generates the input of a full analysis for a building with the given number of height zones
+    :param rng: The random generator to draw the building from
+    :param num_zones: The number of height zones of the building
+    :return: The input of each step of the analysis, keyed like AnalysisInput, as sent to the endpoints
+    """
+    # Stack the height zones, the top of the last one is the height of the building
+    elevations = []
+    height = 0.0
+    for _ in range(num_zones):
+        height = round(height + rng.uniform(*ZONE_HEIGHT_RANGE), 2)
+        elevations.append(height)
+    width = round(rng.uniform(10, 60), 2)
+
+    return {
+        "location": {
+            "address": rng.choice(ADDRESSES),
+            "site_designation": "xv",
+            "seismic_value": rng.choice(SEISMIC_VALUES),
+        },
+        "dimensions": {
+            "width": width,
+            "height": height,
+            "eave_height": None,
+            "ridge_height": None,
+        },
+        "cladding": {
+            "c_top": round(height - rng.uniform(0, 1), 2),
+            "c_bot": round(rng.uniform(0, 1), 2),
+        },
+        "roof": {
+            "w_roof": width,
+            "l_roof": round(rng.uniform(10, 60), 2),
+            "slope": round(rng.uniform(0, 30), 1),
+            "uniform_dead_load": round(rng.uniform(0.5, 2), 2),
+        },
+        "importance_category": {
+            "importance_category": rng.choice(list(ImportanceFactor)).value
+        },
+        "building": {
+            "num_floor": max(1, round(height / FLOOR_HEIGHT)),
+            "h_opening": None,
+            "zones": [[i + 1, elevation] for i, elevation in enumerate(elevations)],
+            "materials": [
+                [i + 1, round(rng.uniform(0.5, 3), 2)] for i in range(num_zones)
+            ],
+        },
+        "wind_load": {
+            "ct": [1.0] * num_zones,
+            "exposure_factor": [
+                rng.choice(
+                    [
+                        WindExposureFactorSelections.OPEN.value,
+                        WindExposureFactorSelections.ROUGH.value,
+                    ]
+                )
+            ]
+            * num_zones,
+            "manual_ce_cei": [None] * num_zones,
+            "internal_pressure_category": [
+                rng.choice(list(InternalPressureSelections)).value
+            ]
+            * num_zones,
+        },
+        "seismic_load": {
+            "ar": 1.0,
+            "rp": 2.5,
+            "cp": 1.0,
+        },
+        "snow_load": {
+            "exposure_factor_selection": rng.choice(
+                [
+                    WindExposureFactorSelections.OPEN.value,
+                    WindExposureFactorSelections.ROUGH.value,
+                ]
+            ),
+            "roof_type": rng.choice(list(RoofType)).value,
+        },
+        "wall_load_combination": {
+            "uls_wall_type": rng.choice(list(ULSWallLoadCombinationTypes)).value,
+            "sls_wall_type": rng.choice(list(SLSWallLoadCombinationTypes)).value,
+        },
+        "roof_load_combination": {
+            "uls_roof_type": rng.choice(list(ULSRoofLoadCombinationTypes)).value,
+            "sls_roof_type": rng.choice(list(SLSRoofLoadCombinationTypes)).value,
+        },
+    }
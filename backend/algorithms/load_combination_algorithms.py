@@ -13,8 +13,6 @@
 # IMPORTS
 ########################################################################################################################
 
-import pandas as pd
-
 from backend.Constants.roof_load_combination_constants import (
     ULSRoofLoadCombinationTypes,
     SLSRoofLoadCombinationTypes,
@@ -25,6 +23,7 @@ from backend.Constants.wall_load_combination_constants import (
 )
 from backend.Entities.Building.building import Building
 from backend.Entities.Snow.snow_load import SnowLoad
+from backend.Entities.Tracing.tracing import traced
 
 
 ########################################################################################################################
@@ -772,6 +771,7 @@ def generate_wall_load_entries(columns, dataframe, variables, uls_wall, sls_wall
     dataframe.loc[len(dataframe)] = [entry[column] for column in dataframe.columns]
 
 
+@traced("algorithm.compute_wall_load_combinations")
 def compute_wall_load_combinations(
     building: Building,
     snow_load: SnowLoad,
@@ -786,6 +786,9 @@ def compute_wall_load_combinations(
     :param sls_wall_load_combination_type: The SLS wall load combination type
     :return: A dataframe containing the wall load combinations
     """
+    # Imported on first use so that the server does not wait for pandas to start
+    import pandas as pd
+
     # Determine the wall load combination type
     selection = (uls_wall_load_combination_type, sls_wall_load_combination_type)
     # Compute the appropriate combination based on the selection
@@ -1126,6 +1129,7 @@ def generate_roof_load_entries(columns, dataframe, variables, uls_roof, sls_roof
     dataframe.loc[len(dataframe)] = [entry[column] for column in dataframe.columns]
 
 
+@traced("algorithm.compute_roof_load_combinations")
 def compute_roof_load_combinations(
     building: Building,
     snow_load: SnowLoad,
@@ -1140,6 +1144,9 @@ def compute_roof_load_combinations(
     :param sls_roof_load_combination_type: The SLS roof load combination type
     :return: A dataframe containing the roof load combinations
     """
+    # Imported on first use so that the server does not wait for pandas to start
+    import pandas as pd
+
     # Determine the roof load combination type
     selection = (uls_roof_load_combination_type, sls_roof_load_combination_type)
     # Compute the appropriate combination based on the selection
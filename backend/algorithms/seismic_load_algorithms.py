@@ -18,6 +18,7 @@ from backend.Entities.Building.building import Building
 from backend.Entities.Location.location import Location
 from backend.Entities.Seismic.seismic_factor import SeismicFactorBuilder
 from backend.Entities.Seismic.seismic_load import SeismicLoadBuilder
+from backend.Entities.Tracing.tracing import traced
 
 
 ########################################################################################################################
@@ -25,6 +26,7 @@ from backend.Entities.Seismic.seismic_load import SeismicLoadBuilder
 ########################################################################################################################
 
 
+@traced("algorithm.get_seismic_factor_values")
 def get_seismic_factor_values(
     seismic_factor_builder: SeismicFactorBuilder,
     ar: float = 1,
@@ -47,6 +49,7 @@ def get_seismic_factor_values(
     seismic_factor_builder.set_cp(cp)
 
 
+@traced("algorithm.get_floor_mapping")
 def get_floor_mapping(building: Building):
     """
     This function maps the floor number to the appropriate height zone number
@@ -70,6 +73,7 @@ def get_floor_mapping(building: Building):
     return floor_mapping
 
 
+@traced("algorithm.get_height_factor")
 def get_height_factor(
     seismic_load_builder: SeismicLoadBuilder, building: Building, zone_num: int
 ):
@@ -87,6 +91,7 @@ def get_height_factor(
     )
 
 
+@traced("algorithm.get_horizontal_force_factor")
 def get_horizontal_force_factor(
     seismic_factor_builder: SeismicFactorBuilder,
     seismic_load_builder: SeismicLoadBuilder,
@@ -107,6 +112,7 @@ def get_horizontal_force_factor(
     seismic_load_builder.set_factor(seismic_factor)
 
 
+@traced("algorithm.get_specified_lateral_earthquake_force")
 def get_specified_lateral_earthquake_force(
     seismic_load_builder: SeismicLoadBuilder,
     building: Building,
@@ -26,6 +26,7 @@ from backend.Entities.Building.building import Building
 from backend.Entities.Location.location import Location
 from backend.Entities.Snow.snow_factor import SnowFactorBuilder
 from backend.Entities.Snow.snow_load import SnowLoadBuilder
+from backend.Entities.Tracing.tracing import traced
 
 
 ########################################################################################################################
@@ -33,6 +34,7 @@ from backend.Entities.Snow.snow_load import SnowLoadBuilder
 ########################################################################################################################
 
 
+@traced("algorithm.get_slope_factor")
 def get_slope_factor(
     snow_factor_builder: SnowFactorBuilder, selection: RoofType, building: Building
 ):
@@ -69,6 +71,7 @@ def get_slope_factor(
                 snow_factor_builder.set_cs(0)
 
 
+@traced("algorithm.get_accumulation_factor")
 def get_accumulation_factor(
     snow_factor_builder: SnowFactorBuilder,
     wind_direction: WindDirection,
@@ -86,6 +89,7 @@ def get_accumulation_factor(
         snow_factor_builder.set_ca(0)
 
 
+@traced("algorithm.get_wind_exposure_factor_snow")
 def get_wind_exposure_factor_snow(
     snow_factor_builder: SnowFactorBuilder,
     importance_factor: ImportanceFactor,
@@ -122,6 +126,7 @@ def get_wind_exposure_factor_snow(
         snow_factor_builder.set_cw(1)
 
 
+@traced("algorithm.get_basic_roof_snow_load_factor")
 def get_basic_roof_snow_load_factor(
     snow_factor_builder: SnowFactorBuilder, building: Building
 ):
@@ -150,6 +155,7 @@ def get_basic_roof_snow_load_factor(
         )
 
 
+@traced("algorithm.get_snow_load")
 def get_snow_load(
     snow_factor_builder: SnowFactorBuilder,
     snow_load_builder: SnowLoadBuilder,
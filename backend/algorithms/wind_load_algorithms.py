@@ -23,6 +23,7 @@ from backend.Entities.Wind.wind_factor import WindFactorBuilder, WindFactor
 from backend.Entities.Wind.wind_load import WindLoadBuilder
 from backend.Entities.Wind.wind_pressure import WindPressureBuilder
 from backend.Entities.Wind.zone import ZoneBuilder
+from backend.Entities.Tracing.tracing import traced
 
 
 ########################################################################################################################
@@ -35,6 +36,7 @@ from backend.Entities.Wind.zone import ZoneBuilder
 ########################################################################################################################
 
 
+@traced("algorithm.get_wind_topographic_factor")
 def get_wind_topographic_factor(wind_factor_builder: WindFactorBuilder, ct: float = 1):
     """
     This function sets the topographic factor
@@ -46,6 +48,7 @@ def get_wind_topographic_factor(wind_factor_builder: WindFactorBuilder, ct: floa
     wind_factor_builder.set_ct(ct)
 
 
+@traced("algorithm.get_wind_exposure_factor")
 def get_wind_exposure_factor(
     wind_factor_builder: WindFactorBuilder,
     wind_exposure_factor_selection: WindExposureFactorSelections,
@@ -103,6 +106,7 @@ def get_wind_exposure_factor(
             wind_factor_builder.set_cei(manual)
 
 
+@traced("algorithm.get_wind_gust_factor")
 def get_wind_gust_factor(wind_factor_builder: WindFactorBuilder):
     """
     This function sets the gust factor
@@ -112,6 +116,7 @@ def get_wind_gust_factor(wind_factor_builder: WindFactorBuilder):
     wind_factor_builder.set_cg()
 
 
+@traced("algorithm.get_internal_pressure")
 def get_internal_pressure(
     wind_factor: WindFactor,
     wind_pressure_builder: WindPressureBuilder,
@@ -174,6 +179,7 @@ def get_internal_pressure(
             wind_pressure_builder.set_pi_neg_sls(internal_pressure_sls * -0.7)
 
 
+@traced("algorithm.get_external_pressure")
 def get_external_pressure(
     wind_factor: WindFactor,
     wind_pressure_builder: WindPressureBuilder,
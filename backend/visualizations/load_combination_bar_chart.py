@@ -13,7 +13,6 @@
 ########################################################################################################################
 
 
-import matplotlib.pyplot as plt
 import numpy as np
 
 from backend.Constants.wall_load_combination_constants import (
@@ -41,6 +40,9 @@ def generate_bar_chart(id: str, building: Building, snow_load: SnowLoad):
     :param snow_load: The snow load of the building
     :return: The number of bar charts generated
     """
+    # Imported on first use so that the server does not wait for matplotlib to start
+    import matplotlib.pyplot as plt
+
     count = 0
     # Iterate through each height zone
     for height_zone in sorted(building.height_zones, key=lambda x: x.zone_num):
@@ -1,11 +1,14 @@
 ########################################################################################################################
 # NBCC_Data_Extraction.py
 # This file contains functions that extract data from the National Building Code of Canada 2020 (NBCC2020) and stores it
-# in a Pandas dataframe. The data is then converted to a csv file and an Excel file and saved in the output directory.
-# The data is extracted from the following tables:
+# in a Pandas dataframe. The data is then converted to a csv file, an Excel file and a Parquet file and saved in the
+# output directory. The data is extracted from the following tables:
 #   - Table C1: Wind Speeds
 #   - Table C2: Climatic Design Data for Selected Locations in Canada
 #
+# The text of each page is extracted in a process pool and cached in the cache directory, keyed by the hash of the PDF
+# and the page number, so that the PDFs are only read again when they change.
+#
 # Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
 # By using this code, you agree to abide by the terms and conditions in those files.
 #
@@ -15,7 +18,10 @@
 ########################################################################################################################
 # IMPORTS
 ########################################################################################################################
+import hashlib
+import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 from pypdf import PdfReader
 
@@ -39,12 +45,91 @@ CANADIAN_PROVINCES_AND_TERRITORIES = {
     "Yukon",
 }
 
+# The directory the extracted text of each page is cached in
+CACHE_DIRECTORY = "cache"
+
+# Table C1 data lines, 8 numbers seperated by spaces
+C1_DATA_REGEX = re.compile(r"^(-?\d+(\.\d+)?\s){7}-?\d+(\.\d+)?$")
+
+# A floating point number. This matches the same numbers as [-+]?[0-9]*\.?[0-9]+ but can only match a number one way,
+# which keeps the patterns below from backtracking exponentially on lines that do not match
+NUMBER_PATTERN = r"[-+]?(?:[0-9]+(?:\.[0-9]+)?|\.[0-9]+)"
+
+# This regular expression matches a string that ends with a sequence of 16 floating point numbers. The numbers
+# are separated by spaces, with 15 of them followed by a space and the last one at the end of the string. The
+# string before the numbers can be any characters.
+# Example: 'Toronto 1 2 3 4 5 6 7 8 9 10 11 12 13 14 15 16'
+C2_DATA_REGEX_1 = re.compile(rf".*\s({NUMBER_PATTERN}\s){{15}}{NUMBER_PATTERN}")
+
+# This regular expression matches a string that starts with any characters (including digits within parentheses)
+# followed by a sequence of 16 floating point numbers. The numbers are separated by spaces, with 15 of them
+# followed by a space and the last one at the end of the string.
+# Example: 'Vancouver(Granville St. & 41stAve) 1 2 3 4 5 6 7 8 9 10 11 12 13 14 15 16'
+C2_DATA_REGEX_2 = re.compile(
+    rf".*\(([^)]*)\)\D*(({NUMBER_PATTERN}\s){{15}}{NUMBER_PATTERN})"
+)
+
+# A letter directly followed by a number, and a number directly followed by a letter
+LETTER_NUMBER_REGEX = re.compile(r"([a-zA-Z])(\d)")
+NUMBER_LETTER_REGEX = re.compile(r"(\d)([a-zA-Z])")
+
+# A number at the end of an error line
+NUMBER_REGEX = re.compile(r"\b\.?\d+(\.\d+)?\b")
+
+########################################################################################################################
+# GLOBALS
+########################################################################################################################
+
+# The PDF readers opened by a worker process, keyed by path, so that each PDF is only opened once per process
+READERS = {}
+
 
 ########################################################################################################################
 # PDF OPERATIONS
 ########################################################################################################################
 
 
+def get_file_hash(path: str) -> str:
+    """
+    Computes the hash of a file.
+
+    :param path: The path of the file.
+    :return: The SHA-256 hash of the file as a hex string.
+    """
+    file_hash = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1 << 20), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def extract_page_text(path: str, file_hash: str, page_number: int) -> str:
+    """
+    Extracts the text of a single page, reading it from the cache if the page was extracted before.
+
+    :param path: The path of the pdf file.
+    :param file_hash: The hash of the pdf file.
+    :param page_number: The number of the page, starting from 0.
+    :return: The extracted text of the page.
+    """
+    cache_path = os.path.join(CACHE_DIRECTORY, f"{file_hash}-{page_number}.txt")
+    if os.path.exists(cache_path):
+        with open(cache_path, "r", encoding="utf-8") as cache_file:
+            return cache_file.read()
+
+    # Open the PDF once per process
+    if path not in READERS:
+        READERS[path] = PdfReader(path)
+    text = READERS[path].pages[page_number].extract_text()
+
+    # Write to a temporary file first so that an interrupted run never leaves a partial page in the cache
+    os.makedirs(CACHE_DIRECTORY, exist_ok=True)
+    with open(f"{cache_path}.{os.getpid()}.tmp", "w", encoding="utf-8") as cache_file:
+        cache_file.write(text)
+    os.replace(f"{cache_path}.{os.getpid()}.tmp", cache_path)
+    return text
+
+
 def pdf_to_text(pdf: str) -> list[list[str]]:
     """
     Converts a PDF file to text organized by page and line.
@@ -53,12 +138,20 @@ def pdf_to_text(pdf: str) -> list[list[str]]:
     :return: A nested list containing the extracted text from each page and line.
     """
 
-    # Create a reader for the specified PDF
-    reader = PdfReader(f"input/{pdf}")
-    # Extract the text page by page and line by line.
-    text = []
-    for page in reader.pages:
-        text.append(page.extract_text().split("\n"))
+    path = f"input/{pdf}"
+    file_hash = get_file_hash(path)
+    page_count = len(PdfReader(path).pages)
+
+    # Extract the text of the pages in parallel, the pages are returned in order
+    with ProcessPoolExecutor() as pool:
+        pages = pool.map(
+            extract_page_text,
+            [path] * page_count,
+            [file_hash] * page_count,
+            range(page_count),
+        )
+        # Split the text of each page line by line.
+        text = [page.split("\n") for page in pages]
 
     # Return the extracted text.
     return text
@@ -93,6 +186,54 @@ def dataframe_to_excel(dataframe: pd.DataFrame, filename: str) -> None:
     dataframe.to_excel(f"output/{filename}")
 
 
+def flatten_columns(dataframe: pd.DataFrame) -> list[str]:
+    """
+    Flattens the multi-level headers of a dataframe into unique column names.
+
+    :param dataframe: The dataframe.
+    :return: The column names, e.g. 'Design Temperature / January / 2.5% °C'.
+    """
+    names = []
+    for column in dataframe.columns:
+        levels = column if isinstance(column, tuple) else (column,)
+        name = " / ".join(str(level) for level in levels if level != "")
+        # Repeated headers are numbered, e.g. 'q / kPa (2)'
+        count = sum(1 for x in names if x == name or x.startswith(f"{name} ("))
+        names.append(name if count == 0 else f"{name} ({count + 1})")
+    return names
+
+
+def dataframe_to_parquet(dataframe: pd.DataFrame, filename: str) -> None:
+    """
+    Convert Pandas dataframe to Parquet file and save it to the output directory. Parquet needs unique column names, so
+    the headers are flattened.
+
+    :param dataframe: The dataframe to save.
+    :param filename: The filename of the Parquet file (ensure to include the .parquet extension).
+    """
+    assert ".parquet" in filename
+
+    flattened = dataframe.copy()
+    flattened.columns = flatten_columns(dataframe)
+    # Mixed columns, such as the location names and numbers of Table C2, are stored as text
+    for column in flattened.columns:
+        if flattened[column].dtype == object:
+            flattened[column] = flattened[column].astype(str)
+    flattened.to_parquet(f"output/{filename}")
+
+
+def export_dataframe(dataframe: pd.DataFrame, name: str) -> None:
+    """
+    Saves a dataframe to the output directory in every output format.
+
+    :param dataframe: The dataframe to save.
+    :param name: The filename without an extension.
+    """
+    dataframe_to_csv(dataframe, f"{name}.csv")
+    dataframe_to_excel(dataframe, f"{name}.xlsx")
+    dataframe_to_parquet(dataframe, f"{name}.parquet")
+
+
 ########################################################################################################################
 # DATA EXTRACTION
 ########################################################################################################################
@@ -108,17 +249,13 @@ def table_c1_extraction() -> pd.DataFrame:
     # The extracted text
     text = pdf_to_text("NBCC2020-Table-C-1.pdf")
 
-    # The regex used to extract data lines, in this case 8 numbers seperated by spaces
-    data_pattern = r"^(-?\d+(\.\d+)?\s){7}-?\d+(\.\d+)?$"
-    data_regex = re.compile(data_pattern)
-
     # Text is analyzed and lines deemed usable data are stored.
     processed = []
     errors = []
     for page in text:
         for line in page:
             # Save data
-            if data_regex.match(line):
+            if C1_DATA_REGEX.match(line):
                 # Convert to list of floats
                 processed.append([float(x) for x in line.split(" ")])
             else:
@@ -154,22 +291,6 @@ def table_c2_extraction() -> pd.DataFrame:
     # The computer vision extracted text by page and line
     text = pdf_to_text("NBCC2020-Table-C-2.pdf")
 
-    # This regular expression matches a string that ends with a sequence of 16 floating point numbers. The numbers
-    # are separated by spaces, with 15 of them followed by a space and the last one at the end of the string. The
-    # string before the numbers can be any characters.
-    # Example: 'Toronto 1 2 3 4 5 6 7 8 9 10 11 12 13 14 15 16'
-    data_pattern_1 = r".*\s(([-+]?[0-9]*\.?[0-9]+)\s){15}([-+]?[0-9]*\.?[0-9]+)"
-    data_regex_1 = re.compile(data_pattern_1)
-
-    # This regular expression matches a string that starts with any characters (including digits within parentheses)
-    # followed by a sequence of 16 floating point numbers. The numbers are separated by spaces, with 15 of them
-    # followed by a space and the last one at the end of the string.
-    # Example: 'Vancouver(Granville St. & 41stAve) 1 2 3 4 5 6 7 8 9 10 11 12 13 14 15 16'
-    data_pattern_2 = (
-        r".*\(([^)]*)\)\D*(([-+]?[0-9]*\.?[0-9]+\s){15}([-+]?[0-9]*\.?[0-9]+))"
-    )
-    data_regex_2 = re.compile(data_pattern_2)
-
     # Analyzed lines deemed usable data are stored.
     processed = []
     # Iterating through the pages
@@ -181,9 +302,9 @@ def table_c2_extraction() -> pd.DataFrame:
             # Replace ')' with ') ' to account for numbers placed adjacent to a closing parenthesis
             line = line.replace(")", ") ")
             # Add a space between letters and numbers
-            line = re.sub(r"([a-zA-Z])(\d)", r"\1 \2", line)
+            line = LETTER_NUMBER_REGEX.sub(r"\1 \2", line)
             # Add a space between numbers and letters
-            line = re.sub(r"(\d)([a-zA-Z])", r"\1 \2", line)
+            line = NUMBER_LETTER_REGEX.sub(r"\1 \2", line)
 
             # Convert line to a list, splitting at spaces
             data = line.split(" ")
@@ -194,7 +315,7 @@ def table_c2_extraction() -> pd.DataFrame:
             # Process data line
             # These are lines the OCR was able to read correctly and contain no formatting errors
             # Ex: 'Ocean Falls 10 -10 -12 23 17 3400 13 260 4150 4.2 4300 350 3.9 0.8 0.44 0.59'
-            elif data_regex_1.match(line) or data_regex_2.match(line):
+            elif C2_DATA_REGEX_1.match(line) or C2_DATA_REGEX_2.match(line):
                 # Separate numerical data from the location
                 numerical_data = [float(x) for x in data[-16:]]
                 # Get the location from the data by joining all strings before numerical data
@@ -220,8 +341,7 @@ def table_c2_extraction() -> pd.DataFrame:
                 if len(data) == 0:
                     break
                 n = len(data) - 1
-                number_regex = re.compile(r"\b\.?\d+(\.\d+)?\b")
-                while number_regex.match(data[n]):
+                while NUMBER_REGEX.match(data[n]):
                     data.pop(n)
                     n -= 1
 
@@ -311,9 +431,10 @@ def table_c2_extraction() -> pd.DataFrame:
 
 
 if __name__ == "__main__":
-    print(table_c1_extraction())
-    print(table_c2_extraction())
-    dataframe_to_excel(table_c1_extraction(), "table_c1.xlsx")
-    dataframe_to_csv(table_c1_extraction(), "table_c1.csv")
-    dataframe_to_excel(table_c2_extraction(), "table_c2.xlsx")
-    dataframe_to_csv(table_c2_extraction(), "table_c2.csv")
+    # Each table is parsed once and every output is produced from the same dataframe
+    table_c1 = table_c1_extraction()
+    table_c2 = table_c2_extraction()
+    print(table_c1)
+    print(table_c2)
+    export_dataframe(table_c1, "table_c1")
+    export_dataframe(table_c2, "table_c2")
@@ -37,8 +37,8 @@ class CanadianPostalCodeData(BASE):
     __tablename__ = "CanadianPostalCodeData"
     # The ID of the entry
     ID = Column(Integer, primary_key=True)
-    # The postal code of the location
-    postal_code = Column(String(255))
+    # The postal code of the location, indexed since every location lookup by postal code filters on it
+    postal_code = Column(String(255), index=True)
     # The city of the location
     city = Column(String(255))
     # The province of the location
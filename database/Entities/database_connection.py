@@ -13,14 +13,80 @@
 ########################################################################################################################
 
 import os
+import threading
+
 import psycopg2
 import sqlalchemy
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from dotenv import load_dotenv
 
 from config import get_file_path
 from database.Constants.connection_constants import PrivilegeType
 
+########################################################################################################################
+# GLOBALS
+########################################################################################################################
+
+# The usage of the database across every DatabaseConnection, for the metrics endpoint:
+#   - engines: the number of open sqlalchemy engines
+#   - pooled_connections: the number of connections held by the pools of those engines
+#   - checked_out: the number of pooled connections currently in use
+#   - connections: the number of open psycopg2 connections
+POOL_STATISTICS = {
+    "engines": 0,
+    "pooled_connections": 0,
+    "checked_out": 0,
+    "connections": 0,
+}
+
+# Guards the statistics
+POOL_STATISTICS_LOCK = threading.Lock()
+
+
+########################################################################################################################
+# HELPER FUNCTIONS
+########################################################################################################################
+
+
+def update_pool_statistic(name: str, amount: int):
+    """
+    Adds to one of the database usage statistics
+    :param name: The name of the statistic, a key of POOL_STATISTICS
+    :param amount: The amount to add, negative to subtract
+    :return: None
+    """
+    with POOL_STATISTICS_LOCK:
+        POOL_STATISTICS[name] += amount
+
+
+def get_pool_statistics() -> dict:
+    """
+    Gets the database usage statistics
+    :return: A copy of POOL_STATISTICS
+    """
+    with POOL_STATISTICS_LOCK:
+        return dict(POOL_STATISTICS)
+
+
+def track_engine_pool(engine: sqlalchemy.Engine):
+    """
+    Keeps the database usage statistics up to date with the connections of an engine's pool
+    :param engine: The sqlalchemy engine
+    :return: None
+    """
+    event.listen(
+        engine, "connect", lambda *args: update_pool_statistic("pooled_connections", 1)
+    )
+    event.listen(
+        engine, "close", lambda *args: update_pool_statistic("pooled_connections", -1)
+    )
+    event.listen(
+        engine, "checkout", lambda *args: update_pool_statistic("checked_out", 1)
+    )
+    event.listen(
+        engine, "checkin", lambda *args: update_pool_statistic("checked_out", -1)
+    )
+
 
 ########################################################################################################################
 # DATABASE CONNECTION CLASS
@@ -50,6 +116,9 @@ class DatabaseConnection:
     read_password: str
     # The name of the database
     database_name: str
+    # A sqlalchemy URL used for every engine instead of the settings above, such as a SQLite file standing in for
+    # PostgreSQL, None to connect to PostgreSQL
+    url: str | None
     # The list of connections
     connections: list[psycopg2.extensions.connection]
     # The list of cursors
@@ -66,7 +135,7 @@ class DatabaseConnection:
         load_dotenv(get_file_path("database/.env"))
         # Read and store the values retrieved from the .env file
         self.host = os.getenv("HOST")
-        self.port = int(os.getenv("PORT"))
+        self.port = int(os.getenv("PORT")) if os.getenv("PORT") else None
         self.admin_username = os.getenv("ADMIN_USERNAME")
         self.admin_password = os.getenv("ADMIN_PASSWORD")
         self.write_username = os.getenv("WRITE_USERNAME")
@@ -74,6 +143,7 @@ class DatabaseConnection:
         self.read_username = os.getenv("READ_USERNAME")
         self.read_password = os.getenv("READ_PASSWORD")
         self.database_name = database_name
+        self.url = os.getenv("DATABASE_URL")
         # initialize connection, cursors, and engines lists
         self.connections = []
         self.cursors = []
@@ -117,6 +187,7 @@ class DatabaseConnection:
         )
         # Add the connection to the list of connections
         self.connections.append(connection)
+        update_pool_statistic("connections", 1)
         # Return the connection
         return connection
 
@@ -143,9 +214,15 @@ class DatabaseConnection:
         """
         # Get the username and password for the given privilege
         user, password = self.get_credentials(privilege)
-        # Create an engine for the database
-        connection_url = f"postgresql+psycopg2://{user}:{password}@{self.host}:{self.port}/{self.database_name}"
+        # Create an engine for the database, or for the database that stands in for it
+        connection_url = (
+            self.url
+            or f"postgresql+psycopg2://{user}:{password}@{self.host}:{self.port}/{self.database_name}"
+        )
         engine = create_engine(connection_url)
+        # Count the connections of the engine's pool
+        track_engine_pool(engine)
+        update_pool_statistic("engines", 1)
         # Add the engine to the list of engines
         self.engines.append(engine)
         # Return the engine
@@ -166,12 +243,14 @@ class DatabaseConnection:
         for connection in self.connections:
             connection.close()
         # Clear the list of connections
+        update_pool_statistic("connections", -len(self.connections))
         self.connections.clear()
 
         # Close all engines
         for engine in self.engines:
             engine.dispose()
         # Clear the list of engines
+        update_pool_statistic("engines", -len(self.engines))
         self.engines.clear()
 
     def __str__(self):
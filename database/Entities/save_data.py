@@ -12,8 +12,19 @@
 # IMPORTS
 ########################################################################################################################
 
-from sqlalchemy import Column, String, DateTime, Integer
-from sqlalchemy.orm import declarative_base
+import json
+
+from sqlalchemy import (
+    Column,
+    String,
+    DateTime,
+    Integer,
+    LargeBinary,
+    TypeDecorator,
+    Index,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import declarative_base, deferred
 
 ########################################################################################################################
 # GLOBALS
@@ -24,7 +35,53 @@ BASE = declarative_base()
 
 
 ########################################################################################################################
-# CANADIAN POSTAL CODE DATA CLASS
+# COLUMN TYPES
+########################################################################################################################
+
+
+class JsonText(TypeDecorator):
+    """
+    Column type that is stored as JSONB so the database can merge documents, but is read and written as a JSON string
+    """
+
+    impl = String
+    cache_ok = True
+
+    def load_dialect_impl(self, dialect):
+        """
+        Uses JSONB on PostgreSQL and plain text elsewhere
+        :param dialect: The dialect of the database
+        :return: The type used by the dialect
+        """
+        if dialect.name == "postgresql":
+            return dialect.type_descriptor(JSONB())
+        return dialect.type_descriptor(String())
+
+    def process_bind_param(self, value, dialect):
+        """
+        Converts the JSON string into the value stored in the database
+        :param value: The JSON string
+        :param dialect: The dialect of the database
+        :return: The value stored in the database
+        """
+        if value is None or dialect.name != "postgresql":
+            return value
+        return json.loads(value)
+
+    def process_result_value(self, value, dialect):
+        """
+        Converts the value stored in the database back into a JSON string
+        :param value: The value stored in the database
+        :param dialect: The dialect of the database
+        :return: The JSON string
+        """
+        if value is None or isinstance(value, str):
+            return value
+        return json.dumps(value)
+
+
+########################################################################################################################
+# SAVE DATA CLASS
 ########################################################################################################################
 
 
@@ -35,8 +92,14 @@ class SaveData(BASE):
 
     # The name of the table
     __tablename__ = "SaveData"
+    # Listing a user's save files walks this index newest first, one page at a time
+    __table_args__ = (
+        Index("ix_SaveData_Username_DateModified_ID", "Username", "DateModified", "ID"),
+    )
     # table contains id, date modified, and json data columns
     ID = Column(Integer, primary_key=True)
     Username = Column(String)
     DateModified = Column(DateTime)
-    JsonData = Column(String)
+    JsonData = Column(JsonText)
+    # Binary snapshot of the user's session, deferred so that it is only loaded when restoring a save
+    Snapshot = deferred(Column(LargeBinary))
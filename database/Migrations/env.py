@@ -0,0 +1,85 @@
+########################################################################################################################
+# env.py
+# This file configures how the database schema migrations connect to the NBCC-2020 database
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+from alembic import context
+
+from database.Constants.connection_constants import PrivilegeType
+from database.Entities import (
+    authentication_data,
+    canadian_postal_code_data,
+    climatic_data,
+    save_data,
+    wind_speed_data,
+)
+from database.Entities.database_connection import DatabaseConnection
+
+########################################################################################################################
+# GLOBALS
+########################################################################################################################
+
+# The metadata of every table, each entity module declares its own base
+TARGET_METADATA = [
+    authentication_data.BASE.metadata,
+    canadian_postal_code_data.BASE.metadata,
+    climatic_data.BASE.metadata,
+    save_data.BASE.metadata,
+    wind_speed_data.BASE.metadata,
+]
+
+
+########################################################################################################################
+# MIGRATION FUNCTIONS
+########################################################################################################################
+
+
+def run_migrations_offline():
+    """
+    Writes the SQL of the migrations without connecting to the database
+    :return: None
+    """
+    context.configure(
+        url="postgresql+psycopg2://",
+        target_metadata=TARGET_METADATA,
+        literal_binds=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    """
+    Applies the migrations to the database
+    :return: None
+    """
+    # Use a connection handed over by the caller if there is one, otherwise connect as the admin user
+    connection = context.config.attributes.get("connection")
+    if connection is not None:
+        context.configure(connection=connection, target_metadata=TARGET_METADATA)
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
+    database = DatabaseConnection(database_name="NBCC-2020")
+    engine = database.get_engine(privilege=PrivilegeType.ADMIN)
+    with engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=TARGET_METADATA)
+        with context.begin_transaction():
+            context.run_migrations()
+    database.close()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
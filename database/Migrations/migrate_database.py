@@ -0,0 +1,66 @@
+########################################################################################################################
+# migrate_database.py
+# This file contains the code for bringing the schema of the NBCC-2020 database up to date. The schema is defined by the
+# migrations in database/Migrations/versions, which are applied in order and recorded in the alembic_version table so
+# that each one only runs once.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+from alembic import command
+from alembic.config import Config
+
+from config import get_file_path
+
+########################################################################################################################
+# GLOBALS
+########################################################################################################################
+
+# The alembic configuration file
+ALEMBIC_CONFIG_PATH = get_file_path("database/alembic.ini")
+
+
+########################################################################################################################
+# MIGRATION FUNCTIONS
+########################################################################################################################
+
+
+def get_alembic_config() -> Config:
+    """
+    Gets the alembic configuration of the NBCC-2020 database
+    :return: The alembic configuration
+    """
+    return Config(ALEMBIC_CONFIG_PATH)
+
+
+def upgrade_database(revision: str = "head"):
+    """
+    Applies every migration that has not been applied yet, up to and including the given revision
+    :param revision: The revision to upgrade to, the latest revision by default
+    :return: None
+    """
+    command.upgrade(get_alembic_config(), revision)
+
+
+def downgrade_database(revision: str):
+    """
+    Reverts every migration applied after the given revision
+    :param revision: The revision to downgrade to
+    :return: None
+    """
+    command.downgrade(get_alembic_config(), revision)
+
+
+########################################################################################################################
+# MAIN
+########################################################################################################################
+
+if __name__ == "__main__":
+    upgrade_database()
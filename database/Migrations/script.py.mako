@@ -0,0 +1,46 @@
+########################################################################################################################
+# ${up_revision}_${slug}.py
+# ${message}
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+from alembic import op
+import sqlalchemy as sa
+${imports if imports else ""}
+########################################################################################################################
+# REVISION IDENTIFIERS
+########################################################################################################################
+
+revision = ${repr(up_revision)}
+down_revision = ${repr(down_revision)}
+branch_labels = ${repr(branch_labels)}
+depends_on = ${repr(depends_on)}
+
+
+########################################################################################################################
+# MIGRATION
+########################################################################################################################
+
+
+def upgrade():
+    """
+    Applies the migration
+    :return: None
+    """
+    ${upgrades if upgrades else "pass"}
+
+
+def downgrade():
+    """
+    Reverts the migration
+    :return: None
+    """
+    ${downgrades if downgrades else "pass"}
@@ -0,0 +1,111 @@
+########################################################################################################################
+# verify_indexes.py
+# This file contains the code for checking that the queries on the hot paths of the API are served by an index. Each
+# query is run through EXPLAIN with sequential scans disabled, so that the check depends on whether a usable index
+# exists rather than on how many rows the tables currently hold.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import sys
+from typing import Dict, List
+
+from database.Constants.connection_constants import PrivilegeType
+from database.Entities.database_connection import DatabaseConnection
+
+########################################################################################################################
+# GLOBALS
+########################################################################################################################
+
+# The queries on the hot paths of the API, along with the parameters to explain them with
+HOT_QUERIES: Dict[str, tuple] = {
+    # Login, token validation and username checks
+    "authentication by username": (
+        'SELECT * FROM "AuthenticationData" WHERE "username" = %s',
+        ("username",),
+    ),
+    # Email checks during signup
+    "authentication by email": (
+        'SELECT * FROM "AuthenticationData" WHERE "email" = %s',
+        ("email@example.com",),
+    ),
+    # Location lookups by postal code
+    "postal code lookup": (
+        'SELECT * FROM "CanadianPostalCodeData" WHERE "postal_code" = %s',
+        ("M5S 1A1",),
+    ),
+    # Loading, updating and deleting a save file
+    "save file by id": (
+        'SELECT "JsonData" FROM "SaveData" WHERE "Username" = %s AND "ID" = %s',
+        ("username", 1),
+    ),
+    # Listing a user's save files one page at a time
+    "save file listing": (
+        'SELECT "ID", "DateModified" FROM "SaveData" WHERE "Username" = %s '
+        'ORDER BY "DateModified" DESC, "ID" DESC LIMIT 50',
+        ("username",),
+    ),
+}
+
+
+########################################################################################################################
+# VERIFICATION FUNCTIONS
+########################################################################################################################
+
+
+def explain_query(cursor, query: str, parameters: tuple) -> List[str]:
+    """
+    Gets the query plan of a query
+    :param cursor: A cursor to the database
+    :param query: The query to explain
+    :param parameters: The parameters of the query
+    :return: The lines of the query plan
+    """
+    cursor.execute(f"EXPLAIN {query}", parameters)
+    return [row[0] for row in cursor.fetchall()]
+
+
+def verify_indexes() -> Dict[str, List[str]]:
+    """
+    Checks that every hot query is served by an index
+    :return: The query plans of the hot queries that are not served by an index, keyed by the name of the query
+    """
+    database = DatabaseConnection(database_name="NBCC-2020")
+    connection = database.get_connection(privilege=PrivilegeType.ADMIN)
+    cursor = database.get_cursor(connection)
+    # Make the planner use an index whenever one can serve the query, small tables would otherwise be scanned
+    cursor.execute("SET enable_seqscan = off;")
+
+    failures = dict()
+    for name, (query, parameters) in HOT_QUERIES.items():
+        plan = explain_query(cursor, query, parameters)
+        # Index Scan, Index Only Scan and Bitmap Index Scan all mention the index in the plan
+        if not any("Index" in line for line in plan):
+            failures[name] = plan
+
+    # Nothing was changed, so roll back the setting along with the transaction
+    connection.rollback()
+    database.close()
+    return failures
+
+
+########################################################################################################################
+# MAIN
+########################################################################################################################
+
+if __name__ == "__main__":
+    failures = verify_indexes()
+    for name, plan in failures.items():
+        print(f"{name} is not served by an index:")
+        for line in plan:
+            print(f"    {line}")
+    if failures:
+        sys.exit(1)
+    print(f"All {len(HOT_QUERIES)} hot queries are served by an index.")
@@ -0,0 +1,123 @@
+########################################################################################################################
+# 0001_baseline_tables.py
+# Creates the NBCC-2020 tables as they were created by the population scripts before migrations existed. Tables that
+# already exist are left untouched, so existing databases can be brought under migration control.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+from alembic import context, op
+import sqlalchemy as sa
+
+########################################################################################################################
+# REVISION IDENTIFIERS
+########################################################################################################################
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+########################################################################################################################
+# MIGRATION
+########################################################################################################################
+
+
+def upgrade():
+    """
+    Applies the migration
+    :return: None
+    """
+    # Tables created by the population scripts before migrations existed are kept, nothing can be inspected when only
+    # writing the SQL of the migration
+    existing_tables = (
+        []
+        if context.is_offline_mode()
+        else sa.inspect(op.get_bind()).get_table_names()
+    )
+
+    if "AuthenticationData" not in existing_tables:
+        op.create_table(
+            "AuthenticationData",
+            sa.Column("username", sa.String(), primary_key=True),
+            sa.Column("first_name", sa.String()),
+            sa.Column("last_name", sa.String()),
+            sa.Column("hashed_password", sa.LargeBinary()),
+            sa.Column("salt", sa.LargeBinary()),
+            sa.Column("email", sa.String(), unique=True),
+            sa.Column("signup_date", sa.DateTime()),
+        )
+
+    if "CanadianPostalCodeData" not in existing_tables:
+        op.create_table(
+            "CanadianPostalCodeData",
+            sa.Column("ID", sa.Integer(), primary_key=True),
+            sa.Column("postal_code", sa.String(255)),
+            sa.Column("city", sa.String(255)),
+            sa.Column("province", sa.String(255)),
+            sa.Column("time_zone", sa.Integer()),
+            sa.Column("latitude", sa.Float()),
+            sa.Column("longitude", sa.Float()),
+        )
+
+    if "ClimaticData" not in existing_tables:
+        op.create_table(
+            "ClimaticData",
+            sa.Column("ID", sa.Integer(), primary_key=True),
+            sa.Column("ProvinceAndLocation", sa.String(255)),
+            sa.Column("Latitude", sa.Float()),
+            sa.Column("Longitude", sa.Float()),
+            sa.Column("Elev_m", sa.Integer()),
+            sa.Column("Jan_2_5_percent_C", sa.Float()),
+            sa.Column("Jan_1_percent_C", sa.Float()),
+            sa.Column("July_Dry_C", sa.Float()),
+            sa.Column("July_Wet_C", sa.Float()),
+            sa.Column("DegreeDaysBelow18C", sa.Integer()),
+            sa.Column("Rain_15_Min_mm", sa.Integer()),
+            sa.Column("OneDayRain_1_50_mm", sa.Integer()),
+            sa.Column("Ann_Rain_mm", sa.Integer()),
+            sa.Column("MoistIndex", sa.Float()),
+            sa.Column("Ann_Tot_Ppn_mm", sa.Integer()),
+            sa.Column("DrivingRainWindPressures_Pa_1_5", sa.Integer()),
+            sa.Column("SnowLoad_kPa_1_50_Ss", sa.Float()),
+            sa.Column("SnowLoad_kPa_1_50_Sr", sa.Float()),
+            sa.Column("HourlyWindPressures_kPa_1_10", sa.Float()),
+            sa.Column("HourlyWindPressures_kPa_1_50", sa.Float()),
+        )
+
+    if "SaveData" not in existing_tables:
+        op.create_table(
+            "SaveData",
+            sa.Column("ID", sa.Integer(), primary_key=True),
+            sa.Column("Username", sa.String()),
+            sa.Column("DateModified", sa.DateTime()),
+            sa.Column("JsonData", sa.String()),
+        )
+
+    if "WindSpeedData" not in existing_tables:
+        op.create_table(
+            "WindSpeedData",
+            sa.Column("ID", sa.Integer(), primary_key=True),
+            sa.Column("q_KPa", sa.Float()),
+            sa.Column("V_ms", sa.Float()),
+        )
+
+
+def downgrade():
+    """
+    Reverts the migration
+    :return: None
+    """
+    op.drop_table("WindSpeedData")
+    op.drop_table("SaveData")
+    op.drop_table("ClimaticData")
+    op.drop_table("CanadianPostalCodeData")
+    op.drop_table("AuthenticationData")
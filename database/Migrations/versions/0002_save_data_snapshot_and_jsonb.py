@@ -0,0 +1,59 @@
+########################################################################################################################
+# 0002_save_data_snapshot_and_jsonb.py
+# Adds the Snapshot column to SaveData, converts JsonData to JSONB so that updates can be merged by the database, and
+# adds the index used to list a user's save files one page at a time.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+from alembic import op
+
+########################################################################################################################
+# REVISION IDENTIFIERS
+########################################################################################################################
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+########################################################################################################################
+# MIGRATION
+########################################################################################################################
+
+
+def upgrade():
+    """
+    Applies the migration
+    :return: None
+    """
+    # IF NOT EXISTS keeps the migration safe on databases that were upgraded by hand
+    op.execute('ALTER TABLE "SaveData" ADD COLUMN IF NOT EXISTS "Snapshot" BYTEA')
+    # Existing entries are parsed and kept
+    op.execute(
+        'ALTER TABLE "SaveData" ALTER COLUMN "JsonData" TYPE JSONB USING "JsonData"::jsonb'
+    )
+    op.execute(
+        'CREATE INDEX IF NOT EXISTS "ix_SaveData_Username_DateModified_ID" '
+        'ON "SaveData" ("Username", "DateModified", "ID")'
+    )
+
+
+def downgrade():
+    """
+    Reverts the migration
+    :return: None
+    """
+    op.execute('DROP INDEX IF EXISTS "ix_SaveData_Username_DateModified_ID"')
+    op.execute(
+        'ALTER TABLE "SaveData" ALTER COLUMN "JsonData" TYPE VARCHAR USING "JsonData"::text'
+    )
+    op.execute('ALTER TABLE "SaveData" DROP COLUMN IF EXISTS "Snapshot"')
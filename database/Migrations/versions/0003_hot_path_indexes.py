@@ -0,0 +1,69 @@
+########################################################################################################################
+# 0003_hot_path_indexes.py
+# Adds the indexes used by postal code lookups and signup validation. Login and username checks already use the primary
+# key of AuthenticationData, and save file lookups use the primary key and the index added by 0002.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+from alembic import context, op
+import sqlalchemy as sa
+
+########################################################################################################################
+# REVISION IDENTIFIERS
+########################################################################################################################
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+########################################################################################################################
+# MIGRATION
+########################################################################################################################
+
+
+def upgrade():
+    """
+    Applies the migration
+    :return: None
+    """
+    # Postal code lookups when resolving a location
+    op.execute(
+        'CREATE INDEX IF NOT EXISTS "ix_CanadianPostalCodeData_postal_code" '
+        'ON "CanadianPostalCodeData" ("postal_code")'
+    )
+    # Email checks during signup use the unique constraint on email, which older databases may be missing. When only
+    # writing the SQL of the migration the baseline table is assumed, which already has the constraint
+    if context.is_offline_mode():
+        return
+    inspector = sa.inspect(op.get_bind())
+    unique_columns = [
+        constraint["column_names"]
+        for constraint in inspector.get_unique_constraints("AuthenticationData")
+    ] + [
+        index["column_names"]
+        for index in inspector.get_indexes("AuthenticationData")
+        if index["unique"]
+    ]
+    if ["email"] not in unique_columns:
+        op.create_index(
+            "ix_AuthenticationData_email", "AuthenticationData", ["email"], unique=True
+        )
+
+
+def downgrade():
+    """
+    Reverts the migration
+    :return: None
+    """
+    op.execute('DROP INDEX IF EXISTS "ix_AuthenticationData_email"')
+    op.execute('DROP INDEX IF EXISTS "ix_CanadianPostalCodeData_postal_code"')
@@ -0,0 +1,175 @@
+########################################################################################################################
+# build_reference_data.py
+# This file contains the code for compiling the read-only NBCC reference data (ClimaticData, CanadianPostalCodeData
+# and WindSpeedData) into a versioned bundle of NumPy column files. The bundle is memory mapped by the API, so the
+# location lookups can be served without a database connection and the pages are shared between worker processes.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from typing import Dict, List
+
+import numpy as np
+
+from backend.Constants.reference_data_constants import (
+    REFERENCE_DATA_DIRECTORY,
+    REFERENCE_DATA_MANIFEST,
+    REFERENCE_DATA_SORT_COLUMNS,
+    REFERENCE_DATA_TABLES,
+    REFERENCE_DATA_VERSION,
+)
+from config import get_file_path
+from database.Constants.connection_constants import PrivilegeType
+from database.Entities.database_connection import DatabaseConnection
+
+########################################################################################################################
+# GLOBALS
+########################################################################################################################
+
+# The database connection
+DATABASE = DatabaseConnection(database_name="NBCC-2020")
+
+# How many rows are fetched from the database at a time
+FETCH_SIZE = 50000
+
+
+########################################################################################################################
+# BUILD FUNCTIONS
+########################################################################################################################
+
+
+def to_column_array(values: List) -> np.ndarray:
+    """
+    Converts the values of a column into an array that can be memory mapped
+    :param values: The values of the column
+    :return: Fixed width UTF-8 bytes for text columns, otherwise 64 bit floats with NaN for missing values
+    """
+    if any(isinstance(value, str) for value in values):
+        return np.array([(value or "").encode("utf-8") for value in values])
+    return np.array(
+        [np.nan if value is None else value for value in values], dtype=np.float64
+    )
+
+
+def write_table(directory: str, table_name: str, values: List[List]) -> dict:
+    """
+    Writes a table into the bundle, one file per column
+    :param directory: The directory of the bundle
+    :param table_name: The name of the table
+    :param values: The values of each column, in the order of REFERENCE_DATA_TABLES, with the rows in the order of
+    the column of REFERENCE_DATA_SORT_COLUMNS
+    :return: The manifest entry of the table
+    """
+    columns = REFERENCE_DATA_TABLES[table_name]
+    arrays = [to_column_array(column_values) for column_values in values]
+    # Text is sorted again here in byte order, which the binary searches of the API rely on, since the order of the
+    # database depends on its collation. The sort is stable, so rows with the same key stay in the order given
+    sort_column = REFERENCE_DATA_SORT_COLUMNS[table_name]
+    if sort_column in columns:
+        order = np.argsort(arrays[columns.index(sort_column)], kind="stable")
+        arrays = [array[order] for array in arrays]
+
+    manifest = {"rows": len(values[0]), "columns": dict()}
+    for column, array in zip(columns, arrays):
+        file_name = f"{table_name}.{column}.npy"
+        np.save(os.path.join(directory, file_name), array, allow_pickle=False)
+        manifest["columns"][column] = {"file": file_name, "dtype": array.dtype.str}
+    return manifest
+
+
+def write_manifest(directory: str, tables: Dict[str, dict]):
+    """
+    Writes the manifest of the bundle, which is written last since a bundle without one is never loaded
+    :param directory: The directory of the bundle
+    :param tables: The manifest entry of each table, as returned by write_table
+    :return: None
+    """
+    manifest = {
+        "version": REFERENCE_DATA_VERSION,
+        "built": datetime.now().isoformat(),
+        "tables": tables,
+    }
+    with open(os.path.join(directory, REFERENCE_DATA_MANIFEST), "w") as file:
+        json.dump(manifest, file, indent=4)
+
+
+def build_table(directory: str, table_name: str) -> dict:
+    """
+    Compiles a table into one file per column
+    :param directory: The directory of the bundle
+    :param table_name: The name of the table
+    :return: The manifest entry of the table
+    """
+    columns = REFERENCE_DATA_TABLES[table_name]
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    sort_column = REFERENCE_DATA_SORT_COLUMNS[table_name]
+
+    # Read the table in the order it is stored in the bundle
+    connection = DATABASE.get_connection(privilege=PrivilegeType.ADMIN)
+    cursor = DATABASE.get_cursor(connection)
+    cursor.execute(
+        f'SELECT {column_list} FROM "{table_name}" ORDER BY "{sort_column}", "ID";'
+    )
+    values = [[] for _ in columns]
+    while True:
+        rows = cursor.fetchmany(FETCH_SIZE)
+        if not rows:
+            break
+        for row in rows:
+            for index, value in enumerate(row):
+                values[index].append(value)
+    connection.rollback()
+
+    return write_table(directory, table_name, values)
+
+
+def build_reference_data():
+    """
+    Compiles the reference data tables into a bundle, replacing the bundle of the same version if there is one
+    :return: None
+    """
+    start = time.perf_counter()
+    root = get_file_path(REFERENCE_DATA_DIRECTORY)
+    directory = os.path.join(root, f"v{REFERENCE_DATA_VERSION}")
+    # Build next to the current bundle so that it can be swapped in with a rename
+    staging_directory = f"{directory}.staging"
+    shutil.rmtree(staging_directory, ignore_errors=True)
+    os.makedirs(staging_directory)
+
+    tables = dict()
+    for table_name in REFERENCE_DATA_TABLES:
+        tables[table_name] = build_table(staging_directory, table_name)
+        print(f"Compiled {tables[table_name]['rows']} rows of {table_name}")
+    write_manifest(staging_directory, tables)
+
+    # Swap the new bundle in, processes that already mapped the old files keep reading them until they restart
+    old_directory = f"{directory}.old"
+    shutil.rmtree(old_directory, ignore_errors=True)
+    if os.path.exists(directory):
+        os.rename(directory, old_directory)
+    os.rename(staging_directory, directory)
+    shutil.rmtree(old_directory, ignore_errors=True)
+    print(
+        f"Built reference data bundle {directory} in {time.perf_counter() - start:.2f}s"
+    )
+
+
+########################################################################################################################
+# MAIN
+########################################################################################################################
+
+if __name__ == "__main__":
+    build_reference_data()
+    DATABASE.close()
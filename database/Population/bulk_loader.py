@@ -0,0 +1,159 @@
+########################################################################################################################
+# bulk_loader.py
+# This file contains the code for bulk loading reference data into the database. Rows are streamed through PostgreSQL
+# COPY FROM STDIN into a staging table, then swapped into the target table in the same transaction, so readers see
+# either all of the old data or all of the new data and a failed load leaves the old data in place.
+#
+# Please refer to the LICENSE and DISCLAIMER files for more information regarding the use and distribution of this code.
+# By using this code, you agree to abide by the terms and conditions in those files.
+#
+# Author: Noah Subedar [https://github.com/noahsub]
+########################################################################################################################
+
+########################################################################################################################
+# IMPORTS
+########################################################################################################################
+
+import csv
+import io
+import time
+from typing import Iterable, Iterator, List, Optional
+
+from tqdm import tqdm
+
+from database.Constants.connection_constants import PrivilegeType
+from database.Entities.database_connection import DatabaseConnection
+
+########################################################################################################################
+# GLOBALS
+########################################################################################################################
+
+# How a missing value is written to the COPY stream, so that empty strings are kept as empty strings
+NULL_MARKER = "\\N"
+
+
+########################################################################################################################
+# STREAM CLASS
+########################################################################################################################
+
+
+class CsvRowStream(io.TextIOBase):
+    """
+    Read only file-like object that turns an iterator of rows into CSV text on demand, so that COPY FROM STDIN can
+    stream the rows without the whole file being built in memory
+    """
+
+    # The rows that have not been written yet
+    rows: Iterator[Iterable]
+    # The CSV text written but not read yet
+    pending: io.StringIO
+    # Writes rows into the pending text
+    writer: csv.writer
+
+    def __init__(self, rows: Iterable[Iterable]):
+        """
+        Initializes the stream
+        :param rows: The rows to stream, None values are loaded as NULL
+        """
+        self.rows = iter(rows)
+        self.pending = io.StringIO()
+        self.writer = csv.writer(self.pending, lineterminator="\n")
+
+    def readable(self) -> bool:
+        """
+        Whether the stream can be read
+        :return: True
+        """
+        return True
+
+    def read(self, size: Optional[int] = -1) -> str:
+        """
+        Reads CSV text from the stream
+        :param size: The number of characters to read, everything that is left if negative
+        :return: The CSV text, an empty string once every row has been read
+        """
+        # Write rows until there is enough text to return or the rows run out
+        while size is None or size < 0 or self.pending.tell() < size:
+            row = next(self.rows, None)
+            if row is None:
+                break
+            self.writer.writerow(
+                [NULL_MARKER if value is None else value for value in row]
+            )
+        # Hand out the requested text and keep the rest for the next read
+        text = self.pending.getvalue()
+        if size is not None and 0 <= size < len(text):
+            text, rest = text[:size], text[size:]
+        else:
+            rest = ""
+        self.pending = io.StringIO()
+        self.pending.write(rest)
+        self.writer = csv.writer(self.pending, lineterminator="\n")
+        return text
+
+
+########################################################################################################################
+# LOADER FUNCTIONS
+########################################################################################################################
+
+
+def bulk_load_table(
+    database: DatabaseConnection,
+    table_name: str,
+    columns: List[str],
+    rows: Iterable[Iterable],
+    description: str,
+) -> int:
+    """
+    Replaces the contents of a table with the given rows
+    :param database: The database connection
+    :param table_name: The name of the table
+    :param columns: The columns each row provides values for, in order
+    :param rows: The rows to load
+    :param description: The description shown in the progress bar
+    :return: The number of rows loaded
+    """
+    # Get the connection and cursor, everything below runs in a single transaction
+    connection = database.get_connection(privilege=PrivilegeType.ADMIN)
+    cursor = database.get_cursor(connection)
+    staging_table = f"{table_name}_staging"
+    column_list = ", ".join(f'"{column}"' for column in columns)
+    start = time.perf_counter()
+
+    try:
+        # The staging table only lives as long as the transaction and skips the write-ahead log
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE "{staging_table}" '
+            f'(LIKE "{table_name}" INCLUDING DEFAULTS) ON COMMIT DROP;'
+        )
+
+        # Stream the rows into the staging table, reporting progress as they are read
+        progress = tqdm(rows, description, unit=" rows", unit_scale=True)
+        cursor.copy_expert(
+            f'COPY "{staging_table}" ({column_list}) FROM STDIN '
+            f"WITH (FORMAT csv, NULL '{NULL_MARKER}');",
+            CsvRowStream(progress),
+        )
+        progress.close()
+        row_count = progress.n
+
+        # Swap the new rows in, readers of the table wait for the swap rather than seeing it half done
+        cursor.execute(f'TRUNCATE "{table_name}" RESTART IDENTITY;')
+        cursor.execute(
+            f'INSERT INTO "{table_name}" ({column_list}) '
+            f'SELECT {column_list} FROM "{staging_table}" ORDER BY "ID";'
+        )
+        # Commit the changes, this also drops the staging table
+        connection.commit()
+    except Exception:
+        # Keep the old data
+        connection.rollback()
+        raise
+
+    # Report the throughput
+    elapsed = time.perf_counter() - start
+    print(
+        f"Loaded {row_count} rows into {table_name} in {elapsed:.2f}s "
+        f"({row_count / max(elapsed, 1e-9):.0f} rows/s)"
+    )
+    return row_count
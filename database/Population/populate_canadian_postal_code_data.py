@@ -13,15 +13,11 @@
 ########################################################################################################################
 
 import csv
-from sqlalchemy import inspect
-from sqlalchemy.orm import sessionmaker
-from tqdm import tqdm
 from config import get_file_path
 from database.Constants.connection_constants import PrivilegeType
-from database.Entities.canadian_postal_code_data import CanadianPostalCodeData
-from database.Entities.canadian_postal_code_data import BASE
 from database.Entities.database_connection import DatabaseConnection
-from database.Warnings.database_warnings import already_exists_warning
+from database.Migrations.migrate_database import upgrade_database
+from database.Population.bulk_loader import bulk_load_table
 
 ########################################################################################################################
 # GLOBALS
@@ -30,35 +26,22 @@ from database.Warnings.database_warnings import already_exists_warning
 # The database connection
 DATABASE = DatabaseConnection(database_name="NBCC-2020")
 
+# The columns of the CanadianPostalCodeData table provided by each row of the csv file
+POSTAL_CODE_COLUMNS = [
+    "postal_code",
+    "city",
+    "province",
+    "time_zone",
+    "latitude",
+    "longitude",
+]
+
 
 ########################################################################################################################
 # DATABASE FUNCTIONS
 ########################################################################################################################
 
 
-def create_canadian_postal_code_data_table():
-    """
-    Creates the CanadianPostalCodeData table
-    :return: None
-    """
-    # Get the engine
-    engine = DATABASE.get_engine(privilege=PrivilegeType.ADMIN)
-
-    # Name of the table
-    table_name = "CanadianPostalCodeData"
-    inspector = inspect(engine)
-    # If the table already exists, we don't want to create it again
-
-    if table_name in inspector.get_table_names():
-        already_exists_warning(item=table_name, database_name=DATABASE.database_name)
-        return
-
-    # Otherwise, we create the table
-    else:
-        BASE.metadata.bind = engine
-        BASE.metadata.create_all(bind=engine)
-
-
 def clean_canadian_postal_code_data_table():
     """
     Cleans the ClimaticData table
@@ -80,16 +63,11 @@ def clean_canadian_postal_code_data_table():
 ########################################################################################################################
 
 
-def populate_canadian_postal_code_data_table():
+def read_canadian_postal_code_data():
     """
-    Populates the CanadianPostalCodeData table
-    :return: None
+    Reads the rows of the CanadianPostalCodeData table from data/location/CanadianPostalCodes202312.csv
+    :return: A generator of rows, in the order of POSTAL_CODE_COLUMNS
     """
-    # Get the engine and controller
-    engine = DATABASE.get_engine(privilege=PrivilegeType.ADMIN)
-    session = sessionmaker(autocommit=False, autoflush=True, bind=engine)
-    controller = session()
-
     # get the path to the data/location/CanadianPostalCodes202312.csv file
     file_path = get_file_path("data/location/CanadianPostalCodes202312.csv")
     # read the file
@@ -97,27 +75,23 @@ def populate_canadian_postal_code_data_table():
         # Skip first line, header line and not data
         next(csv_file)
 
-        # read data/location/CanadianPostalCodes202312.csv file
-        csv_reader = csv.reader(csv_file)
-
-        # map column names to appropriate column index
-        for row in tqdm(csv_reader, "Populating Canadian Postal Code Data"):
-
-            # unpack entry_data to create a ClimaticData object
-            entry = CanadianPostalCodeData(
-                postal_code=row[0],
-                city=row[1],
-                province=row[2],
-                time_zone=row[3],
-                latitude=row[4],
-                longitude=row[5],
-            )
-            # prepare the entry to be added to the database
-            controller.add(entry)
-        # add all entries to the database
-        print("Committing changes to database...")
-        print("This may take a while...")
-        controller.commit()
+        # the columns of the file are already in the order of the table, they are converted by the database
+        for row in csv.reader(csv_file):
+            yield row[:6]
+
+
+def populate_canadian_postal_code_data_table():
+    """
+    Populates the CanadianPostalCodeData table, replacing any existing data
+    :return: None
+    """
+    bulk_load_table(
+        database=DATABASE,
+        table_name="CanadianPostalCodeData",
+        columns=POSTAL_CODE_COLUMNS,
+        rows=read_canadian_postal_code_data(),
+        description="Populating Canadian Postal Code Data",
+    )
 
 
 ########################################################################################################################
@@ -131,8 +105,7 @@ if __name__ == "__main__":
     )
     choice = input("Are you sure you want to continue? (y/n): ")
     if choice.lower() == "y":
-        create_canadian_postal_code_data_table()
-        clean_canadian_postal_code_data_table()
+        upgrade_database()
         populate_canadian_postal_code_data_table()
         DATABASE.close()
     else:
@@ -14,16 +14,22 @@
 
 import ast
 import csv
+import json
+import os
+import re
 import uuid
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
 from tqdm import tqdm
 from geopy.extra.rate_limiter import RateLimiter
-from sqlalchemy import inspect
 from sqlalchemy.orm import sessionmaker
+from backend.Entities.Location.gazetteer import Gazetteer, get_province_code
 from config import get_file_path
 from database.Constants.connection_constants import PrivilegeType
-from database.Entities.climatic_data import BASE, ClimaticData
+from database.Entities.climatic_data import ClimaticData
 from database.Entities.database_connection import DatabaseConnection
-from database.Warnings.database_warnings import already_exists_warning
+from database.Migrations.migrate_database import upgrade_database
+from database.Population.bulk_loader import bulk_load_table
 from geopy.geocoders import Nominatim
 
 ########################################################################################################################
@@ -33,32 +39,38 @@ from geopy.geocoders import Nominatim
 # The database connection
 DATABASE = DatabaseConnection(database_name="NBCC-2020")
 
+# The columns of the ClimaticData table provided by each row of the csv file, in the order of its columns starting from
+# the second column
+CLIMATIC_DATA_COLUMNS = [
+    "ProvinceAndLocation",
+    "Elev_m",
+    "Jan_2_5_percent_C",
+    "Jan_1_percent_C",
+    "July_Dry_C",
+    "July_Wet_C",
+    "DegreeDaysBelow18C",
+    "Rain_15_Min_mm",
+    "OneDayRain_1_50_mm",
+    "Ann_Rain_mm",
+    "MoistIndex",
+    "Ann_Tot_Ppn_mm",
+    "DrivingRainWindPressures_Pa_1_5",
+    "SnowLoad_kPa_1_50_Ss",
+    "SnowLoad_kPa_1_50_Sr",
+    "HourlyWindPressures_kPa_1_10",
+    "HourlyWindPressures_kPa_1_50",
+]
 
-########################################################################################################################
-# DATABASE FUNCTIONS
-########################################################################################################################
+# Where the results of the network geocoder are kept between runs, so that an interrupted run picks up where it left off
+NOMINATIM_CACHE_PATH = get_file_path("data/geocoding/nominatim_cache.json")
 
+# The gazetteer used by the worker processes that resolve stations
+GAZETTEER: Optional[Gazetteer] = None
 
-def create_climatic_data_table():
-    """
-    Creates the ClimaticData table
-    :return: None
-    """
-    # Get the engine
-    engine = DATABASE.get_engine(privilege=PrivilegeType.ADMIN)
 
-    # Name of the table
-    table_name = "ClimaticData"
-    inspector = inspect(engine)
-    # If the table already exists, we don't want to create it again
-    if table_name in inspector.get_table_names():
-        already_exists_warning(item=table_name, database_name=DATABASE.database_name)
-        return
-
-    # Otherwise, we create the table
-    else:
-        BASE.metadata.bind = engine
-        BASE.metadata.create_all(bind=engine)
+########################################################################################################################
+# DATABASE FUNCTIONS
+########################################################################################################################
 
 
 def clean_climatic_data_table():
@@ -82,16 +94,11 @@ def clean_climatic_data_table():
 ########################################################################################################################
 
 
-def populate_climatic_data_table():
+def read_climatic_data():
     """
-    Populates the ClimaticData table
-    :return: None
+    Reads the rows of the ClimaticData table from data-extraction/output/table_c2.csv
+    :return: A generator of rows, in the order of CLIMATIC_DATA_COLUMNS followed by Latitude and Longitude
     """
-    # Get the engine and controller
-    engine = DATABASE.get_engine(privilege=PrivilegeType.ADMIN)
-    session = sessionmaker(autocommit=False, autoflush=True, bind=engine)
-    controller = session()
-
     # get the path to the data-extraction/output/table_c2.csv file
     file_path = get_file_path("data-extraction/output/table_c2.csv")
     # read the file
@@ -101,83 +108,175 @@ def populate_climatic_data_table():
             next(csv_file)
 
         # read data-extraction/output/table_c2.csv file
-        csv_reader = csv.reader(csv_file)
-
-        # map column names to appropriate column index
-        for row in tqdm(csv_reader, "Populating Climatic Data"):
-            column_mapping = {
-                "ProvinceAndLocation": 1,
-                "Elev_m": 2,
-                "Jan_2_5_percent_C": 3,
-                "Jan_1_percent_C": 4,
-                "July_Dry_C": 5,
-                "July_Wet_C": 6,
-                "DegreeDaysBelow18C": 7,
-                "Rain_15_Min_mm": 8,
-                "OneDayRain_1_50_mm": 9,
-                "Ann_Rain_mm": 10,
-                "MoistIndex": 11,
-                "Ann_Tot_Ppn_mm": 12,
-                "DrivingRainWindPressures_Pa_1_5": 13,
-                "SnowLoad_kPa_1_50_Ss": 14,
-                "SnowLoad_kPa_1_50_Sr": 15,
-                "HourlyWindPressures_kPa_1_10": 16,
-                "HourlyWindPressures_kPa_1_50": 17,
-            }
-
-            # store the data of the entry in a dictionary
-            entry_data = {}
-            # go through each column and set value
-            for column in column_mapping:
-                # the only column that should be a string
-                if column == "ProvinceAndLocation":
-                    entry_data[column] = row[column_mapping[column]]
+        for row in csv.reader(csv_file):
+            # the first column is the province and location, the only column that should be a string
+            entry = [row[1]]
+            for value in row[2 : len(CLIMATIC_DATA_COLUMNS) + 1]:
                 # if an empty string is found as a value, we set that value to null in the database
-                elif row[column_mapping[column]] == "":
-                    entry_data[column] = None
+                if value == "":
+                    entry.append(None)
                 # otherwise, we use an abstract syntax tree to parse the value appropriately
                 else:
-                    entry_data[column] = ast.literal_eval(row[column_mapping[column]])
+                    entry.append(ast.literal_eval(value))
+            # the location is filled in by update_location
+            yield entry + [0, 0]
+
+
+def populate_climatic_data_table():
+    """
+    Populates the ClimaticData table, replacing any existing data
+    :return: None
+    """
+    bulk_load_table(
+        database=DATABASE,
+        table_name="ClimaticData",
+        columns=CLIMATIC_DATA_COLUMNS + ["Latitude", "Longitude"],
+        rows=read_climatic_data(),
+        description="Populating Climatic Data",
+    )
 
-            # unpack entry_data to create a ClimaticData object
-            entry = ClimaticData(**entry_data, Latitude=0, Longitude=0)
-            # prepare the entry to be added to the database
-            controller.add(entry)
-        # add all entries to the database
-        controller.commit()
 
+def get_station_names(station: str) -> List[str]:
+    """
+    Gets the names a station may be listed under, from most to least specific
+    :param station: The name of the station, e.g. "Vancouver(City Hall)" or "Victoria Region"
+    :return: The names to look the station up by
+    """
+    names = [station]
+    # "Haldimand(Hagersville)" is listed under either name
+    match = re.match(r"^(.*?)\s*\((.*?)\)?$", station)
+    if match:
+        names += [match.group(2), match.group(1)]
+    # "Victoria Region" is listed under "Victoria"
+    names += [name[: -len(" Region")] for name in names if name.endswith(" Region")]
+    return [name for name in names if name]
+
+
+def set_gazetteer(gazetteer: Gazetteer):
+    """
+    Sets the gazetteer of a worker process
+    :param gazetteer: The gazetteer
+    :return: None
+    """
+    global GAZETTEER
+    GAZETTEER = gazetteer
+
+
+def resolve_station(
+    station: Tuple[str, Optional[str]]
+) -> Optional[Tuple[float, float]]:
+    """
+    Resolves the location of a station with the gazetteer of the worker process
+    :param station: The (name, province code) of the station
+    :return: The (latitude, longitude) of the station, None if it could not be resolved
+    """
+    name, province = station
+    # Take the best match across the names the station may be listed under
+    best = None
+    for candidate in get_station_names(name):
+        match = GAZETTEER.find_city(candidate, province)
+        if match is not None and (best is None or match[2] > best[2]):
+            best = match
+    return None if best is None else best[:2]
+
+
+def load_nominatim_cache() -> dict:
+    """
+    Loads the results of previous network geocoder lookups
+    :return: The (latitude, longitude) or None of each query that was looked up
+    """
+    if not os.path.exists(NOMINATIM_CACHE_PATH):
+        return dict()
+    with open(NOMINATIM_CACHE_PATH, "r") as cache_file:
+        return json.load(cache_file)
 
-def update_location():
+
+def save_nominatim_cache(cache: dict):
     """
-    Updates the location of each entry in the ClimaticData table
+    Saves the results of the network geocoder lookups, the file is replaced in one step so that an interrupted run never
+    leaves it half written
+    :param cache: The (latitude, longitude) or None of each query that was looked up
+    :return: None
+    """
+    os.makedirs(os.path.dirname(NOMINATIM_CACHE_PATH), exist_ok=True)
+    with open(f"{NOMINATIM_CACHE_PATH}.tmp", "w") as cache_file:
+        json.dump(cache, cache_file, indent=4)
+    os.replace(f"{NOMINATIM_CACHE_PATH}.tmp", NOMINATIM_CACHE_PATH)
+
+
+def update_location(use_nominatim: bool = False):
+    """
+    Updates the location of each entry in the ClimaticData table. Stations are resolved offline against the city
+    centroids of the CanadianPostalCodeData table, which must be populated first
+    :param use_nominatim: Whether to look up stations that cannot be resolved offline with Nominatim
     :return: None
     """
     # Get the engine and controller
     engine = DATABASE.get_engine(privilege=PrivilegeType.ADMIN)
     session = sessionmaker(autocommit=False, autoflush=True, bind=engine)
     controller = session()
+    gazetteer = Gazetteer.from_database()
 
-    # Create a geolocator and geocode rate limiter
-    geolocator = Nominatim(user_agent=str(uuid.uuid4()).replace("-", ""))
-    geocode = RateLimiter(geolocator.geocode, min_delay_seconds=1)
-
-    # For each entry in the ClimaticData table
-    for entry in tqdm(controller.query(ClimaticData).all(), desc="Updating Locations"):
-        # Get the location information
-        location = entry.ProvinceAndLocation
-        location_info = geocode(location, timeout=10)
-
-        # If the location information is None, we set the latitude and longitude to None
-        if location_info is None:
+    # Stations are listed under a heading for their province, in the order of the table
+    stations = []
+    province = None
+    for entry in controller.query(ClimaticData).order_by(ClimaticData.ID).all():
+        # Headings have no climatic data and get no location, so that they are never picked as the closest station
+        if entry.Elev_m is None:
+            province = get_province_code(entry.ProvinceAndLocation) or province
             entry.Latitude = None
             entry.Longitude = None
-        # Otherwise, we set the latitude and longitude to the location information
-        else:
-            entry.Latitude = location_info.latitude
-            entry.Longitude = location_info.longitude
+            continue
+        stations.append((entry, province))
+
+    # Resolve the stations in parallel
+    with ProcessPoolExecutor(initializer=set_gazetteer, initargs=(gazetteer,)) as pool:
+        locations = list(
+            tqdm(
+                pool.map(
+                    resolve_station,
+                    [
+                        (entry.ProvinceAndLocation, province)
+                        for entry, province in stations
+                    ],
+                    chunksize=16,
+                ),
+                desc="Updating Locations",
+                total=len(stations),
+            )
+        )
+
+    # Fall back to the network geocoder for stations that could not be resolved offline
+    unresolved = [index for index, location in enumerate(locations) if location is None]
+    if use_nominatim and unresolved:
+        cache = load_nominatim_cache()
+        geolocator = Nominatim(user_agent=str(uuid.uuid4()).replace("-", ""))
+        geocode = RateLimiter(geolocator.geocode, min_delay_seconds=1)
+        for index in tqdm(unresolved, desc="Updating Locations with Nominatim"):
+            entry, province = stations[index]
+            query = ", ".join(
+                part for part in (entry.ProvinceAndLocation, province, "Canada") if part
+            )
+            # Only look up queries that were not looked up by a previous run
+            if query not in cache:
+                location_info = geocode(query, timeout=10)
+                cache[query] = (
+                    None
+                    if location_info is None
+                    else [location_info.latitude, location_info.longitude]
+                )
+                save_nominatim_cache(cache)
+            if cache[query] is not None:
+                locations[index] = tuple(cache[query])
+
+    # Set the latitude and longitude, stations that could not be resolved are left without a location
+    for (entry, _), location in zip(stations, locations):
+        entry.Latitude, entry.Longitude = location if location else (None, None)
 
     # Commit the changes
     controller.commit()
+    resolved = sum(location is not None for location in locations)
+    print(f"Resolved the location of {resolved} of {len(stations)} stations")
 
 
 ########################################################################################################################
@@ -192,10 +291,12 @@ if __name__ == "__main__":
     )
     choice = input("Are you sure you want to continue? (y/n): ")
     if choice.lower() == "y":
-        create_climatic_data_table()
-        clean_climatic_data_table()
+        upgrade_database()
         populate_climatic_data_table()
-        update_location()
+        nominatim_choice = input(
+            "Look up stations that cannot be resolved offline with Nominatim? (y/n): "
+        )
+        update_location(use_nominatim=nominatim_choice.lower() == "y")
         DATABASE.close()
     else:
         exit(0)
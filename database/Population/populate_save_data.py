@@ -12,14 +12,12 @@
 # IMPORTS
 ########################################################################################################################
 
-from sqlalchemy import inspect
 from sqlalchemy.orm import sessionmaker
 
 from database.Constants.connection_constants import PrivilegeType
 from database.Entities.save_data import SaveData
-from database.Entities.save_data import BASE
 from database.Entities.database_connection import DatabaseConnection
-from database.Warnings.database_warnings import already_exists_warning
+from database.Migrations.migrate_database import upgrade_database
 
 ########################################################################################################################
 # GLOBALS
@@ -34,29 +32,6 @@ DATABASE = DatabaseConnection(database_name="NBCC-2020")
 ########################################################################################################################
 
 
-def create_save_data_table():
-    """
-    Creates the CanadianPostalCodeData table
-    :return: None
-    """
-    # Get the engine
-    engine = DATABASE.get_engine(privilege=PrivilegeType.ADMIN)
-
-    # Name of the table
-    table_name = "SaveData"
-    inspector = inspect(engine)
-    # If the table already exists, we don't want to create it again
-
-    if table_name in inspector.get_table_names():
-        already_exists_warning(item=table_name, database_name=DATABASE.database_name)
-        return
-
-    # Otherwise, we create the table
-    else:
-        BASE.metadata.bind = engine
-        BASE.metadata.create_all(bind=engine)
-
-
 def clean_save_data_table():
     """
     Cleans the ClimaticData table
@@ -102,7 +77,7 @@ if __name__ == "__main__":
     )
     choice = input("Are you sure you want to continue? (y/n): ")
     if choice.lower() == "y":
-        create_save_data_table()
+        upgrade_database()
         clean_save_data_table()
         DATABASE.close()
     else:
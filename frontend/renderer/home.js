@@ -341,55 +341,53 @@ document.getElementById("json-input").addEventListener("change", function (e) {
   reader.readAsText(file);
 });
 ////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
-// WINDOW LOADED
+// SAVE FILE LIST
 ////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
 
 /**
- * When the window is loaded, the username dropdown is set and the save file list is populated
+ * Loads one page of the user's save files into the save file list, then loads the next page if there is one
+ * @param connectionAddress The address of the backend
+ * @param token The API token of the user
+ * @param cursor The cursor returned with the previous page, null for the first page
  */
-window.onload = function () {
-  setUsernameDropdown();
-
-  PROJECT_ARRAY = [];
-
-  window.api.invoke("get-connection-address").then((connectionAddress) => {
-    window.api
-      .invoke("get-token") // Retrieve the token
-      .then((token) => {
-        const myHeaders = new Headers();
-        myHeaders.append("Accept", "application/json");
-        myHeaders.append("Authorization", `Bearer ${token}`);
-
-        const requestOptions = {
-          method: "POST",
-          headers: myHeaders,
-          redirect: "follow",
-        };
+function loadSaveFilePage(connectionAddress, token, cursor) {
+  const myHeaders = new Headers();
+  myHeaders.append("Accept", "application/json");
+  myHeaders.append("Authorization", `Bearer ${token}`);
+
+  const requestOptions = {
+    method: "POST",
+    headers: myHeaders,
+    redirect: "follow",
+  };
 
-        fetch(`${connectionAddress}/get_all_user_save_data`, requestOptions)
-          .then((response) => {
-            if (response.status === 200) {
-              return response.json();
-            } else {
-              throw new Error("Get All User Save Data Error");
-            }
-          })
-          .then((data) => {
-            if (Array.isArray(data)) {
-              let list = document.getElementById("save-file-list");
-              data.forEach((item, index) => {
-                let data = JSON.parse(item.JsonData);
-                let date = new Date(item.DateModified);
-                let formattedDate =
-                  date.toLocaleDateString() + " " + date.toLocaleTimeString();
-                PROJECT_ARRAY.push(item.ID);
-
-                // if there is a corrupted save file, skip it
-                try {
-                  const html = `
+  let url = `${connectionAddress}/list_user_save_files`;
+  if (cursor) {
+    url += `?before_date=${encodeURIComponent(cursor.before_date)}&before_id=${cursor.before_id}`;
+  }
+
+  fetch(url, requestOptions)
+    .then((response) => {
+      if (response.status === 200) {
+        return response.json();
+      } else {
+        throw new Error("List User Save Files Error");
+      }
+    })
+    .then((data) => {
+      if (Array.isArray(data.items)) {
+        let list = document.getElementById("save-file-list");
+        data.items.forEach((item) => {
+          let index = PROJECT_ARRAY.length;
+          let date = new Date(item.DateModified);
+          let formattedDate =
+            date.toLocaleDateString() + " " + date.toLocaleTimeString();
+          PROJECT_ARRAY.push(item.ID);
+
+          const html = `
                             <div class="list-group-item d-flex justify-content-between align-items-center" id="${index}">
                                 <div>
-                                    <h4 class="list-group-item-heading">${data["input_page"]["input"]["project-name"]}</h4>
+                                    <h4 class="list-group-item-heading">${item.ProjectName ?? ""}</h4>
                                     <p class="list-group-item-text">${formattedDate}</p>
                                 </div>
                                 <div class="row">
@@ -401,16 +399,36 @@ window.onload = function () {
                                     </div>
                                 </div>
                             </div>`;
-                  list.innerHTML += html;
-                } catch (err) {
-                  console.error(err);
-                }
-              });
-            } else {
-              throw new Error("Get All User Save Data Error");
-            }
-          })
-          .catch((error) => console.error(error));
+          list.innerHTML += html;
+        });
+        // Load the next page, if there is one
+        if (data.next_cursor) {
+          loadSaveFilePage(connectionAddress, token, data.next_cursor);
+        }
+      } else {
+        throw new Error("List User Save Files Error");
+      }
+    })
+    .catch((error) => console.error(error));
+}
+
+////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+// WINDOW LOADED
+////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
+
+/**
+ * When the window is loaded, the username dropdown is set and the save file list is populated
+ */
+window.onload = function () {
+  setUsernameDropdown();
+
+  PROJECT_ARRAY = [];
+
+  window.api.invoke("get-connection-address").then((connectionAddress) => {
+    window.api
+      .invoke("get-token") // Retrieve the token
+      .then((token) => {
+        loadSaveFilePage(connectionAddress, token, null);
       });
   });
 };
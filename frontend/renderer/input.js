@@ -657,6 +657,11 @@ function setMap(latitude, longitude, address) {
 
   // Add a marker with a popup
   L.marker([latitude, longitude]).addTo(MAP).bindPopup(address);
+
+  // Clicking the map picks the nearest postal code as the address
+  MAP.on("click", function (event) {
+    reverseGeocodeCall(event.latlng.lat, event.latlng.lng);
+  });
 }
 
 ////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
@@ -786,6 +791,99 @@ function locationCall(address, siteDesignation, seismicValue) {
   });
 }
 
+/**
+ * Finds the postal code nearest to a point picked on the map and uses it as the address
+ * @param latitude
+ * @param longitude
+ */
+function reverseGeocodeCall(latitude, longitude) {
+  window.api.invoke("get-connection-address").then((connectionAddress) => {
+    window.api
+      .invoke("get-token") // Retrieve the token
+      .then((token) => {
+        let myHeaders = new Headers();
+        myHeaders.append("Accept", "application/json");
+        myHeaders.append("Authorization", `Bearer ${token}`);
+
+        let requestOptions = {
+          method: "POST",
+          headers: myHeaders,
+          redirect: "follow",
+        };
+
+        fetch(
+          `${connectionAddress}/reverse_geocode?latitude=${latitude}&longitude=${longitude}`,
+          requestOptions,
+        )
+          .then((response) => response.json())
+          .then((result) => {
+            if (result && result.postal_code) {
+              document.getElementById("address").value =
+                `${result.postal_code}, ${result.city}, ${result.province}`;
+            }
+          })
+          .catch((error) => console.error("Error:", error));
+      });
+  });
+}
+
+// Delays the autocomplete request until typing pauses, so that a request is not sent for every key
+let AUTOCOMPLETE_TIMER = null;
+
+/**
+ * Suggests postal codes, cities and provinces for the partially typed address
+ * @param query
+ */
+function autocompleteLocationCall(query) {
+  window.api.invoke("get-connection-address").then((connectionAddress) => {
+    window.api
+      .invoke("get-token") // Retrieve the token
+      .then((token) => {
+        let myHeaders = new Headers();
+        myHeaders.append("Accept", "application/json");
+        myHeaders.append("Authorization", `Bearer ${token}`);
+
+        let requestOptions = {
+          method: "POST",
+          headers: myHeaders,
+          redirect: "follow",
+        };
+
+        fetch(
+          `${connectionAddress}/autocomplete_location?query=${encodeURIComponent(query)}`,
+          requestOptions,
+        )
+          .then((response) => response.json())
+          .then((result) => {
+            if (!Array.isArray(result)) {
+              return;
+            }
+            // Replace the previous suggestions
+            let suggestions = document.getElementById("address-suggestions");
+            suggestions.innerHTML = "";
+            result.forEach((suggestion) => {
+              let option = document.createElement("option");
+              option.value = suggestion.label;
+              suggestions.appendChild(option);
+            });
+          })
+          .catch((error) => console.error("Error:", error));
+      });
+  });
+}
+
+/**
+ * Updates the address suggestions as the address is typed
+ */
+document.getElementById("address").addEventListener("input", function () {
+  clearTimeout(AUTOCOMPLETE_TIMER);
+  let query = document.getElementById("address").value.trim();
+  if (query.length < 2) {
+    return;
+  }
+  AUTOCOMPLETE_TIMER = setTimeout(() => autocompleteLocationCall(query), 150);
+});
+
 ////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
 // BUTTON CLICK EVENTS
 ////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////
@@ -173,6 +173,9 @@ echo "__________________________________________________________________________
 echo "POPULATING DATABASE"
 echo "_________________________________________________________________________________________________________________"
 
+# Bring the database schema up to date
+python3.11 -m database.Migrations.migrate_database
+
 # Populate database
 python3.11 -m database.Population.populate_authentication_data
 python3.11 -m database.Population.populate_canadian_postal_code_data
@@ -180,6 +183,9 @@ python3.11 -m database.Population.populate_climate_data
 python3.11 -m database.Population.populate_save_data
 python3.11 -m database.Population.populate_wind_speed_data
 
+# Compile the reference data so that location lookups do not need the database
+python3.11 -m database.Population.build_reference_data
+
 # Deactivate the virtual environment
 deactivate
 
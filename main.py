@@ -1,12 +1,118 @@
 import argparse
+import os
 import secrets
 from pathlib import Path
 
 import uvicorn
+from dotenv import load_dotenv
 from fastapi import FastAPI
 
+from backend.Constants.server_constants import DEFAULT_WORKERS, SERVER_HOST, SERVER_PORT
 from config import get_file_path
 
+
+def create_app() -> FastAPI:
+    """
+    Creates the app with every router, middleware and event handler. The backend modules are imported here rather than
+    at the top of the file because they read data/EnvironmentVariables/.env, which may only exist once main.py has run
+    :return: The app
+    """
+    from backend.API.Endpoints.analysis_endpoint import analysis_router
+    from backend.API.Endpoints.authentication import authentication_router
+    from backend.API.Endpoints.building_endpoint import building_router
+    from backend.API.Endpoints.cladding_endpoint import cladding_router
+    from backend.API.Endpoints.dimensions_endpoint import dimensions_router
+    from backend.API.Endpoints.height_zones_endpoint import height_zone_router
+    from backend.API.Endpoints.importance_category_endpoint import (
+        importance_category_router,
+    )
+    from backend.API.Endpoints.location import location_router
+    from backend.API.Endpoints.roof_endpoint import roof_router
+    from backend.API.Endpoints.roof_load_combination_endpoint import (
+        roof_load_combination_router,
+    )
+    from backend.API.Endpoints.seismic_load_endpoint import seismic_load_router
+    from backend.API.Endpoints.server_status_endpoint import server_status_endpoint
+    from backend.API.Endpoints.snow_load_endpoint import snow_load_router
+    from backend.API.Endpoints.user_data_endpoint import user_data_router
+    from backend.API.Endpoints.wall_load_combination_endpoint import (
+        wall_load_combination_router,
+    )
+    from backend.API.Endpoints.wind_load_endpoint import wind_load_router
+    from backend.API.Endpoints.visualization_endpoint import visualization_router
+    from backend.API.Endpoints.output_endpoint import output_router
+
+    from backend.API.Managers.autosave_manager import flush_all_user_save_data
+    from backend.API.Managers.executor_manager import (
+        shutdown_cpu_pool,
+        start_cpu_pool,
+    )
+    from backend.API.Managers.location_manager import load_location_indexes
+    from backend.API.Managers.warmup_manager import start_warmup
+    from backend.API.Middleware.metrics_middleware import metrics_middleware
+    from backend.API.Middleware.profiling_middleware import (
+        profile_endpoints,
+        profiling_enabled,
+        profiling_middleware,
+    )
+    from backend.API.Middleware.recording_middleware import (
+        recording_enabled,
+        recording_middleware,
+    )
+    from backend.API.Middleware.tracing_middleware import tracing_middleware
+    from backend.Entities.Tracing.tracing import (
+        trace_database_queries,
+        tracing_enabled,
+    )
+
+    app = FastAPI()
+    # Record the latency of every request for /metrics
+    app.middleware("http")(metrics_middleware)
+    # Profile requests carrying the profiling token, only added when PROFILING_TOKEN is set
+    if profiling_enabled():
+        app.middleware("http")(profiling_middleware)
+    # Time the stages of every request, only added when TRACING_EXPORTER is set
+    if tracing_enabled():
+        app.middleware("http")(tracing_middleware)
+        trace_database_queries()
+    # Record every request so that it can be replayed, only added when RECORD_REQUESTS is set
+    if recording_enabled():
+        app.middleware("http")(recording_middleware)
+    # Write any pending autosaves before the server exits
+    app.add_event_handler("shutdown", flush_all_user_save_data)
+    # Stop the processes the CPU-heavy work runs on
+    app.add_event_handler("shutdown", shutdown_cpu_pool)
+    # Build the location indexes while the server starts accepting requests
+    app.add_event_handler("startup", load_location_indexes)
+    # Import the dependencies left out of startup in the background, unless WARM_UP is false
+    app.add_event_handler("startup", start_warmup)
+    # Start the processes the CPU-heavy work runs on, unless WARM_UP is false
+    app.add_event_handler("startup", start_cpu_pool)
+    app.include_router(authentication_router)
+    app.include_router(location_router)
+    app.include_router(dimensions_router)
+    app.include_router(cladding_router)
+    app.include_router(roof_router)
+    app.include_router(building_router)
+    app.include_router(importance_category_router)
+    app.include_router(user_data_router)
+    app.include_router(wind_load_router)
+    app.include_router(height_zone_router)
+    app.include_router(seismic_load_router)
+    app.include_router(snow_load_router)
+    app.include_router(wall_load_combination_router)
+    app.include_router(roof_load_combination_router)
+    app.include_router(server_status_endpoint)
+    app.include_router(visualization_router)
+    app.include_router(output_router)
+    app.include_router(analysis_router)
+    # Sample the endpoints of profiled requests, only when PROFILING_TOKEN is set
+    if profiling_enabled():
+        profile_endpoints(app)
+
+    return app
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="")
     parser.add_argument(
@@ -21,6 +127,12 @@ if __name__ == "__main__":
     parser.add_argument("-p", "--port", type=int, help="Port Number")
     parser.add_argument("-du", "--admin_username", type=str, help="Admin Username")
     parser.add_argument("-dp", "--admin_password", type=str, help="Admin Password")
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        help="Number of Worker Processes (Defaults to WORKERS in the Environment, or 1)",
+    )
     args = parser.parse_args()
 
     api_env_path = Path(get_file_path("data/EnvironmentVariables/.env"))
@@ -41,7 +153,8 @@ if __name__ == "__main__":
         # get the keys of the .env file
         with open(api_env_path, "r") as file:
             keys = {x.split("=")[0] for x in file.read().splitlines()}
-            if keys != {"API_SECRET_KEY"}:
+            # Optional settings such as GEOCODER_MODE may be added next to the secret key
+            if "API_SECRET_KEY" not in keys:
                 api_env_valid = False
 
     if not database_env_path.exists():
@@ -105,47 +218,13 @@ if __name__ == "__main__":
     if args.install:
         exit(0)
 
-    from backend.API.Endpoints.authentication import authentication_router
-    from backend.API.Endpoints.building_endpoint import building_router
-    from backend.API.Endpoints.cladding_endpoint import cladding_router
-    from backend.API.Endpoints.dimensions_endpoint import dimensions_router
-    from backend.API.Endpoints.height_zones_endpoint import height_zone_router
-    from backend.API.Endpoints.importance_category_endpoint import (
-        importance_category_router,
-    )
-    from backend.API.Endpoints.location import location_router
-    from backend.API.Endpoints.roof_endpoint import roof_router
-    from backend.API.Endpoints.roof_load_combination_endpoint import (
-        roof_load_combination_router,
-    )
-    from backend.API.Endpoints.seismic_load_endpoint import seismic_load_router
-    from backend.API.Endpoints.server_status_endpoint import server_status_endpoint
-    from backend.API.Endpoints.snow_load_endpoint import snow_load_router
-    from backend.API.Endpoints.user_data_endpoint import user_data_router
-    from backend.API.Endpoints.wall_load_combination_endpoint import (
-        wall_load_combination_router,
-    )
-    from backend.API.Endpoints.wind_load_endpoint import wind_load_router
-    from backend.API.Endpoints.visualization_endpoint import visualization_router
-    from backend.API.Endpoints.output_endpoint import output_router
-
-    app = FastAPI()
-    app.include_router(authentication_router)
-    app.include_router(location_router)
-    app.include_router(dimensions_router)
-    app.include_router(cladding_router)
-    app.include_router(roof_router)
-    app.include_router(building_router)
-    app.include_router(importance_category_router)
-    app.include_router(user_data_router)
-    app.include_router(wind_load_router)
-    app.include_router(height_zone_router)
-    app.include_router(seismic_load_router)
-    app.include_router(snow_load_router)
-    app.include_router(wall_load_combination_router)
-    app.include_router(roof_load_combination_router)
-    app.include_router(server_status_endpoint)
-    app.include_router(visualization_router)
-    app.include_router(output_router)
+    # Several workers are run by gunicorn from a preloaded master, see backend/API/Managers/server_manager.py
+    load_dotenv(dotenv_path=api_env_path)
+    workers = args.workers or int(os.getenv("WORKERS") or DEFAULT_WORKERS)
+    if workers > 1:
+        from backend.API.Managers.server_manager import run_production_server
 
-    uvicorn.run(app, host="0.0.0.0", port=42613)
+        run_production_server(create_app, workers)
+    else:
+        app = create_app()
+        uvicorn.run(app, host=SERVER_HOST, port=SERVER_PORT)